@@ -0,0 +1,147 @@
+"""Локальный пересчет счетов записей без счета.
+
+Запуск: python -m app.backfill --chunk-size 10000 [--include-failed]
+
+Записи без счета в состоянии queued (и failed с --include-failed)
+читаются вместе с координатами территории серверным курсором порциями по
+chunk-size, счета порции считаются одним векторным расчетом NumPy и
+записываются пачками UPDATE ... FROM (VALUES ...). Запись, которую за это
+время забрал воркер, пропускается, чтобы ее счет не записался дважды.
+Счета не рассылаются через pg_notify и не попадают в кэши процессов API.
+После каждой порции печатается скорость в строках в секунду.
+"""
+
+# STDLIB
+import argparse
+import asyncio
+from dataclasses import dataclass
+import time
+from typing import Callable
+
+# THIRDPARTY
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.dal.score_cache import NullScoreCache
+from app.database.db_base_config import dispose_engines
+from app.database.db_prod_config import session as prod_sessionmaker
+from app.database.models import JobStatus, ResultModel, TerritoryModel
+from app.services.local_scoring import score_arrays
+from app.services.score_notifier import ScoreNotifier
+
+MAX_WRITE_ROWS = 10000
+"""Строк в одном UPDATE: два параметра на строку, asyncpg допускает 32767."""
+
+
+@dataclass
+class BackfillStats:
+    """Итог пересчета.
+
+    Args:
+        rows (int): Количество записанных счетов.
+        seconds (float): Время пересчета, сек.
+    """
+
+    rows: int = 0
+    seconds: float = 0
+
+    @property
+    def rate(self) -> float:
+        """Скорость, строк в секунду."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+async def backfill(
+    sessionmaker: async_sessionmaker,
+    chunk_size: int,
+    limit: int | None = None,
+    report: Callable[[str], None] = print,
+    include_failed: bool = False,
+) -> BackfillStats:
+    """Считает и записывает счета всех записей без счета.
+
+    Args:
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+        chunk_size (int): Размер порции чтения и векторного расчета.
+        limit (int | None): Максимальное количество записей.
+        report (Callable[[str], None]): Вывод прогресса.
+        include_failed (bool): Считать и расчеты, исчерпавшие попытки.
+
+    Returns:
+        BackfillStats: Количество записанных счетов и время.
+    """
+    statuses = (JobStatus.queued,)
+    if include_failed:
+        statuses += (JobStatus.failed,)
+    statement = (
+        select(
+            ResultModel.id_, TerritoryModel.latitude, TerritoryModel.longtitude
+        )
+        .join(TerritoryModel)
+        .where(ResultModel.score.is_(None), ResultModel.status.in_(statuses))
+        .limit(limit)
+    )
+    stats = BackfillStats()
+    started = time.perf_counter()
+    async with sessionmaker() as read_session:
+        rows = await read_session.stream(
+            statement.execution_options(yield_per=chunk_size)
+        )
+        async for partition in rows.partitions(chunk_size):
+            chunk = np.array(partition, dtype=np.float64)
+            ids = chunk[:, 0].astype(np.int64).tolist()
+            scores = score_arrays(chunk[:, 1], chunk[:, 2]).tolist()
+            async with sessionmaker() as write_session:
+                result = Result(
+                    session=write_session,
+                    cache=NullScoreCache(),
+                    notifier=ScoreNotifier(),
+                )
+                for start in range(0, len(ids), MAX_WRITE_ROWS):
+                    end = start + MAX_WRITE_ROWS
+                    stats.rows += await result.update_many(
+                        list(zip(ids[start:end], scores[start:end])),
+                        notify=False,
+                        statuses=statuses,
+                    )
+            stats.seconds = time.perf_counter() - started
+            report(f'{stats.rows} rows, {stats.rate:.0f} rows/s')
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+async def main(
+    chunk_size: int, limit: int | None, include_failed: bool
+) -> None:
+    """Выполняет пересчет в основной БД.
+
+    Args:
+        chunk_size (int): Размер порции.
+        limit (int | None): Максимальное количество записей.
+        include_failed (bool): Считать и расчеты, исчерпавшие попытки.
+    """
+    try:
+        stats = await backfill(
+            prod_sessionmaker,
+            chunk_size,
+            limit,
+            include_failed=include_failed,
+        )
+    finally:
+        await dispose_engines()
+    print(
+        f'done: {stats.rows} rows in {stats.seconds:.1f}s, '
+        f'{stats.rate:.0f} rows/s'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--include-failed', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(main(args.chunk_size, args.limit, args.include_failed))
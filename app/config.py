@@ -0,0 +1,205 @@
+"""Этот модуль содержит настройки приложения, не относящиеся к базе данных.
+
+Параметры загружаются из переменных окружения и .prod.env файла, у всех есть
+значения по умолчанию.
+"""
+
+# STDLIB
+from enum import StrEnum
+import os
+from typing import Literal
+
+# THIRDPARTY
+from pydantic import ConfigDict
+from pydantic_settings import BaseSettings
+
+ENV_FILENAME = '.prod.env'
+
+
+class CalcMode(StrEnum):
+    """Способ выполнения расчетов."""
+
+    queue = 'queue'
+    kafka = 'kafka'
+    db = 'db'
+
+
+class AppSettings(BaseSettings):
+    """Класс настроек фоновой обработки расчетов.
+
+    Атрибуты:
+        calc_mode (CalcMode): queue - очередь в процессе API, kafka -
+            публикация задач в Kafka для отдельных консьюмеров, db -
+            воркеры забирают расчеты из таблицы result
+        calc_workers (int): Количество воркеров очереди расчетов
+        calc_queue_size (int): Максимальное количество задач в очереди
+        calc_drain_timeout (float): Время на завершение задач при остановке
+        calc_job_worker_enabled (bool): Запускать воркер таблицы расчетов
+            в процессе API в режиме db
+        calc_job_batch_size (int): Сколько расчетов воркер забирает за раз
+        calc_job_lease (float): Время аренды расчета воркером, сек
+        calc_job_poll_interval (float): Интервал опроса таблицы, сек
+        calc_job_sweep_interval (float): Интервал возврата в очередь
+            расчетов с просроченной арендой, сек
+        calc_job_max_attempts (int): Количество попыток расчета
+        calc_job_retry_backoff (float): Пауза перед повтором расчета после
+            первой неудачной попытки, сек, далее удваивается
+        calc_job_retry_max_backoff (float): Максимальная пауза перед
+            повтором расчета, сек
+        calc_backend (str): Бэкенд вычислений: stub, http или local
+        calc_backend_url (str): Адрес сервиса вычислений
+        calc_backend_concurrency (int): Максимальное количество
+            одновременных запросов к сервису вычислений
+        calc_backend_timeout (float): Время на одну попытку запроса, сек
+        calc_backend_connect_timeout (float): Время на соединение, сек
+        calc_backend_retries (int): Количество повторов запроса
+        calc_backend_backoff (float): Базовая пауза перед повтором, сек
+        calc_backend_breaker_threshold (int): Количество ошибок подряд,
+            после которого запросы к сервису прекращаются
+        calc_backend_breaker_reset (float): Через сколько секунд после
+            размыкания пробовать сервис снова
+        calc_backend_batch_size (int): Максимальный размер пачки запросов
+            к бэкенду вычислений, 1 - без пачек. Пачки больше calc_workers
+            не наберутся
+        calc_backend_batch_linger_ms (float): Сколько ждать добора пачки,
+            мс
+        calc_executor (str): Где выполнять CPU-bound расчеты: none - в
+            цикле событий, process - в пуле процессов, interpreter - в пуле
+            субинтерпретаторов (Python 3.14+)
+        calc_executor_workers (int): Количество процессов пула
+        calc_executor_chunk_size (int): Максимальный размер пачки, которую
+            пул считает за один вызов
+        calc_executor_queue_size (int): Максимальное количество пачек в
+            пуле, остальные ждут в цикле событий
+        calc_batch_max_size (int): Максимальное количество элементов в
+            пакетном запросе на расчет
+        results_max_ids (int): Максимальное количество ID и кадастровых
+            номеров в запросе GET /results/
+        territory_near_max_radius (float): Максимальный радиус поиска
+            территорий рядом с точкой, м
+        territory_near_max_limit (int): Максимальное количество территорий
+            в ответе GET /territory/near
+        analytics_source (str): Источник GET /analytics/scores по
+            умолчанию: live - точно по result, rollup - по сводке
+            score_rollup, нужна score_rollup_enabled
+        score_rollup_enabled (bool): Отдавать сводку score_rollup в
+            GET /analytics/scores. Триггеры сводки ставит и снимает
+            python -m app.rollup enable|disable, API при запуске только
+            предупреждает о несовпадении с настройкой
+        score_cache_backend (str): Кэш счетов: memory, redis или none
+        score_cache_size (int): Максимальное количество записей memory кэша
+        score_cache_ttl (float): Время жизни готового счета в кэше, сек
+        score_cache_pending_ttl (float): Время жизни отметки ожидания, сек
+        redis_url (str): Адрес Redis для score_cache_backend=redis
+        result_wait_max_timeout (float): Максимальное время long-poll
+            ожидания счета, сек
+        result_events_keepalive (float): Интервал keepalive в SSE, сек
+        score_notify_enabled (bool): Рассылать записанные счета другим
+            процессам через Postgres LISTEN/NOTIFY
+        score_notify_channel (str): Канал NOTIFY о записи счета
+        score_notify_health_interval (float): Интервал проверки соединения
+            LISTEN запросом SELECT 1, сек
+        score_notify_health_timeout (float): Время ожидания ответа
+            проверки, после которого соединение LISTEN переподключается,
+            сек
+        ws_batch_size (int): Максимальное количество счетов в одном
+            сообщении /ws/results
+        ws_batch_window (float): Время добора пачки счетов, сек
+        ws_queue_size (int): Максимальное количество неотправленных
+            счетов на соединение /ws/results
+        metrics_enabled (bool): Включает /metrics, замер HTTP запросов и
+            SQL запросов движков
+        metrics_max_statements (int): Максимальное количество пар
+            операция и таблица в метрике времени SQL запросов
+        tracing_enabled (bool): Включает трассировку OpenTelemetry, нужен
+            пакет opentelemetry-sdk
+        tracing_exporter (str): Куда отправлять спаны: otlp - в коллектор
+            по переменным окружения OTEL_EXPORTER_OTLP_*, console - в
+            stdout
+        tracing_sample_ratio (float): Доля записываемых новых трасс, от 0
+            до 1. Продолжения входящих трасс следуют их решению
+        admin_token (str): Токен профилирования, журнала медленных
+            запросов и задержки цикла событий в /admin/, который передается
+            в заголовке Authorization: Bearer. Пустой - эти ендпоинты
+            выключены
+        profile_max_seconds (float): Максимальная длительность
+            профилирования через /admin/profile/start/, сек
+        slow_query_threshold_ms (float): Порог журнала медленных SQL
+            запросов при запуске, мс, 0 - журнал выключен. Меняется через
+            PUT /admin/slow-queries/
+        slow_query_log_size (int): Количество хранимых медленных запросов
+        loop_monitor_enabled (bool): Замерять задержку цикла событий API
+        loop_monitor_interval (float): Интервал замера задержки, сек
+        loop_block_threshold_ms (float): Через сколько мс без ответа цикла
+            событий снимать его стек, 0 - не снимать
+        kafka_bootstrap_servers (str): Адреса брокеров Kafka
+        kafka_calc_topic (str): Топик с задачами на расчет
+        kafka_consumer_group (str): Группа консьюмеров расчетов
+    """
+
+    calc_mode: CalcMode = CalcMode.queue
+    calc_workers: int = 8
+    calc_queue_size: int = 1000
+    calc_drain_timeout: float = 30
+    calc_job_worker_enabled: bool = True
+    calc_job_batch_size: int = 100
+    calc_job_lease: float = 120
+    calc_job_poll_interval: float = 1
+    calc_job_sweep_interval: float = 30
+    calc_job_max_attempts: int = 3
+    calc_job_retry_backoff: float = 30
+    calc_job_retry_max_backoff: float = 600
+    calc_backend: Literal['stub', 'http', 'local'] = 'stub'
+    calc_backend_url: str = 'http://localhost:8080'
+    calc_backend_concurrency: int = 64
+    calc_backend_timeout: float = 30
+    calc_backend_connect_timeout: float = 5
+    calc_backend_retries: int = 3
+    calc_backend_backoff: float = 0.5
+    calc_backend_breaker_threshold: int = 5
+    calc_backend_breaker_reset: float = 30
+    calc_backend_batch_size: int = 1
+    calc_backend_batch_linger_ms: float = 50
+    calc_executor: Literal['none', 'process', 'interpreter'] = 'none'
+    calc_executor_workers: int = os.cpu_count() or 1
+    calc_executor_chunk_size: int = 10000
+    calc_executor_queue_size: int = 16
+    calc_batch_max_size: int = 50000
+    results_max_ids: int = 10000
+    territory_near_max_radius: float = 50000
+    territory_near_max_limit: int = 1000
+    analytics_source: Literal['live', 'rollup'] = 'live'
+    score_rollup_enabled: bool = False
+    score_cache_backend: Literal['memory', 'redis', 'none'] = 'memory'
+    score_cache_size: int = 100000
+    score_cache_ttl: float = 3600
+    score_cache_pending_ttl: float = 1
+    redis_url: str = 'redis://localhost:6379/0'
+    result_wait_max_timeout: float = 60
+    result_events_keepalive: float = 15
+    score_notify_enabled: bool = True
+    score_notify_channel: str = 'result_done'
+    score_notify_health_interval: float = 30
+    score_notify_health_timeout: float = 5
+    ws_batch_size: int = 500
+    ws_batch_window: float = 0.05
+    ws_queue_size: int = 10000
+    metrics_enabled: bool = True
+    metrics_max_statements: int = 200
+    tracing_enabled: bool = False
+    tracing_exporter: Literal['otlp', 'console'] = 'otlp'
+    tracing_sample_ratio: float = 0.01
+    admin_token: str = ''
+    profile_max_seconds: float = 300
+    slow_query_threshold_ms: float = 0
+    slow_query_log_size: int = 100
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.1
+    loop_block_threshold_ms: float = 200
+    kafka_bootstrap_servers: str = 'localhost:9092'
+    kafka_calc_topic: str = 'calc-jobs'
+    kafka_consumer_group: str = 'calc-workers'
+    model_config = ConfigDict(env_file=ENV_FILENAME, extra='ignore')
+
+
+app_settings = AppSettings()
@@ -0,0 +1,69 @@
+"""Точка входа консьюмера расчетов.
+
+Запуск: faststream run app.consumer:app --workers 4
+
+Консьюмеры одной группы делят между собой партиции топика, поэтому для
+масштабирования достаточно запустить больше экземпляров.
+"""
+
+# THIRDPARTY
+from faststream import Context, FastStream
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.score_cache import score_cache
+from app.database.db_base_config import dispose_engines
+from app.database.db_prod_config import session as prod_sessionmaker
+from app.schemas.territory import CalcJobMessage
+from app.services.broker import broker
+from app.services.calculation import (
+    calculation_backend,
+    cpu_executor,
+    remote_calculation,
+)
+from app.services.tracing import tracing
+
+app = FastStream(broker)
+
+
+@broker.subscriber(
+    app_settings.kafka_calc_topic,
+    group_id=app_settings.kafka_consumer_group,
+)
+async def handle_calc_job(
+    message: CalcJobMessage,
+    headers: dict[str, str] = Context('message.headers'),
+) -> None:
+    """Выполняет расчет из сообщения и записывает счет.
+
+    Args:
+        message (CalcJobMessage): Задача на расчет.
+        headers (dict[str, str]): Заголовки сообщения с контекстом трассы
+            публикации.
+    """
+    with tracing.span(
+        'handle_calc_job',
+        attributes={'result_id': message.result_id},
+        kind='consumer',
+        carrier=headers,
+    ):
+        async with prod_sessionmaker() as session:
+            await remote_calculation(
+                data=message, result_id=message.result_id, session=session
+            )
+
+
+@app.on_startup
+async def startup() -> None:
+    """Включает трассировку консьюмера, если она включена в настройках."""
+    tracing.setup(service_name='calc-consumer')
+
+
+@app.after_shutdown
+async def shutdown() -> None:
+    """Закрывает пулы соединений, кэш и процессы при остановке консьюмера."""
+    await calculation_backend.aclose()
+    await cpu_executor.shutdown()
+    await score_cache.aclose()
+    await dispose_engines()
+    tracing.shutdown()
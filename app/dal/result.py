@@ -2,35 +2,138 @@
 
 # STDLIB
 from socket import gaierror
+from typing import AsyncIterator
 
 # THIRDPARTY
-from sqlalchemy import select, update
+from sqlalchemy import (
+    ARRAY,
+    Executable,
+    Float,
+    Integer,
+    String,
+    Update,
+    any_,
+    column,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import InterfaceError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # FIRSTPARTY
+from app.config import app_settings
 from app.dal.base_dal import Base
-from app.database.models import ResultModel
-from app.routers.common_http_exceptions import exception_500_db_connection
+from app.dal.score_cache import AbstractScoreCache, score_cache
+from app.database.models import JobStatus, ResultModel
+from app.routers.common_http_exceptions import (
+    exception_404_not_found,
+    exception_500_db_connection,
+)
+from app.services.score_notifier import ScoreNotifier, score_notifier
+from app.services.tracing import traced
+
+PENDING_MESSAGE = 'Расчет еще не выполнен'
+FAILED_MESSAGE = 'Расчет не удался, попытки исчерпаны'
+FAILED_PAYLOAD = 'failed'
+
+
+def with_notify(statement: Update) -> Executable:
+    """Добавляет pg_notify о записанных счетах в тот же запрос.
+
+    UPDATE ... RETURNING id, score оборачивается в CTE, из которого
+    выбираются те же колонки и вызывается pg_notify на каждую строку.
+    Уведомления отправляются при коммите транзакции.
+
+    Args:
+        statement (Update): UPDATE ... RETURNING id, score.
+
+    Returns:
+        Executable: Запрос с уведомлениями или исходный запрос, если
+            score_notify_enabled выключен.
+    """
+    if not app_settings.score_notify_enabled:
+        return statement
+    updated = statement.cte('updated')
+    return select(
+        updated.c.id_,
+        updated.c.score,
+        func.pg_notify(
+            app_settings.score_notify_channel,
+            func.concat(updated.c.id_, ':', updated.c.score),
+        ),
+    )
+
+
+def notify_failed(ids: list[int]) -> Executable:
+    """pg_notify о расчетах, отмеченных failed.
+
+    Подписчики других процессов получают уведомление '<id>:failed' и
+    перестают ждать счет.
+
+    Args:
+        ids (list[int]): ID записей.
+
+    Returns:
+        Executable: SELECT pg_notify(...) FROM unnest($1).
+    """
+    id_ = func.unnest(literal(ids, ARRAY(Integer))).column_valued('id')
+    return select(
+        func.pg_notify(
+            app_settings.score_notify_channel,
+            func.concat(id_, ':', FAILED_PAYLOAD),
+        )
+    )
 
 
 class Result(Base):
     """Класс с DAL CRUD операциями для сущности Result."""
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        cache: AbstractScoreCache | None = None,
+        notifier: ScoreNotifier | None = None,
+    ) -> None:
         """Инициализация сессии.
 
         Args:
             session (AsyncSession): асинхронная сессия.
+            cache (AbstractScoreCache | None): кэш счетов, по умолчанию
+                общий кэш процесса.
+            notifier (ScoreNotifier | None): уведомления о записи счета, по
+                умолчанию общие для процесса.
 
         """
         super().__init__(session=session)
+        self.cache = score_cache if cache is None else cache
+        self.notifier = score_notifier if notifier is None else notifier
+
+    @traced
+    async def update(
+        self, id_: int, score: float, notify: bool = True
+    ) -> bool:
+        """SQL Alchemy запрос на запись счета по ID записи.
 
-    async def update(self, cadastral_number: str, score: float) -> None:
-        """SQL Alchemy запрос на запись счета.
+        Выполняется один запрос UPDATE ... WHERE id = $1 RETURNING id, score
+        без дополнительного чтения, расчет записи отмечается выполненным.
+        Новый счет сразу записывается в кэш и передается запросам,
+        ожидающим эту запись. При включенном
+        score_notify_enabled тот же запрос выполняет pg_notify, и счет
+        получают подписчики других процессов.
 
         Args:
-            id_ (int): Данные для нахождения сущности, которую надо обновить.
+            id_ (int): ID записи, которую надо обновить.
+            score (float): Счет.
+            notify (bool): Отправлять pg_notify другим процессам.
+
+        Returns:
+            bool: True, если запись с таким ID найдена и обновлена.
 
         Raises:
             InterfaceError: при работе вне развернутого окружения, когда нет
@@ -38,44 +141,231 @@ class Result(Base):
             gaierror: когда нет подrлючения к контейнеру БД в развернутом
                 Docker Compose.
         """
+        statement = (
+            update(ResultModel)
+            .where(ResultModel.id_ == id_)
+            .values(score=score, status=JobStatus.done, leased_until=None)
+            .returning(ResultModel.id_, ResultModel.score)
+        )
+        if notify:
+            statement = with_notify(statement)
         try:
-            await self.session.execute(
-                update(ResultModel)
-                .filter(ResultModel.cadastral_number == cadastral_number)
-                .values(score=score)
+            result = await self.session.execute(statement)
+            row = result.first()
+            await self.session.commit()
+        except InterfaceError:
+            await self.session.rollback()
+            return False
+        except gaierror:
+            raise exception_500_db_connection
+        if row is None:
+            return False
+        await self.cache.set(row.id_, row.score)
+        self.notifier.publish(row.id_, row.score)
+        return True
+
+    @traced
+    async def update_many(
+        self,
+        scores: list[tuple[int, float]],
+        notify: bool = True,
+        statuses: tuple[JobStatus, ...] | None = None,
+    ) -> int:
+        """SQL Alchemy запрос на запись пачки счетов.
+
+        Выполняется один запрос
+        UPDATE result SET score = v.score FROM (VALUES ...) v(id, score)
+        WHERE result.id = v.id RETURNING id, score. Счета записываются в кэш
+        и передаются ожидающим запросам так же, как в update.
+
+        Args:
+            scores (list[tuple[int, float]]): Пары (ID записи, счет).
+            notify (bool): Отправлять pg_notify другим процессам.
+            statuses (tuple[JobStatus, ...] | None): Записывать счет только
+                записям без счета в этих состояниях, например не трогать
+                расчеты, которые сейчас выполняет воркер. По умолчанию
+                записываются все.
+
+        Returns:
+            int: Количество обновленных записей.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+        """
+        if not scores:
+            return 0
+        batch = values(
+            column('id', Integer), column('score', Float), name='v'
+        ).data(scores)
+        statement = (
+            update(ResultModel)
+            .where(ResultModel.id_ == batch.c.id)
+            .values(
+                score=batch.c.score, status=JobStatus.done, leased_until=None
+            )
+            .returning(ResultModel.id_, ResultModel.score)
+        )
+        if statuses is not None:
+            statement = statement.where(
+                ResultModel.status.in_(statuses), ResultModel.score.is_(None)
             )
+        if notify:
+            statement = with_notify(statement)
+        try:
+            result = await self.session.execute(statement)
+            rows = result.all()
             await self.session.commit()
         except InterfaceError:
             await self.session.rollback()
+            return 0
         except gaierror:
             raise exception_500_db_connection
+        for row in rows:
+            await self.cache.set(row.id_, row.score)
+            self.notifier.publish(row.id_, row.score)
+        return len(rows)
 
+    @traced
     async def get(self, id_: int) -> float:
         """SQL Alchemy запрос на получение счета по ID записи.
 
+        Сначала счет ищется в кэше. Готовый счет кэшируется надолго, отметка
+        ожидания расчета - на короткое время. Расчет, исчерпавший попытки,
+        не кэшируется.
+
         Args:
             id_ (int): Данные для получения сущности.
 
         Returns:
-            score: Возвращение score из таблицы с счетом.
+            score: Возвращение score из таблицы с счетом, PENDING_MESSAGE или
+                FAILED_MESSAGE.
 
         Raises:
+            HTTPException: 404, если записи с таким ID нет.
             InterfaceError: при работе вне развернутого окружения, когда нет
                 подключения к БД.
             gaierror: когда нет подrлючения к контейнеру БД в развернутом
                 Docker Compose.
 
         """
+        hit, score = await self.cache.get(id_)
+        if hit:
+            return PENDING_MESSAGE if score is None else score
         try:
             result = await self.session.execute(
-                select(ResultModel.score).filter(ResultModel.id_ == id_)
+                select(ResultModel.score, ResultModel.status).filter(
+                    ResultModel.id_ == id_
+                )
+            )
+        except InterfaceError:
+            await self.session.rollback()
+        except gaierror:
+            raise exception_500_db_connection
+        row = result.first()
+        if row is None:
+            raise exception_404_not_found
+        if row.status == JobStatus.failed:
+            return FAILED_MESSAGE
+        record = row.score
+        await self.cache.set(id_, record)
+        return PENDING_MESSAGE if record is None else record
+
+    @traced
+    async def get_many(
+        self,
+        ids: list[int] | None = None,
+        cadastral_numbers: list[str] | None = None,
+        partition_size: int = 1000,
+    ) -> AsyncIterator[Row]:
+        """SQL Alchemy запрос на получение счетов по списку ID.
+
+        Выполняется один запрос вида
+        SELECT id, cadastral_number, score, status FROM result
+        WHERE id = ANY($1),
+        строки читаются серверным курсором порциями по partition_size.
+
+        Args:
+            ids (list[int] | None): ID записей.
+            cadastral_numbers (list[str] | None): Кадастровые номера, по
+                которым возвращаются все записи счета.
+            partition_size (int): Размер порции чтения курсора.
+
+        Yields:
+            Row: Строки с полями id_, cadastral_number, score и status.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+
+        """
+        conditions = []
+        if ids:
+            conditions.append(
+                ResultModel.id_ == any_(literal(ids, ARRAY(Integer)))
+            )
+        if cadastral_numbers:
+            numbers = literal(cadastral_numbers, ARRAY(String))
+            conditions.append(ResultModel.cadastral_number == any_(numbers))
+        if not conditions:
+            return
+        try:
+            result = await self.session.stream(
+                select(
+                    ResultModel.id_,
+                    ResultModel.cadastral_number,
+                    ResultModel.score,
+                    ResultModel.status,
+                ).where(or_(*conditions))
             )
+            async for partition in result.partitions(partition_size):
+                for row in partition:
+                    yield row
+        except InterfaceError:
+            await self.session.rollback()
+        except gaierror:
+            raise exception_500_db_connection
+
+    @traced
+    async def delete_many(self, ids: list[int]) -> int:
+        """SQL Alchemy запрос на удаление записей счета по списку ID.
+
+        Нужен, чтобы убрать только что созданные записи, расчет которых не
+        удалось поставить в очередь: иначе повтор с тем же Idempotency-Key
+        вернет запись, счет которой никогда не будет рассчитан.
+
+        Args:
+            ids (list[int]): ID записей.
+
+        Returns:
+            int: Количество удаленных записей.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+        """
+        if not ids:
+            return 0
+        statement = (
+            delete(ResultModel)
+            .where(ResultModel.id_ == any_(literal(ids, ARRAY(Integer))))
+            .returning(ResultModel.id_)
+        )
+        try:
+            result = await self.session.execute(statement)
+            deleted = result.scalars().all()
+            await self.session.commit()
         except InterfaceError:
             await self.session.rollback()
+            return 0
         except gaierror:
             raise exception_500_db_connection
-        record = result.all()[0].score
-        if record:
-            return record
-        elif result:
-            return 'Расчет еще не выполнен'
+        for id_ in deleted:
+            await self.cache.delete(id_)
+        return len(deleted)
@@ -0,0 +1,308 @@
+"""DAL операции с состоянием расчетов в таблице result.
+
+Запись result без счета - это задача на расчет. Воркеры забирают задачи
+пачками через SELECT ... FOR UPDATE SKIP LOCKED и арендуют их до
+leased_until. Задача, воркер которой упал, после окончания аренды
+возвращается в очередь, поэтому каждый расчет выполняется хотя бы один раз.
+Задача после неудачной попытки возвращается в очередь с available_after:
+пауза удваивается с каждой попыткой, чтобы короткий сбой сервиса
+вычислений не исчерпал все попытки за миллисекунды. Когда попытки
+исчерпаны, ожидающие счет запросы получают FAILED_MESSAGE так же, как
+счет из Result.update.
+"""
+
+# STDLIB
+from datetime import datetime, timedelta
+from socket import gaierror
+
+# THIRDPARTY
+from sqlalchemy import (
+    ARRAY,
+    ColumnElement,
+    Integer,
+    any_,
+    case,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.exc import InterfaceError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.base_dal import Base
+from app.dal.result import FAILED_MESSAGE, notify_failed
+from app.dal.score_cache import AbstractScoreCache, score_cache
+from app.database.models import JobStatus, ResultModel, TerritoryModel
+from app.routers.common_http_exceptions import exception_500_db_connection
+from app.schemas.territory import CalcRequestSchema
+from app.services.calc_queue import CalcJob
+from app.services.score_notifier import ScoreNotifier, score_notifier
+from app.services.tracing import traced
+
+
+class ResultJobs(Base):
+    """Класс с DAL операциями над состоянием расчетов."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        cache: AbstractScoreCache | None = None,
+        notifier: ScoreNotifier | None = None,
+    ) -> None:
+        """Инициализация сессии.
+
+        Args:
+            session (AsyncSession): асинхронная сессия.
+            cache (AbstractScoreCache | None): кэш счетов, по умолчанию
+                общий кэш процесса.
+            notifier (ScoreNotifier | None): уведомления о записи счета, по
+                умолчанию общие для процесса.
+
+        """
+        super().__init__(session=session)
+        self.cache = score_cache if cache is None else cache
+        self.notifier = score_notifier if notifier is None else notifier
+
+    @traced
+    async def claim(self, limit: int, lease: float) -> list[CalcJob]:
+        """Забирает пачку расчетов из очереди.
+
+        Выполняется один запрос: CTE выбирает до limit записей в состоянии
+        queued, пауза перед повтором которых истекла, с FOR UPDATE SKIP
+        LOCKED, UPDATE переводит их в running,
+        увеличивает attempts и возвращает данные территории. Параллельные
+        воркеры пропускают заблокированные записи и не ждут друг друга.
+
+        Args:
+            limit (int): Максимальное количество расчетов.
+            lease (float): Время аренды расчета, сек.
+
+        Returns:
+            list[CalcJob]: Задачи на расчет.
+
+        Raises:
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+        """
+        claimed = (
+            select(ResultModel.id_)
+            .where(
+                ResultModel.status == JobStatus.queued,
+                or_(
+                    ResultModel.available_after.is_(None),
+                    ResultModel.available_after <= func.now(),
+                ),
+            )
+            .order_by(ResultModel.id_)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte('claimed')
+        )
+        statement = (
+            update(ResultModel)
+            .where(ResultModel.id_ == claimed.c.id_)
+            .where(
+                ResultModel.cadastral_number == TerritoryModel.cadastral_number
+            )
+            .values(
+                status=JobStatus.running,
+                attempts=ResultModel.attempts + 1,
+                leased_until=func.now() + timedelta(seconds=lease),
+            )
+            .returning(
+                ResultModel.id_,
+                TerritoryModel.cadastral_number,
+                TerritoryModel.latitude,
+                TerritoryModel.longtitude,
+            )
+        )
+        try:
+            rows = (await self.session.execute(statement)).all()
+            await self.session.commit()
+        except InterfaceError:
+            await self.session.rollback()
+            return []
+        except gaierror:
+            raise exception_500_db_connection
+        return [
+            CalcJob(
+                data=CalcRequestSchema.model_construct(
+                    cadastral_number=row.cadastral_number,
+                    latitude=row.latitude,
+                    longtitude=row.longtitude,
+                ),
+                result_id=row.id_,
+            )
+            for row in rows
+        ]
+
+    @traced
+    async def fail(
+        self,
+        id_: int,
+        max_attempts: int,
+        backoff: float = 0,
+        max_backoff: float = 0,
+    ) -> None:
+        """Возвращает расчет с ошибкой в очередь или отмечает его failed.
+
+        Args:
+            id_ (int): ID записи.
+            max_attempts (int): Количество попыток, после которого расчет
+                больше не повторяется.
+            backoff (float): Пауза перед повтором после первой попытки,
+                сек, далее удваивается.
+            max_backoff (float): Максимальная пауза перед повтором, сек.
+        """
+        await self._finish_lease(
+            ResultModel.id_ == id_,
+            self._retry_status(max_attempts),
+            available_after=self._retry_after(backoff, max_backoff),
+        )
+
+    @traced
+    async def release(self, ids: list[int]) -> None:
+        """Возвращает в очередь расчеты, прерванные остановкой воркера.
+
+        Прерванная попытка не учитывается в attempts.
+
+        Args:
+            ids (list[int]): ID записей.
+        """
+        if not ids:
+            return
+        await self._finish_lease(
+            ResultModel.id_ == any_(literal(ids, ARRAY(Integer))),
+            JobStatus.queued,
+            attempts=ResultModel.attempts - 1,
+        )
+
+    @traced
+    async def requeue_expired(
+        self, max_attempts: int, backoff: float = 0, max_backoff: float = 0
+    ) -> int:
+        """Возвращает в очередь расчеты с просроченной арендой.
+
+        Args:
+            max_attempts (int): Количество попыток, после которого расчет
+                отмечается failed.
+            backoff (float): Пауза перед повтором после первой попытки,
+                сек, далее удваивается.
+            max_backoff (float): Максимальная пауза перед повтором, сек.
+
+        Returns:
+            int: Количество возвращенных или отмеченных failed расчетов.
+        """
+        return await self._finish_lease(
+            ResultModel.leased_until < func.now(),
+            self._retry_status(max_attempts),
+            available_after=self._retry_after(backoff, max_backoff),
+        )
+
+    @traced
+    async def mark_failed(self, id_: int) -> None:
+        """Отмечает failed расчет без аренды после ошибки.
+
+        В режиме queue расчет не арендуется и не повторяется, поэтому
+        ошибка сразу отмечает запись failed, а ожидающие счет запросы
+        получают FAILED_MESSAGE, как после исчерпания попыток.
+
+        Args:
+            id_ (int): ID записи.
+        """
+        await self._finish_lease(
+            (ResultModel.id_ == id_) & ResultModel.score.is_(None),
+            JobStatus.failed,
+            statuses=(JobStatus.queued, JobStatus.running),
+            attempts=ResultModel.attempts + 1,
+        )
+
+    @staticmethod
+    def _retry_status(max_attempts: int) -> ColumnElement[str]:
+        """Состояние после неудачной попытки.
+
+        Args:
+            max_attempts (int): Количество попыток.
+
+        Returns:
+            ColumnElement[str]: queued, пока попытки не исчерпаны, иначе
+                failed.
+        """
+        return case(
+            (ResultModel.attempts >= max_attempts, JobStatus.failed.value),
+            else_=JobStatus.queued.value,
+        )
+
+    @staticmethod
+    def _retry_after(
+        backoff: float, max_backoff: float
+    ) -> ColumnElement[datetime]:
+        """Время, раньше которого расчет не повторяется.
+
+        Args:
+            backoff (float): Пауза после первой попытки, сек.
+            max_backoff (float): Максимальная пауза, сек.
+
+        Returns:
+            ColumnElement[datetime]: now() + min(backoff * 2 ^ (attempts -
+                1), max_backoff).
+        """
+        delay = literal(timedelta(seconds=backoff)) * func.power(
+            2, ResultModel.attempts - 1
+        )
+        return func.now() + func.least(
+            delay, timedelta(seconds=max(backoff, max_backoff))
+        )
+
+    async def _finish_lease(
+        self,
+        condition: ColumnElement[bool],
+        status: ColumnElement[str] | str,
+        statuses: tuple[JobStatus, ...] = (JobStatus.running,),
+        **values: ColumnElement,
+    ) -> int:
+        """Снимает аренду с выполняющихся расчетов.
+
+        О расчетах, отмеченных failed, в той же транзакции отправляется
+        pg_notify, а ожидающим запросам процесса передается FAILED_MESSAGE.
+
+        Args:
+            condition (ColumnElement[bool]): Условие выбора записей.
+            status (ColumnElement[str] | str): Новое состояние.
+            statuses (tuple[JobStatus, ...]): Из каких состояний менять.
+            **values: Дополнительные значения колонок.
+
+        Returns:
+            int: Количество измененных записей.
+
+        Raises:
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+        """
+        statement = (
+            update(ResultModel)
+            .where(ResultModel.status.in_(statuses), condition)
+            .values(status=status, leased_until=None, **values)
+            .returning(ResultModel.id_, ResultModel.status)
+        )
+        try:
+            rows = (await self.session.execute(statement)).all()
+            failed = [
+                row.id_ for row in rows if row.status == JobStatus.failed
+            ]
+            if failed and app_settings.score_notify_enabled:
+                await self.session.execute(notify_failed(failed))
+            await self.session.commit()
+        except InterfaceError:
+            await self.session.rollback()
+            return 0
+        except gaierror:
+            raise exception_500_db_connection
+        for id_ in failed:
+            await self.cache.delete(id_)
+            self.notifier.publish(id_, FAILED_MESSAGE)
+        return len(rows)
@@ -0,0 +1,378 @@
+"""DAL запросы статистики счетов по прямоугольнику и диапазону счетов."""
+
+# STDLIB
+import math
+from socket import gaierror
+
+# THIRDPARTY
+from sqlalchemy import (
+    ARRAY,
+    Float,
+    Select,
+    bindparam,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.exc import InterfaceError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.base_dal import Base
+from app.database.models import (
+    ROLLUP_CELL_SIZE,
+    SCORE_HISTOGRAM_BUCKETS,
+    SCORE_HISTOGRAM_MIN,
+    SCORE_HISTOGRAM_WIDTH,
+    SCORE_ROLLUP_FILL,
+    SCORE_ROLLUP_TRIGGERS,
+    ResultModel,
+    ScoreRollupModel,
+    TerritoryModel,
+)
+from app.routers.common_http_exceptions import exception_500_db_connection
+from app.schemas.analytics import BoundingBox, ScoreAnalyticsSchema
+from app.services.geohash import bbox_cells
+from app.services.tracing import traced
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def score_bucket(score: float) -> int:
+    """Номер корзины счета, как SQL функция score_bucket.
+
+    Args:
+        score (float): Счет.
+
+    Returns:
+        int: Номер корзины от 0 до SCORE_HISTOGRAM_BUCKETS - 1.
+    """
+    bucket = math.floor((score - SCORE_HISTOGRAM_MIN) / SCORE_HISTOGRAM_WIDTH)
+    return max(0, min(SCORE_HISTOGRAM_BUCKETS - 1, bucket))
+
+
+def histogram_percentile(histogram: list[int], quantile: float) -> float:
+    """Перцентиль по гистограмме с линейной интерполяцией в корзине.
+
+    Args:
+        histogram (list[int]): Количество значений в корзинах.
+        quantile (float): Доля от 0 до 1.
+
+    Returns:
+        float: Оценка перцентиля.
+    """
+    rank = quantile * sum(histogram)
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            start = SCORE_HISTOGRAM_MIN + bucket * SCORE_HISTOGRAM_WIDTH
+            return start + SCORE_HISTOGRAM_WIDTH * (rank - seen) / count
+        seen += count
+    return SCORE_HISTOGRAM_MIN + len(histogram) * SCORE_HISTOGRAM_WIDTH
+
+
+def empty_stats(source: str) -> ScoreAnalyticsSchema:
+    """Статистика без счетов.
+
+    Args:
+        source (str): Источник статистики.
+
+    Returns:
+        ScoreAnalyticsSchema: Нулевая статистика.
+    """
+    return ScoreAnalyticsSchema(
+        source=source,
+        count=0,
+        mean=None,
+        percentiles={f'p{round(q * 100)}': None for q in PERCENTILES},
+        histogram_min=SCORE_HISTOGRAM_MIN,
+        histogram_width=SCORE_HISTOGRAM_WIDTH,
+        histogram=[0] * SCORE_HISTOGRAM_BUCKETS,
+    )
+
+
+class ScoreAnalytics(Base):
+    """Класс со статистикой счетов, посчитанной в БД."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Инициализация сессии.
+
+        Args:
+            session (AsyncSession): асинхронная сессия.
+
+        """
+        super().__init__(session=session)
+
+    @staticmethod
+    def live_statement(
+        bbox: BoundingBox | None,
+        min_score: float | None,
+        max_score: float | None,
+    ) -> Select:
+        """Запрос статистики по таблице result.
+
+        Территории прямоугольника читаются диапазонами geohash ячеек из
+        индекса ix_territory_geohash, их счета - из ix_result_latest_score.
+        Без прямоугольника счета читаются из ix_result_score. Количество,
+        среднее, перцентили и гистограмма считаются одним запросом.
+
+        Args:
+            bbox (BoundingBox | None): Прямоугольник координат.
+            min_score (float | None): Минимальный счет.
+            max_score (float | None): Максимальный счет.
+
+        Returns:
+            Select: Запрос одной строки count, mean, percentiles, histogram.
+        """
+        scored = select(ResultModel.score).where(
+            ResultModel.score.is_not(None)
+        )
+        if min_score is not None:
+            scored = scored.where(ResultModel.score >= min_score)
+        if max_score is not None:
+            scored = scored.where(ResultModel.score <= max_score)
+        if bbox is not None:
+            cells = bbox_cells(
+                bbox.min_lat, bbox.min_lon, bbox.max_lat, bbox.max_lon
+            )
+            territories = union_all(
+                *(
+                    select(TerritoryModel.cadastral_number).where(
+                        TerritoryModel.geohash >= cell,
+                        TerritoryModel.geohash < f'{cell}{{',
+                        TerritoryModel.latitude.between(
+                            bbox.min_lat, bbox.max_lat
+                        ),
+                        TerritoryModel.longtitude.between(
+                            bbox.min_lon, bbox.max_lon
+                        ),
+                    )
+                    for cell in cells
+                )
+            ).subquery('territories')
+            scored = scored.join(
+                territories,
+                ResultModel.cadastral_number == territories.c.cadastral_number,
+            )
+        scored = scored.cte('scored')
+        bucket = func.score_bucket(scored.c.score)
+        histogram = (
+            select(bucket.label('bucket'), func.count().label('count'))
+            .group_by(bucket)
+            .subquery('histogram')
+        )
+        quantiles = literal(list(PERCENTILES), ARRAY(Float))
+        return select(
+            func.count().label('count'),
+            func.avg(scored.c.score).label('mean'),
+            func.percentile_cont(quantiles)
+            .within_group(scored.c.score)
+            .label('percentiles'),
+            select(func.json_object_agg(histogram.c.bucket, histogram.c.count))
+            .scalar_subquery()
+            .label('histogram'),
+        )
+
+    @traced
+    async def live(
+        self,
+        bbox: BoundingBox | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+    ) -> ScoreAnalyticsSchema:
+        """Точная статистика по таблице result.
+
+        Args:
+            bbox (BoundingBox | None): Прямоугольник координат.
+            min_score (float | None): Минимальный счет.
+            max_score (float | None): Максимальный счет.
+
+        Returns:
+            ScoreAnalyticsSchema: Статистика счетов.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+
+        """
+        statement = self.live_statement(bbox, min_score, max_score)
+        try:
+            row = (await self.session.execute(statement)).one()
+        except InterfaceError:
+            await self.session.rollback()
+            return empty_stats('live')
+        except gaierror:
+            raise exception_500_db_connection
+        if not row.count:
+            return empty_stats('live')
+        histogram = [0] * SCORE_HISTOGRAM_BUCKETS
+        for bucket, count in row.histogram.items():
+            histogram[int(bucket)] = count
+        return ScoreAnalyticsSchema(
+            source='live',
+            count=row.count,
+            mean=row.mean,
+            percentiles={
+                f'p{round(quantile * 100)}': value
+                for quantile, value in zip(PERCENTILES, row.percentiles)
+            },
+            histogram_min=SCORE_HISTOGRAM_MIN,
+            histogram_width=SCORE_HISTOGRAM_WIDTH,
+            histogram=histogram,
+        )
+
+    @traced
+    async def rollup(
+        self,
+        bbox: BoundingBox | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+    ) -> ScoreAnalyticsSchema:
+        """Приближенная статистика по сводке score_rollup.
+
+        Прямоугольник расширяется до ячеек сетки ROLLUP_CELL_SIZE, диапазон
+        счетов - до корзин гистограммы, перцентили интерполируются внутри
+        корзин.
+
+        Args:
+            bbox (BoundingBox | None): Прямоугольник координат.
+            min_score (float | None): Минимальный счет.
+            max_score (float | None): Максимальный счет.
+
+        Returns:
+            ScoreAnalyticsSchema: Статистика счетов.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+
+        """
+        statement = select(
+            ScoreRollupModel.bucket,
+            func.sum(ScoreRollupModel.count).label('count'),
+            func.sum(ScoreRollupModel.total).label('total'),
+        ).group_by(ScoreRollupModel.bucket)
+        if bbox is not None:
+            statement = statement.where(
+                ScoreRollupModel.cell_lat.between(
+                    math.floor(bbox.min_lat / ROLLUP_CELL_SIZE),
+                    math.floor(bbox.max_lat / ROLLUP_CELL_SIZE),
+                ),
+                ScoreRollupModel.cell_lon.between(
+                    math.floor(bbox.min_lon / ROLLUP_CELL_SIZE),
+                    math.floor(bbox.max_lon / ROLLUP_CELL_SIZE),
+                ),
+            )
+        if min_score is not None:
+            statement = statement.where(
+                ScoreRollupModel.bucket >= score_bucket(min_score)
+            )
+        if max_score is not None:
+            statement = statement.where(
+                ScoreRollupModel.bucket <= score_bucket(max_score)
+            )
+        try:
+            rows = (await self.session.execute(statement)).all()
+        except InterfaceError:
+            await self.session.rollback()
+            return empty_stats('rollup')
+        except gaierror:
+            raise exception_500_db_connection
+        histogram = [0] * SCORE_HISTOGRAM_BUCKETS
+        total = 0.0
+        for row in rows:
+            histogram[row.bucket] = int(row.count)
+            total += row.total
+        count = sum(histogram)
+        if not count:
+            return empty_stats('rollup')
+        return ScoreAnalyticsSchema(
+            source='rollup',
+            count=count,
+            mean=total / count,
+            percentiles={
+                f'p{round(quantile * 100)}': histogram_percentile(
+                    histogram, quantile
+                )
+                for quantile in PERCENTILES
+            },
+            histogram_min=SCORE_HISTOGRAM_MIN,
+            histogram_width=SCORE_HISTOGRAM_WIDTH,
+            histogram=histogram,
+        )
+
+    async def rollup_triggers(self) -> int:
+        """Количество установленных триггеров сводки score_rollup.
+
+        Returns:
+            int: От 0 до len(SCORE_ROLLUP_TRIGGERS).
+        """
+        statement = text(
+            'SELECT count(*) FROM pg_trigger WHERE tgname IN :names'
+        ).bindparams(bindparam('names', expanding=True))
+        return await self.session.scalar(
+            statement, {'names': list(SCORE_ROLLUP_TRIGGERS)}
+        )
+
+    async def rollup_enabled(self) -> bool:
+        """Установлены ли все триггеры сводки score_rollup.
+
+        Returns:
+            bool: True, если сводка ведется.
+        """
+        return await self.rollup_triggers() == len(SCORE_ROLLUP_TRIGGERS)
+
+    async def enable_rollup(self) -> bool:
+        """Ставит триггеры сводки score_rollup и заполняет ее по result.
+
+        Записи в result и territory ждут, пока сводка заполняется, чтобы
+        их счета не потерялись и не посчитались дважды. Если все триггеры
+        уже стоят, сводка не трогается.
+
+        Returns:
+            bool: True, если сводка была выключена и заполнена заново.
+        """
+        if await self.rollup_enabled():
+            await self.session.rollback()
+            return False
+        await self.session.execute(
+            text('LOCK TABLE result, territory IN SHARE ROW EXCLUSIVE MODE')
+        )
+        if await self.rollup_enabled():
+            await self.session.rollback()
+            return False
+        for name, (table, definition) in SCORE_ROLLUP_TRIGGERS.items():
+            await self.session.execute(
+                text(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+            )
+            await self.session.execute(
+                text(f'CREATE TRIGGER {name} {definition}')
+            )
+        await self.session.execute(delete(ScoreRollupModel))
+        await self.session.execute(text(SCORE_ROLLUP_FILL))
+        await self.session.commit()
+        return True
+
+    async def disable_rollup(self) -> bool:
+        """Снимает триггеры сводки score_rollup и очищает ее.
+
+        Returns:
+            bool: True, если сводка была включена.
+        """
+        if not await self.rollup_triggers():
+            await self.session.rollback()
+            return False
+        for name, (table, _) in SCORE_ROLLUP_TRIGGERS.items():
+            await self.session.execute(
+                text(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+            )
+        await self.session.execute(delete(ScoreRollupModel))
+        await self.session.commit()
+        return True
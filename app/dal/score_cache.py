@@ -0,0 +1,262 @@
+"""Кэш счетов перед Result.get.
+
+Готовый счет после записи не меняется, поэтому кэшируется на score_ttl.
+Для записей, расчет которых еще не выполнен, кэшируется отметка ожидания на
+короткий score_pending_ttl. Result.update записывает новый счет в кэш сразу,
+поэтому читатели видят его без ожидания TTL.
+
+Доступные бэкенды:
+    memory - LRU в памяти процесса с ограничением размера и TTL;
+    redis - Redis-совместимый сервер, клиент redis.asyncio;
+    none - кэш отключен.
+"""
+
+# STDLIB
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+import time
+from typing import Callable, Protocol
+
+# FIRSTPARTY
+from app.config import app_settings
+
+PENDING = 'pending'
+
+
+@dataclass
+class CacheStats:
+    """Счетчики кэша.
+
+    Args:
+        hits (int): Попадания.
+        misses (int): Промахи.
+        evictions (int): Вытеснения по размеру и истечению TTL.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Счетчики в виде словаря."""
+        return asdict(self)
+
+
+class AbstractScoreCache(ABC):
+    """Абстрактный кэш счетов по ID записи."""
+
+    def __init__(self, ttl: float, pending_ttl: float) -> None:
+        """Инициализация времени жизни записей.
+
+        Args:
+            ttl (float): Время жизни готового счета, сек.
+            pending_ttl (float): Время жизни отметки ожидания, сек.
+        """
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.stats = CacheStats()
+
+    def ttl_for(self, score: float | None) -> float:
+        """Время жизни записи в зависимости от готовности счета."""
+        return self.pending_ttl if score is None else self.ttl
+
+    @abstractmethod
+    async def get(self, key: int) -> tuple[bool, float | None]:
+        """Возвращает признак попадания и счет, None - расчет не выполнен."""
+        pass
+
+    @abstractmethod
+    async def set(self, key: int, score: float | None) -> None:
+        """Записывает счет, None - отметка ожидания расчета."""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: int) -> None:
+        """Удаляет запись из кэша."""
+        pass
+
+    async def aclose(self) -> None:
+        """Закрывает соединения кэша при остановке процесса."""
+
+
+class NullScoreCache(AbstractScoreCache):
+    """Отключенный кэш: всегда промах."""
+
+    def __init__(self) -> None:
+        """Инициализация без времени жизни."""
+        super().__init__(ttl=0, pending_ttl=0)
+
+    async def get(self, key: int) -> tuple[bool, float | None]:
+        """Всегда промах."""
+        self.stats.misses += 1
+        return False, None
+
+    async def set(self, key: int, score: float | None) -> None:
+        """Ничего не записывает."""
+
+    async def delete(self, key: int) -> None:
+        """Ничего не удаляет."""
+
+
+class LRUScoreCache(AbstractScoreCache):
+    """LRU кэш в памяти процесса с ограничением размера и TTL."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        pending_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация кэша.
+
+        Args:
+            maxsize (int): Максимальное количество записей.
+            ttl (float): Время жизни готового счета, сек.
+            pending_ttl (float): Время жизни отметки ожидания, сек.
+            clock (Callable[[], float]): Источник времени.
+        """
+        super().__init__(ttl=ttl, pending_ttl=pending_ttl)
+        self.maxsize = maxsize
+        self.clock = clock
+        self._data: OrderedDict[int, tuple[float, float | None]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        """Количество записей, включая еще не удаленные истекшие."""
+        return len(self._data)
+
+    async def get(self, key: int) -> tuple[bool, float | None]:
+        """Возвращает счет из кэша, если запись не истекла."""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, score = entry
+            if expires_at > self.clock():
+                self._data.move_to_end(key)
+                self.stats.hits += 1
+                return True, score
+            del self._data[key]
+            self.stats.evictions += 1
+        self.stats.misses += 1
+        return False, None
+
+    async def set(self, key: int, score: float | None) -> None:
+        """Записывает счет и вытесняет самые старые записи сверх maxsize."""
+        self._data[key] = (self.clock() + self.ttl_for(score), score)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: int) -> None:
+        """Удаляет запись из кэша."""
+        self._data.pop(key, None)
+
+
+class RedisClient(Protocol):
+    """Методы Redis клиента, которые использует кэш."""
+
+    async def get(self, name: str) -> bytes | str | None:
+        """Значение по ключу."""
+
+    async def set(self, name: str, value: str, px: int) -> object:
+        """Запись значения с временем жизни в миллисекундах."""
+
+    async def delete(self, *names: str) -> object:
+        """Удаление ключей."""
+
+    async def aclose(self) -> None:
+        """Закрытие пула соединений."""
+
+
+class RedisScoreCache(AbstractScoreCache):
+    """Кэш в Redis-совместимом хранилище, общий для всех процессов.
+
+    Вытеснение выполняет сам сервер, поэтому счетчик evictions не растет.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient,
+        ttl: float,
+        pending_ttl: float,
+        prefix: str = 'score:',
+    ) -> None:
+        """Инициализация кэша.
+
+        Args:
+            client (RedisClient): Асинхронный Redis клиент.
+            ttl (float): Время жизни готового счета, сек.
+            pending_ttl (float): Время жизни отметки ожидания, сек.
+            prefix (str): Префикс ключей.
+        """
+        super().__init__(ttl=ttl, pending_ttl=pending_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: int) -> str:
+        """Ключ Redis для ID записи."""
+        return f'{self.prefix}{key}'
+
+    async def get(self, key: int) -> tuple[bool, float | None]:
+        """Возвращает счет из Redis."""
+        value = await self.client.get(self._key(key))
+        if value is None:
+            self.stats.misses += 1
+            return False, None
+        self.stats.hits += 1
+        if isinstance(value, bytes):
+            value = value.decode()
+        return True, None if value == PENDING else float(value)
+
+    async def set(self, key: int, score: float | None) -> None:
+        """Записывает счет с временем жизни."""
+        await self.client.set(
+            self._key(key),
+            PENDING if score is None else repr(score),
+            px=int(self.ttl_for(score) * 1000),
+        )
+
+    async def delete(self, key: int) -> None:
+        """Удаляет запись из Redis."""
+        await self.client.delete(self._key(key))
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений Redis клиента."""
+        await self.client.aclose()
+
+
+def create_score_cache() -> AbstractScoreCache:
+    """Создает кэш по настройкам приложения.
+
+    Returns:
+        AbstractScoreCache: Кэш выбранного бэкенда.
+
+    Raises:
+        RuntimeError: Если выбран redis, а пакет redis не установлен.
+    """
+    if app_settings.score_cache_backend == 'none':
+        return NullScoreCache()
+    if app_settings.score_cache_backend == 'redis':
+        try:
+            # THIRDPARTY
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError(
+                'Для SCORE_CACHE_BACKEND=redis установите пакет redis'
+            ) from None
+        return RedisScoreCache(
+            client=aioredis.from_url(app_settings.redis_url),
+            ttl=app_settings.score_cache_ttl,
+            pending_ttl=app_settings.score_cache_pending_ttl,
+        )
+    return LRUScoreCache(
+        maxsize=app_settings.score_cache_size,
+        ttl=app_settings.score_cache_ttl,
+        pending_ttl=app_settings.score_cache_pending_ttl,
+    )
+
+
+score_cache = create_score_cache()
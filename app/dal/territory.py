@@ -2,9 +2,12 @@
 
 # STDLIB
 from socket import gaierror
+from typing import NamedTuple
 
 # THIRDPARTY
 from pydantic import validate_call
+from sqlalchemy import Select, func, insert, literal, select, true, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import InterfaceError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,7 +15,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.dal.base_dal import Base
 from app.database.models import ResultModel, TerritoryModel
 from app.routers.common_http_exceptions import exception_500_db_connection
-from app.schemas.territory import CalcRequestSchema
+from app.schemas.territory import CalcRequestSchema, NearTerritorySchema
+from app.services.geohash import EARTH_RADIUS, covering_cells
+from app.services.tracing import traced
+
+
+class CreatedResult(NamedTuple):
+    """ID записи счета и признак того, что запись создана этим запросом.
+
+    Args:
+        id_ (int): ID записи в таблице с счетом.
+        created (bool): False, если запись с тем же ключом идемпотентности
+            уже существовала.
+    """
+
+    id_: int
+    created: bool
 
 
 class Territory(Base):
@@ -27,6 +45,7 @@ class Territory(Base):
         """
         super().__init__(session=session)
 
+    @traced
     @validate_call
     async def create(self, data: CalcRequestSchema) -> int | None:
         """SQL Alchemy запрос на создание записей по территории.
@@ -45,19 +64,242 @@ class Territory(Base):
                 Docker Compose.
 
         """
-        record_territory = TerritoryModel(
+        created = await self.upsert(data=data)
+        return None if created is None else created.id_
+
+    @traced
+    @validate_call
+    async def upsert(
+        self, data: CalcRequestSchema, idempotency_key: str | None = None
+    ) -> CreatedResult | None:
+        """Идемпотентное создание записей по территории и счету.
+
+        Территория и запись счета создаются одним запросом с CTE:
+        INSERT ... ON CONFLICT (cadastral_number) DO UPDATE для территории и
+        INSERT ... ON CONFLICT (idempotency_key) DO NOTHING для счета. Если
+        запись с тем же ключом идемпотентности уже есть, возвращается ее ID.
+
+        Args:
+            data (CalcRequestSchema): Данные для создания сущности.
+            idempotency_key (str | None): Ключ идемпотентности запроса.
+
+        Returns:
+            CreatedResult: ID записи счета и признак ее создания.
+
+        Raises:
+            ValidationError: Если Pydantic обнаружит неправильные данные.
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+
+        """
+        territory = pg_insert(TerritoryModel).values(
             cadastral_number=data.cadastral_number,
             latitude=data.latitude,
             longtitude=data.longtitude,
         )
-        record_result = ResultModel(cadastral_number=data.cadastral_number)
+        territory = territory.on_conflict_do_update(
+            index_elements=[TerritoryModel.cadastral_number],
+            set_={
+                'latitude': territory.excluded.latitude,
+                'longtitude': territory.excluded.longtitude,
+            },
+        ).cte('territory_upsert')
+        result = (
+            pg_insert(ResultModel)
+            .values(
+                cadastral_number=data.cadastral_number,
+                idempotency_key=idempotency_key,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[ResultModel.idempotency_key]
+            )
+            .returning(ResultModel.id_)
+            .cte('result_insert')
+        )
+        statement = select(result.c.id_, literal(True))
+        if idempotency_key is not None:
+            # Без ключа запись всегда создается, а условие
+            # idempotency_key IS NULL читало бы все записи без ключа.
+            statement = union_all(
+                statement,
+                select(ResultModel.id_, literal(False)).where(
+                    ResultModel.idempotency_key == idempotency_key
+                ),
+            )
+        statement = statement.add_cte(territory)
+        try:
+            row = (await self.session.execute(statement)).first()
+            if row is None:
+                # Запись с тем же ключом создана параллельным запросом после
+                # снимка данных этого запроса, она видна в новом снимке.
+                row = (await self.session.execute(statement)).first()
+            await self.session.commit()
+        except InterfaceError:
+            await self.session.rollback()
+            return None
+        except gaierror:
+            raise exception_500_db_connection
+
+        return CreatedResult(id_=row[0], created=row[1])
+
+    @traced
+    async def create_many(self, data: list[CalcRequestSchema]) -> list[int]:
+        """Массовое создание записей по территориям и счетам.
+
+        Территории записываются одним multi-row INSERT с обновлением
+        координат при совпадении кадастрового номера, записи счета -
+        INSERT ... RETURNING id с сохранением порядка входных данных.
+
+        Args:
+            data (list[CalcRequestSchema]): Провалидированные данные.
+
+        Returns:
+            list[int]: ID записей счета в порядке входных данных.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+
+        """
+        if not data:
+            return []
+        territories = {
+            item.cadastral_number: {
+                'cadastral_number': item.cadastral_number,
+                'latitude': item.latitude,
+                'longtitude': item.longtitude,
+            }
+            for item in data
+        }
+        statement = pg_insert(TerritoryModel)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TerritoryModel.cadastral_number],
+            set_={
+                'latitude': statement.excluded.latitude,
+                'longtitude': statement.excluded.longtitude,
+            },
+        )
         try:
-            self.session.add(instance=record_territory)
-            self.session.add(instance=record_result)
+            await self.session.execute(statement, list(territories.values()))
+            ids = await self.session.scalars(
+                insert(ResultModel).returning(
+                    ResultModel.id_, sort_by_parameter_order=True
+                ),
+                [{'cadastral_number': item.cadastral_number} for item in data],
+            )
+            ids = list(ids)
             await self.session.commit()
         except InterfaceError:
             await self.session.rollback()
+            return []
         except gaierror:
             raise exception_500_db_connection
 
-        return record_result.id_
+        return ids
+
+    @staticmethod
+    def near_statement(
+        latitude: float, longtitude: float, radius: float, limit: int
+    ) -> Select:
+        """Запрос территорий в радиусе от точки с последними счетами.
+
+        Круг покрывается geohash ячейками, каждая ячейка читается
+        отдельным диапазоном из индекса ix_territory_geohash без чтения
+        таблицы. Диапазоны объединяются UNION ALL, а не соединением с
+        VALUES, чтобы планировщик оценивал каждый по статистике колонки.
+        Точное расстояние считается по формуле гаверсинусов, последний
+        счет берется из индекса ix_result_latest_score.
+
+        Args:
+            latitude (float): Широта точки.
+            longtitude (float): Долгота точки.
+            radius (float): Радиус, м.
+            limit (int): Максимальное количество территорий.
+
+        Returns:
+            Select: Запрос с колонками NearTerritorySchema.
+        """
+        candidates = union_all(
+            *(
+                select(
+                    TerritoryModel.cadastral_number,
+                    TerritoryModel.latitude,
+                    TerritoryModel.longtitude,
+                ).where(
+                    TerritoryModel.geohash >= cell,
+                    TerritoryModel.geohash < f'{cell}{{',
+                )
+                for cell in covering_cells(latitude, longtitude, radius)
+            )
+        ).subquery('candidates')
+        half_lat = func.radians(candidates.c.latitude - latitude) / 2
+        half_lon = func.radians(candidates.c.longtitude - longtitude) / 2
+        cos_product = func.cos(func.radians(latitude)) * func.cos(
+            func.radians(candidates.c.latitude)
+        )
+        haversine = func.power(func.sin(half_lat), 2) + cos_product * (
+            func.power(func.sin(half_lon), 2)
+        )
+        arc = func.asin(func.least(1.0, func.sqrt(haversine)))
+        distance = (2 * EARTH_RADIUS * arc).label('distance')
+        nearby = (
+            select(candidates, distance)
+            .where(distance <= radius)
+            .order_by(distance)
+            .limit(limit)
+            .subquery('nearby')
+        )
+        latest = (
+            select(ResultModel.score)
+            .where(
+                ResultModel.cadastral_number == nearby.c.cadastral_number,
+                ResultModel.score.is_not(None),
+            )
+            .order_by(ResultModel.id_.desc())
+            .limit(1)
+            .lateral('latest')
+        )
+        statement = (
+            select(nearby, latest.c.score)
+            .outerjoin(latest, true())
+            .order_by(nearby.c.distance)
+        )
+        return statement
+
+    @traced
+    async def near(
+        self, latitude: float, longtitude: float, radius: float, limit: int
+    ) -> list[NearTerritorySchema]:
+        """Территории в радиусе от точки с последними счетами.
+
+        Args:
+            latitude (float): Широта точки.
+            longtitude (float): Долгота точки.
+            radius (float): Радиус, м.
+            limit (int): Максимальное количество территорий.
+
+        Returns:
+            list[NearTerritorySchema]: Территории по возрастанию расстояния.
+
+        Raises:
+            InterfaceError: при работе вне развернутого окружения, когда нет
+                подключения к БД.
+            gaierror: когда нет подrлючения к контейнеру БД в развернутом
+                Docker Compose.
+
+        """
+        statement = self.near_statement(latitude, longtitude, radius, limit)
+        try:
+            rows = await self.session.execute(statement)
+        except InterfaceError:
+            await self.session.rollback()
+            return []
+        except gaierror:
+            raise exception_500_db_connection
+        return [
+            NearTerritorySchema.model_validate(row._mapping) for row in rows
+        ]
@@ -5,11 +5,16 @@
 
 Он включает настройку подключения к базе данных на основе переменных окружения.
 
+Движки и фабрики сессий кэшируются в реестре EngineRegistry по DSN и
+параметрам пула, поэтому на процесс создается один пул соединений на базу
+данных. Реестр закрывается в lifespan приложения через dispose_engines.
+
 Пример использования методов класса:
     settings = Settings().
     db_url = settings.get_db_url().
     engine = settings.get_engine(use_null_pool=True).
     async_session = settings.get_session().
+    await dispose_engines().
 
 """
 
@@ -25,9 +30,114 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.pool import NullPool
 
+# FIRSTPARTY
+from app.services.metrics import instrument_engine
+from app.services.profiling import watch_engine
+from app.services.tracing import trace_engine
+
 ASYNC_DRIVER = 'postgresql+asyncpg'
 
 
+class EngineRegistry:
+    """Реестр асинхронных движков и фабрик сессий процесса.
+
+    Движки хранятся по ключу из DSN, типа и параметров пула, поэтому
+    повторные вызовы Settings.get_engine возвращают один и тот же объект с
+    одним пулом соединений вместо создания нового пула на каждый запрос, а
+    настройки с другими параметрами пула получают свой движок. Новые движки
+    подключаются к метрикам SQL запросов и пула, см. metrics.py.
+    """
+
+    def __init__(self) -> None:
+        """Инициализация пустого реестра."""
+        self._engines: dict[tuple, AsyncEngine] = {}
+        self._sessionmakers: dict[tuple, async_sessionmaker] = {}
+
+    @staticmethod
+    def _key(url: URL, use_null_pool: bool, engine_kwargs: dict) -> tuple:
+        """Ключ реестра из DSN, типа пула и параметров пула.
+
+        Параметры пула не входят в ключ движка с NullPool, которому они не
+        передаются.
+        """
+        options = () if use_null_pool else tuple(sorted(engine_kwargs.items()))
+        return (
+            url.render_as_string(hide_password=False),
+            use_null_pool,
+            options,
+        )
+
+    def get_engine(
+        self, url: URL, use_null_pool: bool = False, **engine_kwargs
+    ) -> AsyncEngine:
+        """Возвращает движок из реестра, создавая его при первом обращении.
+
+        Args:
+            url (URL): URL подключения к базе данных.
+            use_null_pool (bool): Выбор NullPool для движка.
+            **engine_kwargs: Параметры пула для create_async_engine.
+
+        Returns:
+            AsyncEngine: Закэшированный движок.
+
+        """
+        key = self._key(url, use_null_pool, engine_kwargs)
+        engine = self._engines.get(key)
+        if engine is None:
+            if use_null_pool:
+                engine = create_async_engine(url, poolclass=NullPool)
+            else:
+                engine = create_async_engine(url, **engine_kwargs)
+            instrument_engine(engine)
+            trace_engine(engine)
+            watch_engine(engine)
+            self._engines[key] = engine
+        return engine
+
+    def get_sessionmaker(
+        self, url: URL, use_null_pool: bool = False, **engine_kwargs
+    ) -> async_sessionmaker:
+        """Возвращает фабрику сессий для движка из реестра.
+
+        Args:
+            url (URL): URL подключения к базе данных.
+            use_null_pool (bool): Выбор NullPool для движка.
+            **engine_kwargs: Параметры пула для create_async_engine.
+
+        Returns:
+            async_sessionmaker: Закэшированная фабрика сессий.
+
+        """
+        key = self._key(url, use_null_pool, engine_kwargs)
+        maker = self._sessionmakers.get(key)
+        if maker is None:
+            maker = async_sessionmaker(
+                self.get_engine(url, use_null_pool, **engine_kwargs),
+                expire_on_commit=False,
+                class_=AsyncSession,
+            )
+            self._sessionmakers[key] = maker
+        return maker
+
+    async def dispose(self) -> None:
+        """Закрывает пулы соединений всех движков реестра.
+
+        Движки остаются в реестре: после dispose SQLAlchemy создает для них
+        новый пустой пул, поэтому ссылки на модульные engine/session остаются
+        рабочими.
+        """
+        for engine in self._engines.values():
+            await engine.dispose()
+
+
+registry = EngineRegistry()
+
+
+async def dispose_engines() -> None:
+    """Закрывает все движки процесса, вызывается при остановке приложения."""
+    await registry.dispose()
+
+
 class Settings(BaseSettings):
     """Класс для настройки переменных окружения для подключения к базе данных.
 
@@ -40,6 +150,11 @@ class Settings(BaseSettings):
         postgres_db_name (str): Имя базы данных
         postgres_user (str): Имя пользователя базы данных
         postgres_password (str): Пароль для подключения к базе данных
+        db_pool_size (int): Количество постоянных соединений в пуле
+        db_max_overflow (int): Количество соединений сверх db_pool_size
+        db_pool_timeout (float): Время ожидания свободного соединения, сек
+        db_pool_pre_ping (bool): Проверка соединения перед выдачей из пула
+        db_pool_recycle (int): Время жизни соединения в пуле, сек
 
     Параметры загружаются из .env файла
 
@@ -54,6 +169,11 @@ class Settings(BaseSettings):
     postgres_db_name: str
     postgres_user: str
     postgres_password: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
     model_config = ConfigDict(extra='ignore')
 
     def get_db_url(self) -> URL:
@@ -75,25 +195,44 @@ class Settings(BaseSettings):
             database=self.postgres_db_name,
         )
 
+    def get_pool_options(self) -> dict:
+        """Параметры пула соединений для create_async_engine.
+
+        Returns:
+            dict: Именованные аргументы пула QueuePool.
+
+        """
+        return {
+            'pool_size': self.db_pool_size,
+            'max_overflow': self.db_max_overflow,
+            'pool_timeout': self.db_pool_timeout,
+            'pool_pre_ping': self.db_pool_pre_ping,
+            'pool_recycle': self.db_pool_recycle,
+        }
+
     def get_engine(self, use_null_pool: bool = False) -> AsyncEngine:
-        """Создает движок асинхронной сессии с выбором типа пула.
+        """Возвращает движок асинхронной сессии с выбором типа пула.
+
+        Движок берется из реестра процесса и создается только при первом
+        обращении к DSN с этими параметрами пула.
 
         Args:
             use_null_pool(bool): Выбор NullPool для сессии SQLAlchemy.
 
         """
-        pool_class = NullPool if use_null_pool else None
-        return create_async_engine(self.get_db_url(), poolclass=pool_class)
+        return registry.get_engine(
+            self.get_db_url(), use_null_pool, **self.get_pool_options()
+        )
 
     def get_sessionmaker(self) -> async_sessionmaker:
-        """Создает и возвращает асинхронную сессию.
+        """Возвращает фабрику асинхронных сессий из реестра.
 
         Returns:
             session(AsyncSession).
 
         """
-        return async_sessionmaker(
-            self.get_engine(), expire_on_commit=False, class_=AsyncSession
+        return registry.get_sessionmaker(
+            self.get_db_url(), **self.get_pool_options()
         )
 
     def get_session(self) -> AsyncSession:
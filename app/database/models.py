@@ -1,13 +1,262 @@
 """Модуль с моделями сущностей."""
 
 # STDLIB
+from datetime import datetime
+from enum import StrEnum
 from typing import List
 
 # THIRDPARTY
-from sqlalchemy import ForeignKey
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    event,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
+class JobStatus(StrEnum):
+    """Состояние расчета записи счета."""
+
+    queued = 'queued'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
+
+GEOHASH_ENCODE_FUNCTION = """
+CREATE OR REPLACE FUNCTION {name}(
+    latitude double precision,
+    longtitude double precision,
+    chars integer
+) RETURNS text
+LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE AS $$
+DECLARE
+    alphabet constant text := '0123456789bcdefghjkmnpqrstuvwxyz';
+    lat_min double precision := -90;
+    lat_max double precision := 90;
+    lon_min double precision := -180;
+    lon_max double precision := 180;
+    middle double precision;
+    code integer := 0;
+    bits integer := 0;
+    even boolean := true;
+    geohash text := '';
+BEGIN
+    WHILE length(geohash) < chars LOOP
+        IF even THEN
+            middle := (lon_min + lon_max) / 2;
+            IF longtitude >= middle THEN
+                code := code * 2 + 1;
+                lon_min := middle;
+            ELSE
+                code := code * 2;
+                lon_max := middle;
+            END IF;
+        ELSE
+            middle := (lat_min + lat_max) / 2;
+            IF latitude >= middle THEN
+                code := code * 2 + 1;
+                lat_min := middle;
+            ELSE
+                code := code * 2;
+                lat_max := middle;
+            END IF;
+        END IF;
+        even := NOT even;
+        bits := bits + 1;
+        IF bits = 5 THEN
+            geohash := geohash || substr(alphabet, code + 1, 1);
+            code := 0;
+            bits := 0;
+        END IF;
+    END LOOP;
+    RETURN geohash;
+END
+$$
+"""
+
+SCORE_HISTOGRAM_MIN = -100
+SCORE_HISTOGRAM_WIDTH = 10
+SCORE_HISTOGRAM_BUCKETS = 20
+ROLLUP_CELL_SIZE = 0.05
+
+SCORE_BUCKET_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION score_bucket(score double precision)
+RETURNS integer
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT greatest(0, least({SCORE_HISTOGRAM_BUCKETS - 1}, floor(
+        (score - ({SCORE_HISTOGRAM_MIN})) / {SCORE_HISTOGRAM_WIDTH}
+    )))::integer
+$$
+"""
+
+SCORE_ROLLUP_CHANGES = {
+    'INSERT': 'SELECT cadastral_number, score, 1 AS sign FROM new_rows',
+    'DELETE': 'SELECT cadastral_number, score, -1 AS sign FROM old_rows',
+    'UPDATE': (
+        'SELECT x.* FROM old_rows AS o JOIN new_rows AS n USING (id) '
+        'CROSS JOIN LATERAL (VALUES (o.cadastral_number, o.score, -1), '
+        '(n.cadastral_number, n.score, 1)) '
+        'AS x(cadastral_number, score, sign) '
+        'WHERE o.score IS DISTINCT FROM n.score '
+        'OR o.cadastral_number <> n.cadastral_number'
+    ),
+}
+
+SCORE_ROLLUP_UPSERT = f"""
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / {ROLLUP_CELL_SIZE})::integer,
+            floor(t.longtitude / {ROLLUP_CELL_SIZE})::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM ({{changes}}) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;"""
+
+SCORE_ROLLUP_FUNCTION = """
+CREATE OR REPLACE FUNCTION score_rollup_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{insert}
+    ELSIF TG_OP = 'DELETE' THEN{delete}
+    ELSE{update}
+    END IF;
+    RETURN NULL;
+END
+$$
+""".format(
+    **{
+        operation.lower(): SCORE_ROLLUP_UPSERT.format(changes=changes)
+        for operation, changes in SCORE_ROLLUP_CHANGES.items()
+    }
+)
+
+SCORE_ROLLUP_MOVE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION score_rollup_move() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    WITH moved AS (
+        SELECT
+            n.cadastral_number,
+            floor(o.latitude / {ROLLUP_CELL_SIZE})::integer AS old_lat,
+            floor(o.longtitude / {ROLLUP_CELL_SIZE})::integer AS old_lon,
+            floor(n.latitude / {ROLLUP_CELL_SIZE})::integer AS new_lat,
+            floor(n.longtitude / {ROLLUP_CELL_SIZE})::integer AS new_lon
+        FROM old_rows AS o
+        JOIN new_rows AS n USING (cadastral_number)
+    ), changes AS (
+        SELECT cadastral_number, old_lat AS cell_lat, old_lon AS cell_lon,
+            -1 AS sign
+        FROM moved WHERE (old_lat, old_lon) <> (new_lat, new_lon)
+        UNION ALL
+        SELECT cadastral_number, new_lat, new_lon, 1
+        FROM moved WHERE (old_lat, old_lon) <> (new_lat, new_lon)
+    )
+    INSERT INTO score_rollup AS rollup
+        (cell_lat, cell_lon, bucket, count, total)
+    SELECT
+        c.cell_lat,
+        c.cell_lon,
+        score_bucket(r.score),
+        sum(c.sign),
+        sum(c.sign * r.score)
+    FROM changes AS c
+    JOIN result AS r USING (cadastral_number)
+    WHERE r.score IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+        count = rollup.count + excluded.count,
+        total = rollup.total + excluded.total;
+    RETURN NULL;
+END
+$$
+"""
+
+SCORE_ROLLUP_FORGET_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION score_rollup_forget() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO score_rollup AS rollup
+        (cell_lat, cell_lon, bucket, count, total)
+    SELECT
+        floor(OLD.latitude / {ROLLUP_CELL_SIZE})::integer,
+        floor(OLD.longtitude / {ROLLUP_CELL_SIZE})::integer,
+        score_bucket(r.score),
+        -count(*),
+        -sum(r.score)
+    FROM result AS r
+    WHERE r.cadastral_number = OLD.cadastral_number AND r.score IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+        count = rollup.count + excluded.count,
+        total = rollup.total + excluded.total;
+    RETURN OLD;
+END
+$$
+"""
+
+SCORE_ROLLUP_TRIGGERS = {
+    'result_score_rollup_insert': (
+        'result',
+        'AFTER INSERT ON result REFERENCING NEW TABLE AS new_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    ),
+    'result_score_rollup_update': (
+        'result',
+        'AFTER UPDATE ON result '
+        'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    ),
+    'result_score_rollup_delete': (
+        'result',
+        'AFTER DELETE ON result REFERENCING OLD TABLE AS old_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    ),
+    'territory_score_rollup_move': (
+        'territory',
+        'AFTER UPDATE ON territory '
+        'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_move()',
+    ),
+    'territory_score_rollup_forget': (
+        'territory',
+        'BEFORE DELETE ON territory '
+        'FOR EACH ROW EXECUTE FUNCTION score_rollup_forget()',
+    ),
+}
+
+SCORE_ROLLUP_FILL = f"""
+INSERT INTO score_rollup (cell_lat, cell_lon, bucket, count, total)
+SELECT
+    floor(t.latitude / {ROLLUP_CELL_SIZE})::integer,
+    floor(t.longtitude / {ROLLUP_CELL_SIZE})::integer,
+    score_bucket(r.score),
+    count(*),
+    sum(r.score)
+FROM result AS r
+JOIN territory AS t USING (cadastral_number)
+WHERE r.score IS NOT NULL
+GROUP BY 1, 2, 3
+"""
+
+
 class Base(DeclarativeBase):
     """Базовый класс."""
 
@@ -17,10 +266,15 @@ class Base(DeclarativeBase):
 class TerritoryModel(Base):
     """Класс, определяющий кадастровый номер с координатами объекта.
 
+    Колонка geohash вычисляется БД из координат функцией geohash_encode.
+    Индекс ix_territory_geohash с координатами в INCLUDE нужен поиску
+    территорий рядом с точкой без чтения таблицы.
+
     Args:
         cadastral_number (str): Кадастровый номер объекта.
         latitude (float): Широта.
         longtitude (float): Долгота.
+        geohash (str): Geohash координат, 12 символов.
     """
 
     __tablename__ = 'territory'
@@ -28,6 +282,18 @@ class TerritoryModel(Base):
     cadastral_number: Mapped[str] = mapped_column(primary_key=True)
     latitude: Mapped[float] = mapped_column(nullable=False)
     longtitude: Mapped[float] = mapped_column(nullable=False)
+    geohash: Mapped[str] = mapped_column(
+        String(12, collation='C'),
+        Computed('geohash_encode(latitude, longtitude, 12)', persisted=True),
+    )
+
+    __table_args__ = (
+        Index(
+            'ix_territory_geohash',
+            'geohash',
+            postgresql_include=['cadastral_number', 'latitude', 'longtitude'],
+        ),
+    )
 
     result: Mapped[List['ResultModel']] = relationship(
         back_populates='territory'
@@ -37,20 +303,123 @@ class TerritoryModel(Base):
 class ResultModel(Base):
     """Класс, определяющий вычисления по кадастровому номеру.
 
+    Индекс ix_result_cadastral_number нужен для записи счета по
+    кадастровому номеру, ix_result_latest_score - для чтения последнего
+    счета территории без чтения таблицы, ix_result_score - для
+    статистики по диапазону счетов без чтения таблицы, частичный индекс
+    ix_result_pending - для поиска записей, расчет которых еще не
+    выполнен. Частичные индексы
+    ix_result_queued и ix_result_leased нужны воркерам, которые забирают
+    расчеты из таблицы, и проверке просроченной аренды.
+
     Args:
         id_ (int): id записи.
         cadastral_number (str): Кадастровый номер, по которому ведется расчет.
         score (float): результат расчетов.
+        idempotency_key (str | None): ключ идемпотентности запроса на расчет.
+        status (JobStatus): состояние расчета.
+        attempts (int): количество попыток расчета.
+        leased_until (datetime | None): до какого времени расчет закреплен
+            за воркером.
+        available_after (datetime | None): раньше какого времени не
+            повторять расчет после неудачной попытки.
     """
 
     __tablename__ = 'result'
 
     id_: Mapped[int] = mapped_column(name='id', primary_key=True)
     cadastral_number: Mapped[str] = mapped_column(
-        ForeignKey('territory.cadastral_number', ondelete='CASCADE')
+        ForeignKey('territory.cadastral_number', ondelete='CASCADE'),
+        index=True,
     )
     score: Mapped[float] = mapped_column(nullable=True)
+    idempotency_key: Mapped[str | None] = mapped_column(
+        nullable=True, unique=True, index=True
+    )
+
+    status: Mapped[str] = mapped_column(
+        String(16), server_default=JobStatus.queued.value
+    )
+    attempts: Mapped[int] = mapped_column(server_default='0')
+    leased_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    available_after: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    __table_args__ = (
+        Index('ix_result_pending', 'id', postgresql_where=score.is_(None)),
+        Index(
+            'ix_result_latest_score',
+            'cadastral_number',
+            'id',
+            postgresql_include=['score'],
+            postgresql_where=score.is_not(None),
+        ),
+        Index('ix_result_score', 'score', postgresql_where=score.is_not(None)),
+        Index(
+            'ix_result_queued',
+            'id',
+            postgresql_where=status == JobStatus.queued.value,
+        ),
+        Index(
+            'ix_result_leased',
+            'leased_until',
+            postgresql_where=status == JobStatus.running.value,
+        ),
+    )
 
     territory: Mapped[List['TerritoryModel']] = relationship(
         back_populates='result'
     )
+
+
+class ScoreRollupModel(Base):
+    """Класс, определяющий сводку счетов по ячейкам сетки и корзинам.
+
+    Сводка позволяет считать статистику по прямоугольнику без чтения
+    result и ведется, только пока стоят триггеры SCORE_ROLLUP_TRIGGERS:
+    python -m app.rollup enable ставит их и заново заполняет сводку,
+    disable снимает их и очищает ее. Триггеры на result
+    обновляют сводку в той же транзакции, что и запись счета, перенос
+    территории в другую ячейку переносит ее счета, удаление территории
+    вычитает ее счета до того, как их удалит каскад. Одновременные записи
+    счетов в одну ячейку и корзину ждут друг друга на строке сводки.
+    Ячейка - квадрат ROLLUP_CELL_SIZE градусов, корзина - интервал счета
+    шириной SCORE_HISTOGRAM_WIDTH.
+
+    Args:
+        cell_lat (int): floor(latitude / ROLLUP_CELL_SIZE).
+        cell_lon (int): floor(longtitude / ROLLUP_CELL_SIZE).
+        bucket (int): Номер корзины счета.
+        count (int): Количество счетов.
+        total (float): Сумма счетов.
+    """
+
+    __tablename__ = 'score_rollup'
+
+    cell_lat: Mapped[int] = mapped_column(primary_key=True)
+    cell_lon: Mapped[int] = mapped_column(primary_key=True)
+    bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger)
+    total: Mapped[float]
+
+
+event.listen(
+    Base.metadata,
+    'before_create',
+    DDL(GEOHASH_ENCODE_FUNCTION.format(name='geohash_encode')),
+)
+event.listen(Base.metadata, 'before_create', DDL(SCORE_BUCKET_FUNCTION))
+event.listen(Base.metadata, 'after_create', DDL(SCORE_ROLLUP_FUNCTION))
+event.listen(Base.metadata, 'after_create', DDL(SCORE_ROLLUP_MOVE_FUNCTION))
+event.listen(Base.metadata, 'after_create', DDL(SCORE_ROLLUP_FORGET_FUNCTION))
+event.listen(
+    Base.metadata,
+    'after_drop',
+    DDL(
+        'DROP FUNCTION IF EXISTS geohash_encode, score_bucket, '
+        'score_rollup_apply, score_rollup_move, score_rollup_forget'
+    ),
+)
@@ -1,17 +1,115 @@
 """Точка входа в приложение."""
 
+# STDLIB
+from contextlib import asynccontextmanager
+import logging
+from typing import AsyncIterator
+
 # THIRDPARTY
 from fastapi import FastAPI
 import uvicorn
 
 # FIRSTPARTY
-from app.routers.territory import router
+from app.config import CalcMode, app_settings
+from app.dal.score_analytics import ScoreAnalytics
+from app.dal.score_cache import score_cache
+from app.database.db_base_config import dispose_engines
+from app.database.db_prod_config import engine, session, settings
+from app.routers import admin, analytics, metrics, ws
+from app.routers.territory import calc_queue, router
+from app.services.broker import broker
+from app.services.calc_worker import calc_worker
+from app.services.calculation import calculation_backend, cpu_executor
+from app.services.metrics import MetricsMiddleware
+from app.services.profiling import loop_monitor, profiler
+from app.services.score_listener import ScoreListener
+from app.services.score_notifier import score_notifier
+from app.services.tracing import TracingMiddleware, tracing
+
+logger = logging.getLogger(__name__)
+
+score_listener = ScoreListener(
+    url=settings.get_db_url(),
+    channel=app_settings.score_notify_channel,
+    notifier=score_notifier,
+    cache=score_cache,
+    health_interval=app_settings.score_notify_health_interval,
+    health_timeout=app_settings.score_notify_health_timeout,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Жизненный цикл приложения.
+
+    Публикует общий движок и фабрику сессий процесса в app.state,
+    предупреждает, если score_rollup_enabled не совпадает с триггерами
+    сводки score_rollup (их ставит python -m app.rollup), запускает
+    воркеры очереди расчетов, воркер расчетов из БД или подключается к
+    Kafka и слушает уведомления о записи счета из других процессов,
+    включает трассировку и замер задержки цикла событий. При
+    остановке дает воркерам разобрать очередь, закрывает соединения,
+    клиент кэша счетов и пул процессов расчетов и отправляет оставшиеся
+    спаны.
+
+    Args:
+        app (FastAPI): Экземпляр приложения.
+    """
+    app.state.engine = engine
+    app.state.sessionmaker = session
+    tracing.setup(service_name='calc-api')
+    async with session() as db_session:
+        rollup_enabled = await ScoreAnalytics(
+            session=db_session
+        ).rollup_enabled()
+    if rollup_enabled != app_settings.score_rollup_enabled:
+        logger.warning(
+            'score_rollup_enabled=%s, а сводка score_rollup %s: '
+            'python -m app.rollup enable|disable',
+            app_settings.score_rollup_enabled,
+            'ведется' if rollup_enabled else 'не ведется',
+        )
+    if app_settings.calc_mode == CalcMode.kafka:
+        await broker.connect()
+    elif app_settings.calc_mode == CalcMode.db:
+        if app_settings.calc_job_worker_enabled:
+            await calc_worker.start()
+    else:
+        calc_queue.start()
+    if app_settings.score_notify_enabled:
+        score_listener.start()
+    if app_settings.loop_monitor_enabled:
+        loop_monitor.start()
+    yield
+    profiler.stop()
+    await loop_monitor.stop()
+    await score_listener.stop()
+    if app_settings.calc_mode == CalcMode.kafka:
+        await broker.close()
+    elif app_settings.calc_mode == CalcMode.db:
+        await calc_worker.stop(drain_timeout=app_settings.calc_drain_timeout)
+    else:
+        await calc_queue.stop(drain_timeout=app_settings.calc_drain_timeout)
+    await calculation_backend.aclose()
+    await cpu_executor.shutdown()
+    await score_cache.aclose()
+    await dispose_engines()
+    tracing.shutdown()
+
 
 app = FastAPI(
     title='Тестовое задание для ДОМ.РФ',
+    lifespan=lifespan,
 )
 
 app.include_router(router)
+app.include_router(admin.router)
+app.include_router(analytics.router)
+app.include_router(ws.router)
+if app_settings.metrics_enabled:
+    app.include_router(metrics.router)
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 if __name__ == '__main__':
     uvicorn.run(app='main:app', host='0.0.0.0', port=8000, reload=True)
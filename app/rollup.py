@@ -0,0 +1,71 @@
+"""Включение и выключение сводки score_rollup.
+
+Запуск: python -m app.rollup enable|disable|status
+
+enable ставит триггеры сводки на result и territory и заполняет ее по
+result, на время заполнения записи в эти таблицы ждут блокировку.
+disable снимает триггеры и очищает сводку. Команде нужны права владельца
+таблиц, поэтому она запускается отдельно от API, например шагом
+развертывания, а API только отдает сводку при score_rollup_enabled.
+"""
+
+# STDLIB
+import argparse
+import asyncio
+from typing import Literal
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# FIRSTPARTY
+from app.dal.score_analytics import ScoreAnalytics
+from app.database.db_base_config import dispose_engines
+from app.database.db_prod_config import session as prod_sessionmaker
+
+RollupAction = Literal['enable', 'disable', 'status']
+
+
+async def switch_rollup(
+    sessionmaker: async_sessionmaker, action: RollupAction
+) -> bool:
+    """Включает, выключает или проверяет сводку.
+
+    Args:
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+        action (RollupAction): enable, disable или status.
+
+    Returns:
+        bool: Для enable и disable - изменилось ли состояние, для status -
+            установлены ли все триггеры сводки.
+    """
+    async with sessionmaker() as session:
+        analytics = ScoreAnalytics(session=session)
+        if action == 'enable':
+            return await analytics.enable_rollup()
+        if action == 'disable':
+            return await analytics.disable_rollup()
+        return await analytics.rollup_enabled()
+
+
+async def main(action: RollupAction) -> None:
+    """Выполняет команду в основной БД.
+
+    Args:
+        action (RollupAction): enable, disable или status.
+    """
+    try:
+        result = await switch_rollup(prod_sessionmaker, action)
+    finally:
+        await dispose_engines()
+    if action == 'status':
+        state = 'enabled' if result else 'disabled'
+    else:
+        state = f'{action}d' if result else f'already {action}d'
+    print(f'done: rollup {state}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('action', choices=('enable', 'disable', 'status'))
+    args = parser.parse_args()
+    asyncio.run(main(args.action))
@@ -0,0 +1,214 @@
+"""Модуль со служебными ендпоинтами.
+
+Статистика кэша и расчетов открыта на чтение. Профилирование, журнал
+медленных запросов и задержка цикла событий доступны только с токеном
+admin_token в заголовке Authorization: Bearer, без заданного токена эти
+ендпоинты выключены.
+"""
+
+# STDLIB
+from typing import Literal
+
+# THIRDPARTY
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse, Response
+
+# FIRSTPARTY
+from app.dal.score_cache import score_cache
+from app.routers.common_http_exceptions import (
+    exception_404_not_found,
+    exception_409_profiler_busy,
+)
+from app.routers.dependencies import require_admin_token
+from app.routers.territory import calc_queue, in_flight
+from app.services.calc_worker import calc_worker
+from app.services.calculation import calc_batcher, cpu_executor
+from app.services.profiling import (
+    ProfilerBusy,
+    ProfileSort,
+    loop_monitor,
+    profiler,
+    slow_query_log,
+)
+from app.services.score_notifier import score_notifier
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+admin_only = [Depends(require_admin_token)]
+
+
+@router.get('/cache/stats/')
+async def get_cache_stats() -> dict[str, int]:
+    """Функция возвращает счетчики кэша счетов процесса.
+
+    Returns:
+        dict: JSON формата {'hits': 10, 'misses': 2, 'evictions': 0}.
+    """
+    return score_cache.stats.as_dict()
+
+
+@router.get('/calc/stats/')
+async def get_calc_stats() -> dict[str, int]:
+    """Функция возвращает состояние фоновых расчетов процесса.
+
+    Returns:
+        dict: JSON формата {'queued': 3, 'in_flight': 5, 'coalesced': 12,
+            'waiters': 40, 'claimed': 8}, где coalesced - количество
+            запросов, объединенных с уже выполняющимся расчетом, waiters -
+            запросы, ожидающие счет через long-poll или SSE, claimed -
+            расчеты из БД, выполняющиеся воркером процесса.
+    """
+    return {
+        'queued': calc_queue.qsize(),
+        'in_flight': len(in_flight),
+        'coalesced': in_flight.coalesced,
+        'waiters': len(score_notifier),
+        'claimed': len(calc_worker),
+    }
+
+
+@router.get('/calc/batches/')
+async def get_calc_batches() -> dict:
+    """Функция возвращает статистику пачек запросов к бэкенду вычислений.
+
+    Returns:
+        dict: JSON формата {'max_size': 100, 'linger': 0.05, 'pending': 3,
+            'flushed_full': 10, 'flushed_linger': 4, 'sizes': {...},
+            'fill': {...}}, где sizes и fill - накопительные гистограммы
+            размера пачки и ее заполнения относительно max_size.
+    """
+    return calc_batcher.stats()
+
+
+@router.get('/calc/executor/')
+async def get_calc_executor() -> dict:
+    """Функция возвращает загрузку пула процессов для расчетов.
+
+    Returns:
+        dict: JSON формата {'kind': 'process', 'workers': 8,
+            'queue_size': 16, 'in_flight': 3, 'waiting': 0, 'chunks': 10,
+            'items': 100000, 'busy': 1.2, 'utilisation': 0.05,
+            'chunk_seconds': {...}}, где in_flight - пачки в пуле,
+            waiting - пачки, ждущие места в очереди пула.
+    """
+    return cpu_executor.stats()
+
+
+@router.post('/profile/start/', dependencies=admin_only)
+async def start_profile(seconds: float = Query(default=30, gt=0)) -> dict:
+    """Функция включает cProfile цикла событий процесса на время.
+
+    Профилирование замедляет обработку запросов процесса в несколько раз
+    и выключается само через seconds, но не больше profile_max_seconds.
+
+    Args:
+        seconds (float): Длительность профилирования, сек.
+
+    Returns:
+        dict: Состояние профилирования, см. GET /admin/profile/.
+
+    Raises:
+        HTTPException: 409, если профилирование уже выполняется.
+    """
+    try:
+        profiler.start(seconds)
+    except ProfilerBusy:
+        raise exception_409_profiler_busy
+    return profiler.status()
+
+
+@router.post('/profile/stop/', dependencies=admin_only)
+async def stop_profile() -> dict:
+    """Функция останавливает профилирование раньше срока.
+
+    Returns:
+        dict: Состояние профилирования, см. GET /admin/profile/.
+    """
+    profiler.stop()
+    return profiler.status()
+
+
+@router.get('/profile/', dependencies=admin_only)
+async def get_profile() -> dict:
+    """Функция возвращает состояние профилирования.
+
+    Returns:
+        dict: JSON формата {'running': False, 'seconds': 30.0,
+            'started': 1700000000.0, 'finished': 1700000030.0,
+            'available': True}, где available - есть ли результат для
+            скачивания.
+    """
+    return profiler.status()
+
+
+@router.get('/profile/download/', dependencies=admin_only)
+async def download_profile(
+    format_: Literal['pstats', 'text'] = Query(
+        default='pstats', alias='format'
+    ),
+    sort: ProfileSort = 'cumulative',
+    limit: int = Query(default=50, gt=0),
+) -> Response:
+    """Функция отдает результат последнего профилирования.
+
+    Файл pstats открывается python -m pstats profile.pstats или snakeviz.
+
+    Args:
+        format_ (str): pstats - файл pstats, text - отчет pstats.
+        sort (ProfileSort): Сортировка функций отчета.
+        limit (int): Количество функций в отчете.
+
+    Returns:
+        Response: Файл pstats или текстовый отчет.
+
+    Raises:
+        HTTPException: 404, если профилирование еще не выполнялось.
+    """
+    if profiler.last is None:
+        raise exception_404_not_found
+    if format_ == 'text':
+        return PlainTextResponse(profiler.text(sort, limit))
+    return Response(
+        profiler.dump(),
+        media_type='application/octet-stream',
+        headers={'Content-Disposition': 'attachment; filename=profile.pstats'},
+    )
+
+
+@router.get('/slow-queries/', dependencies=admin_only)
+async def get_slow_queries() -> dict:
+    """Функция возвращает журнал медленных SQL запросов процесса.
+
+    Returns:
+        dict: JSON формата {'threshold_ms': 100.0, 'count': 3,
+            'queries': [{'at': 1700000000.0, 'duration_ms': 120.5,
+            'statement': 'SELECT ...', 'parameters': '(1,)'}]}.
+    """
+    return slow_query_log.stats()
+
+
+@router.put('/slow-queries/', dependencies=admin_only)
+async def set_slow_queries(threshold_ms: float = Query(ge=0)) -> dict:
+    """Функция меняет порог журнала медленных SQL запросов процесса.
+
+    Args:
+        threshold_ms (float): Порог времени запроса, мс, 0 - выключить.
+
+    Returns:
+        dict: Журнал медленных запросов, см. GET /admin/slow-queries/.
+    """
+    slow_query_log.threshold_ms = threshold_ms
+    return slow_query_log.stats()
+
+
+@router.get('/loop/', dependencies=admin_only)
+async def get_loop() -> dict:
+    """Функция возвращает задержку цикла событий процесса.
+
+    Returns:
+        dict: JSON формата {'interval': 0.1, 'block_threshold': 0.2,
+            'max_lag': 0.3, 'lag': {...}, 'blocks': [{'at': 1700000000.0,
+            'blocked_ms': 250.0, 'stack': '...'}]}, где lag -
+            накопительная гистограмма задержки, сек, blocks - стеки потока
+            цикла, снятые во время блокировок.
+    """
+    return loop_monitor.stats()
@@ -0,0 +1,84 @@
+"""Модуль с ендпоинтами аналитики счетов."""
+
+# STDLIB
+from typing import Literal
+
+# THIRDPARTY
+from fastapi import APIRouter, Depends
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.score_analytics import ScoreAnalytics
+from app.routers.common_http_exceptions import (
+    exception_400_validation,
+    exception_409_rollup_disabled,
+)
+from app.routers.dependencies import get_prod_session
+from app.schemas.analytics import BoundingBox, ScoreAnalyticsSchema
+
+router = APIRouter(prefix='/analytics', tags=['analytics'])
+
+
+def parse_bbox(value: str) -> BoundingBox:
+    """Разбирает прямоугольник из строки min_lon,min_lat,max_lon,max_lat.
+
+    Args:
+        value (str): Значение параметра bbox.
+
+    Returns:
+        BoundingBox: Прямоугольник.
+
+    Raises:
+        HTTPException: 400, если значение неверного формата.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = map(float, value.split(','))
+        return BoundingBox(
+            min_lon=min_lon, min_lat=min_lat, max_lon=max_lon, max_lat=max_lat
+        )
+    except (ValueError, ValidationError):
+        raise exception_400_validation
+
+
+@router.get('/scores')
+async def get_score_analytics(
+    bbox: str | None = None,
+    min_score: float | None = None,
+    max_score: float | None = None,
+    source: Literal['live', 'rollup'] | None = None,
+    session: AsyncSession = Depends(get_prod_session),
+) -> ScoreAnalyticsSchema:
+    """Функция возвращает статистику счетов, посчитанную в БД.
+
+    Args:
+        bbox (str | None): Прямоугольник min_lon,min_lat,max_lon,max_lat.
+        min_score (float | None): Минимальный счет.
+        max_score (float | None): Максимальный счет.
+        source (str | None): live - точно по result, rollup - по сводке
+            score_rollup, по умолчанию analytics_source.
+        session (AsyncSession): Асинхронная сессия для подключения к бд.
+
+    Returns:
+        ScoreAnalyticsSchema: JSON формата {'source': 'live', 'count': 10,
+            'mean': 1.5, 'percentiles': {'p50': 2.0, ...},
+            'histogram_min': -100, 'histogram_width': 10,
+            'histogram': [0, 1, ...]}.
+
+    Raises:
+        HTTPException: 400 - bbox неверного формата или min_score больше
+            max_score.
+        HTTPException: 409 - запрошена сводка, а score_rollup_enabled
+            выключена.
+    """
+    box = None if bbox is None else parse_bbox(bbox)
+    if min_score is not None and max_score is not None:
+        if min_score > max_score:
+            raise exception_400_validation
+    analytics = ScoreAnalytics(session=session)
+    if (source or app_settings.analytics_source) == 'rollup':
+        if not app_settings.score_rollup_enabled:
+            raise exception_409_rollup_disabled
+        return await analytics.rollup(box, min_score, max_score)
+    return await analytics.live(box, min_score, max_score)
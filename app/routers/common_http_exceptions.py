@@ -13,6 +13,16 @@ exception_400_validation = HTTPException(
     ).model_dump(),
 )
 
+exception_401_unauthorized = HTTPException(
+    status_code=401,
+    detail=ErrorResponse(
+        code=401,
+        type_='Unauthorized',
+        message='Неверный токен доступа',
+    ).model_dump(),
+    headers={'WWW-Authenticate': 'Bearer'},
+)
+
 exception_404_not_found = HTTPException(
     status_code=404,
     detail=ErrorResponse(
@@ -20,6 +30,33 @@ exception_404_not_found = HTTPException(
     ).model_dump(),
 )
 
+exception_409_profiler_busy = HTTPException(
+    status_code=409,
+    detail=ErrorResponse(
+        code=409,
+        type_='ProfilerBusy',
+        message='Профилирование уже выполняется',
+    ).model_dump(),
+)
+
+exception_409_rollup_disabled = HTTPException(
+    status_code=409,
+    detail=ErrorResponse(
+        code=409,
+        type_='RollupDisabled',
+        message='Сводка счетов выключена, используйте source=live',
+    ).model_dump(),
+)
+
+exception_413_too_many_items = HTTPException(
+    status_code=413,
+    detail=ErrorResponse(
+        code=413,
+        type_='TooManyItems',
+        message='Слишком много элементов в запросе',
+    ).model_dump(),
+)
+
 exception_500_db_connection = HTTPException(
     status_code=500,
     detail=ErrorResponse(
@@ -28,3 +65,12 @@ exception_500_db_connection = HTTPException(
         message='Нет подключения к БД',
     ).model_dump(),
 )
+
+exception_503_queue_full = HTTPException(
+    status_code=503,
+    detail=ErrorResponse(
+        code=503,
+        type_='QueueFull',
+        message='Очередь расчетов переполнена, повторите запрос позже',
+    ).model_dump(),
+)
@@ -1,18 +1,70 @@
 """Общие зависимости для роутеров."""
 
+# STDLIB
+import secrets
+
 # THIRDPARTY
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 # FIRSTPARTY
-from app.database.db_prod_config import settings
+from app.config import app_settings
+from app.database.db_prod_config import session as prod_sessionmaker
+from app.routers.common_http_exceptions import (
+    exception_401_unauthorized,
+    exception_404_not_found,
+)
+
+admin_bearer = HTTPBearer(auto_error=False)
 
 
 async def get_prod_session() -> AsyncSession:
     """Depends для получения асинхронной сессии из prod settings.
 
+    Сессия берется из общей фабрики процесса, поэтому соединения
+    переиспользуются из пула движка, а не открываются заново.
+
     Returns:
         AsyncSession: сессия для подключения к основной БД.
 
     """
-    async with settings.get_session() as session:
+    async with prod_sessionmaker() as session:
         yield session
+
+
+def get_prod_sessionmaker() -> async_sessionmaker:
+    """Depends для получения фабрики сессий из prod settings.
+
+    Нужна ендпоинтам с потоковым ответом, которые открывают сессию на время
+    отдачи тела, уже после выхода из зависимостей.
+
+    Returns:
+        async_sessionmaker: фабрика сессий основной БД.
+
+    """
+    return prod_sessionmaker
+
+
+def require_admin_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(admin_bearer),
+) -> None:
+    """Depends для служебных ендпоинтов /admin/.
+
+    Пока admin_token не задан, ендпоинты отвечают 404, как будто их нет.
+
+    Args:
+        credentials (HTTPAuthorizationCredentials | None): токен из
+            заголовка Authorization: Bearer.
+
+    Raises:
+        HTTPException: 404 - admin_token не задан, 401 - токен не передан
+            или неверный.
+
+    """
+    if not app_settings.admin_token:
+        raise exception_404_not_found
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), app_settings.admin_token.encode()
+    ):
+        raise exception_401_unauthorized
@@ -0,0 +1,89 @@
+"""Модуль с ендпоинтом метрик Prometheus."""
+
+# THIRDPARTY
+from fastapi import APIRouter
+from starlette.responses import Response
+
+# FIRSTPARTY
+from app.dal.score_cache import score_cache
+from app.routers.territory import calc_queue, in_flight
+from app.services.calc_worker import calc_worker
+from app.services.calculation import calc_batcher, cpu_executor
+from app.services.metrics import CONTENT_TYPE, metrics
+
+router = APIRouter(tags=['metrics'])
+
+metrics.gauge(
+    'calc_queue_depth',
+    'Расчеты в очереди процесса, ожидающие воркера.',
+    collect=lambda: {(): calc_queue.qsize()},
+)
+metrics.gauge(
+    'calc_in_flight',
+    'Выполняющиеся расчеты очереди процесса.',
+    collect=lambda: {(): len(in_flight)},
+)
+metrics.gauge(
+    'calc_worker_claimed',
+    'Расчеты из БД, выполняющиеся воркером процесса.',
+    collect=lambda: {(): len(calc_worker)},
+)
+metrics.gauge(
+    'calc_executor_waiting',
+    'Пачки, ждущие места в очереди пула процессов расчетов.',
+    collect=lambda: {(): cpu_executor.waiting},
+)
+metrics.counter(
+    'calc_coalesced_total',
+    'Запросы расчета, объединенные с уже выполняющимся расчетом.',
+    collect=lambda: {(): in_flight.coalesced},
+)
+metrics.counter(
+    'score_cache_requests_total',
+    'Обращения к кэшу счетов процесса по результату.',
+    ('result',),
+    collect=lambda: {
+        ('hit',): score_cache.stats.hits,
+        ('miss',): score_cache.stats.misses,
+    },
+)
+metrics.counter(
+    'score_cache_evictions_total',
+    'Вытеснения из кэша счетов по размеру и истечению TTL.',
+    collect=lambda: {(): score_cache.stats.evictions},
+)
+metrics.histogram(
+    'calc_batch_size',
+    'Размер пачки запросов к бэкенду вычислений.',
+    collect=lambda: {(): calc_batcher.sizes},
+)
+metrics.histogram(
+    'calc_batch_fill_ratio',
+    'Заполнение пачки относительно calc_backend_batch_size.',
+    collect=lambda: {(): calc_batcher.fill},
+)
+metrics.counter(
+    'calc_executor_busy_seconds_total',
+    'Время работы процессов пула расчетов, сек.',
+    collect=lambda: {(): cpu_executor.busy},
+)
+metrics.gauge(
+    'calc_executor_utilisation',
+    'Доля времени работы процессов пула расчетов с момента его создания.',
+    collect=lambda: {(): cpu_executor.stats()['utilisation']},
+)
+metrics.histogram(
+    'calc_executor_chunk_seconds',
+    'Время расчета пачки в процессе пула.',
+    collect=lambda: {(): cpu_executor.chunk_seconds},
+)
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics() -> Response:
+    """Функция возвращает метрики процесса в формате Prometheus.
+
+    Returns:
+        Response: text/plain в формате Prometheus 0.0.4.
+    """
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
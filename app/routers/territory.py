@@ -2,54 +2,332 @@
 
 # STDLIB
 import asyncio
-import random
+from typing import Hashable
 
 # THIRDPARTY
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.responses import JSONResponse, StreamingResponse
 
 # FIRSTPARTY
+from app.config import CalcMode, app_settings
 from app.dal.result import Result
+from app.dal.result_job import ResultJobs
 from app.dal.territory import Territory
-from app.routers.dependencies import get_prod_session
-from app.schemas.territory import CalcRequestSchema
+from app.database.db_prod_config import session as prod_sessionmaker
+from app.routers.common_http_exceptions import (
+    exception_400_validation,
+    exception_413_too_many_items,
+    exception_500_db_connection,
+    exception_503_queue_full,
+)
+from app.routers.dependencies import get_prod_session, get_prod_sessionmaker
+from app.schemas.territory import (
+    CalcBatchErrorSchema,
+    CalcBatchResponseSchema,
+    CalcJobMessage,
+    CalcRequestSchema,
+    NearTerritorySchema,
+)
+from app.services.broker import publish_calc_job
+from app.services.calc_batch import (
+    CalcBatchMalformed,
+    CalcBatchTooLarge,
+    parse_calc_batch,
+)
+from app.services.calc_queue import CalcJob, CalcQueue, CalcQueueFull
+from app.services.calc_worker import calc_worker
+from app.services.calculation import remote_calculation
+from app.services.score_lookup import stream_scores
+from app.services.score_notifier import score_notifier
+from app.services.score_wait import current_score, score_events, wait_for_score
+from app.services.single_flight import InFlightCalculations, calc_key
+from app.services.tracing import tracing
 
 router = APIRouter()
 
 
-async def remote_calculation(
-    data: CalcRequestSchema, session: AsyncSession
+async def calculate_job(job: CalcJob, session: AsyncSession) -> None:
+    """Выполнение задачи из очереди расчетов.
+
+    Очередь процесса не повторяет расчеты: при ошибке запись отмечается
+    failed, и ожидающие счет запросы перестают ждать.
+
+    Args:
+        job (CalcJob): Задача на расчет.
+        session (AsyncSession): Сессия воркера очереди.
+    """
+    try:
+        await remote_calculation(
+            data=job.data, result_id=job.result_id, session=session
+        )
+    except Exception:
+        await session.rollback()
+        await ResultJobs(session).mark_failed(job.result_id)
+        raise
+    finally:
+        in_flight.release(calc_key(job.data), job.result_id)
+
+
+in_flight = InFlightCalculations()
+
+calc_queue = CalcQueue(
+    handler=calculate_job,
+    sessionmaker=prod_sessionmaker,
+    workers=app_settings.calc_workers,
+    maxsize=app_settings.calc_queue_size,
+)
+
+
+def get_calc_queue() -> CalcQueue:
+    """Depends для получения очереди расчетов.
+
+    Returns:
+        CalcQueue: очередь расчетов процесса.
+
+    """
+    return calc_queue
+
+
+def get_in_flight() -> InFlightCalculations:
+    """Depends для получения реестра выполняющихся расчетов.
+
+    Returns:
+        InFlightCalculations: реестр расчетов процесса.
+
+    """
+    return in_flight
+
+
+async def submit_calculation(
+    data: CalcRequestSchema, result_id: int, queue: CalcQueue
 ) -> None:
-    """Имитация сервиса вычислений.
+    """Отправляет расчет в очередь процесса или в Kafka.
+
+    В режиме db запись уже является задачей, воркер процесса только
+    будится, чтобы не ждать очередного опроса.
 
     Args:
-        data (CalcRequestSchema): Инофрмация для вычислений.
-        session (AsyncSession): Асинхронная сессия для подключения к бд.
+        data (CalcRequestSchema): Данные для вычислений.
+        result_id (int): ID записи с счетом.
+        queue (CalcQueue): Очередь фоновых расчетов.
+
+    Raises:
+        HTTPException: 503, если очередь расчетов переполнена.
     """
-    await asyncio.sleep(random.randint(10, 20))
-    score = round(random.uniform(-100, 100), 6)
-    result = Result(session=session)
-    await result.update(cadastral_number=data.cadastral_number, score=score)
+    if app_settings.calc_mode == CalcMode.kafka:
+        await publish_calc_job(
+            CalcJobMessage(**data.model_dump(), result_id=result_id)
+        )
+        return
+    if app_settings.calc_mode == CalcMode.db:
+        calc_worker.wake()
+        return
+    try:
+        queue.submit(
+            CalcJob(
+                data=data,
+                result_id=result_id,
+                trace_context=tracing.inject(),
+            )
+        )
+    except CalcQueueFull:
+        raise exception_503_queue_full
 
 
-@router.post('/calc/')
+@router.post('/calc/', status_code=202)
 async def post_to_result(
-    body: CalcRequestSchema, session: AsyncSession = Depends(get_prod_session)
+    body: CalcRequestSchema,
+    response: Response,
+    idempotency_key: str | None = Header(
+        default=None, alias='Idempotency-Key', max_length=255
+    ),
+    session: AsyncSession = Depends(get_prod_session),
+    queue: CalcQueue = Depends(get_calc_queue),
+    calculations: InFlightCalculations = Depends(get_in_flight),
 ) -> int:
     """Функция получает тело запроса и возвращает ID из бд.
 
+    Расчет ставится в очередь процесса или публикуется в Kafka, ответ
+    возвращается сразу после записи в бд. Повторный запрос с тем же
+    заголовком Idempotency-Key возвращает ID уже созданной записи с кодом
+    200 и не запускает новый расчет. Если расчет не удалось поставить в
+    очередь или опубликовать, созданная запись удаляется, и повтор с тем же
+    ключом создает ее заново.
+
+    В режиме очереди запросы без Idempotency-Key с теми же кадастровым
+    номером и координатами, что и у выполняющегося расчета, получают ID его
+    записи и не запускают новый расчет.
+
     Args:
         body (CalcRequestSchema): Тело запроса для вычислений.
+        response (Response): Ответ, для смены кода на 200 при повторе.
+        idempotency_key (str | None): Ключ идемпотентности запроса.
         session (AsyncSession): Асинхронная сессия для подключения к бд.
+        queue (CalcQueue): Очередь фоновых расчетов.
+        calculations (InFlightCalculations): Реестр выполняющихся расчетов.
 
     Returns:
         ID записи в бд.
+
+    Raises:
+        HTTPException: 503, если очередь расчетов переполнена.
     """
     territory = Territory(session=session)
-    id_ = await territory.create(data=body)
-    await remote_calculation(data=body, session=session)
-    return id_
+
+    async def create() -> int:
+        if app_settings.calc_mode == CalcMode.queue and not queue.has_room(1):
+            raise exception_503_queue_full
+        created = await territory.upsert(
+            data=body, idempotency_key=idempotency_key
+        )
+        if created is None:
+            raise exception_500_db_connection
+        if not created.created:
+            response.status_code = 200
+            return created.id_
+        try:
+            await submit_calculation(body, created.id_, queue)
+        except Exception:
+            await Result(session=session).delete_many([created.id_])
+            raise
+        return created.id_
+
+    if app_settings.calc_mode == CalcMode.queue and idempotency_key is None:
+        id_, _ = await calculations.run(calc_key(body), create)
+        return id_
+    return await create()
+
+
+@router.post(
+    '/calc/batch',
+    status_code=202,
+    response_model=CalcBatchResponseSchema,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {
+                    'schema': {
+                        'type': 'array',
+                        'items': CalcRequestSchema.model_json_schema(),
+                    }
+                },
+                'application/x-ndjson': {
+                    'schema': CalcRequestSchema.model_json_schema()
+                },
+            },
+        }
+    },
+)
+async def post_batch_to_result(
+    request: Request,
+    session: AsyncSession = Depends(get_prod_session),
+    queue: CalcQueue = Depends(get_calc_queue),
+    calculations: InFlightCalculations = Depends(get_in_flight),
+) -> CalcBatchResponseSchema:
+    """Пакетный запрос на расчет.
+
+    Принимает JSON массив или NDJSON поток элементов CalcRequestSchema,
+    валидирует их за один проход и записывает валидные элементы массовой
+    вставкой. Ошибки отдельных элементов возвращаются в ответе и не
+    прерывают обработку пакета.
+
+    В режиме очереди одинаковые элементы пакета и элементы, совпадающие с
+    выполняющимися расчетами, получают ID одной записи и один расчет. ID
+    передаются присоединившимся запросам только после постановки расчетов в
+    очередь, если поставить их не удалось, созданные записи удаляются.
+
+    Args:
+        request (Request): Запрос с телом пакета.
+        session (AsyncSession): Асинхронная сессия для подключения к бд.
+        queue (CalcQueue): Очередь фоновых расчетов.
+        calculations (InFlightCalculations): Реестр выполняющихся расчетов.
+
+    Returns:
+        CalcBatchResponseSchema: ID записей в порядке входных данных и
+            ошибки валидации.
+
+    Raises:
+        HTTPException: 400 - тело не массив, 413 - пакет больше
+            calc_batch_max_size, 503 - в очереди нет места для пакета.
+    """
+    try:
+        batch = await parse_calc_batch(
+            request, max_size=app_settings.calc_batch_max_size
+        )
+    except CalcBatchMalformed:
+        raise exception_400_validation
+    except CalcBatchTooLarge:
+        raise exception_413_too_many_items
+
+    coalesce = app_settings.calc_mode == CalcMode.queue
+    ids: list[int | None] = [None] * batch.size
+    joined: list[tuple[int, asyncio.Future[int]]] = []
+    leaders: dict[Hashable, list[int]] = {}
+    items: list[CalcRequestSchema] = []
+    for index, item in batch.items:
+        key = calc_key(item) if coalesce else index
+        future = calculations.get(key) if coalesce else None
+        if future is not None:
+            joined.append((index, future))
+        elif key in leaders:
+            leaders[key].append(index)
+        else:
+            leaders[key] = [index]
+            items.append(item)
+    if coalesce:
+        calculations.coalesced += len(batch.items) - len(items)
+        if not queue.has_room(len(items)):
+            raise exception_503_queue_full
+        for key in leaders:
+            calculations.lead(key)
+
+    territory = Territory(session=session)
+    created_ids: list[int] = []
+    try:
+        created_ids = await territory.create_many(data=items)
+        if len(created_ids) != len(items):
+            raise exception_500_db_connection
+        trace_context = tracing.inject()
+        jobs = [
+            CalcJob(data=item, result_id=id_, trace_context=trace_context)
+            for item, id_ in zip(items, created_ids)
+        ]
+        if app_settings.calc_mode == CalcMode.kafka:
+            for job in jobs:
+                await submit_calculation(job.data, job.result_id, queue)
+        elif app_settings.calc_mode == CalcMode.db:
+            calc_worker.wake()
+        else:
+            try:
+                queue.submit_many(jobs)
+            except CalcQueueFull:
+                raise exception_503_queue_full
+    except BaseException as error:
+        if coalesce:
+            for key in leaders:
+                calculations.fail(key, error)
+        if created_ids and isinstance(error, Exception):
+            await Result(session=session).delete_many(created_ids)
+        raise
+
+    for (key, indexes), id_ in zip(leaders.items(), created_ids):
+        for index in indexes:
+            ids[index] = id_
+        if coalesce:
+            calculations.resolve(key, id_)
+
+    for index, future in joined:
+        try:
+            ids[index] = await asyncio.shield(future)
+        except Exception:
+            batch.errors.append(
+                CalcBatchErrorSchema(
+                    index=index, errors=['Не удалось создать запись расчета']
+                )
+            )
+    return CalcBatchResponseSchema(ids=ids, errors=batch.errors)
 
 
 @router.get('/result/')
@@ -64,8 +342,166 @@ async def get_result(
         session (AsyncSession): Асинхронная сессия для подключения к бд.
 
     Returns:
-        JSONResponse: JSON формата {'score': -45.123125}.
+        JSONResponse: JSON формата {'score': -45.123125}, до записи счета -
+            {'score': 'Расчет еще не выполнен'}, если попытки расчета
+            исчерпаны - {'score': 'Расчет не удался, попытки исчерпаны'}.
     """
     result = Result(session=session)
     result = await result.get(id_=result_id)
     return {'score': result}
+
+
+@router.get('/result/{result_id}/wait')
+async def wait_result(
+    result_id: int,
+    timeout: float = Query(
+        default=30, gt=0, le=app_settings.result_wait_max_timeout
+    ),
+    sessionmaker: async_sessionmaker = Depends(get_prod_sessionmaker),
+) -> JSONResponse:
+    """Long-poll: ждет записи счета не дольше timeout секунд.
+
+    Текущий счет проверяется один раз, дальше запрос ждет уведомления от
+    Result.update без обращений к БД и без занятого соединения.
+
+    Args:
+        result_id (int): ID записи в бд.
+        timeout (float): Максимальное время ожидания, сек.
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+
+    Returns:
+        JSONResponse: JSON формата {'score': -45.123125},
+            {'score': 'Расчет не удался, попытки исчерпаны'} или
+            {'score': 'Расчет еще не выполнен'}, если время вышло.
+    """
+    score = await wait_for_score(
+        sessionmaker=sessionmaker,
+        notifier=score_notifier,
+        result_id=result_id,
+        timeout=timeout,
+    )
+    return {'score': score}
+
+
+@router.get('/result/{result_id}/events')
+async def result_events(
+    result_id: int,
+    sessionmaker: async_sessionmaker = Depends(get_prod_sessionmaker),
+) -> StreamingResponse:
+    """Server-Sent Events: поток событий до записи счета.
+
+    Отдает событие pending, keepalive комментарии и событие score или
+    failed, если попытки расчета исчерпаны, после которого поток
+    закрывается.
+
+    Args:
+        result_id (int): ID записи в бд.
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+
+    Returns:
+        StreamingResponse: Поток text/event-stream.
+    """
+    future = score_notifier.subscribe(result_id)
+    try:
+        score = await current_score(sessionmaker, result_id)
+    except BaseException:
+        score_notifier.unsubscribe(result_id, future)
+        raise
+    return StreamingResponse(
+        score_events(
+            notifier=score_notifier,
+            result_id=result_id,
+            future=future,
+            score=score,
+            keepalive=app_settings.result_events_keepalive,
+        ),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def split_query_values(values: list[str]) -> list[str]:
+    """Разбивает повторяющиеся и перечисленные через запятую параметры.
+
+    Args:
+        values (list[str]): Значения параметра из строки запроса.
+
+    Returns:
+        list[str]: Непустые значения без дубликатов в исходном порядке.
+    """
+    items = (item.strip() for value in values for item in value.split(','))
+    return list(dict.fromkeys(item for item in items if item))
+
+
+@router.get('/results/')
+async def get_results(
+    ids: list[str] = Query(default=[]),
+    cadastral_numbers: list[str] = Query(default=[]),
+    sessionmaker: async_sessionmaker = Depends(get_prod_sessionmaker),
+) -> StreamingResponse:
+    """Функция возвращает счета по списку ID или кадастровых номеров.
+
+    Все записи выбираются одним запросом, ответ отдается потоком.
+
+    Args:
+        ids (list[str]): ID записей, ?ids=1&ids=2 или ?ids=1,2.
+        cadastral_numbers (list[str]): Кадастровые номера.
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+
+    Returns:
+        StreamingResponse: JSON формата {'results': {'1':
+            {'cadastral_number': '77:01:000401:01', 'score': -45.123125,
+            'status': 'done'}, '2': {'cadastral_number': '77:01:000401:02',
+            'score': None, 'status': 'failed'}}, 'missing': {'ids': [3],
+            'cadastral_numbers': []}}.
+
+    Raises:
+        HTTPException: 400 - ID не число, 413 - больше results_max_ids
+            значений.
+    """
+    try:
+        result_ids = [int(id_) for id_ in split_query_values(ids)]
+    except ValueError:
+        raise exception_400_validation
+    numbers = split_query_values(cadastral_numbers)
+    if len(result_ids) + len(numbers) > app_settings.results_max_ids:
+        raise exception_413_too_many_items
+    return StreamingResponse(
+        stream_scores(
+            sessionmaker=sessionmaker,
+            ids=result_ids,
+            cadastral_numbers=numbers,
+        ),
+        media_type='application/json',
+    )
+
+
+@router.get('/territory/near')
+async def get_territories_near(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float = Query(gt=0, le=app_settings.territory_near_max_radius),
+    limit: int = Query(
+        default=100, ge=1, le=app_settings.territory_near_max_limit
+    ),
+    session: AsyncSession = Depends(get_prod_session),
+) -> list[NearTerritorySchema]:
+    """Функция возвращает территории в радиусе от точки.
+
+    Args:
+        lat (float): Широта точки.
+        lon (float): Долгота точки.
+        radius (float): Радиус поиска, м.
+        limit (int): Максимальное количество территорий.
+        session (AsyncSession): Асинхронная сессия для подключения к бд.
+
+    Returns:
+        list[NearTerritorySchema]: Территории по возрастанию расстояния с
+            последними посчитанными счетами, JSON формата
+            [{'cadastral_number': '77:01:000401:01', 'latitude': 55.7,
+            'longtitude': 37.6, 'distance': 120.5, 'score': -45.123125}].
+    """
+    territory = Territory(session=session)
+    return await territory.near(
+        latitude=lat, longtitude=lon, radius=radius, limit=limit
+    )
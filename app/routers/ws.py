@@ -0,0 +1,151 @@
+"""Модуль с WebSocket ендпоинтами."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.status import WS_1013_TRY_AGAIN_LATER
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.routers.dependencies import get_prod_sessionmaker
+from app.schemas.territory import ScoreSubscriptionSchema
+from app.services.score_notifier import score_notifier
+from app.services.score_subscription import (
+    ScoreSubscription,
+    ScoreSubscriptionLimit,
+    subscribe_scores,
+)
+
+router = APIRouter()
+
+
+async def send_scores(
+    websocket: WebSocket, subscription: ScoreSubscription
+) -> None:
+    """Отправляет записанные счета пачками.
+
+    Следующая пачка собирается только после отправки предыдущей, поэтому
+    медленный клиент копит счета в ограниченной очереди подписки.
+
+    Args:
+        websocket (WebSocket): Соединение клиента.
+        subscription (ScoreSubscription): Подписка соединения.
+    """
+    async for batch in subscription.batches(
+        batch_size=app_settings.ws_batch_size,
+        window=app_settings.ws_batch_window,
+    ):
+        await websocket.send_json(
+            {
+                'type': 'scores',
+                'scores': [
+                    {'id': id_, 'score': score} for id_, score in batch
+                ],
+            }
+        )
+
+
+async def receive_subscriptions(
+    websocket: WebSocket,
+    subscription: ScoreSubscription,
+    sessionmaker: async_sessionmaker,
+) -> None:
+    """Обрабатывает сообщения подписки клиента до закрытия соединения.
+
+    Args:
+        websocket (WebSocket): Соединение клиента.
+        subscription (ScoreSubscription): Подписка соединения.
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+    """
+    while True:
+        try:
+            message = ScoreSubscriptionSchema.model_validate(
+                await websocket.receive_json()
+            )
+        except (ValueError, ValidationError) as e:
+            await websocket.send_json({'type': 'error', 'detail': str(e)})
+            continue
+        if message.action == 'unsubscribe':
+            subscription.unsubscribe(message.ids)
+            await websocket.send_json(
+                {'type': 'unsubscribed', 'ids': message.ids}
+            )
+            continue
+        count = len(message.ids) + len(message.cadastral_numbers)
+        if count > app_settings.results_max_ids:
+            await websocket.send_json(
+                {'type': 'error', 'detail': 'Слишком много элементов'}
+            )
+            continue
+        try:
+            status = await subscribe_scores(
+                sessionmaker=sessionmaker,
+                subscription=subscription,
+                ids=message.ids,
+                cadastral_numbers=message.cadastral_numbers,
+            )
+        except ScoreSubscriptionLimit:
+            await websocket.send_json(
+                {'type': 'error', 'detail': 'Слишком много подписок'}
+            )
+            continue
+        await websocket.send_json({'type': 'subscribed', **status})
+
+
+@router.websocket('/ws/results')
+async def results_ws(
+    websocket: WebSocket,
+    sessionmaker: async_sessionmaker = Depends(get_prod_sessionmaker),
+) -> None:
+    """Поток счетов по подписке на ID или кадастровые номера.
+
+    Клиент отправляет {'action': 'subscribe', 'ids': [1, 2],
+    'cadastral_numbers': ['77:01:000401:01']} и получает
+    {'type': 'subscribed', 'pending': [1], 'missing': {'ids': [],
+    'cadastral_numbers': []}}, а по мере записи счетов -
+    {'type': 'scores', 'scores': [{'id': 2, 'score': 1.5}]}.
+    Готовые счета отправляются сразу и могут прийти раньше подтверждения.
+    Для расчета, исчерпавшего попытки, вместо счета приходит сообщение
+    'Расчет не удался, попытки исчерпаны'.
+    {'action': 'unsubscribe', 'ids': [1]} снимает подписку.
+
+    Подписок на соединение не больше results_max_ids, неотправленных
+    счетов не больше ws_queue_size. Если клиент не успевает читать,
+    соединение закрывается с кодом 1013.
+
+    Args:
+        websocket (WebSocket): Соединение клиента.
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+    """
+    await websocket.accept()
+    subscription = ScoreSubscription(
+        notifier=score_notifier,
+        maxsize=app_settings.ws_queue_size,
+        max_subscriptions=app_settings.results_max_ids,
+    )
+    tasks = [
+        asyncio.create_task(send_scores(websocket, subscription)),
+        asyncio.create_task(
+            receive_subscriptions(websocket, subscription, sessionmaker)
+        ),
+        asyncio.create_task(subscription.overflowed.wait()),
+    ]
+    try:
+        done, _ = await asyncio.wait(
+            tasks, return_when=asyncio.FIRST_COMPLETED
+        )
+        if subscription.overflowed.is_set():
+            await websocket.close(code=WS_1013_TRY_AGAIN_LATER)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                if not isinstance(task.exception(), WebSocketDisconnect):
+                    raise task.exception()
+    finally:
+        subscription.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
@@ -0,0 +1,67 @@
+"""Модуль со схемами аналитики счетов."""
+
+# STDLIB
+from typing import Literal
+
+# THIRDPARTY
+from pydantic import BaseModel, Field, model_validator
+
+
+class BoundingBox(BaseModel):
+    """Прямоугольник координат, без перехода через 180 меридиан.
+
+    Args:
+        min_lon (float): Минимальная долгота.
+        min_lat (float): Минимальная широта.
+        max_lon (float): Максимальная долгота.
+        max_lat (float): Максимальная широта.
+    """
+
+    min_lon: float = Field(..., ge=-180, le=180)
+    min_lat: float = Field(..., ge=-90, le=90)
+    max_lon: float = Field(..., ge=-180, le=180)
+    max_lat: float = Field(..., ge=-90, le=90)
+
+    @model_validator(mode='after')
+    def validate_order(self) -> 'BoundingBox':
+        """Проверка, что минимальные координаты не больше максимальных.
+
+        Returns:
+            BoundingBox: Прямоугольник, если координаты в верном порядке.
+
+        Raises:
+            ValueError: Если минимум больше максимума.
+        """
+        if self.min_lon > self.max_lon or self.min_lat > self.max_lat:
+            raise ValueError(
+                'bbox должен быть формата min_lon,min_lat,max_lon,max_lat'
+            )
+        return self
+
+
+class ScoreAnalyticsSchema(BaseModel):
+    """Статистика счетов.
+
+    Гистограмма - количество счетов в корзинах шириной
+    histogram_width, начиная с histogram_min: корзина i содержит счета
+    [histogram_min + i * histogram_width, ... + histogram_width).
+
+    Args:
+        source (str): live - по таблице result, rollup - по сводке
+            score_rollup с точностью до ячейки сетки и корзины.
+        count (int): Количество счетов.
+        mean (float | None): Среднее.
+        percentiles (dict[str, float | None]): Перцентили p50, p90, p95,
+            p99.
+        histogram_min (float): Нижняя граница первой корзины.
+        histogram_width (float): Ширина корзины.
+        histogram (list[int]): Количество счетов в корзинах.
+    """
+
+    source: Literal['live', 'rollup']
+    count: int
+    mean: float | None
+    percentiles: dict[str, float | None]
+    histogram_min: float
+    histogram_width: float
+    histogram: list[int]
@@ -2,6 +2,7 @@
 
 # STDLIB
 import re
+from typing import Literal
 
 # THIRDPARTY
 from pydantic import BaseModel, Field, field_validator
@@ -39,3 +40,71 @@ class CalcRequestSchema(BaseModel):
                 'Кадастровый номер должен быть формата' ' NN:NN:NNNNNN:NN'
             )
         return value
+
+
+class CalcJobMessage(CalcRequestSchema):
+    """Схема сообщения с задачей на расчет для брокера.
+
+    Args:
+        result_id (int): ID записи в таблице с счетом.
+    """
+
+    result_id: int = Field(..., description='ID записи с счетом')
+
+
+class CalcBatchErrorSchema(BaseModel):
+    """Ошибка валидации элемента пакетного запроса.
+
+    Args:
+        index (int): Позиция элемента во входных данных.
+        errors (list[str]): Сообщения об ошибках.
+    """
+
+    index: int
+    errors: list[str]
+
+
+class CalcBatchResponseSchema(BaseModel):
+    """Ответ на пакетный запрос на расчет.
+
+    Args:
+        ids (list[int | None]): ID записей счета в порядке входных данных,
+            None для элементов с ошибкой.
+        errors (list[CalcBatchErrorSchema]): Ошибки валидации элементов.
+    """
+
+    ids: list[int | None]
+    errors: list[CalcBatchErrorSchema]
+
+
+class NearTerritorySchema(BaseModel):
+    """Территория рядом с точкой.
+
+    Args:
+        cadastral_number (str): Кадастровый номер.
+        latitude (float): Широта.
+        longtitude (float): Долгота.
+        distance (float): Расстояние до точки, м.
+        score (float | None): Последний посчитанный счет.
+    """
+
+    cadastral_number: str
+    latitude: float
+    longtitude: float
+    distance: float
+    score: float | None
+
+
+class ScoreSubscriptionSchema(BaseModel):
+    """Сообщение клиента /ws/results.
+
+    Args:
+        action (str): subscribe или unsubscribe.
+        ids (list[int]): ID записей.
+        cadastral_numbers (list[str]): Кадастровые номера, только для
+            subscribe.
+    """
+
+    action: Literal['subscribe', 'unsubscribe']
+    ids: list[int] = Field(default_factory=list)
+    cadastral_numbers: list[str] = Field(default_factory=list)
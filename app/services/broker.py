@@ -0,0 +1,34 @@
+"""Kafka брокер для вынесения расчетов из API в отдельные консьюмеры.
+
+В режиме calc_mode='kafka' POST /calc/ публикует задачу в топик, а расчет
+выполняет консьюмер из app/consumer.py. Ключ сообщения - кадастровый номер,
+поэтому задачи одного участка попадают в одну партицию, а консьюмеры одной
+группы масштабируются по количеству партиций.
+"""
+
+# THIRDPARTY
+from faststream.kafka import KafkaBroker
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.schemas.territory import CalcJobMessage
+from app.services.tracing import tracing
+
+broker = KafkaBroker(app_settings.kafka_bootstrap_servers)
+
+calc_publisher = broker.publisher(app_settings.kafka_calc_topic)
+
+
+async def publish_calc_job(message: CalcJobMessage) -> None:
+    """Публикует задачу на расчет в топик.
+
+    Контекст текущей трассы передается в заголовках сообщения.
+
+    Args:
+        message (CalcJobMessage): Задача на расчет.
+    """
+    await calc_publisher.publish(
+        message,
+        key=message.cadastral_number.encode(),
+        headers=tracing.inject(),
+    )
@@ -0,0 +1,143 @@
+"""Разбор и валидация тела пакетного запроса на расчет.
+
+Тело принимается JSON массивом или NDJSON потоком (по объекту на строку,
+Content-Type: application/x-ndjson). Каждый элемент валидируется отдельно,
+ошибки собираются в ответ и не прерывают обработку остальных элементов.
+"""
+
+# STDLIB
+from dataclasses import dataclass, field
+import json
+from typing import Any, AsyncIterator
+
+# THIRDPARTY
+from fastapi import Request
+from pydantic import ValidationError
+
+# FIRSTPARTY
+from app.schemas.territory import CalcBatchErrorSchema, CalcRequestSchema
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl')
+
+
+class CalcBatchTooLarge(Exception):
+    """В пакете больше элементов, чем разрешено настройками."""
+
+
+class CalcBatchMalformed(Exception):
+    """Тело пакетного запроса не является массивом или NDJSON."""
+
+
+@dataclass
+class CalcBatch:
+    """Результат разбора пакетного запроса.
+
+    Args:
+        size (int): Количество элементов во входных данных.
+        items (list[tuple[int, CalcRequestSchema]]): Валидные элементы с
+            позицией во входных данных.
+        errors (list[CalcBatchErrorSchema]): Ошибки валидации.
+    """
+
+    size: int = 0
+    items: list[tuple[int, CalcRequestSchema]] = field(default_factory=list)
+    errors: list[CalcBatchErrorSchema] = field(default_factory=list)
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    """Построчно читает NDJSON тело запроса без загрузки целиком.
+
+    Args:
+        request (Request): Входящий запрос.
+
+    Yields:
+        Разобранный объект строки или исключение, если строка не JSON.
+    """
+    buffer = b''
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+def _loads(line: bytes) -> object:
+    """Разбирает строку NDJSON, возвращая исключение вместо выброса."""
+    try:
+        return json.loads(line)
+    except ValueError as error:
+        return error
+
+
+async def iter_json_array(request: Request) -> AsyncIterator[Any]:
+    """Читает тело запроса как JSON массив.
+
+    Args:
+        request (Request): Входящий запрос.
+
+    Yields:
+        Элементы массива.
+
+    Raises:
+        CalcBatchMalformed: Если тело не JSON массив.
+    """
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise CalcBatchMalformed from None
+    if not isinstance(body, list):
+        raise CalcBatchMalformed
+    for item in body:
+        yield item
+
+
+async def parse_calc_batch(request: Request, max_size: int) -> CalcBatch:
+    """Разбирает и валидирует пакетный запрос за один проход.
+
+    Args:
+        request (Request): Входящий запрос.
+        max_size (int): Максимальное количество элементов в пакете.
+
+    Returns:
+        CalcBatch: Валидные элементы и ошибки по позициям.
+
+    Raises:
+        CalcBatchTooLarge: Если элементов больше max_size.
+        CalcBatchMalformed: Если тело не JSON массив.
+    """
+    content_type = request.headers.get('content-type', '')
+    if content_type.split(';')[0].strip() in NDJSON_CONTENT_TYPES:
+        raw_items = iter_ndjson(request)
+    else:
+        raw_items = iter_json_array(request)
+
+    batch = CalcBatch()
+    async for raw_item in raw_items:
+        index = batch.size
+        batch.size += 1
+        if batch.size > max_size:
+            raise CalcBatchTooLarge
+        if isinstance(raw_item, ValueError):
+            batch.errors.append(
+                CalcBatchErrorSchema(index=index, errors=[str(raw_item)])
+            )
+            continue
+        try:
+            item = CalcRequestSchema.model_validate(raw_item)
+        except ValidationError as error:
+            batch.errors.append(
+                CalcBatchErrorSchema(
+                    index=index,
+                    errors=[
+                        f"{'.'.join(map(str, detail['loc']))}: "
+                        f"{detail['msg']}"
+                        for detail in error.errors()
+                    ],
+                )
+            )
+            continue
+        batch.items.append((index, item))
+    return batch
@@ -0,0 +1,168 @@
+"""Микропакетирование запросов к сервису вычислений.
+
+Расчеты копятся в буфере до max_size задач или linger секунд с первой
+задачи пачки, затем бэкенд вызывается один раз на всю пачку, а счета
+записываются одним UPDATE ... FROM (VALUES ...). Вызывающий расчет ждет,
+пока счет его записи не будет записан.
+"""
+
+# STDLIB
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.schemas.territory import CalcRequestSchema
+from app.services.histogram import Histogram
+from app.services.tracing import tracing
+
+if TYPE_CHECKING:
+    # FIRSTPARTY
+    from app.services.calculation import CalculationBackend
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BATCH_FILL_BUCKETS = (0.1, 0.25, 0.5, 0.75, 0.9, 1)
+
+PendingCalculation = tuple[CalcRequestSchema, int, asyncio.Future[float]]
+
+
+class CalcBatcher:
+    """Буфер расчетов, отправляемых бэкенду пачками."""
+
+    def __init__(
+        self,
+        backend: 'CalculationBackend',
+        sessionmaker: async_sessionmaker,
+        max_size: int,
+        linger: float,
+    ) -> None:
+        """Инициализация буфера.
+
+        Args:
+            backend (CalculationBackend): Бэкенд вычислений.
+            sessionmaker (async_sessionmaker): Фабрика сессий для записи
+                пачки счетов.
+            max_size (int): Максимальный размер пачки, 1 - без пачек.
+            linger (float): Сколько ждать добора пачки, сек.
+        """
+        self.backend = backend
+        self.sessionmaker = sessionmaker
+        self.max_size = max_size
+        self.linger = linger
+        self.sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.fill = Histogram(BATCH_FILL_BUCKETS)
+        self.flushed_full = 0
+        self.flushed_linger = 0
+        self._pending: list[PendingCalculation] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Собираются ли расчеты в пачки."""
+        return self.max_size > 1
+
+    def __len__(self) -> int:
+        """Количество расчетов, ожидающих отправки пачки."""
+        return len(self._pending)
+
+    async def calculate(
+        self, data: CalcRequestSchema, result_id: int
+    ) -> float:
+        """Ставит расчет в пачку и ждет записи его счета.
+
+        Args:
+            data (CalcRequestSchema): Информация для вычислений.
+            result_id (int): ID записи с счетом.
+
+        Returns:
+            float: Записанный счет.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((data, result_id, future))
+        if len(self._pending) >= self.max_size:
+            self.flushed_full += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger, self._flush_linger)
+        return await future
+
+    def stats(self) -> dict:
+        """Состояние буфера и гистограммы размера и заполнения пачек.
+
+        Returns:
+            dict: Настройки, счетчики отправок по заполнению и по
+                таймеру и гистограммы sizes и fill.
+        """
+        return {
+            'max_size': self.max_size,
+            'linger': self.linger,
+            'pending': len(self),
+            'flushed_full': self.flushed_full,
+            'flushed_linger': self.flushed_linger,
+            'sizes': self.sizes.as_dict(),
+            'fill': self.fill.as_dict(),
+        }
+
+    def _flush_linger(self) -> None:
+        """Отправляет неполную пачку по истечении linger."""
+        self._timer = None
+        if self._pending:
+            self.flushed_linger += 1
+            self._flush()
+
+    def _flush(self) -> None:
+        """Забирает буфер и запускает обработку пачки."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        self.sizes.observe(len(batch))
+        self.fill.observe(len(batch) / self.max_size)
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[PendingCalculation]) -> None:
+        """Считает пачку одним вызовом бэкенда и записывает счета.
+
+        Ошибка бэкенда или записи передается всем расчетам пачки.
+
+        Args:
+            batch (list[PendingCalculation]): Расчеты пачки.
+        """
+        try:
+            with tracing.span(
+                'CalculationBackend.calculate_many',
+                attributes={
+                    'calc.backend': type(self.backend).__name__,
+                    'calc.batch_size': len(batch),
+                },
+                kind='client',
+            ):
+                scores = await self.backend.calculate_many(
+                    [data for data, _, _ in batch]
+                )
+            async with self.sessionmaker() as session:
+                await Result(session=session).update_many(
+                    [
+                        (result_id, score)
+                        for (_, result_id, _), score in zip(batch, scores)
+                    ]
+                )
+        except Exception as error:
+            logger.exception('Ошибка расчета пачки из %s записей', len(batch))
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, _, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
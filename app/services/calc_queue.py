@@ -0,0 +1,184 @@
+"""Внутрипроцессная очередь фоновых расчетов.
+
+POST /calc/ кладет задачу в ограниченную очередь и сразу отвечает клиенту.
+Очередь разбирают воркеры, каждый из которых открывает собственную
+короткую сессию на время одного расчета.
+
+Задачи хранятся только в памяти: при падении процесса их записи остаются
+queued без счета. Восстановление описано в calc_worker.py.
+"""
+
+# STDLIB
+import asyncio
+from dataclasses import dataclass, field
+import logging
+from typing import Awaitable, Callable
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+# FIRSTPARTY
+from app.schemas.territory import CalcRequestSchema
+from app.services.tracing import tracing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CalcJob:
+    """Задача на расчет.
+
+    Args:
+        data (CalcRequestSchema): Данные для вычислений.
+        result_id (int): ID записи в таблице с счетом.
+        trace_context (dict[str, str]): Заголовки трассы, в которой
+            поставлена задача.
+    """
+
+    data: CalcRequestSchema
+    result_id: int
+    trace_context: dict[str, str] = field(default_factory=dict, compare=False)
+
+
+CalcHandler = Callable[[CalcJob, AsyncSession], Awaitable[None]]
+
+
+class CalcQueueFull(Exception):
+    """Очередь расчетов заполнена."""
+
+
+class CalcQueue:
+    """Ограниченная очередь расчетов с пулом воркеров."""
+
+    def __init__(
+        self,
+        handler: CalcHandler,
+        sessionmaker: async_sessionmaker,
+        workers: int,
+        maxsize: int,
+    ) -> None:
+        """Инициализация очереди.
+
+        Args:
+            handler (CalcHandler): Корутина расчета одной задачи.
+            sessionmaker (async_sessionmaker): Фабрика сессий для воркеров.
+            workers (int): Количество воркеров.
+            maxsize (int): Максимальное количество задач в очереди.
+        """
+        self.handler = handler
+        self.sessionmaker = sessionmaker
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue[CalcJob] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def started(self) -> bool:
+        """Запущены ли воркеры."""
+        return bool(self._tasks)
+
+    def qsize(self) -> int:
+        """Количество задач, ожидающих воркера."""
+        return self._queue.qsize() if self._queue else 0
+
+    def has_room(self, count: int) -> bool:
+        """Поместится ли в очередь count задач.
+
+        Args:
+            count (int): Количество задач.
+
+        Returns:
+            bool: True, если места достаточно.
+        """
+        return self.maxsize <= 0 or self.qsize() + count <= self.maxsize
+
+    def start(self) -> None:
+        """Запускает воркеры, повторный вызов ничего не делает."""
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f'calc-worker-{number}')
+            for number in range(self.workers)
+        ]
+
+    def submit(self, job: CalcJob) -> None:
+        """Ставит задачу в очередь без ожидания.
+
+        Воркеры запускаются при первой задаче, если lifespan приложения их
+        еще не запустил.
+
+        Args:
+            job (CalcJob): Задача на расчет.
+
+        Raises:
+            CalcQueueFull: Если в очереди нет места.
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise CalcQueueFull from None
+
+    def submit_many(self, jobs: list[CalcJob]) -> None:
+        """Ставит пакет задач в очередь целиком или не ставит ни одной.
+
+        Args:
+            jobs (list[CalcJob]): Задачи на расчет.
+
+        Raises:
+            CalcQueueFull: Если в очереди нет места для всего пакета.
+        """
+        self.start()
+        if not self.has_room(len(jobs)):
+            raise CalcQueueFull
+        for job in jobs:
+            self._queue.put_nowait(job)
+
+    async def join(self) -> None:
+        """Ожидает выполнения всех поставленных задач."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self, drain_timeout: float = 0) -> None:
+        """Останавливает воркеры.
+
+        Args:
+            drain_timeout (float): Сколько секунд дать воркерам на выполнение
+                уже поставленных задач перед отменой.
+        """
+        if not self.started:
+            return
+        if drain_timeout > 0:
+            try:
+                await asyncio.wait_for(self.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    'Очередь расчетов не разобрана, осталось задач: %s',
+                    self.qsize(),
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def _worker(self) -> None:
+        """Цикл воркера: берет задачу и выполняет ее в своей сессии."""
+        while True:
+            job = await self._queue.get()
+            try:
+                with tracing.span(
+                    'CalcQueue.job',
+                    attributes={'result_id': job.result_id},
+                    kind='consumer',
+                    carrier=job.trace_context,
+                ):
+                    async with self.sessionmaker() as session:
+                        await self.handler(job, session)
+            except Exception:
+                logger.exception(
+                    'Ошибка расчета для результата %s', job.result_id
+                )
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,269 @@
+"""Воркер расчетов, хранящихся в таблице result.
+
+В режиме calc_mode='db' POST /calc/ только создает запись, а расчет
+забирает воркер в процессе API или отдельный процесс app.worker:
+    python -m app.worker
+
+Воркер арендует пачку записей, выполняет расчеты не больше calc_workers
+одновременно и при старте и далее раз в calc_job_sweep_interval
+возвращает в очередь расчеты с просроченной арендой. Расчет, прерванный
+перезапуском пода, выполнит любой другой воркер.
+
+В режиме queue записи остаются queued, пока задачи лежат в памяти
+процесса API, и теряются при его падении. Их дорасчитывает разовый
+запуск, который выполняет все queued записи и завершается:
+    python -m app.worker --once
+Задачи, еще лежащие в очереди живых процессов, при этом могут быть
+посчитаны дважды, второй расчет перезапишет счет.
+"""
+
+# STDLIB
+import asyncio
+import logging
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.result_job import ResultJobs
+from app.database.db_prod_config import session as prod_sessionmaker
+from app.services.calc_queue import CalcHandler, CalcJob
+from app.services.calculation import remote_calculation
+from app.services.tracing import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class CalcWorker:
+    """Воркер, забирающий расчеты из БД через FOR UPDATE SKIP LOCKED."""
+
+    def __init__(
+        self,
+        handler: CalcHandler,
+        sessionmaker: async_sessionmaker,
+        workers: int,
+        batch_size: int,
+        lease: float,
+        poll_interval: float,
+        sweep_interval: float,
+        max_attempts: int,
+        retry_backoff: float = 0,
+        retry_max_backoff: float = 0,
+    ) -> None:
+        """Инициализация воркера.
+
+        Args:
+            handler (CalcHandler): Корутина расчета одной задачи.
+            sessionmaker (async_sessionmaker): Фабрика сессий.
+            workers (int): Максимальное количество одновременных расчетов.
+            batch_size (int): Сколько расчетов забирать за один запрос.
+            lease (float): Время аренды расчета, сек.
+            poll_interval (float): Интервал опроса пустой очереди, сек.
+            sweep_interval (float): Интервал возврата в очередь расчетов с
+                просроченной арендой, сек.
+            max_attempts (int): Количество попыток расчета.
+            retry_backoff (float): Пауза перед повтором расчета после
+                первой неудачной попытки, сек, далее удваивается.
+            retry_max_backoff (float): Максимальная пауза перед повтором,
+                сек.
+        """
+        self.handler = handler
+        self.sessionmaker = sessionmaker
+        self.workers = workers
+        self.batch_size = batch_size
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_max_backoff = retry_max_backoff
+        self._poller: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._running: dict[asyncio.Task, int] = {}
+        self._last_sweep = 0.0
+
+    def __len__(self) -> int:
+        """Количество выполняющихся расчетов."""
+        return len(self._running)
+
+    @property
+    def started(self) -> bool:
+        """Запущен ли воркер."""
+        return self._poller is not None
+
+    async def start(self) -> None:
+        """Возвращает в очередь просроченные расчеты и запускает опрос."""
+        if self.started:
+            return
+        await self.sweep()
+        self._wakeup = asyncio.Event()
+        self._poller = asyncio.create_task(self._poll(), name='calc-poller')
+
+    def wake(self) -> None:
+        """Будит опрос без ожидания poll_interval после создания записи."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def sweep(self) -> int:
+        """Возвращает в очередь расчеты с просроченной арендой.
+
+        Returns:
+            int: Количество возвращенных или отмеченных failed расчетов.
+        """
+        self._last_sweep = asyncio.get_running_loop().time()
+        async with self.sessionmaker() as session:
+            count = await ResultJobs(session).requeue_expired(
+                self.max_attempts, self.retry_backoff, self.retry_max_backoff
+            )
+        if count:
+            logger.warning('Возвращено расчетов с истекшей арендой: %s', count)
+        return count
+
+    async def drain(self) -> int:
+        """Выполняет все доступные расчеты без запуска опроса.
+
+        Расчеты забираются пачками не больше calc_workers, пока claim не
+        вернет пустую пачку. Расчеты с ошибкой возвращаются в очередь с
+        паузой и в этом запуске не повторяются.
+
+        Returns:
+            int: Количество выполненных расчетов, включая неудачные.
+        """
+        await self.sweep()
+        count = 0
+        while jobs := await self._claim(min(self.workers, self.batch_size)):
+            await asyncio.gather(*(self._run(job) for job in jobs))
+            count += len(jobs)
+        return count
+
+    async def stop(self, drain_timeout: float = 0) -> None:
+        """Останавливает опрос и выполняющиеся расчеты.
+
+        Расчеты, не завершившиеся за drain_timeout, отменяются и
+        возвращаются в очередь без учета попытки.
+
+        Args:
+            drain_timeout (float): Сколько секунд дать расчетам на
+                завершение перед отменой.
+        """
+        if not self.started:
+            return
+        self._poller.cancel()
+        await asyncio.gather(self._poller, return_exceptions=True)
+        if self._running and drain_timeout > 0:
+            await asyncio.wait(list(self._running), timeout=drain_timeout)
+        unfinished = [
+            id_ for task, id_ in self._running.items() if not task.done()
+        ]
+        for task in self._running:
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        if unfinished:
+            logger.warning(
+                'Расчеты возвращены в очередь при остановке: %s',
+                len(unfinished),
+            )
+            async with self.sessionmaker() as session:
+                await ResultJobs(session).release(unfinished)
+        self._running = {}
+        self._poller = None
+        self._wakeup = None
+
+    async def _claim(self, limit: int) -> list[CalcJob]:
+        """Забирает пачку расчетов в отдельной сессии.
+
+        Args:
+            limit (int): Максимальное количество расчетов.
+
+        Returns:
+            list[CalcJob]: Задачи на расчет.
+        """
+        async with self.sessionmaker() as session:
+            return await ResultJobs(session).claim(
+                limit=limit, lease=self.lease
+            )
+
+    async def _poll(self) -> None:
+        """Цикл опроса: забирает расчеты, пока есть свободные слоты."""
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() - self._last_sweep >= self.sweep_interval:
+                try:
+                    await self.sweep()
+                except Exception:
+                    logger.exception('Ошибка возврата просроченных расчетов')
+            free = self.workers - len(self._running)
+            if free <= 0:
+                await asyncio.wait(
+                    list(self._running), return_when=asyncio.FIRST_COMPLETED
+                )
+                continue
+            limit = min(free, self.batch_size)
+            self._wakeup.clear()
+            try:
+                jobs = await self._claim(limit)
+            except Exception:
+                logger.exception('Ошибка получения расчетов из БД')
+                jobs = []
+            for job in jobs:
+                task = asyncio.create_task(self._run(job))
+                self._running[task] = job.result_id
+                task.add_done_callback(self._running.pop)
+            if len(jobs) < limit:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _run(self, job: CalcJob) -> None:
+        """Выполняет расчет, при ошибке возвращает его в очередь с паузой.
+
+        Args:
+            job (CalcJob): Задача на расчет.
+        """
+        try:
+            with tracing.span(
+                'CalcWorker.job',
+                attributes={'result_id': job.result_id},
+                kind='consumer',
+            ):
+                async with self.sessionmaker() as session:
+                    await self.handler(job, session)
+        except Exception:
+            logger.exception('Ошибка расчета для результата %s', job.result_id)
+            async with self.sessionmaker() as session:
+                await ResultJobs(session).fail(
+                    job.result_id,
+                    self.max_attempts,
+                    self.retry_backoff,
+                    self.retry_max_backoff,
+                )
+
+
+async def calculate_claimed_job(job: CalcJob, session: AsyncSession) -> None:
+    """Выполнение расчета, полученного из БД.
+
+    Args:
+        job (CalcJob): Задача на расчет.
+        session (AsyncSession): Сессия расчета.
+    """
+    await remote_calculation(
+        data=job.data, result_id=job.result_id, session=session
+    )
+
+
+calc_worker = CalcWorker(
+    handler=calculate_claimed_job,
+    sessionmaker=prod_sessionmaker,
+    workers=app_settings.calc_workers,
+    batch_size=app_settings.calc_job_batch_size,
+    lease=app_settings.calc_job_lease,
+    poll_interval=app_settings.calc_job_poll_interval,
+    sweep_interval=app_settings.calc_job_sweep_interval,
+    max_attempts=app_settings.calc_job_max_attempts,
+    retry_backoff=app_settings.calc_job_retry_backoff,
+    retry_max_backoff=app_settings.calc_job_retry_max_backoff,
+)
@@ -0,0 +1,166 @@
+"""Сервис вычисления счета по территории.
+
+Счет считает бэкенд вычислений, выбранный настройкой calc_backend:
+stub - имитация сервиса в процессе, http - внешний сервис вычислений,
+local - векторный расчет на NumPy в процессе или в пуле процессов
+cpu_executor, см. cpu_executor.py.
+Запросы к бэкенду могут собираться в пачки, см. calc_batcher.py.
+"""
+
+# STDLIB
+import asyncio
+import random
+import time
+from typing import Protocol
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.result import Result
+from app.database.db_prod_config import session as prod_sessionmaker
+from app.schemas.territory import CalcRequestSchema
+from app.services.calc_batcher import CalcBatcher
+from app.services.cpu_executor import CpuExecutor
+from app.services.http_backend import HttpCalculationBackend
+from app.services.local_scoring import NumpyScoringEngine
+from app.services.metrics import calc_remote_seconds
+from app.services.tracing import tracing
+
+
+class CalculationBackend(Protocol):
+    """Бэкенд вычисления счета."""
+
+    async def calculate(self, data: CalcRequestSchema) -> float:
+        """Счет по данным территории."""
+
+    async def calculate_many(
+        self, data: list[CalcRequestSchema]
+    ) -> list[float]:
+        """Счета пачки территорий в порядке data."""
+
+    async def aclose(self) -> None:
+        """Закрывает соединения бэкенда."""
+
+
+class StubCalculationBackend:
+    """Имитация сервиса вычислений: случайный счет после паузы."""
+
+    def __init__(self, min_delay: int = 10, max_delay: int = 20) -> None:
+        """Инициализация имитации.
+
+        Args:
+            min_delay (int): Минимальная пауза, сек.
+            max_delay (int): Максимальная пауза, сек.
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    async def calculate(self, data: CalcRequestSchema) -> float:
+        """Случайный счет после паузы.
+
+        Args:
+            data (CalcRequestSchema): Информация для вычислений.
+
+        Returns:
+            float: Счет от -100 до 100.
+        """
+        await asyncio.sleep(random.randint(self.min_delay, self.max_delay))
+        return round(random.uniform(-100, 100), 6)
+
+    async def calculate_many(
+        self, data: list[CalcRequestSchema]
+    ) -> list[float]:
+        """Случайные счета пачки после одной паузы.
+
+        Args:
+            data (list[CalcRequestSchema]): Информация для вычислений.
+
+        Returns:
+            list[float]: Счета от -100 до 100.
+        """
+        await asyncio.sleep(random.randint(self.min_delay, self.max_delay))
+        return [round(random.uniform(-100, 100), 6) for _ in data]
+
+    async def aclose(self) -> None:
+        """У имитации нет соединений."""
+
+
+def create_calculation_backend() -> CalculationBackend:
+    """Создает бэкенд вычислений по настройкам приложения.
+
+    Returns:
+        CalculationBackend: Бэкенд выбранного типа.
+    """
+    if app_settings.calc_backend == 'local':
+        return NumpyScoringEngine(executor=cpu_executor)
+    if app_settings.calc_backend == 'http':
+        return HttpCalculationBackend(
+            url=app_settings.calc_backend_url,
+            concurrency=app_settings.calc_backend_concurrency,
+            timeout=app_settings.calc_backend_timeout,
+            connect_timeout=app_settings.calc_backend_connect_timeout,
+            retries=app_settings.calc_backend_retries,
+            backoff=app_settings.calc_backend_backoff,
+            breaker_threshold=app_settings.calc_backend_breaker_threshold,
+            breaker_reset=app_settings.calc_backend_breaker_reset,
+        )
+    return StubCalculationBackend()
+
+
+cpu_executor = CpuExecutor(
+    kind=app_settings.calc_executor,
+    workers=app_settings.calc_executor_workers,
+    chunk_size=app_settings.calc_executor_chunk_size,
+    queue_size=app_settings.calc_executor_queue_size,
+)
+
+calculation_backend = create_calculation_backend()
+
+calc_batcher = CalcBatcher(
+    backend=calculation_backend,
+    sessionmaker=prod_sessionmaker,
+    max_size=app_settings.calc_backend_batch_size,
+    linger=app_settings.calc_backend_batch_linger_ms / 1000,
+)
+
+
+async def remote_calculation(
+    data: CalcRequestSchema,
+    result_id: int,
+    session: AsyncSession,
+    backend: CalculationBackend | None = None,
+) -> None:
+    """Вычисляет счет и записывает его.
+
+    При calc_backend_batch_size > 1 расчет уходит в пачку calc_batcher, и
+    счет записывается вместе со счетами всей пачки. Время вызова попадает
+    в метрику calc_remote_calculation_seconds, вызов бэкенда - в спан
+    CalculationBackend.calculate.
+
+    Args:
+        data (CalcRequestSchema): Инофрмация для вычислений.
+        result_id (int): ID записи с счетом, полученный из Territory.create.
+        session (AsyncSession): Асинхронная сессия для подключения к бд.
+        backend (CalculationBackend | None): Бэкенд вычислений, по
+            умолчанию бэкенд процесса.
+    """
+    started = time.perf_counter()
+    try:
+        if backend is None and calc_batcher.enabled:
+            await calc_batcher.calculate(data, result_id)
+            return
+        backend = calculation_backend if backend is None else backend
+        with tracing.span(
+            'CalculationBackend.calculate',
+            attributes={'calc.backend': type(backend).__name__},
+            kind='client',
+        ):
+            score = await backend.calculate(data)
+        result = Result(session=session)
+        await result.update(id_=result_id, score=score)
+    finally:
+        calc_remote_seconds.labels(app_settings.calc_backend).observe(
+            time.perf_counter() - started
+        )
@@ -0,0 +1,200 @@
+"""Пул процессов для вычислений, нагружающих процессор.
+
+Расчет внутри цикла событий останавливает обработку всех запросов
+процесса, поэтому CPU-bound бэкенды отправляют работу в пул процессов
+(calc_executor=process) или субинтерпретаторов (calc_executor=interpreter,
+Python 3.14+) через loop.run_in_executor.
+
+Элементы делятся на пачки по chunk_size. В пуле одновременно не больше
+queue_size пачек, остальные ждут свободного места в цикле событий, так что
+очередь пула не растет без ограничений.
+"""
+
+# STDLIB
+import asyncio
+import concurrent.futures
+import multiprocessing
+import time
+from typing import Any, Callable, Literal, Sequence
+
+# FIRSTPARTY
+from app.services.histogram import Histogram
+
+CHUNK_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+ChunkFunc = Callable[[list], list]
+
+
+def run_timed(func: ChunkFunc, chunk: list) -> tuple[list, float]:
+    """Выполняет функцию над пачкой и замеряет время в процессе пула.
+
+    Args:
+        func (ChunkFunc): Функция пачки, импортируемая по имени модуля.
+        chunk (list): Пачка элементов.
+
+    Returns:
+        tuple[list, float]: Результаты пачки и время расчета, сек.
+    """
+    started = time.perf_counter()
+    result = func(chunk)
+    return result, time.perf_counter() - started
+
+
+class CpuExecutor:
+    """Пул процессов с ограниченной очередью пачек и метриками загрузки."""
+
+    def __init__(
+        self,
+        kind: Literal['none', 'process', 'interpreter'],
+        workers: int,
+        chunk_size: int,
+        queue_size: int,
+    ) -> None:
+        """Инициализация пула.
+
+        Пул создается при первой пачке.
+
+        Args:
+            kind (str): none - расчет в цикле событий, process - пул
+                процессов, interpreter - пул субинтерпретаторов.
+            workers (int): Количество процессов пула.
+            chunk_size (int): Максимальный размер пачки элементов.
+            queue_size (int): Максимальное количество пачек в пуле.
+        """
+        self.kind = kind
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.chunks = 0
+        self.items = 0
+        self.busy = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.chunk_seconds = Histogram(CHUNK_SECONDS_BUCKETS)
+        self._executor: concurrent.futures.Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._started_at: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Выполняются ли пачки в пуле."""
+        return self.kind != 'none'
+
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        """Пул, создается при первом обращении.
+
+        Raises:
+            RuntimeError: Если выбран interpreter, а в Python нет
+                InterpreterPoolExecutor.
+        """
+        if self._executor is None:
+            if self.kind == 'interpreter':
+                pool = getattr(
+                    concurrent.futures, 'InterpreterPoolExecutor', None
+                )
+                if pool is None:
+                    raise RuntimeError(
+                        'Для CALC_EXECUTOR=interpreter нужен Python 3.14+'
+                    )
+                self._executor = pool(max_workers=self.workers)
+            else:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            self._slots = asyncio.Semaphore(self.queue_size)
+            self._started_at = time.monotonic()
+        return self._executor
+
+    async def map(self, func: ChunkFunc, items: Sequence[Any]) -> list:
+        """Выполняет функцию над элементами пачками по chunk_size.
+
+        Args:
+            func (ChunkFunc): Функция уровня модуля, возвращающая по
+                результату на каждый элемент пачки.
+            items (Sequence[Any]): Элементы.
+
+        Returns:
+            list: Результаты в порядке items.
+        """
+        chunks = []
+        for start in range(0, len(items), self.chunk_size):
+            end = start + self.chunk_size
+            chunks.append(list(items[start:end]))
+        if not self.enabled:
+            return [result for chunk in chunks for result in func(chunk)]
+        results = await asyncio.gather(
+            *(self._run(func, chunk) for chunk in chunks)
+        )
+        return [result for chunk in results for result in chunk]
+
+    async def _run(self, func: ChunkFunc, chunk: list) -> list:
+        """Отправляет пачку в пул, дождавшись места в очереди.
+
+        Args:
+            func (ChunkFunc): Функция пачки.
+            chunk (list): Пачка элементов.
+
+        Returns:
+            list: Результаты пачки.
+        """
+        executor = self.executor
+        loop = asyncio.get_running_loop()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            result, seconds = await loop.run_in_executor(
+                executor, run_timed, func, chunk
+            )
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+        self.chunks += 1
+        self.items += len(chunk)
+        self.busy += seconds
+        self.chunk_seconds.observe(seconds)
+        return result
+
+    def stats(self) -> dict:
+        """Глубина очереди, загрузка пула и гистограмма времени пачек.
+
+        Returns:
+            dict: JSON формата {'kind': 'process', 'workers': 8,
+                'queue_size': 16, 'in_flight': 3, 'waiting': 0,
+                'chunks': 10, 'items': 100000, 'busy': 1.2,
+                'utilisation': 0.05, 'chunk_seconds': {...}}, где
+                in_flight - пачки в пуле, waiting - пачки, ждущие места в
+                очереди, utilisation - доля времени работы процессов пула
+                с момента его создания.
+        """
+        uptime = 0.0
+        if self._started_at is not None:
+            uptime = time.monotonic() - self._started_at
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'chunks': self.chunks,
+            'items': self.items,
+            'busy': self.busy,
+            'utilisation': (
+                min(1.0, self.busy / (uptime * self.workers)) if uptime else 0
+            ),
+            'chunk_seconds': self.chunk_seconds.as_dict(),
+        }
+
+    async def shutdown(self) -> None:
+        """Дожидается пачек в пуле и останавливает его процессы."""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True)
+        self._slots = None
+        self._started_at = None
@@ -0,0 +1,144 @@
+"""Geohash ячейки для поиска территорий рядом с точкой.
+
+Geohash кодирует точку строкой base32, где каждый символ делит ячейку
+предыдущего уровня на 32 части, поэтому точки одной ячейки имеют общий
+префикс. Колонка territory.geohash с C-сортировкой и B-tree индексом
+позволяет выбрать точки ячейки диапазоном [prefix, prefix + '{').
+
+Кодирование совпадает с SQL функцией geohash_encode из models.py.
+"""
+
+# STDLIB
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS = 6371008.8
+MAX_CELLS = 16
+
+
+def encode(latitude: float, longtitude: float, precision: int) -> str:
+    """Geohash точки.
+
+    Args:
+        latitude (float): Широта.
+        longtitude (float): Долгота.
+        precision (int): Количество символов.
+
+    Returns:
+        str: Geohash.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    char = bit = 0
+    even = True
+    while len(geohash) < precision:
+        value, bounds = (
+            (longtitude, lon_range) if even else (latitude, lat_range)
+        )
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            char = char * 2 + 1
+            bounds[0] = middle
+        else:
+            char *= 2
+            bounds[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            geohash.append(GEOHASH_ALPHABET[char])
+            char = bit = 0
+    return ''.join(geohash)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """Размер ячейки в градусах.
+
+    Args:
+        precision (int): Количество символов geohash.
+
+    Returns:
+        tuple[float, float]: Высота по широте и ширина по долготе.
+    """
+    lat_bits = precision * 5 // 2
+    lon_bits = precision * 5 - lat_bits
+    return 180 / 2**lat_bits, 360 / 2**lon_bits
+
+
+def covering_cells(
+    latitude: float,
+    longtitude: float,
+    radius: float,
+    max_cells: int = MAX_CELLS,
+) -> list[str]:
+    """Geohash ячейки, покрывающие круг вокруг точки.
+
+    Args:
+        latitude (float): Широта центра.
+        longtitude (float): Долгота центра.
+        radius (float): Радиус, м.
+        max_cells (int): Максимальное количество ячеек.
+
+    Returns:
+        list[str]: Отсортированные префиксы geohash.
+    """
+    delta_lat = math.degrees(radius / EARTH_RADIUS)
+    lat_min = max(-90.0, latitude - delta_lat)
+    lat_max = min(90.0, latitude + delta_lat)
+    widest = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    if widest <= 0 or delta_lat / widest >= 180:
+        lon_min, lon_max = -180.0, 180.0
+    else:
+        delta_lon = delta_lat / widest
+        lon_min, lon_max = longtitude - delta_lon, longtitude + delta_lon
+    return bbox_cells(lat_min, lon_min, lat_max, lon_max, max_cells)
+
+
+def bbox_cells(
+    lat_min: float,
+    lon_min: float,
+    lat_max: float,
+    lon_max: float,
+    max_cells: int = MAX_CELLS,
+) -> list[str]:
+    """Geohash ячейки, покрывающие прямоугольник.
+
+    Выбирается самая мелкая точность, при которой прямоугольник покрывают
+    не больше max_cells ячеек. Долготы за пределами [-180, 180]
+    переходят через 180 меридиан.
+
+    Args:
+        lat_min (float): Минимальная широта.
+        lon_min (float): Минимальная долгота.
+        lat_max (float): Максимальная широта.
+        lon_max (float): Максимальная долгота.
+        max_cells (int): Максимальное количество ячеек.
+
+    Returns:
+        list[str]: Отсортированные префиксы geohash.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        columns = round(360 / width)
+        rows = range(
+            int((lat_min + 90) // height),
+            min(int((lat_max + 90) // height), round(180 / height) - 1) + 1,
+        )
+        first = math.floor((lon_min + 180) / width)
+        last = min(math.floor((lon_max + 180) / width), first + columns - 1)
+        if len(rows) * (last - first + 1) > max_cells:
+            continue
+        cols = {col % columns for col in range(first, last + 1)}
+        return sorted(
+            {
+                encode(
+                    -90 + (row + 0.5) * height,
+                    -180 + (col + 0.5) * width,
+                    precision,
+                )
+                for row in rows
+                for col in cols
+            }
+        )
+    return sorted(GEOHASH_ALPHABET)
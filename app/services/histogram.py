@@ -0,0 +1,48 @@
+"""Гистограмма значений в памяти процесса."""
+
+# STDLIB
+from bisect import bisect_left
+from typing import Sequence
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин.
+
+    Корзины накопительные, как в Prometheus: в корзину le попадают все
+    значения не больше le.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        """Инициализация пустой гистограммы.
+
+        Args:
+            buckets (Sequence[float]): Возрастающие верхние границы корзин.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Добавляет значение.
+
+        Args:
+            value (float): Наблюдаемое значение.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self) -> dict:
+        """Накопительные счетчики корзин, количество и сумма значений.
+
+        Returns:
+            dict: {'buckets': {'1': 3, ..., '+Inf': 10}, 'count': 10,
+                'sum': 42.0}.
+        """
+        buckets = {}
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            buckets[f'{bound:g}' if bound != '+Inf' else bound] = total
+        return {'buckets': buckets, 'count': self.count, 'sum': self.sum}
@@ -0,0 +1,315 @@
+"""HTTP бэкенд вычислений: запрос счета у внешнего сервиса.
+
+Сервис принимает POST {url}/score с телом
+    {"cadastral_number": "77:01:000401:01", "latitude": 55.7,
+     "longtitude": 37.6}
+и отвечает {"score": -45.123125}. Пачка территорий отправляется на
+POST {url}/score/batch.
+
+Все расчеты процесса используют один AsyncClient с пулом соединений.
+Количество одновременных запросов ограничено семафором, каждая попытка -
+таймаутом. Ошибки соединения, таймауты, 429 и 5xx повторяются с паузой
+со случайным разбросом, а после calc_backend_breaker_threshold ошибок
+подряд размыкатель перестает обращаться к сервису на
+calc_backend_breaker_reset секунд.
+"""
+
+# STDLIB
+import asyncio
+import random
+import time
+from typing import Callable
+
+# THIRDPARTY
+import httpx
+
+# FIRSTPARTY
+from app.schemas.territory import CalcRequestSchema
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CalculationBackendError(Exception):
+    """Сервис вычислений не вернул счет."""
+
+
+class CircuitOpen(CalculationBackendError):
+    """Размыкатель разомкнут, запросы к сервису не выполняются."""
+
+
+class CircuitBreaker:
+    """Размыкатель: прекращает запросы к сервису после серии ошибок.
+
+    После threshold ошибок подряд размыкатель размыкается на reset секунд.
+    Затем пропускается одна пробная попытка: успех замыкает его, ошибка
+    размыкает снова.
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        reset: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализация замкнутого размыкателя.
+
+        Args:
+            threshold (int): Количество ошибок подряд до размыкания.
+            reset (float): Время до пробной попытки, сек.
+            clock (Callable[[], float]): Источник времени.
+        """
+        self.threshold = threshold
+        self.reset = reset
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """Состояние: closed, open или half-open."""
+        if self._opened_at is None:
+            return 'closed'
+        if self.clock() - self._opened_at < self.reset:
+            return 'open'
+        return 'half-open'
+
+    def allow(self) -> None:
+        """Проверяет, можно ли выполнить попытку.
+
+        Raises:
+            CircuitOpen: Если размыкатель разомкнут или пробная попытка
+                уже выполняется.
+        """
+        state = self.state
+        if state == 'closed':
+            return
+        if state == 'open' or self._trial:
+            raise CircuitOpen
+        self._trial = True
+
+    def record_success(self) -> None:
+        """Успешная попытка замыкает размыкатель."""
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        """Ошибка попытки, при достижении порога размыкает размыкатель."""
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            self._opened_at = self.clock()
+        self._trial = False
+
+    def release(self) -> None:
+        """Отмененная попытка: результат не учитывается.
+
+        Пробная попытка освобождается, и следующий запрос может ее
+        повторить.
+        """
+        self._trial = False
+
+
+class HttpCalculationBackend:
+    """Бэкенд вычислений поверх общего httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int,
+        timeout: float,
+        connect_timeout: float,
+        retries: int,
+        backoff: float,
+        breaker_threshold: int,
+        breaker_reset: float,
+        max_backoff: float = 10,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """Инициализация бэкенда.
+
+        Клиент создается при первом запросе, чтобы привязаться к циклу
+        событий процесса.
+
+        Args:
+            url (str): Адрес сервиса вычислений.
+            concurrency (int): Максимальное количество одновременных
+                запросов и размер пула соединений.
+            timeout (float): Время на одну попытку запроса, сек.
+            connect_timeout (float): Время на соединение, сек.
+            retries (int): Количество повторов после первой попытки.
+            backoff (float): Базовая пауза перед повтором, сек.
+            breaker_threshold (int): Ошибок подряд до размыкания.
+            breaker_reset (float): Время до пробной попытки, сек.
+            max_backoff (float): Максимальная пауза перед повтором, сек.
+            transport (httpx.AsyncBaseTransport | None): Транспорт клиента,
+                для тестов.
+        """
+        self.url = url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transport = transport
+        self.breaker = CircuitBreaker(
+            threshold=breaker_threshold, reset=breaker_reset
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Общий клиент с пулом на concurrency соединений."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                transport=self.transport,
+                timeout=httpx.Timeout(
+                    self.timeout, connect=self.connect_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                ),
+            )
+        return self._client
+
+    async def calculate(self, data: CalcRequestSchema) -> float:
+        """Запрашивает счет одной территории.
+
+        Args:
+            data (CalcRequestSchema): Информация для вычислений.
+
+        Returns:
+            float: Счет.
+
+        Raises:
+            CircuitOpen: Если размыкатель разомкнут.
+            CalculationBackendError: Если сервис не вернул счет за все
+                попытки или ответил ошибкой, которую не нужно повторять.
+        """
+        response = await self._post('/score', data.model_dump())
+        return self._parse_score(response)
+
+    async def calculate_many(
+        self, data: list[CalcRequestSchema]
+    ) -> list[float]:
+        """Запрашивает счета пачки территорий одним запросом.
+
+        Сервис принимает POST {url}/score/batch с телом
+        {"items": [...]} и отвечает {"scores": [...]} в том же порядке.
+
+        Args:
+            data (list[CalcRequestSchema]): Информация для вычислений.
+
+        Returns:
+            list[float]: Счета в порядке data.
+
+        Raises:
+            CircuitOpen: Если размыкатель разомкнут.
+            CalculationBackendError: Если сервис не вернул счета.
+        """
+        response = await self._post(
+            '/score/batch', {'items': [item.model_dump() for item in data]}
+        )
+        try:
+            scores = [float(score) for score in response.json()['scores']]
+        except (ValueError, KeyError, TypeError) as e:
+            raise CalculationBackendError(
+                f'Некорректный ответ сервиса вычислений: {e!r}'
+            ) from None
+        if len(scores) != len(data):
+            raise CalculationBackendError(
+                f'Сервис вычислений вернул {len(scores)} счетов '
+                f'вместо {len(data)}'
+            )
+        return scores
+
+    async def _post(self, path: str, payload: dict) -> httpx.Response:
+        """POST запрос к сервису с повторами.
+
+        Args:
+            path (str): Путь ендпоинта сервиса.
+            payload (dict): Тело запроса.
+
+        Returns:
+            httpx.Response: Успешный ответ.
+
+        Каждая попытка, пропущенная размыкателем, учитывается в нем: прочие
+        ошибки - как неудача, отмена - без учета, иначе пробная попытка в
+        состоянии half-open так и осталась бы занятой.
+
+        Raises:
+            CircuitOpen: Если размыкатель разомкнут.
+            CalculationBackendError: Если сервис не ответил успешно за все
+                попытки или ответил ошибкой, которую не нужно повторять.
+        """
+        for attempt in range(self.retries + 1):
+            self.breaker.allow()
+            try:
+                async with self._semaphore:
+                    async with asyncio.timeout(self.timeout):
+                        response = await self.client.post(path, json=payload)
+            except (httpx.TransportError, TimeoutError) as e:
+                error = CalculationBackendError(repr(e))
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except BaseException:
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 400:
+                    self.breaker.record_success()
+                    return response
+                error = CalculationBackendError(
+                    f'Сервис вычислений ответил {response.status_code}'
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    raise error
+            self.breaker.record_failure()
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt))
+        raise error
+
+    @staticmethod
+    def _parse_score(response: httpx.Response) -> float:
+        """Счет из ответа сервиса.
+
+        Args:
+            response (httpx.Response): Успешный ответ.
+
+        Returns:
+            float: Счет.
+
+        Raises:
+            CalculationBackendError: Если в ответе нет счета.
+        """
+        try:
+            return float(response.json()['score'])
+        except (ValueError, KeyError, TypeError) as e:
+            raise CalculationBackendError(
+                f'Некорректный ответ сервиса вычислений: {e!r}'
+            ) from None
+
+    def _delay(self, attempt: int) -> float:
+        """Пауза перед повтором: full jitter от экспоненциальной паузы.
+
+        Args:
+            attempt (int): Номер неудачной попытки, с 0.
+
+        Returns:
+            float: Пауза, сек.
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2**attempt)
+        )
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,96 @@
+"""Локальный векторный расчет счета на NumPy.
+
+Счет считается по колонкам широт и долгот целиком, без сети и без цикла
+по территориям, поэтому подходит для пересчета миллионов записей.
+Требует пакет numpy. С пулом CpuExecutor расчет выполняется в процессах
+пула и не занимает цикл событий.
+
+Формула совпадает по диапазону с имитацией сервиса: счет от -100 до 100,
+округленный до 6 знаков, но зависит только от координат.
+"""
+
+# THIRDPARTY
+import numpy as np
+
+# FIRSTPARTY
+from app.schemas.territory import CalcRequestSchema
+from app.services.cpu_executor import CpuExecutor
+
+
+def score_arrays(latitude: np.ndarray, longtitude: np.ndarray) -> np.ndarray:
+    """Счета по колонкам координат.
+
+    Args:
+        latitude (np.ndarray): Широты, градусы.
+        longtitude (np.ndarray): Долготы, градусы.
+
+    Returns:
+        np.ndarray: Счета float64 той же длины.
+    """
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longtitude, dtype=np.float64))
+    return np.round(100 * np.sin(3 * lat) * np.cos(2 * lon), 6)
+
+
+def score_chunk(coordinates: list[tuple[float, float]]) -> list[float]:
+    """Счета пачки координат, функция для пула процессов.
+
+    Args:
+        coordinates (list[tuple[float, float]]): Пары широта, долгота.
+
+    Returns:
+        list[float]: Счета в порядке coordinates.
+    """
+    array = np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+    return score_arrays(array[:, 0], array[:, 1]).tolist()
+
+
+class NumpyScoringEngine:
+    """Бэкенд вычислений в процессе на NumPy."""
+
+    def __init__(self, executor: CpuExecutor | None = None) -> None:
+        """Инициализация бэкенда.
+
+        Args:
+            executor (CpuExecutor | None): Пул для расчета вне цикла
+                событий, по умолчанию расчет в цикле событий.
+        """
+        self.executor = executor
+
+    async def calculate(self, data: CalcRequestSchema) -> float:
+        """Счет одной территории.
+
+        Args:
+            data (CalcRequestSchema): Информация для вычислений.
+
+        Returns:
+            float: Счет.
+        """
+        return (await self.calculate_many([data]))[0]
+
+    async def calculate_many(
+        self, data: list[CalcRequestSchema]
+    ) -> list[float]:
+        """Счета пачки территорий одним векторным расчетом.
+
+        Args:
+            data (list[CalcRequestSchema]): Информация для вычислений.
+
+        Returns:
+            list[float]: Счета в порядке data.
+        """
+        if self.executor is not None and self.executor.enabled:
+            return await self.executor.map(
+                score_chunk,
+                [(item.latitude, item.longtitude) for item in data],
+            )
+        latitude = np.fromiter(
+            (item.latitude for item in data), np.float64, len(data)
+        )
+        longtitude = np.fromiter(
+            (item.longtitude for item in data), np.float64, len(data)
+        )
+        return score_arrays(latitude, longtitude).tolist()
+
+    async def aclose(self) -> None:
+        """У локального расчета нет соединений."""
@@ -0,0 +1,433 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Гистограммы хранятся в Histogram по набору значений меток или берутся
+функцией у сервиса при чтении /metrics, gauge и counter либо меняются
+кодом, либо считаются функцией при чтении. Каждая
+метрика ограничивает количество наборов меток: значения сверх max_series
+попадают в набор other, поэтому произвольные пути и тексты запросов не
+раздувают память и ответ /metrics.
+
+Метрики процесса не суммируются между воркерами uvicorn, каждый воркер
+отдает свои, Prometheus собирает их по отдельности.
+"""
+
+# STDLIB
+from functools import lru_cache
+import re
+import time
+from typing import Callable, Sequence
+
+# THIRDPARTY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.services.histogram import Histogram
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SECONDS_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+OTHER = 'other'
+UNMATCHED_ROUTE = '<unmatched>'
+STATEMENT_OPERATIONS = frozenset(
+    ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+)
+STATEMENT_TABLE = re.compile(
+    r'\b(?:FROM|INTO|UPDATE)\s+"?([a-z_][\w.]*)', re.IGNORECASE
+)
+
+Collect = Callable[[], dict[tuple[str, ...], float]]
+CollectHistograms = Callable[[], dict[tuple[str, ...], Histogram]]
+
+
+def escape(value: str) -> str:
+    """Экранирует значение метки.
+
+    Args:
+        value (str): Значение метки.
+
+    Returns:
+        str: Значение для текстового формата.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Метки в фигурных скобках.
+
+    Args:
+        names (Sequence[str]): Имена меток.
+        values (Sequence[str]): Значения меток.
+
+    Returns:
+        str: {name="value",...} или пустая строка без меток.
+    """
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape(value)}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class LabeledHistogram:
+    """Гистограмма с метками и ограниченным количеством наборов меток."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = SECONDS_BUCKETS,
+        max_series: int = 1000,
+        collect: CollectHistograms | None = None,
+    ) -> None:
+        """Инициализация гистограммы.
+
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание для HELP.
+            labelnames (Sequence[str]): Имена меток.
+            buckets (Sequence[float]): Верхние границы корзин.
+            max_series (int): Максимальное количество наборов меток.
+            collect (CollectHistograms | None): Функция, возвращающая
+                гистограммы сервиса по наборам меток при чтении /metrics,
+                корзины берутся из самих гистограмм.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.max_series = max_series
+        self.collect = collect
+        self.series: dict[tuple[str, ...], Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        """Гистограмма набора меток.
+
+        Args:
+            *values (str): Значения меток в порядке labelnames.
+
+        Returns:
+            Histogram: Гистограмма набора или набора other, если наборов
+                уже max_series.
+        """
+        histogram = self.series.get(values)
+        if histogram is None:
+            if len(self.series) >= self.max_series:
+                values = (OTHER,) * len(self.labelnames)
+                histogram = self.series.get(values)
+            if histogram is None:
+                histogram = self.series[values] = Histogram(self.buckets)
+        return histogram
+
+    def render(self) -> list[str]:
+        """Строки метрики в текстовом формате.
+
+        Returns:
+            list[str]: HELP, TYPE, корзины, сумма и количество наборов.
+        """
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        series = self.series if self.collect is None else self.collect()
+        for values, histogram in list(series.items()):
+            data = histogram.as_dict()
+            for bound, count in data['buckets'].items():
+                labels = format_labels(
+                    (*self.labelnames, 'le'), (*values, bound)
+                )
+                lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {data['sum']}")
+            lines.append(f"{self.name}_count{labels} {data['count']}")
+        return lines
+
+
+class Gauge:
+    """Gauge, который меняет код или считает функция при чтении."""
+
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Collect | None = None,
+    ) -> None:
+        """Инициализация gauge.
+
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание для HELP.
+            labelnames (Sequence[str]): Имена меток.
+            collect (Collect | None): Функция, возвращающая значения по
+                наборам меток при чтении /metrics.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """Увеличивает значение gauge без меток."""
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """Уменьшает значение gauge без меток."""
+        self.value -= amount
+
+    def render(self) -> list[str]:
+        """Строки метрики в текстовом формате.
+
+        Returns:
+            list[str]: HELP, TYPE и значения наборов меток.
+        """
+        values = {(): self.value} if self.collect is None else self.collect()
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for labels, value in values.items():
+            lines.append(
+                f'{self.name}{format_labels(self.labelnames, labels)} {value}'
+            )
+        return lines
+
+
+class Counter(Gauge):
+    """Счетчик, который только растет: имя заканчивается на _total."""
+
+    kind = 'counter'
+
+    def dec(self, amount: float = 1) -> None:
+        """Счетчик не уменьшается.
+
+        Raises:
+            TypeError: Всегда.
+        """
+        raise TypeError(f'{self.name} is a counter')
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса."""
+
+    def __init__(self) -> None:
+        """Инициализация пустого реестра."""
+        self.metrics: list[LabeledHistogram | Gauge] = []
+
+    def histogram(self, *args: object, **kwargs: object) -> LabeledHistogram:
+        """Создает и регистрирует гистограмму, см. LabeledHistogram."""
+        metric = LabeledHistogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, *args: object, **kwargs: object) -> Gauge:
+        """Создает и регистрирует gauge, см. Gauge."""
+        metric = Gauge(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args: object, **kwargs: object) -> Counter:
+        """Создает и регистрирует счетчик, см. Counter."""
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Все метрики реестра в текстовом формате Prometheus.
+
+        Returns:
+            str: Тело ответа /metrics.
+        """
+        lines = [line for metric in self.metrics for line in metric.render()]
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    'http_request_duration_seconds',
+    'Время обработки HTTP запроса по шаблону пути.',
+    ('method', 'route', 'status'),
+)
+http_requests_in_flight = metrics.gauge(
+    'http_requests_in_flight', 'HTTP запросы в обработке.'
+)
+db_statement_seconds = metrics.histogram(
+    'db_statement_duration_seconds',
+    'Время выполнения SQL запроса по операции и таблице.',
+    ('operation', 'table'),
+    max_series=app_settings.metrics_max_statements,
+)
+calc_remote_seconds = metrics.histogram(
+    'calc_remote_calculation_seconds',
+    'Время remote_calculation: расчет счета и его запись.',
+    ('backend',),
+)
+
+instrumented_engines: list[AsyncEngine] = []
+
+
+def collect_pool(attribute: str) -> Collect:
+    """Функция чтения состояния пулов соединений.
+
+    Args:
+        attribute (str): Метод пула: checkedout или overflow.
+
+    Returns:
+        Collect: Значения по имени базы для пулов с очередью соединений.
+    """
+
+    def collect() -> dict[tuple[str, ...], float]:
+        values = {}
+        for engine in instrumented_engines:
+            method = getattr(engine.pool, attribute, None)
+            if method is not None:
+                values[(engine.url.database or '',)] = method()
+        return values
+
+    return collect
+
+
+metrics.gauge(
+    'db_pool_checked_out',
+    'Соединения пула, выданные сессиям.',
+    ('database',),
+    collect=collect_pool('checkedout'),
+)
+metrics.gauge(
+    'db_pool_overflow',
+    'Соединения сверх pool_size, отрицательное - свободные места пула.',
+    ('database',),
+    collect=collect_pool('overflow'),
+)
+
+
+@lru_cache(maxsize=1024)
+def statement_labels(statement: str) -> tuple[str, str]:
+    """Операция и первая таблица SQL запроса.
+
+    Args:
+        statement (str): Текст запроса.
+
+    Returns:
+        tuple[str, str]: Операция, например SELECT, и таблица или пустая
+            строка.
+    """
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words else ''
+    if operation not in STATEMENT_OPERATIONS:
+        return OTHER, ''
+    match = STATEMENT_TABLE.search(statement)
+    return operation, match.group(1).lower() if match else ''
+
+
+def before_cursor_execute(
+    conn: object,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    """Запоминает время начала запроса в контексте выполнения."""
+    context.metrics_started = time.perf_counter()
+
+
+def after_cursor_execute(
+    conn: object,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    """Добавляет время запроса в гистограмму операции и таблицы."""
+    db_statement_seconds.labels(*statement_labels(statement)).observe(
+        time.perf_counter() - context.metrics_started
+    )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает замер запросов и состояние пула движка.
+
+    Args:
+        engine (AsyncEngine): Движок из реестра движков процесса.
+    """
+    if not app_settings.metrics_enabled:
+        return
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', after_cursor_execute)
+    instrumented_engines.append(engine)
+
+
+class MetricsMiddleware:
+    """ASGI middleware с временем и количеством HTTP запросов.
+
+    Путь в метке - шаблон маршрута FastAPI, например
+    /result/{result_id}/wait, запросы без маршрута попадают в
+    <unmatched>, поэтому количество наборов меток ограничено маршрутами
+    приложения. Время считается до отправки последней части ответа.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app (ASGIApp): Приложение.
+        """
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Замеряет HTTP запрос, остальные передает без изменений.
+
+        Args:
+            scope (Scope): ASGI scope.
+            receive (Receive): Получение сообщений запроса.
+            send (Send): Отправка сообщений ответа.
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get('route')
+            http_request_seconds.labels(
+                scope['method'],
+                UNMATCHED_ROUTE if route is None else route.path,
+                f'{status // 100}xx',
+            ).observe(time.perf_counter() - started)
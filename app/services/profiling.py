@@ -0,0 +1,426 @@
+"""Профилирование процесса, включаемое без перезапуска.
+
+Profiler - cProfile потока цикла событий на заданное время, результат
+отдается файлом pstats через /admin/profile/. cProfile замедляет код в
+несколько раз, поэтому включается только по запросу и выключается сам по
+истечении времени.
+
+SlowQueryLog - журнал SQL запросов дольше порога с параметрами и
+временем. Порог меняется через /admin/slow-queries/, пока он не задан,
+обработчики событий движков только проверяют его.
+
+LoopMonitor - задержка цикла событий: задача засыпает на interval и
+замеряет, насколько позже проснулась, в метрику event_loop_lag_seconds.
+Если цикл не отвечает дольше block_threshold, поток-наблюдатель снимает
+стек потока цикла, так что в журнале видно, какой синхронный код держит
+цикл, например вызов в app/routers/territory.py.
+"""
+
+# STDLIB
+import asyncio
+import cProfile
+from collections import deque
+from dataclasses import asdict, dataclass
+import io
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+import traceback
+from typing import Literal
+
+# THIRDPARTY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.services.histogram import Histogram
+from app.services.metrics import SECONDS_BUCKETS, metrics
+
+logger = logging.getLogger(__name__)
+
+PARAMETERS_MAX_LENGTH = 1000
+
+ProfileSort = Literal['cumulative', 'tottime', 'calls']
+
+
+class ProfilerBusy(Exception):
+    """Профилирование уже выполняется."""
+
+
+class Profiler:
+    """cProfile потока цикла событий на ограниченное время."""
+
+    def __init__(self, max_seconds: float) -> None:
+        """Инициализация профилировщика.
+
+        Args:
+            max_seconds (float): Максимальная длительность профилирования,
+                сек.
+        """
+        self.max_seconds = max_seconds
+        self.seconds = 0.0
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.last: cProfile.Profile | None = None
+        self._profile: cProfile.Profile | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def running(self) -> bool:
+        """Выполняется ли профилирование."""
+        return self._profile is not None
+
+    def start(self, seconds: float) -> None:
+        """Начинает профилирование, которое остановится само.
+
+        Args:
+            seconds (float): Длительность, не больше max_seconds, сек.
+
+        Raises:
+            ProfilerBusy: Если профилирование уже выполняется.
+        """
+        if self.running:
+            raise ProfilerBusy
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ не дает включить второй профилировщик.
+            raise ProfilerBusy from None
+        self._profile = profile
+        self.seconds = min(seconds, self.max_seconds)
+        self.started = time.time()
+        self.finished = None
+        self._timer = asyncio.get_running_loop().call_later(
+            self.seconds, self.stop
+        )
+
+    def stop(self) -> None:
+        """Останавливает профилирование и сохраняет результат."""
+        if not self.running:
+            return
+        self._timer.cancel()
+        self._profile.disable()
+        self._profile.create_stats()
+        self.last, self._profile, self._timer = self._profile, None, None
+        self.finished = time.time()
+
+    def status(self) -> dict:
+        """Состояние профилирования.
+
+        Returns:
+            dict: JSON формата {'running': False, 'seconds': 30.0,
+                'started': 1700000000.0, 'finished': 1700000030.0,
+                'available': True}, где available - есть ли результат
+                для скачивания.
+        """
+        return {
+            'running': self.running,
+            'seconds': self.seconds,
+            'started': self.started,
+            'finished': self.finished,
+            'available': self.last is not None,
+        }
+
+    def dump(self) -> bytes:
+        """Результат последнего профилирования в формате pstats.
+
+        Returns:
+            bytes: Содержимое файла, как от cProfile.Profile.dump_stats.
+        """
+        return marshal.dumps(self.last.stats)
+
+    def text(self, sort: ProfileSort, limit: int) -> str:
+        """Отчет pstats последнего профилирования.
+
+        Args:
+            sort (ProfileSort): Ключ сортировки функций.
+            limit (int): Количество функций в отчете.
+
+        Returns:
+            str: Таблица функций, как у python -m pstats.
+        """
+        stream = io.StringIO()
+        pstats.Stats(self.last, stream=stream).sort_stats(sort).print_stats(
+            limit
+        )
+        return stream.getvalue()
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """Медленный SQL запрос.
+
+    Args:
+        at (float): Время окончания запроса, unix time.
+        duration_ms (float): Время выполнения, мс.
+        statement (str): Текст запроса.
+        parameters (str): Параметры запроса, обрезанные до
+            PARAMETERS_MAX_LENGTH символов.
+    """
+
+    at: float
+    duration_ms: float
+    statement: str
+    parameters: str
+
+
+class SlowQueryLog:
+    """Журнал последних SQL запросов дольше порога."""
+
+    def __init__(self, threshold_ms: float, size: int) -> None:
+        """Инициализация журнала.
+
+        Args:
+            threshold_ms (float): Порог времени запроса, мс, 0 - журнал
+                выключен.
+            size (int): Количество хранимых запросов.
+        """
+        self.threshold_ms = threshold_ms
+        self.queries: deque[SlowQuery] = deque(maxlen=size)
+        self.count = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Записываются ли медленные запросы."""
+        return self.threshold_ms > 0
+
+    def record(
+        self, statement: str, parameters: object, duration: float
+    ) -> None:
+        """Записывает запрос, если он дольше порога.
+
+        Args:
+            statement (str): Текст запроса.
+            parameters (object): Параметры запроса.
+            duration (float): Время выполнения, сек.
+        """
+        duration_ms = duration * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+        query = SlowQuery(
+            at=time.time(),
+            duration_ms=duration_ms,
+            statement=statement,
+            parameters=repr(parameters)[:PARAMETERS_MAX_LENGTH],
+        )
+        self.queries.append(query)
+        self.count += 1
+        logger.warning(
+            'Медленный SQL запрос %.1f мс: %s %s',
+            duration_ms,
+            statement,
+            query.parameters,
+        )
+
+    def stats(self) -> dict:
+        """Порог и последние медленные запросы.
+
+        Returns:
+            dict: JSON формата {'threshold_ms': 100.0, 'count': 3,
+                'queries': [{'at': 1700000000.0, 'duration_ms': 120.5,
+                'statement': 'SELECT ...', 'parameters': '(1,)'}]}, где
+                count - количество медленных запросов с запуска процесса.
+        """
+        return {
+            'threshold_ms': self.threshold_ms,
+            'count': self.count,
+            'queries': [asdict(query) for query in self.queries],
+        }
+
+
+@dataclass(frozen=True)
+class BlockedLoop:
+    """Снимок заблокированного цикла событий.
+
+    Args:
+        at (float): Время снимка, unix time.
+        blocked_ms (float): Сколько цикл не отвечал к моменту снимка, мс.
+        stack (str): Стек потока цикла событий.
+    """
+
+    at: float
+    blocked_ms: float
+    stack: str
+
+
+class LoopMonitor:
+    """Замер задержки цикла событий и стеки его блокировок."""
+
+    def __init__(
+        self,
+        interval: float,
+        block_threshold: float,
+        lag: Histogram | None = None,
+        size: int = 20,
+    ) -> None:
+        """Инициализация монитора.
+
+        Args:
+            interval (float): Интервал замера задержки, сек.
+            block_threshold (float): Через сколько секунд без ответа цикла
+                снимать его стек, 0 - не снимать.
+            lag (Histogram | None): Гистограмма задержки, по умолчанию
+                новая.
+            size (int): Количество хранимых снимков.
+        """
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag = Histogram(SECONDS_BUCKETS) if lag is None else lag
+        self.max_lag = 0.0
+        self.blocks: deque[BlockedLoop] = deque(maxlen=size)
+        self._beat = 0.0
+        self._thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watcher: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def started(self) -> bool:
+        """Запущен ли монитор."""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Запускает замер и поток-наблюдатель в текущем цикле событий."""
+        if self.started:
+            return
+        self._beat = time.monotonic()
+        self._thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._measure(), name='loop-monitor')
+        if self.block_threshold > 0:
+            self._stopped.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, name='loop-watcher', daemon=True
+            )
+            self._watcher.start()
+
+    async def stop(self) -> None:
+        """Останавливает замер и поток-наблюдатель."""
+        if not self.started:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._watcher is not None:
+            self._stopped.set()
+            await asyncio.to_thread(self._watcher.join)
+            self._watcher = None
+
+    def stats(self) -> dict:
+        """Задержка цикла событий и снимки блокировок.
+
+        Returns:
+            dict: JSON формата {'interval': 0.1, 'block_threshold': 0.2,
+                'max_lag': 0.3, 'lag': {...}, 'blocks': [{'at': ...,
+                'blocked_ms': 250.0, 'stack': '...'}]}, где lag -
+                накопительная гистограмма задержки, сек.
+        """
+        return {
+            'interval': self.interval,
+            'block_threshold': self.block_threshold,
+            'max_lag': self.max_lag,
+            'lag': self.lag.as_dict(),
+            'blocks': [asdict(block) for block in self.blocks],
+        }
+
+    async def _measure(self) -> None:
+        """Цикл замера: засыпает на interval и замеряет опоздание."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self) -> None:
+        """Поток-наблюдатель: снимает стек цикла, не ответившего вовремя.
+
+        Одна блокировка снимается один раз, по первому опозданию.
+        """
+        reported = 0.0
+        while not self._stopped.wait(self.block_threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.block_threshold or beat == reported:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._thread_id)
+            stack = (
+                '' if frame is None else ''.join(traceback.format_stack(frame))
+            )
+            self.blocks.append(
+                BlockedLoop(
+                    at=time.time(), blocked_ms=blocked * 1000, stack=stack
+                )
+            )
+            logger.warning(
+                'Цикл событий не отвечает %.0f мс:\n%s', blocked * 1000, stack
+            )
+
+
+profiler = Profiler(max_seconds=app_settings.profile_max_seconds)
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=app_settings.slow_query_threshold_ms,
+    size=app_settings.slow_query_log_size,
+)
+
+event_loop_lag_seconds = metrics.histogram(
+    'event_loop_lag_seconds',
+    'Насколько позже задача цикла событий просыпается после sleep.',
+)
+
+loop_monitor = LoopMonitor(
+    interval=app_settings.loop_monitor_interval,
+    block_threshold=app_settings.loop_block_threshold_ms / 1000,
+    lag=event_loop_lag_seconds.labels(),
+)
+
+
+def before_cursor_execute(
+    conn: object,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    """Запоминает время начала запроса, если журнал включен."""
+    if slow_query_log.enabled:
+        context.slow_query_started = time.perf_counter()
+
+
+def after_cursor_execute(
+    conn: object,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    """Передает время запроса в журнал медленных запросов."""
+    started = getattr(context, 'slow_query_started', None)
+    if started is not None:
+        slow_query_log.record(
+            statement, parameters, time.perf_counter() - started
+        )
+
+
+def watch_engine(engine: AsyncEngine) -> None:
+    """Подключает журнал медленных запросов движка.
+
+    Обработчики подключаются всегда, чтобы порог можно было задать без
+    перезапуска.
+
+    Args:
+        engine (AsyncEngine): Движок из реестра движков процесса.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', after_cursor_execute)
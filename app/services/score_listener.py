@@ -0,0 +1,219 @@
+"""Получение уведомлений о записи счета из других процессов.
+
+Result.update в том же запросе, что и UPDATE, выполняет
+pg_notify('result_done', '<id>:<score>'), ResultJobs о расчете,
+исчерпавшем попытки, - '<id>:failed'. ScoreListener держит отдельное
+asyncpg соединение с LISTEN на этот канал и передает каждый счет в кэш и
+подписчикам процесса. После переподключения выполняется догоняющий запрос
+по ID, которые ждут подписчики, чтобы не потерять уведомления, пришедшие,
+пока соединения не было.
+
+Полуоткрытое соединение, например после обрыва сети без закрытия TCP,
+не вызывает termination listener, поэтому раз в health_interval слушатель
+выполняет на нем SELECT 1. Если ответа нет за health_timeout, соединение
+разрывается, а слушатель переподключается и догоняет пропущенные счета.
+"""
+
+# STDLIB
+import asyncio
+import logging
+
+# THIRDPARTY
+import asyncpg
+from sqlalchemy import URL
+
+# FIRSTPARTY
+from app.dal.result import FAILED_MESSAGE, FAILED_PAYLOAD
+from app.dal.score_cache import AbstractScoreCache
+from app.database.models import JobStatus
+from app.services.score_notifier import ScoreNotifier
+
+logger = logging.getLogger(__name__)
+
+HEALTH_QUERY = 'SELECT 1'
+CATCH_UP_QUERY = (
+    'SELECT id, score, status FROM result '
+    "WHERE id = ANY($1::int[]) AND (score IS NOT NULL OR status = 'failed')"
+)
+
+
+def parse_payload(payload: str) -> tuple[int, float | str]:
+    """Разбирает уведомление формата '<id>:<score>' или '<id>:failed'.
+
+    Args:
+        payload (str): Текст уведомления.
+
+    Returns:
+        tuple[int, float | str]: ID записи и счет или FAILED_MESSAGE.
+    """
+    result_id, score = payload.split(':', 1)
+    if score == FAILED_PAYLOAD:
+        return int(result_id), FAILED_MESSAGE
+    return int(result_id), float(score)
+
+
+class ScoreListener:
+    """Слушатель канала уведомлений о записи счета."""
+
+    def __init__(
+        self,
+        url: URL,
+        channel: str,
+        notifier: ScoreNotifier,
+        cache: AbstractScoreCache,
+        reconnect_delay: float = 1,
+        max_reconnect_delay: float = 30,
+        health_interval: float = 30,
+        health_timeout: float = 5,
+    ) -> None:
+        """Инициализация слушателя.
+
+        Args:
+            url (URL): URL подключения к базе данных.
+            channel (str): Канал LISTEN.
+            notifier (ScoreNotifier): Подписчики процесса.
+            cache (AbstractScoreCache): Кэш счетов процесса.
+            reconnect_delay (float): Начальная пауза перед переподключением.
+            max_reconnect_delay (float): Максимальная пауза, сек.
+            health_interval (float): Интервал проверки соединения, сек.
+            health_timeout (float): Время ожидания ответа проверки, сек.
+        """
+        self.dsn = url.set(drivername='postgresql').render_as_string(
+            hide_password=False
+        )
+        self.channel = channel
+        self.notifier = notifier
+        self.cache = cache
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.connected = asyncio.Event()
+        self.received = 0
+        self.caught_up = 0
+        self._task: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Запускает фоновую задачу слушателя."""
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._run(), name='score-listener'
+            )
+
+    async def stop(self) -> None:
+        """Останавливает слушателя и закрывает соединение."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def dispatch(self, result_id: int, score: float | str) -> None:
+        """Передает счет в кэш и подписчикам процесса.
+
+        Отметка ожидания расчета, исчерпавшего попытки, убирается из кэша.
+
+        Args:
+            result_id (int): ID записи с счетом.
+            score (float | str): Счет или FAILED_MESSAGE.
+        """
+        if score == FAILED_MESSAGE:
+            await self.cache.delete(result_id)
+        else:
+            await self.cache.set(result_id, score)
+        self.notifier.publish(result_id, score)
+
+    def _on_notification(
+        self,
+        connection: asyncpg.Connection,
+        pid: int,
+        channel: str,
+        payload: str,
+    ) -> None:
+        """Обработчик уведомления asyncpg."""
+        try:
+            result_id, score = parse_payload(payload)
+        except ValueError:
+            logger.warning('Некорректное уведомление %s: %r', channel, payload)
+            return
+        self.received += 1
+        task = asyncio.create_task(self.dispatch(result_id, score))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def catch_up(self, connection: asyncpg.Connection) -> None:
+        """Догоняющий запрос по ID, которые ждут подписчики.
+
+        Args:
+            connection (asyncpg.Connection): Соединение слушателя.
+        """
+        result_ids = self.notifier.pending_ids()
+        if not result_ids:
+            return
+        rows = await connection.fetch(CATCH_UP_QUERY, result_ids)
+        for row in rows:
+            self.caught_up += 1
+            await self.dispatch(
+                row['id'],
+                (
+                    FAILED_MESSAGE
+                    if row['status'] == JobStatus.failed
+                    else row['score']
+                ),
+            )
+
+    async def watch(
+        self, connection: asyncpg.Connection, lost: asyncio.Event
+    ) -> None:
+        """Ждет потери соединения, проверяя его каждые health_interval.
+
+        Args:
+            connection (asyncpg.Connection): Соединение слушателя.
+            lost (asyncio.Event): Событие закрытия соединения.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(lost.wait(), self.health_interval)
+                logger.warning('Соединение LISTEN %s потеряно', self.channel)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(
+                    connection.fetchval(HEALTH_QUERY), self.health_timeout
+                )
+            except Exception:
+                logger.warning(
+                    'Соединение LISTEN %s не отвечает', self.channel
+                )
+                connection.terminate()
+                return
+
+    async def _run(self) -> None:
+        """Цикл подключения, прослушивания и переподключения."""
+        delay = self.reconnect_delay
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(
+                    self.channel, self._on_notification
+                )
+                await self.catch_up(connection)
+                self.connected.set()
+                delay = self.reconnect_delay
+                await self.watch(connection, lost)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Ошибка соединения LISTEN %s', self.channel)
+            finally:
+                self.connected.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
@@ -0,0 +1,94 @@
+"""Потоковая выдача счетов по списку ID или кадастровых номеров.
+
+Ответ формируется по мере чтения курсора и не собирается в памяти целиком:
+    {"results": {"1": {"cadastral_number": "77:01:000401:01",
+    "score": 12.5, "status": "done"}}, "missing": {"ids": [3],
+    "cadastral_numbers": []}}
+
+В results ключ - ID записи, значение - кадастровый номер записи, счет или
+null, если расчет еще не выполнен, и состояние расчета: queued, running,
+done или failed, если попытки расчета исчерпаны. По кадастровому номеру
+возвращаются все записи территории, номер в значении позволяет сопоставить
+их с запросом. В missing - запрошенные ID и кадастровые номера, для которых
+записей нет.
+"""
+
+# STDLIB
+import json
+from typing import AsyncIterator
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# FIRSTPARTY
+from app.dal.result import Result
+
+
+def missing_items(
+    ids: list[int],
+    found_ids: set[int],
+    cadastral_numbers: list[str],
+    found_numbers: set[str],
+) -> dict[str, list]:
+    """Запрошенные ID и кадастровые номера, для которых записей нет.
+
+    Args:
+        ids (list[int]): Запрошенные ID записей.
+        found_ids (set[int]): Найденные ID.
+        cadastral_numbers (list[str]): Запрошенные кадастровые номера.
+        found_numbers (set[str]): Найденные кадастровые номера.
+
+    Returns:
+        dict[str, list]: {'ids': [3], 'cadastral_numbers': ['...']}.
+    """
+    return {
+        'ids': [id_ for id_ in ids if id_ not in found_ids],
+        'cadastral_numbers': [
+            number
+            for number in cadastral_numbers
+            if number not in found_numbers
+        ],
+    }
+
+
+async def stream_scores(
+    sessionmaker: async_sessionmaker,
+    ids: list[int],
+    cadastral_numbers: list[str],
+) -> AsyncIterator[str]:
+    """Генерирует JSON ответ по частям.
+
+    Сессия открывается внутри генератора, так как ответ отдается после
+    выхода из зависимостей ендпоинта.
+
+    Args:
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+        ids (list[int]): Запрошенные ID записей.
+        cadastral_numbers (list[str]): Запрошенные кадастровые номера.
+
+    Yields:
+        str: Очередной фрагмент JSON.
+    """
+    found_ids = set()
+    found_numbers = set()
+    separator = ''
+    yield '{"results":{'
+    async with sessionmaker() as session:
+        rows = Result(session=session).get_many(
+            ids=ids, cadastral_numbers=cadastral_numbers
+        )
+        async for row in rows:
+            found_ids.add(row.id_)
+            found_numbers.add(row.cadastral_number)
+            entry = json.dumps(
+                {
+                    'cadastral_number': row.cadastral_number,
+                    'score': row.score,
+                    'status': row.status,
+                },
+                ensure_ascii=False,
+            )
+            yield f'{separator}"{row.id_}":{entry}'
+            separator = ','
+    missing = missing_items(ids, found_ids, cadastral_numbers, found_numbers)
+    yield '},"missing":' + json.dumps(missing, ensure_ascii=False) + '}'
@@ -0,0 +1,74 @@
+"""Уведомления о записи счета для ожидающих запросов.
+
+Result.update после коммита вызывает score_notifier.publish, и все запросы,
+ожидающие этот ID, получают счет без обращения к БД. Если расчет исчерпал
+попытки, ResultJobs передает вместо счета FAILED_MESSAGE. Счета, записанные в
+других процессах, приходят через ScoreListener из score_listener.py.
+"""
+
+# STDLIB
+import asyncio
+from collections import defaultdict
+
+
+class ScoreNotifier:
+    """Подписки на запись счета по ID записи в пределах процесса."""
+
+    def __init__(self) -> None:
+        """Инициализация пустого набора подписок."""
+        self._waiters: defaultdict[int, set[asyncio.Future[float | str]]] = (
+            defaultdict(set)
+        )
+
+    def __len__(self) -> int:
+        """Количество ожидающих подписчиков."""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def pending_ids(self) -> list[int]:
+        """ID записей, которые ждут подписчики."""
+        return list(self._waiters)
+
+    def subscribe(self, result_id: int) -> asyncio.Future[float | str]:
+        """Подписывается на запись счета.
+
+        Подписку нужно оформить до проверки текущего счета, чтобы не
+        пропустить запись между проверкой и ожиданием.
+
+        Args:
+            result_id (int): ID записи с счетом.
+
+        Returns:
+            asyncio.Future[float | str]: Future, в которую будет записан
+                счет или FAILED_MESSAGE.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[result_id].add(future)
+        return future
+
+    def unsubscribe(self, result_id: int, future: asyncio.Future) -> None:
+        """Снимает подписку.
+
+        Args:
+            result_id (int): ID записи с счетом.
+            future (asyncio.Future): Future, полученная из subscribe.
+        """
+        waiters = self._waiters.get(result_id)
+        if waiters is None:
+            return
+        waiters.discard(future)
+        if not waiters:
+            del self._waiters[result_id]
+
+    def publish(self, result_id: int, score: float | str) -> None:
+        """Передает счет всем подписчикам записи.
+
+        Args:
+            result_id (int): ID записи с счетом.
+            score (float | str): Записанный счет или FAILED_MESSAGE.
+        """
+        for future in self._waiters.pop(result_id, ()):
+            if not future.done():
+                future.set_result(score)
+
+
+score_notifier = ScoreNotifier()
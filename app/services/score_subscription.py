@@ -0,0 +1,228 @@
+"""Подписка одного WebSocket клиента на запись множества счетов.
+
+Клиент подписывается на ID или кадастровые номера, записанные счета
+складываются в ограниченную очередь соединения и отправляются пачками.
+Память на соединение ограничена количеством подписок и размером очереди:
+если клиент не успевает читать и очередь переполнена, соединение
+закрывается, а не растет без предела.
+"""
+
+# STDLIB
+import asyncio
+from functools import partial
+from typing import AsyncIterator
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# FIRSTPARTY
+from app.dal.result import FAILED_MESSAGE, Result
+from app.database.models import JobStatus
+from app.services.score_lookup import missing_items
+from app.services.score_notifier import ScoreNotifier
+
+
+class ScoreSubscriptionLimit(Exception):
+    """Превышено количество подписок одного соединения."""
+
+
+class ScoreSubscription:
+    """Подписки соединения и очередь записанных счетов.
+
+    Атрибуты:
+        queue (asyncio.Queue): Пары (ID, счет или FAILED_MESSAGE),
+            ожидающие отправки.
+        overflowed (asyncio.Event): Очередь переполнена, клиент не успевает
+            читать.
+    """
+
+    def __init__(
+        self,
+        notifier: ScoreNotifier,
+        maxsize: int,
+        max_subscriptions: int,
+    ) -> None:
+        """Инициализация подписки.
+
+        Args:
+            notifier (ScoreNotifier): Уведомления о записи счета.
+            maxsize (int): Максимальное количество неотправленных счетов.
+            max_subscriptions (int): Максимальное количество одновременно
+                ожидаемых ID.
+        """
+        self.notifier = notifier
+        self.max_subscriptions = max_subscriptions
+        self.queue: asyncio.Queue[tuple[int, float | str]] = asyncio.Queue(
+            maxsize
+        )
+        self.overflowed = asyncio.Event()
+        self._futures: dict[int, asyncio.Future[float | str]] = {}
+
+    def __len__(self) -> int:
+        """Количество ожидаемых ID."""
+        return len(self._futures)
+
+    def __contains__(self, id_: int) -> bool:
+        """Есть ли подписка на ID."""
+        return id_ in self._futures
+
+    def subscribe(self, ids: list[int]) -> None:
+        """Подписывается на запись счетов.
+
+        Args:
+            ids (list[int]): ID записей без счета.
+
+        Raises:
+            ScoreSubscriptionLimit: если подписок станет больше
+                max_subscriptions.
+        """
+        new_ids = [id_ for id_ in dict.fromkeys(ids) if id_ not in self]
+        if len(self) + len(new_ids) > self.max_subscriptions:
+            raise ScoreSubscriptionLimit
+        for id_ in new_ids:
+            future = self.notifier.subscribe(id_)
+            future.add_done_callback(partial(self._on_score, id_))
+            self._futures[id_] = future
+
+    def unsubscribe(self, ids: list[int]) -> None:
+        """Снимает подписки.
+
+        Args:
+            ids (list[int]): ID записей.
+        """
+        for id_ in ids:
+            future = self._futures.pop(id_, None)
+            if future is not None:
+                self.notifier.unsubscribe(id_, future)
+                future.cancel()
+
+    def close(self) -> None:
+        """Снимает все подписки соединения."""
+        self.unsubscribe(list(self._futures))
+
+    def put(self, id_: int, score: float | str) -> None:
+        """Ставит счет в очередь отправки.
+
+        При переполнении очереди счет отбрасывается и выставляется
+        overflowed, после чего соединение закрывается.
+
+        Args:
+            id_ (int): ID записи.
+            score (float | str): Счет или FAILED_MESSAGE.
+        """
+        try:
+            self.queue.put_nowait((id_, score))
+        except asyncio.QueueFull:
+            self.overflowed.set()
+
+    def deliver(self, id_: int, score: float | str) -> None:
+        """Передает счет ожидаемой записи и снимает подписку на нее.
+
+        Повторная доставка того же ID игнорируется.
+
+        Args:
+            id_ (int): ID записи.
+            score (float | str): Счет или FAILED_MESSAGE.
+        """
+        if id_ not in self._futures:
+            return
+        self.unsubscribe([id_])
+        self.put(id_, score)
+
+    def _on_score(self, id_: int, future: asyncio.Future[float | str]) -> None:
+        """Передает счет подписки из Future ScoreNotifier.
+
+        Args:
+            id_ (int): ID записи.
+            future (asyncio.Future[float | str]): Завершенная подписка.
+        """
+        if not future.cancelled():
+            self.deliver(id_, future.result())
+
+    async def batches(
+        self, batch_size: int, window: float
+    ) -> AsyncIterator[list[tuple[int, float | str]]]:
+        """Пачки записанных счетов для отправки клиенту.
+
+        После первого счета пачка добирается не дольше window секунд или до
+        batch_size элементов.
+
+        Args:
+            batch_size (int): Максимальный размер пачки.
+            window (float): Время добора пачки, сек.
+
+        Yields:
+            list[tuple[int, float | str]]: Пары (ID, счет или
+                FAILED_MESSAGE).
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + window
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            yield batch
+
+
+async def subscribe_scores(
+    sessionmaker: async_sessionmaker,
+    subscription: ScoreSubscription,
+    ids: list[int],
+    cadastral_numbers: list[str],
+) -> dict[str, list | dict]:
+    """Подписывает соединение на ID и кадастровые номера.
+
+    Готовые счета сразу ставятся в очередь отправки, на остальные
+    оформляется подписка. Записи без счета перечитываются после подписки,
+    чтобы не потерять счет, записанный между запросом и подпиской.
+
+    Args:
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+        subscription (ScoreSubscription): Подписка соединения.
+        ids (list[int]): ID записей.
+        cadastral_numbers (list[str]): Кадастровые номера.
+
+    Returns:
+        dict[str, list | dict]: {'pending': [1, 2], 'missing': {'ids':
+            [3], 'cadastral_numbers': []}} - ID, на которые оформлена
+            подписка, и ненайденные ID и номера.
+
+    Raises:
+        ScoreSubscriptionLimit: если подписок станет больше допустимого.
+    """
+    ready = {}
+    pending = []
+    found_ids = set()
+    found_numbers = set()
+    async with sessionmaker() as session:
+        result = Result(session=session)
+        async for row in result.get_many(
+            ids=ids, cadastral_numbers=cadastral_numbers
+        ):
+            found_ids.add(row.id_)
+            found_numbers.add(row.cadastral_number)
+            if row.status == JobStatus.failed:
+                ready[row.id_] = FAILED_MESSAGE
+            elif row.score is None:
+                pending.append(row.id_)
+            else:
+                ready[row.id_] = row.score
+        subscription.subscribe(pending)
+        for id_, score in ready.items():
+            subscription.put(id_, score)
+        if pending:
+            async for row in result.get_many(ids=pending):
+                if row.status == JobStatus.failed:
+                    subscription.deliver(row.id_, FAILED_MESSAGE)
+                elif row.score is not None:
+                    subscription.deliver(row.id_, row.score)
+    missing = missing_items(ids, found_ids, cadastral_numbers, found_numbers)
+    return {'pending': pending, 'missing': missing}
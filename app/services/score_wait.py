@@ -0,0 +1,118 @@
+"""Ожидание счета для long-poll и SSE ендпоинтов.
+
+Текущий счет проверяется одним запросом (или из кэша), после чего запрос
+ждет уведомления от Result.update и больше не обращается к БД.
+"""
+
+# STDLIB
+import asyncio
+import json
+from typing import AsyncIterator
+
+# THIRDPARTY
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# FIRSTPARTY
+from app.dal.result import FAILED_MESSAGE, PENDING_MESSAGE, Result
+from app.services.score_notifier import ScoreNotifier
+
+
+async def current_score(
+    sessionmaker: async_sessionmaker, result_id: int
+) -> float | str:
+    """Текущий счет записи в короткой сессии.
+
+    Сессия закрывается сразу, чтобы ожидающий запрос не держал соединение.
+
+    Args:
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+        result_id (int): ID записи с счетом.
+
+    Returns:
+        float | str: Счет, PENDING_MESSAGE или FAILED_MESSAGE.
+    """
+    async with sessionmaker() as session:
+        return await Result(session=session).get(id_=result_id)
+
+
+async def wait_for_score(
+    sessionmaker: async_sessionmaker,
+    notifier: ScoreNotifier,
+    result_id: int,
+    timeout: float,
+) -> float | str:
+    """Ждет записи счета не дольше timeout секунд.
+
+    Args:
+        sessionmaker (async_sessionmaker): Фабрика сессий.
+        notifier (ScoreNotifier): Уведомления о записи счета.
+        result_id (int): ID записи с счетом.
+        timeout (float): Максимальное время ожидания, сек.
+
+    Returns:
+        float | str: Счет, FAILED_MESSAGE, если попытки расчета
+            исчерпаны, или PENDING_MESSAGE, если не дождались.
+    """
+    future = notifier.subscribe(result_id)
+    try:
+        score = await current_score(sessionmaker, result_id)
+        if score != PENDING_MESSAGE:
+            return score
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            return PENDING_MESSAGE
+    finally:
+        notifier.unsubscribe(result_id, future)
+
+
+def sse_message(event: str, data: dict) -> str:
+    """Форматирует сообщение Server-Sent Events.
+
+    Args:
+        event (str): Тип события.
+        data (dict): Данные события.
+
+    Returns:
+        str: Сообщение в формате text/event-stream.
+    """
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def score_events(
+    notifier: ScoreNotifier,
+    result_id: int,
+    future: asyncio.Future[float | str],
+    score: float | str,
+    keepalive: float,
+) -> AsyncIterator[str]:
+    """Поток событий SSE до записи счета.
+
+    Args:
+        notifier (ScoreNotifier): Уведомления о записи счета.
+        result_id (int): ID записи с счетом.
+        future (asyncio.Future[float | str]): Подписка, оформленная до
+            проверки текущего счета.
+        score (float | str): Текущий счет, PENDING_MESSAGE или
+            FAILED_MESSAGE.
+        keepalive (float): Интервал комментариев keepalive, сек.
+
+    Yields:
+        str: Сообщения pending, keepalive комментарии и итоговое score
+            или failed, если попытки расчета исчерпаны.
+    """
+    try:
+        if score == PENDING_MESSAGE:
+            yield sse_message('pending', {'score': score})
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=keepalive)
+                if done:
+                    score = future.result()
+                    break
+                yield ': keepalive\n\n'
+        event = 'failed' if score == FAILED_MESSAGE else 'score'
+        yield sse_message(event, {'score': score})
+    finally:
+        notifier.unsubscribe(result_id, future)
@@ -0,0 +1,113 @@
+"""Объединение одинаковых расчетов, выполняющихся одновременно.
+
+Пока расчет для ключа (cadastral_number, latitude, longtitude) находится в
+очереди или выполняется, повторные запросы с тем же ключом не создают новую
+запись и не ставят новый расчет, а получают ID записи первого запроса и,
+следовательно, его счет.
+"""
+
+# STDLIB
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+# FIRSTPARTY
+from app.schemas.territory import CalcRequestSchema
+
+
+def calc_key(data: CalcRequestSchema) -> tuple[str, float, float]:
+    """Ключ объединения расчетов.
+
+    Args:
+        data (CalcRequestSchema): Данные для вычислений.
+
+    Returns:
+        tuple: Кадастровый номер и координаты.
+    """
+    return data.cadastral_number, data.latitude, data.longtitude
+
+
+class InFlightCalculations:
+    """Реестр расчетов, выполняющихся в процессе.
+
+    Для каждого ключа хранится future с ID записи счета. Первый запрос
+    (лидер) создает future и записывает в нее ID после создания записи,
+    остальные запросы ждут ту же future. Ключ освобождается после
+    завершения расчета.
+    """
+
+    def __init__(self) -> None:
+        """Инициализация пустого реестра и счетчика."""
+        self._futures: dict[Hashable, asyncio.Future[int]] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        """Количество ключей с расчетом в работе."""
+        return len(self._futures)
+
+    def get(self, key: Hashable) -> asyncio.Future[int] | None:
+        """Future расчета для ключа, если он уже выполняется."""
+        return self._futures.get(key)
+
+    def lead(self, key: Hashable) -> asyncio.Future[int]:
+        """Регистрирует новый расчет для ключа.
+
+        Args:
+            key (Hashable): Ключ расчета.
+
+        Returns:
+            asyncio.Future[int]: Future, в которую лидер запишет ID.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        return future
+
+    def resolve(self, key: Hashable, result_id: int) -> None:
+        """Сообщает ожидающим запросам ID созданной записи."""
+        future = self._futures.get(key)
+        if future is not None and not future.done():
+            future.set_result(result_id)
+
+    def fail(self, key: Hashable, error: BaseException) -> None:
+        """Снимает ключ и передает ошибку лидера ожидающим запросам."""
+        future = self._futures.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+            # Ошибку уже обработал лидер, без ожидающих она не нужна.
+            future.exception()
+
+    def release(self, key: Hashable, result_id: int) -> None:
+        """Снимает ключ после завершения расчета записи result_id.
+
+        Ключ не снимается, если за ним уже закреплен другой расчет.
+        """
+        future = self._futures.get(key)
+        if future is None or not future.done():
+            return
+        if future.result() == result_id:
+            del self._futures[key]
+
+    async def run(
+        self, key: Hashable, create: Callable[[], Awaitable[int]]
+    ) -> tuple[int, bool]:
+        """Создает запись для ключа или присоединяется к выполняющейся.
+
+        Args:
+            key (Hashable): Ключ расчета.
+            create (Callable[[], Awaitable[int]]): Создание записи, вызывается
+                только лидером.
+
+        Returns:
+            tuple[int, bool]: ID записи и признак лидера.
+        """
+        future = self.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future), False
+        self.lead(key)
+        try:
+            result_id = await create()
+        except BaseException as error:
+            self.fail(key, error)
+            raise
+        self.resolve(key, result_id)
+        return result_id, True
@@ -0,0 +1,438 @@
+"""Трассировка OpenTelemetry HTTP запросов, DAL, SQL и расчетов.
+
+Трассировка необязательна: пока tracing.setup не вызван или
+tracing_enabled=false, модуль не импортирует opentelemetry, span
+возвращает пустой контекстный менеджер, а обработчики событий SQLAlchemy
+и middleware только проверяют tracing.enabled.
+
+После setup новые трассы записываются с долей tracing_sample_ratio
+(TraceIdRatioBased), продолжения чужих трасс следуют решению вызывающей
+стороны (ParentBased). Несэмплированные спаны ничего не записывают и не
+экспортируются, поэтому под полной нагрузкой цена трассировки - доля
+записанных трасс.
+
+Контекст трассы передается W3C заголовками traceparent и tracestate: в
+HTTP запросе, в заголовках сообщения Kafka и в CalcJob очереди процесса,
+поэтому расчет в воркере продолжает трассу POST /calc/. Расчеты режима
+db начинают собственные трассы: задача в нем - только строка result.
+"""
+
+# STDLIB
+from contextlib import AbstractContextManager, nullcontext
+import functools
+import inspect
+from typing import Callable, Literal, TypeVar
+
+# THIRDPARTY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.services.metrics import UNMATCHED_ROUTE, statement_labels
+
+PROPAGATION_HEADERS = frozenset((b'traceparent', b'tracestate'))
+STATEMENT_MAX_LENGTH = 2000
+
+SpanKindName = Literal['internal', 'server', 'client', 'producer', 'consumer']
+Function = TypeVar('Function', bound=Callable)
+
+
+def create_exporter() -> object:
+    """Создает экспортер спанов по настройкам приложения.
+
+    Адрес коллектора OTLP задается переменными окружения OpenTelemetry,
+    например OTEL_EXPORTER_OTLP_ENDPOINT.
+
+    Returns:
+        object: SpanExporter выбранного типа.
+
+    Raises:
+        RuntimeError: Если выбран otlp, а пакет экспортера не установлен.
+    """
+    if app_settings.tracing_exporter == 'otlp':
+        try:
+            # THIRDPARTY
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            raise RuntimeError(
+                'Для TRACING_EXPORTER=otlp установите пакет '
+                'opentelemetry-exporter-otlp-proto-http'
+            ) from None
+        return OTLPSpanExporter()
+    # THIRDPARTY
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    return ConsoleSpanExporter()
+
+
+class Tracing:
+    """Трассировщик процесса, до настройки ничего не записывает."""
+
+    def __init__(self) -> None:
+        """Инициализация выключенного трассировщика."""
+        self.provider = None
+        self._tracer = None
+        self._trace = None
+        self._propagate = None
+
+    @property
+    def enabled(self) -> bool:
+        """Настроена ли трассировка."""
+        return self._tracer is not None
+
+    def setup(
+        self,
+        service_name: str,
+        exporter: object | None = None,
+        sample_ratio: float | None = None,
+    ) -> None:
+        """Включает трассировку, если она включена в настройках.
+
+        Повторный вызов ничего не делает.
+
+        Args:
+            service_name (str): Имя сервиса в ресурсе трасс.
+            exporter (object | None): SpanExporter, которому спаны
+                передаются сразу после завершения. По умолчанию экспортер
+                из настроек с отправкой пачками, трассировка при этом
+                включается только при tracing_enabled.
+            sample_ratio (float | None): Доля записываемых новых трасс, по
+                умолчанию tracing_sample_ratio.
+
+        Raises:
+            RuntimeError: Если пакет opentelemetry-sdk не установлен.
+        """
+        if self.enabled:
+            return
+        if exporter is None and not app_settings.tracing_enabled:
+            return
+        try:
+            # THIRDPARTY
+            from opentelemetry import propagate, trace
+            from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import (
+                BatchSpanProcessor,
+                SimpleSpanProcessor,
+            )
+            from opentelemetry.sdk.trace.sampling import (
+                ParentBased,
+                TraceIdRatioBased,
+            )
+        except ImportError:
+            raise RuntimeError(
+                'Для TRACING_ENABLED=true установите пакет opentelemetry-sdk'
+            ) from None
+        if sample_ratio is None:
+            sample_ratio = app_settings.tracing_sample_ratio
+        provider = TracerProvider(
+            resource=Resource.create({SERVICE_NAME: service_name}),
+            sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+        )
+        if exporter is None:
+            processor = BatchSpanProcessor(create_exporter())
+        else:
+            processor = SimpleSpanProcessor(exporter)
+        provider.add_span_processor(processor)
+        self.provider = provider
+        self._trace = trace
+        self._propagate = propagate
+        self._tracer = provider.get_tracer(__name__)
+
+    def shutdown(self) -> None:
+        """Отправляет оставшиеся спаны и выключает трассировку."""
+        if self.provider is not None:
+            self.provider.shutdown()
+        self.provider = None
+        self._tracer = None
+        self._trace = None
+        self._propagate = None
+
+    def _unsampled(self) -> bool:
+        """Отброшена ли сэмплером трасса текущего спана.
+
+        Дочерние спаны такой трассы тоже отбрасываются, поэтому их можно не
+        создавать: создание несэмплированного спана SDK стоит ~15 мкс.
+
+        Returns:
+            bool: True, если текущий спан есть и не записывается.
+        """
+        span_context = self._trace.get_current_span().get_span_context()
+        return span_context.is_valid and not span_context.trace_flags.sampled
+
+    def span(
+        self,
+        name: str,
+        attributes: dict | None = None,
+        kind: SpanKindName = 'internal',
+        carrier: dict[str, str] | None = None,
+    ) -> AbstractContextManager:
+        """Спан, текущий на время блока with.
+
+        Args:
+            name (str): Имя спана.
+            attributes (dict | None): Атрибуты спана.
+            kind (SpanKindName): Вид спана.
+            carrier (dict[str, str] | None): Заголовки с контекстом
+                родительской трассы из другого процесса или задачи, по
+                умолчанию родитель - текущий спан.
+
+        Returns:
+            AbstractContextManager: Менеджер, возвращающий спан, или None,
+                если трассировка не настроена или трасса текущего спана
+                отброшена сэмплером.
+        """
+        if self._tracer is None or carrier is None and self._unsampled():
+            return nullcontext()
+        return self._tracer.start_as_current_span(
+            name,
+            context=(
+                None if carrier is None else self._propagate.extract(carrier)
+            ),
+            kind=getattr(self._trace.SpanKind, kind.upper()),
+            attributes=attributes,
+        )
+
+    def start_span(
+        self,
+        name: str,
+        attributes: dict | None = None,
+        kind: SpanKindName = 'internal',
+    ) -> object | None:
+        """Начинает дочерний спан текущего, не делая его текущим.
+
+        Args:
+            name (str): Имя спана.
+            attributes (dict | None): Атрибуты спана.
+            kind (SpanKindName): Вид спана.
+
+        Returns:
+            object | None: Спан, который нужно завершить end_span, или
+                None, если трассировка не настроена.
+        """
+        if self._tracer is None or self._unsampled():
+            return None
+        return self._tracer.start_span(
+            name,
+            kind=getattr(self._trace.SpanKind, kind.upper()),
+            attributes=attributes,
+        )
+
+    def end_span(
+        self, span: object, error: BaseException | None = None
+    ) -> None:
+        """Завершает спан, начатый start_span.
+
+        Args:
+            span (object): Спан.
+            error (BaseException | None): Ошибка, с которой завершилась
+                операция спана.
+        """
+        if error is not None:
+            span.record_exception(error)
+            self.set_error(span, str(error))
+        span.end()
+
+    def set_error(self, span: object, description: str) -> None:
+        """Отмечает спан ошибочным.
+
+        Args:
+            span (object): Спан.
+            description (str): Описание ошибки.
+        """
+        span.set_status(self._trace.StatusCode.ERROR, description)
+
+    def inject(self) -> dict[str, str]:
+        """Заголовки с контекстом текущей трассы для передачи дальше.
+
+        Returns:
+            dict[str, str]: traceparent и tracestate или пустой словарь,
+                если трассировка не настроена или текущего спана нет.
+        """
+        carrier: dict[str, str] = {}
+        if self._propagate is not None:
+            self._propagate.inject(carrier)
+        return carrier
+
+
+tracing = Tracing()
+
+
+def traced(function: Function) -> Function:
+    """Декоратор корутины или асинхронного генератора со спаном.
+
+    Имя спана - квалифицированное имя функции, например Territory.create.
+    Спан асинхронного генератора длится до исчерпания или закрытия
+    генератора.
+
+    Args:
+        function (Function): Декорируемая функция.
+
+    Returns:
+        Function: Функция, выполняемая внутри спана.
+    """
+    name = function.__qualname__
+    if inspect.isasyncgenfunction(function):
+
+        @functools.wraps(function)
+        async def generator(*args: object, **kwargs: object) -> object:
+            with tracing.span(name):
+                async for item in function(*args, **kwargs):
+                    yield item
+
+        return generator
+
+    @functools.wraps(function)
+    async def wrapper(*args: object, **kwargs: object) -> object:
+        with tracing.span(name):
+            return await function(*args, **kwargs)
+
+    return wrapper
+
+
+def before_cursor_execute(
+    conn: object,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    """Начинает спан SQL запроса дочерним к текущему спану."""
+    if not tracing.enabled:
+        return
+    operation, table = statement_labels(statement)
+    context.trace_span = tracing.start_span(
+        f'{operation} {table}'.rstrip(),
+        attributes={
+            'db.system': 'postgresql',
+            'db.operation': operation,
+            'db.sql.table': table,
+            'db.statement': statement[:STATEMENT_MAX_LENGTH],
+        },
+        kind='client',
+    )
+
+
+def after_cursor_execute(
+    conn: object,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    """Завершает спан SQL запроса."""
+    span = getattr(context, 'trace_span', None)
+    if span is not None:
+        context.trace_span = None
+        tracing.end_span(span)
+
+
+def handle_error(exception_context: object) -> None:
+    """Завершает спан SQL запроса с ошибкой."""
+    context = exception_context.execution_context
+    span = getattr(context, 'trace_span', None)
+    if span is not None:
+        context.trace_span = None
+        tracing.end_span(span, exception_context.original_exception)
+
+
+def before_commit(session: Session) -> None:
+    """Начинает спан коммита сессии вместе с отправкой изменений."""
+    if tracing.enabled:
+        session.info['trace_commit'] = tracing.start_span('COMMIT')
+
+
+def after_transaction_end(session: Session, transaction: object) -> None:
+    """Завершает спан коммита при завершении транзакции сессии."""
+    span = session.info.pop('trace_commit', None)
+    if span is not None:
+        tracing.end_span(span)
+
+
+def trace_engine(engine: AsyncEngine) -> None:
+    """Подключает спаны SQL запросов и коммитов сессий движка.
+
+    Обработчики подключаются всегда и ничего не делают, пока трассировка
+    не настроена: движки создаются при импорте, раньше tracing.setup.
+
+    Args:
+        engine (AsyncEngine): Движок из реестра движков процесса.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(sync_engine, 'handle_error', handle_error)
+    if not event.contains(Session, 'before_commit', before_commit):
+        event.listen(Session, 'before_commit', before_commit)
+        event.listen(Session, 'after_transaction_end', after_transaction_end)
+
+
+class TracingMiddleware:
+    """ASGI middleware со спаном HTTP запроса.
+
+    Спан продолжает трассу из заголовка traceparent запроса, имя спана -
+    метод и шаблон маршрута FastAPI, например POST /calc/. Без настроенной
+    трассировки запросы передаются без изменений.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app (ASGIApp): Приложение.
+        """
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Выполняет HTTP запрос внутри спана, остальные без изменений.
+
+        Args:
+            scope (Scope): ASGI scope.
+            receive (Receive): Получение сообщений запроса.
+            send (Send): Отправка сообщений ответа.
+        """
+        if scope['type'] != 'http' or not tracing.enabled:
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        method = scope['method']
+        carrier = {
+            key.decode('latin-1'): value.decode('latin-1')
+            for key, value in scope['headers']
+            if key in PROPAGATION_HEADERS
+        }
+        with tracing.span(
+            method,
+            attributes={
+                'http.request.method': method,
+                'url.path': scope['path'],
+            },
+            kind='server',
+            carrier=carrier,
+        ) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get('route')
+                path = UNMATCHED_ROUTE if route is None else route.path
+                span.update_name(f'{method} {path}')
+                span.set_attribute('http.route', path)
+                span.set_attribute('http.response.status_code', status)
+                if status >= 500:
+                    tracing.set_error(span, f'HTTP {status}')
@@ -0,0 +1,64 @@
+"""Точка входа воркера расчетов из БД.
+
+Запуск: python -m app.worker [--once]
+
+Воркеры забирают расчеты через FOR UPDATE SKIP LOCKED и не мешают друг
+другу, поэтому для масштабирования достаточно запустить больше процессов.
+С --once воркер выполняет все queued записи и завершается, так
+дорасчитываются записи, потерянные упавшим процессом API в режиме queue.
+"""
+
+# STDLIB
+import argparse
+import asyncio
+import signal
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.score_cache import score_cache
+from app.database.db_base_config import dispose_engines
+from app.services.calc_worker import calc_worker
+from app.services.calculation import calculation_backend, cpu_executor
+from app.services.tracing import tracing
+
+
+async def main(once: bool = False) -> None:
+    """Работает до SIGINT или SIGTERM, затем дает расчетам завершиться.
+
+    Args:
+        once (bool): Выполнить доступные расчеты и завершиться.
+    """
+    tracing.setup(service_name='calc-worker')
+    if once:
+        try:
+            count = await calc_worker.drain()
+        finally:
+            await close()
+        print(f'done: {count} jobs')
+        return
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await calc_worker.start()
+    try:
+        await stop.wait()
+    finally:
+        await calc_worker.stop(drain_timeout=app_settings.calc_drain_timeout)
+        await close()
+
+
+async def close() -> None:
+    """Закрывает бэкенд вычислений, пул процессов, кэш и соединения."""
+    await calculation_backend.aclose()
+    await cpu_executor.shutdown()
+    await score_cache.aclose()
+    await dispose_engines()
+    tracing.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--once', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(main(args.once))
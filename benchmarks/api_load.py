@@ -0,0 +1,368 @@
+"""Нагрузочный бенчмарк ендпоинтов /calc/, /result/ и /results/.
+
+Гоняет приложение app.main.app заданным числом параллельных клиентов со
+смесью запросов и печатает пропускную способность и p50/p95/p99 по
+каждому ендпоинту. Расчет счета заменяется имитацией без паузы, так что
+замер показывает стоимость HTTP слоя, сессий и DAL, а не сервиса
+вычислений.
+
+Цели:
+    asgi - приложение в процессе клиента через httpx.ASGITransport;
+    uvicorn - приложение в дочернем процессе uvicorn с имитацией расчета;
+    url - уже запущенный сервер по --url, расчет как настроен на сервере.
+
+Записи создаются в БД из настроек приложения, она должна быть
+мигрирована. Результат можно сохранить как JSON базу (--save) и
+сравнить с ней следующий запуск (--compare): при росте p95 любого
+ендпоинта больше --tolerance бенчмарк завершается с кодом 1.
+
+Запуск:
+    python -m benchmarks.api_load --target asgi --concurrency 32 \
+        --requests 5000 --mix calc=1,result=4,results=1 \
+        --compare benchmarks/baselines/api_load_asgi.json
+"""
+
+# STDLIB
+import argparse
+import asyncio
+from collections import defaultdict
+import json
+from pathlib import Path
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# THIRDPARTY
+from httpx import ASGITransport, AsyncClient, HTTPError
+import uvicorn
+
+# FIRSTPARTY
+from app.main import app
+from app.services import calculation
+from app.services.calculation import StubCalculationBackend
+
+ENDPOINTS = ('calc', 'result', 'results')
+RESULTS_BATCH = 20
+
+
+def install_stub() -> None:
+    """Заменяет бэкенд вычислений процесса имитацией без паузы."""
+    backend = StubCalculationBackend(min_delay=0, max_delay=0)
+    calculation.calculation_backend = backend
+    calculation.calc_batcher.backend = backend
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Разбирает смесь запросов формата calc=1,result=4.
+
+    Args:
+        value (str): Веса ендпоинтов через запятую.
+
+    Returns:
+        dict[str, float]: Вес каждого ендпоинта.
+
+    Raises:
+        ArgumentTypeError: Если ендпоинт неизвестен или вес не число.
+    """
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f'неизвестный ендпоинт {name}')
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'неверный вес {weight}')
+    return mix
+
+
+class LoadRunner:
+    """Параллельные клиенты, выполняющие смесь запросов."""
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        mix: dict[str, float],
+        territories: int,
+        seed: int,
+    ) -> None:
+        """Инициализация клиентов.
+
+        Args:
+            client (AsyncClient): HTTP клиент приложения.
+            mix (dict[str, float]): Веса ендпоинтов.
+            territories (int): Количество разных кадастровых номеров.
+            seed (int): Начальное значение генератора запросов.
+        """
+        self.client = client
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.territories = territories
+        self.random = random.Random(seed)
+        self.ids: list[int] = []
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def calc_body(self) -> dict:
+        """Тело запроса /calc/ со случайной территорией."""
+        number = self.random.randrange(self.territories)
+        return {
+            'cadastral_number': f'77:77:{number:06}:00',
+            'latitude': 55 + number % 1000 / 1000,
+            'longtitude': 37 + number // 1000 % 1000 / 1000,
+        }
+
+    async def request(self, name: str) -> None:
+        """Выполняет запрос к ендпоинту и замеряет его.
+
+        Args:
+            name (str): calc, result или results.
+        """
+        started = time.perf_counter()
+        try:
+            if name == 'calc':
+                response = await self.client.post(
+                    '/calc/', json=self.calc_body()
+                )
+            elif name == 'result':
+                response = await self.client.get(
+                    '/result/',
+                    params={'result_id': self.random.choice(self.ids)},
+                )
+            else:
+                ids = self.random.sample(
+                    self.ids, min(RESULTS_BATCH, len(self.ids))
+                )
+                response = await self.client.get(
+                    '/results/', params={'ids': ','.join(map(str, ids))}
+                )
+        except HTTPError:
+            self.errors[name] += 1
+            return
+        self.timings[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        elif name == 'calc':
+            self.ids.append(response.json())
+
+    async def warmup(self, requests: int) -> None:
+        """Создает записи для чтения и прогревает соединения.
+
+        Args:
+            requests (int): Количество запросов /calc/.
+        """
+        for _ in range(requests):
+            await self.request('calc')
+        if not self.ids:
+            raise RuntimeError('Не удалось создать записи, см. ошибки /calc/')
+        self.timings.clear()
+        self.errors.clear()
+
+    async def run(self, requests: int, concurrency: int) -> float:
+        """Выполняет запросы параллельными клиентами.
+
+        Args:
+            requests (int): Общее количество запросов.
+            concurrency (int): Количество параллельных клиентов.
+
+        Returns:
+            float: Время замера, сек.
+        """
+        plan = self.random.choices(self.names, self.weights, k=requests)
+
+        async def worker() -> None:
+            while plan:
+                await self.request(plan.pop())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def summary(self, elapsed: float) -> dict:
+        """Статистика замера по ендпоинтам.
+
+        Args:
+            elapsed (float): Время замера, сек.
+
+        Returns:
+            dict: JSON формата {'elapsed': 10.0, 'throughput': 500.0,
+                'endpoints': {'calc': {'requests': 1000, 'errors': 0,
+                'throughput': 100.0, 'mean': 5.1, 'p50': 4.2, 'p95': 9.8,
+                'p99': 15.0}}}, время в миллисекундах.
+        """
+        endpoints = {}
+        for name, timings in sorted(self.timings.items()):
+            quantiles = statistics.quantiles(timings, n=100)
+            endpoints[name] = {
+                'requests': len(timings),
+                'errors': self.errors[name],
+                'throughput': len(timings) / elapsed,
+                'mean': statistics.mean(timings),
+                'p50': quantiles[49],
+                'p95': quantiles[94],
+                'p99': quantiles[98],
+            }
+        total = sum(item['requests'] for item in endpoints.values())
+        return {
+            'elapsed': elapsed,
+            'throughput': total / elapsed,
+            'endpoints': endpoints,
+        }
+
+
+def report(summary: dict, baseline: dict | None, tolerance: float) -> bool:
+    """Печатает статистику и сравнение с базой.
+
+    Args:
+        summary (dict): Статистика замера.
+        baseline (dict | None): Сохраненная статистика для сравнения.
+        tolerance (float): Допустимый относительный рост p95.
+
+    Returns:
+        bool: Нет ли регрессии p95 относительно базы.
+    """
+    print(
+        f"total: {summary['throughput']:.1f} req/s "
+        f"in {summary['elapsed']:.1f}s"
+    )
+    ok = True
+    for name, stats in summary['endpoints'].items():
+        line = (
+            f"{name}: {stats['throughput']:.1f} req/s "
+            f"errors={stats['errors']} mean={stats['mean']:.3f}ms "
+            f"p50={stats['p50']:.3f}ms p95={stats['p95']:.3f}ms "
+            f"p99={stats['p99']:.3f}ms"
+        )
+        base = (baseline or {}).get('endpoints', {}).get(name)
+        if base:
+            change = stats['p95'] / base['p95'] - 1
+            line += f' p95 vs baseline {change:+.1%}'
+            if change > tolerance:
+                line += ' REGRESSION'
+                ok = False
+        print(line)
+    return ok
+
+
+async def wait_for_server(client: AsyncClient, timeout: float) -> None:
+    """Ждет, пока сервер начнет отвечать.
+
+    Args:
+        client (AsyncClient): HTTP клиент сервера.
+        timeout (float): Максимальное время ожидания, сек.
+
+    Raises:
+        RuntimeError: Если сервер не ответил за timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get('/openapi.json')
+            return
+        except HTTPError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError('Сервер не запустился')
+
+
+async def measure(args: argparse.Namespace) -> dict:
+    """Запускает цель и выполняет замер.
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+
+    Returns:
+        dict: Статистика замера с параметрами запуска.
+    """
+    if args.target == 'asgi':
+        install_stub()
+        transport = ASGITransport(app=app)
+        base_url = 'http://benchmark'
+    else:
+        transport = None
+        base_url = args.url
+    server = None
+    if args.target == 'uvicorn':
+        base_url = f'http://127.0.0.1:{args.port}'
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                '-m',
+                'benchmarks.api_load',
+                '--serve',
+                '--port',
+                str(args.port),
+            ]
+        )
+    try:
+        async with AsyncClient(
+            transport=transport, base_url=base_url, timeout=60
+        ) as client:
+            runner = LoadRunner(
+                client=client,
+                mix=args.mix,
+                territories=args.territories,
+                seed=args.seed,
+            )
+            if args.target == 'asgi':
+                async with app.router.lifespan_context(app):
+                    await runner.warmup(args.warmup)
+                    elapsed = await runner.run(args.requests, args.concurrency)
+            else:
+                await wait_for_server(client, timeout=30)
+                await runner.warmup(args.warmup)
+                elapsed = await runner.run(args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return {
+        'target': args.target,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'mix': args.mix,
+        **runner.summary(elapsed),
+    }
+
+
+def serve(port: int) -> None:
+    """Запускает приложение в uvicorn с имитацией расчета без паузы.
+
+    Args:
+        port (int): Порт сервера.
+    """
+    install_stub()
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--target', choices=('asgi', 'uvicorn', 'url'), default='asgi'
+    )
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument(
+        '--mix', type=parse_mix, default=parse_mix('calc=1,result=4,results=1')
+    )
+    parser.add_argument('--territories', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', type=Path)
+    parser.add_argument('--compare', type=Path)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--serve', action='store_true')
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.port)
+        sys.exit()
+    summary = asyncio.run(measure(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    ok = report(summary, baseline, args.tolerance)
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(summary, indent=2) + '\n')
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,454 @@
+"""Фикстуры микробенчмарков DAL.
+
+Бенчмарки запускаются на одноразовом Postgres:
+    pg_ctl - новый кластер во временной папке, бинарники из PATH или
+        --bench-pg-bin, запуск не от root;
+    compose - сервис test-db-service из docker-compose.yaml;
+    env - уже запущенный сервер из настроек тестов (.test.env).
+
+В compose и env создается и после замера удаляется отдельная база
+bench_dal. Таблицы создаются из моделей и заполняются generate_series до
+--bench-rows записей territory и result.
+
+Каждый замер печатает операции в секунду и проверяет снимки планов
+запросов: общий план (plan_cache_mode = force_generic_plan) каждого
+запроса операции без стоимости сравнивается с файлом
+plans/<rows>/<name>.txt, изменившийся план проваливает бенчмарк с
+разницей планов. --bench-update-plans перезаписывает снимки.
+
+Запуск:
+    pytest benchmarks/dal --bench-postgres pg_ctl --bench-rows 1000000 \
+        --bench-json bench_dal.json
+"""
+
+# STDLIB
+import difflib
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+# THIRDPARTY
+import pytest
+import pytest_asyncio
+from sqlalchemy import URL, Connection, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# FIRSTPARTY
+from app.database.models import Base
+from tests.config import settings
+
+DATABASE = 'bench_dal'
+PLANS = Path(__file__).parent / 'plans'
+PARAMETER = re.compile(r'\$(\d+)')
+EXPLAINED = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+CADASTRAL_NUMBER = (
+    "lpad((i / 100000000 % 100)::text, 2, '0') || ':' || "
+    "lpad((i / 1000000 % 100)::text, 2, '0') || ':' || "
+    "lpad((i % 1000000)::text, 6, '0') || '\\:00'"
+)
+
+results_key = pytest.StashKey[list[dict]]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Параметры запуска бенчмарков.
+
+    Args:
+        parser (pytest.Parser): Парсер параметров pytest.
+    """
+    group = parser.getgroup('bench', 'микробенчмарки DAL')
+    group.addoption(
+        '--bench-postgres',
+        choices=('pg_ctl', 'compose', 'env'),
+        default='pg_ctl',
+        help='как получить одноразовый Postgres',
+    )
+    group.addoption(
+        '--bench-pg-bin', default=None, help='папка с initdb и pg_ctl'
+    )
+    group.addoption(
+        '--bench-rows',
+        type=int,
+        default=10_000,
+        help='записей territory и result, например 10000, 1000000',
+    )
+    group.addoption('--bench-rounds', type=int, default=200)
+    group.addoption('--bench-warmup', type=int, default=10)
+    group.addoption('--bench-batch', type=int, default=100)
+    group.addoption('--bench-json', type=Path, default=None)
+    group.addoption('--bench-update-plans', action='store_true')
+
+
+def free_port() -> int:
+    """Свободный TCP порт на localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def pg_ctl_server(
+    directory: Path, bin_dir: str | None
+) -> tuple[URL, Callable[[], None]]:
+    """Запускает новый кластер Postgres во временной папке.
+
+    Args:
+        directory (Path): Папка для данных кластера.
+        bin_dir (str | None): Папка с бинарниками Postgres.
+
+    Returns:
+        tuple[URL, Callable[[], None]]: URL базы postgres и остановка
+            кластера.
+
+    Raises:
+        pytest.UsageError: Если бинарники не найдены или запуск от root.
+    """
+    initdb = shutil.which('initdb', path=bin_dir)
+    pg_ctl = shutil.which('pg_ctl', path=bin_dir)
+    if initdb is None or pg_ctl is None:
+        raise pytest.UsageError('initdb и pg_ctl не найдены, --bench-pg-bin')
+    if os.geteuid() == 0:
+        raise pytest.UsageError('Postgres нельзя запустить от root')
+    data = directory / 'data'
+    port = free_port()
+    subprocess.run(
+        [initdb, '-D', data, '-U', 'postgres', '--auth=trust', '-E', 'UTF8'],
+        check=True,
+        capture_output=True,
+    )
+    subprocess.run(
+        [
+            pg_ctl,
+            '-D',
+            data,
+            '-l',
+            directory / 'postgres.log',
+            '-o',
+            f'-p {port} -k {directory} -h 127.0.0.1',
+            '-w',
+            'start',
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+    def stop() -> None:
+        subprocess.run(
+            [pg_ctl, '-D', data, '-m', 'fast', 'stop'],
+            check=True,
+            capture_output=True,
+        )
+
+    url = URL.create(
+        'postgresql+asyncpg',
+        username='postgres',
+        host='127.0.0.1',
+        port=port,
+        database='postgres',
+    )
+    return url, stop
+
+
+def compose_server() -> tuple[URL, Callable[[], None]]:
+    """Поднимает сервис test-db-service из docker-compose.yaml.
+
+    Returns:
+        tuple[URL, Callable[[], None]]: URL базы из настроек тестов и
+            остановка сервиса.
+    """
+    subprocess.run(
+        ['docker', 'compose', 'up', '-d', '--wait', 'test-db-service'],
+        check=True,
+    )
+
+    def stop() -> None:
+        subprocess.run(
+            ['docker', 'compose', 'stop', 'test-db-service'], check=True
+        )
+
+    return settings.get_db_url(), stop
+
+
+@pytest.fixture(scope='session')
+def bench_server(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Iterator[URL]:
+    """Одноразовый сервер Postgres.
+
+    Args:
+        request (pytest.FixtureRequest): Запрос фикстуры с параметрами.
+        tmp_path_factory (pytest.TempPathFactory): Временные папки.
+
+    Yields:
+        URL: URL подключения к служебной базе сервера.
+    """
+    mode = request.config.getoption('--bench-postgres')
+    if mode == 'pg_ctl':
+        url, stop = pg_ctl_server(
+            tmp_path_factory.mktemp('postgres'),
+            request.config.getoption('--bench-pg-bin'),
+        )
+    elif mode == 'compose':
+        url, stop = compose_server()
+    else:
+        url, stop = settings.get_db_url(), None
+    yield url
+    if stop is not None:
+        stop()
+
+
+async def seed(engine: AsyncEngine, rows: int) -> None:
+    """Создает таблицы из моделей и заполняет их.
+
+    Каждая территория получает одну запись result, 90% записей со счетом.
+
+    Args:
+        engine (AsyncEngine): Движок базы бенчмарка.
+        rows (int): Количество записей territory и result.
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(
+            text(
+                'INSERT INTO territory (cadastral_number, latitude, '
+                f'longtitude) SELECT {CADASTRAL_NUMBER}, '
+                '54 + random() * 3, 35 + random() * 5 '
+                'FROM generate_series(1, :rows) AS i'
+            ),
+            {'rows': rows},
+        )
+        await connection.execute(
+            text(
+                'INSERT INTO result (cadastral_number, score, status) '
+                f'SELECT {CADASTRAL_NUMBER}, '
+                'CASE WHEN i % 10 <> 0 THEN random() * 200 - 100 END, '
+                "CASE WHEN i % 10 <> 0 THEN 'done' ELSE 'queued' END "
+                'FROM generate_series(1, :rows) AS i'
+            ),
+            {'rows': rows},
+        )
+    autocommit = engine.execution_options(isolation_level='AUTOCOMMIT')
+    async with autocommit.connect() as connection:
+        for table in ('territory', 'result', 'score_rollup'):
+            await connection.execute(text(f'VACUUM ANALYZE {table}'))
+
+
+@pytest_asyncio.fixture(scope='session', loop_scope='session')
+async def bench_engine(
+    request: pytest.FixtureRequest, bench_server: URL
+) -> AsyncIterator[AsyncEngine]:
+    """Движок заполненной базы бенчмарка.
+
+    Args:
+        request (pytest.FixtureRequest): Запрос фикстуры с параметрами.
+        bench_server (URL): URL служебной базы сервера.
+
+    Yields:
+        AsyncEngine: Движок с пулом соединений к базе bench_dal.
+    """
+    admin = create_async_engine(bench_server, isolation_level='AUTOCOMMIT')
+    async with admin.connect() as connection:
+        await connection.execute(
+            text(f'DROP DATABASE IF EXISTS {DATABASE} WITH (FORCE)')
+        )
+        await connection.execute(text(f'CREATE DATABASE {DATABASE}'))
+    engine = create_async_engine(bench_server.set(database=DATABASE))
+    rows = request.config.getoption('--bench-rows')
+    started = time.perf_counter()
+    await seed(engine, rows)
+    print(f'\nseeded {rows} rows in {time.perf_counter() - started:.1f}s')
+    yield engine
+    await engine.dispose()
+    async with admin.connect() as connection:
+        await connection.execute(
+            text(f'DROP DATABASE IF EXISTS {DATABASE} WITH (FORCE)')
+        )
+    await admin.dispose()
+
+
+class Bench:
+    """Замер операции DAL и проверка снимков планов ее запросов."""
+
+    def __init__(self, config: pytest.Config, engine: AsyncEngine) -> None:
+        """Инициализация замера.
+
+        Args:
+            config (pytest.Config): Конфигурация pytest с параметрами.
+            engine (AsyncEngine): Движок базы бенчмарка.
+        """
+        self.config = config
+        self.engine = engine
+        self.rows = config.getoption('--bench-rows')
+        self.rounds = config.getoption('--bench-rounds')
+        self.warmup = config.getoption('--bench-warmup')
+
+    async def capture(self, func: Callable[[], Awaitable[Any]]) -> list[str]:
+        """Выполняет операцию и собирает ее запросы.
+
+        Args:
+            func (Callable[[], Awaitable[Any]]): Операция.
+
+        Returns:
+            list[str]: Тексты запросов в порядке выполнения.
+        """
+        statements = []
+
+        def record(
+            connection: Connection,
+            cursor: object,
+            statement: str,
+            *args: object,
+        ) -> None:
+            if statement.lstrip().upper().startswith(EXPLAINED):
+                statements.append(statement)
+
+        sync_engine = self.engine.sync_engine
+        event.listen(sync_engine, 'before_cursor_execute', record)
+        try:
+            await func()
+        finally:
+            event.remove(sync_engine, 'before_cursor_execute', record)
+        return statements
+
+    async def explain(self, statements: list[str]) -> str:
+        """Общие планы запросов без стоимости.
+
+        Общий план не зависит от значений параметров, поэтому снимок
+        меняется только при смене индексов, статистики или текста запроса.
+
+        Args:
+            statements (list[str]): Тексты запросов с $n параметрами.
+
+        Returns:
+            str: Планы запросов, разделенные пустой строкой.
+        """
+        plans = []
+        async with self.engine.connect() as connection:
+            await connection.exec_driver_sql(
+                'SET plan_cache_mode = force_generic_plan'
+            )
+            for statement in statements:
+                await connection.exec_driver_sql(
+                    f'PREPARE bench_plan AS {statement}'
+                )
+                count = max(map(int, PARAMETER.findall(statement)), default=0)
+                arguments = f"({', '.join(['NULL'] * count)})" if count else ''
+                result = await connection.exec_driver_sql(
+                    f'EXPLAIN (COSTS OFF) EXECUTE bench_plan{arguments}'
+                )
+                plans.append('\n'.join(row[0] for row in result))
+                await connection.exec_driver_sql('DEALLOCATE bench_plan')
+        return '\n\n'.join(plans) + '\n'
+
+    def check_plan(self, name: str, plan: str) -> None:
+        """Сравнивает план со снимком и записывает новый снимок.
+
+        Args:
+            name (str): Имя операции.
+            plan (str): Планы запросов операции.
+        """
+        path = PLANS / str(self.rows) / f'{name}.txt'
+        update = self.config.getoption('--bench-update-plans')
+        if path.exists() and not update:
+            expected = path.read_text()
+            if expected != plan:
+                diff = difflib.unified_diff(
+                    expected.splitlines(),
+                    plan.splitlines(),
+                    str(path),
+                    'current',
+                    lineterm='',
+                )
+                pytest.fail('план изменился:\n' + '\n'.join(diff))
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(plan)
+
+    async def __call__(
+        self, name: str, func: Callable[[], Awaitable[Any]], items: int = 1
+    ) -> dict:
+        """Замеряет операцию и проверяет план ее запросов.
+
+        Args:
+            name (str): Имя операции.
+            func (Callable[[], Awaitable[Any]]): Операция, каждый вызов
+                выполняет ее с новыми данными.
+            items (int): Количество записей в одной операции.
+
+        Returns:
+            dict: Статистика замера.
+        """
+        plan = await self.explain(await self.capture(func))
+        for _ in range(self.warmup):
+            await func()
+        timings = []
+        for _ in range(self.rounds):
+            started = time.perf_counter()
+            await func()
+            timings.append(time.perf_counter() - started)
+        quantiles = statistics.quantiles(timings, n=100)
+        stats = {
+            'name': name,
+            'rows': self.rows,
+            'rounds': self.rounds,
+            'items': items,
+            'ops': self.rounds / sum(timings),
+            'items_per_second': self.rounds * items / sum(timings),
+            'mean': statistics.mean(timings) * 1000,
+            'p50': quantiles[49] * 1000,
+            'p95': quantiles[94] * 1000,
+            'p99': quantiles[98] * 1000,
+        }
+        self.config.stash.setdefault(results_key, []).append(stats)
+        self.check_plan(name, plan)
+        return stats
+
+
+@pytest.fixture
+def bench(request: pytest.FixtureRequest, bench_engine: AsyncEngine) -> Bench:
+    """Замер операции DAL.
+
+    Args:
+        request (pytest.FixtureRequest): Запрос фикстуры.
+        bench_engine (AsyncEngine): Движок базы бенчмарка.
+
+    Returns:
+        Bench: Замер.
+    """
+    return Bench(request.config, bench_engine)
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter,
+    exitstatus: int,
+    config: pytest.Config,
+) -> None:
+    """Печатает таблицу замеров и сохраняет их в --bench-json.
+
+    Args:
+        terminalreporter (pytest.TerminalReporter): Вывод pytest.
+        exitstatus (int): Код завершения.
+        config (pytest.Config): Конфигурация pytest.
+    """
+    results = config.stash.get(results_key, [])
+    if not results:
+        return
+    terminalreporter.section('DAL benchmarks')
+    for stats in results:
+        terminalreporter.write_line(
+            f"{stats['name']:<24} rows={stats['rows']} "
+            f"ops/s={stats['ops']:.1f} "
+            f"items/s={stats['items_per_second']:.1f} "
+            f"mean={stats['mean']:.3f}ms p50={stats['p50']:.3f}ms "
+            f"p95={stats['p95']:.3f}ms p99={stats['p99']:.3f}ms"
+        )
+    path = config.getoption('--bench-json')
+    if path is not None:
+        path.write_text(json.dumps(results, indent=2) + '\n')
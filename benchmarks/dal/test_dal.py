@@ -0,0 +1,139 @@
+"""Микробенчмарки горячих путей DAL Territory и Result."""
+
+# STDLIB
+import itertools
+import random
+
+# THIRDPARTY
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.dal.score_cache import NullScoreCache
+from app.dal.territory import Territory
+from app.schemas.territory import CalcRequestSchema
+from benchmarks.dal.conftest import Bench
+from benchmarks.result_update import cadastral_number
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.asyncio(loop_scope='session'),
+]
+
+
+@pytest_asyncio.fixture(loop_scope='session')
+async def session(bench_engine: AsyncEngine) -> AsyncSession:
+    """Сессия базы бенчмарка.
+
+    Args:
+        bench_engine (AsyncEngine): Движок базы бенчмарка.
+
+    Yields:
+        AsyncSession: Сессия, общая для всех операций замера.
+    """
+    async with AsyncSession(bench_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def rows(request: pytest.FixtureRequest) -> int:
+    """Количество заполненных записей."""
+    return request.config.getoption('--bench-rows')
+
+
+@pytest.fixture
+def batch(request: pytest.FixtureRequest) -> int:
+    """Размер пачки пакетных операций."""
+    return request.config.getoption('--bench-batch')
+
+
+def result_dal(session: AsyncSession) -> Result:
+    """Создает Result без кэша, чтобы замер читал БД."""
+    return Result(session=session, cache=NullScoreCache())
+
+
+class TerritoryFactory:
+    """Новые территории за пределами заполненных номеров."""
+
+    numbers = itertools.count(10**8)
+
+    def __call__(self) -> CalcRequestSchema:
+        """Следующая территория."""
+        return CalcRequestSchema(
+            cadastral_number=cadastral_number(next(self.numbers)),
+            latitude=random.uniform(54, 57),
+            longtitude=random.uniform(35, 40),
+        )
+
+
+async def test_territory_create(bench: Bench, session: AsyncSession) -> None:
+    """Territory.create новой территории."""
+    dal = Territory(session=session)
+    territory = TerritoryFactory()
+    await bench('territory_create', lambda: dal.create(data=territory()))
+
+
+async def test_territory_create_many(
+    bench: Bench, session: AsyncSession, batch: int
+) -> None:
+    """Territory.create_many пачки новых территорий."""
+    dal = Territory(session=session)
+    territory = TerritoryFactory()
+    await bench(
+        'territory_create_many',
+        lambda: dal.create_many(data=[territory() for _ in range(batch)]),
+        items=batch,
+    )
+
+
+async def test_result_update(
+    bench: Bench, session: AsyncSession, rows: int
+) -> None:
+    """Result.update случайной записи."""
+    dal = result_dal(session)
+    await bench(
+        'result_update',
+        lambda: dal.update(
+            id_=random.randint(1, rows), score=random.uniform(-100, 100)
+        ),
+    )
+
+
+async def test_result_update_many(
+    bench: Bench, session: AsyncSession, rows: int, batch: int
+) -> None:
+    """Result.update_many пачки случайных записей."""
+    dal = result_dal(session)
+    await bench(
+        'result_update_many',
+        lambda: dal.update_many(
+            [
+                (id_, random.uniform(-100, 100))
+                for id_ in random.sample(range(1, rows + 1), batch)
+            ]
+        ),
+        items=batch,
+    )
+
+
+async def test_result_get(
+    bench: Bench, session: AsyncSession, rows: int
+) -> None:
+    """Result.get случайной записи."""
+    dal = result_dal(session)
+    await bench('result_get', lambda: dal.get(id_=random.randint(1, rows)))
+
+
+async def test_result_get_many(
+    bench: Bench, session: AsyncSession, rows: int, batch: int
+) -> None:
+    """Result.get_many пачки случайных записей."""
+    dal = result_dal(session)
+
+    async def get_many() -> list:
+        ids = random.sample(range(1, rows + 1), batch)
+        return [row async for row in dal.get_many(ids=ids)]
+
+    await bench('result_get_many', get_many, items=batch)
@@ -0,0 +1,211 @@
+"""Бенчмарк накладных расходов метрик на горячем пути.
+
+Замеряет по отдельности:
+    middleware - ASGI вызов маршрута FastAPI без работы с MetricsMiddleware
+        и без него, без HTTP клиента и сети;
+    sql - SELECT 1 через движок с событиями замера запросов и без них.
+
+Разница медиан - стоимость метрик на один HTTP запрос и на один SQL
+запрос, время SQL запроса зависит от сети и шумнее ASGI вызова. В
+benchmarks/baselines/metrics_overhead.json обе разницы в пределах
+нескольких микросекунд при ~100 мкс на ASGI вызов и ~150 мкс на SELECT 1,
+то есть в пределах шума. Полный путь запроса с метриками и без них
+сравнивает api_load:
+    METRICS_ENABLED=false python -m benchmarks.api_load
+    METRICS_ENABLED=true python -m benchmarks.api_load
+
+Запуск:
+    python -m benchmarks.metrics_overhead --requests 20000 --statements 5000 \
+        --save benchmarks/baselines/metrics_overhead.json
+"""
+
+# STDLIB
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import statistics
+import time
+
+# THIRDPARTY
+from fastapi import FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from starlette.types import ASGIApp, Message
+
+# FIRSTPARTY
+from app.database.db_prod_config import settings
+from app.services.metrics import (
+    MetricsMiddleware,
+    after_cursor_execute,
+    before_cursor_execute,
+)
+
+
+def create_app(with_metrics: bool) -> ASGIApp:
+    """Приложение с одним маршрутом.
+
+    Args:
+        with_metrics (bool): Добавить MetricsMiddleware.
+
+    Returns:
+        ASGIApp: Приложение FastAPI.
+    """
+    app = FastAPI()
+
+    @app.get('/items/{item_id}')
+    async def get_item(item_id: int) -> dict:
+        return {'id': item_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def measure_requests(app: ASGIApp, requests: int) -> list[float]:
+    """Замеряет ASGI вызовы маршрута.
+
+    Args:
+        app (ASGIApp): Приложение.
+        requests (int): Количество вызовов.
+
+    Returns:
+        list[float]: Время каждого вызова в микросекундах.
+    """
+
+    async def receive() -> Message:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    timings = []
+    for number in range(requests):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': f'/items/{number}',
+            'raw_path': f'/items/{number}'.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [],
+            'server': ('benchmark', 80),
+            'client': ('benchmark', 1),
+        }
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+async def measure_statements(
+    engine: AsyncEngine, statements: int
+) -> list[float]:
+    """Замеряет SELECT 1 в одном соединении.
+
+    Args:
+        engine (AsyncEngine): Движок.
+        statements (int): Количество запросов.
+
+    Returns:
+        list[float]: Время каждого запроса в микросекундах.
+    """
+    timings = []
+    async with engine.connect() as connection:
+        for _ in range(statements):
+            started = time.perf_counter()
+            await connection.execute(text('SELECT 1'))
+            timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+def summarize(plain: list[float], measured: list[float]) -> dict:
+    """Статистика замеров без метрик и с метриками.
+
+    Args:
+        plain (list[float]): Время без метрик, мкс.
+        measured (list[float]): Время с метриками, мкс.
+
+    Returns:
+        dict: Средние, медианы и их разница в микросекундах.
+    """
+    return {
+        'plain_mean': statistics.mean(plain),
+        'plain_p50': statistics.median(plain),
+        'metrics_mean': statistics.mean(measured),
+        'metrics_p50': statistics.median(measured),
+        'overhead_mean': statistics.mean(measured) - statistics.mean(plain),
+        'overhead_p50': statistics.median(measured) - statistics.median(plain),
+    }
+
+
+def report(title: str, stats: dict) -> None:
+    """Печатает статистику замера.
+
+    Args:
+        title (str): Заголовок замера.
+        stats (dict): Статистика из summarize.
+    """
+    print(
+        f"{title}: plain mean={stats['plain_mean']:.1f}us "
+        f"p50={stats['plain_p50']:.1f}us, metrics "
+        f"mean={stats['metrics_mean']:.1f}us "
+        f"p50={stats['metrics_p50']:.1f}us, "
+        f"overhead mean={stats['overhead_mean']:+.1f}us "
+        f"p50={stats['overhead_p50']:+.1f}us"
+    )
+
+
+async def main(requests: int, statements: int, rounds: int) -> dict:
+    """Выполняет бенчмарк.
+
+    Замеры без метрик и с метриками чередуются по rounds раз, чтобы
+    прогрев и фоновая нагрузка влияли на оба одинаково.
+
+    Args:
+        requests (int): Количество ASGI вызовов в раунде.
+        statements (int): Количество SQL запросов в раунде.
+        rounds (int): Количество раундов.
+
+    Returns:
+        dict: Статистика middleware и sql.
+    """
+    apps = {False: create_app(False), True: create_app(True)}
+    url = settings.get_db_url()
+    engines = {False: create_async_engine(url), True: create_async_engine(url)}
+    sync_engine = engines[True].sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', after_cursor_execute)
+    http = {False: [], True: []}
+    sql = {False: [], True: []}
+    for _ in range(rounds):
+        for with_metrics in (False, True):
+            http[with_metrics] += await measure_requests(
+                apps[with_metrics], requests
+            )
+            sql[with_metrics] += await measure_statements(
+                engines[with_metrics], statements
+            )
+    for engine in engines.values():
+        await engine.dispose()
+    return {
+        'middleware': summarize(http[False], http[True]),
+        'sql': summarize(sql[False], sql[True]),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--statements', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--save', type=Path)
+    args = parser.parse_args()
+    results = asyncio.run(main(args.requests, args.statements, args.rounds))
+    report('middleware', results['middleware'])
+    report('sql', results['sql'])
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + '\n')
@@ -0,0 +1,212 @@
+"""Бенчмарк записи счета по кадастровому номеру до и после индексов.
+
+Создает во временной схеме таблицы territory и result, заполняет их
+generate_series, замеряет UPDATE result ... WHERE cadastral_number = $1 без
+индексов, затем строит индексы из ревизии 3f1c2a7d9b41 и повторяет замер.
+
+Запуск:
+    python -m benchmarks.result_update --rows 2000000 --updates 200
+"""
+
+# STDLIB
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+# THIRDPARTY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# FIRSTPARTY
+from app.database.db_prod_config import settings
+
+SCHEMA = 'bench_result_update'
+
+CADASTRAL_NUMBER = (
+    "lpad((i / 100000000 % 100)::text, 2, '0') || ':' || "
+    "lpad((i / 1000000 % 100)::text, 2, '0') || ':' || "
+    "lpad((i % 1000000)::text, 6, '0') || '\\:00'"
+)
+
+
+def cadastral_number(i: int) -> str:
+    """Кадастровый номер, совпадающий с генерацией в SQL."""
+    return (
+        f'{i // 100000000 % 100:02}:{i // 1000000 % 100:02}:'
+        f'{i % 1000000:06}:00'
+    )
+
+
+async def prepare(connection: AsyncConnection, rows: int) -> None:
+    """Создает и заполняет таблицы без дополнительных индексов.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД.
+        rows (int): Количество записей в territory и result.
+    """
+    await connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+    await connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+    await connection.execute(
+        text(
+            f'CREATE TABLE {SCHEMA}.territory ('
+            'cadastral_number varchar PRIMARY KEY, '
+            'latitude float NOT NULL, longtitude float NOT NULL)'
+        )
+    )
+    await connection.execute(
+        text(
+            f'CREATE TABLE {SCHEMA}.result ('
+            'id serial PRIMARY KEY, '
+            f'cadastral_number varchar NOT NULL REFERENCES {SCHEMA}.territory '
+            'ON DELETE CASCADE, score float)'
+        )
+    )
+    await connection.execute(
+        text(
+            f'INSERT INTO {SCHEMA}.territory '
+            f'SELECT {CADASTRAL_NUMBER}, random() * 180 - 90, '
+            'random() * 360 - 180 FROM generate_series(1, :rows) AS i'
+        ),
+        {'rows': rows},
+    )
+    await connection.execute(
+        text(
+            f'INSERT INTO {SCHEMA}.result (cadastral_number, score) '
+            f'SELECT {CADASTRAL_NUMBER}, '
+            'CASE WHEN random() < 0.9 THEN random() * 200 - 100 END '
+            'FROM generate_series(1, :rows) AS i'
+        ),
+        {'rows': rows},
+    )
+    await connection.execute(text(f'ANALYZE {SCHEMA}.territory'))
+    await connection.execute(text(f'ANALYZE {SCHEMA}.result'))
+
+
+async def create_indexes(connection: AsyncConnection) -> None:
+    """Строит индексы, как в миграции 3f1c2a7d9b41.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД.
+    """
+    await connection.execute(
+        text(
+            'CREATE INDEX ix_result_cadastral_number '
+            f'ON {SCHEMA}.result (cadastral_number)'
+        )
+    )
+    await connection.execute(
+        text(
+            f'CREATE INDEX ix_result_pending ON {SCHEMA}.result (id) '
+            'WHERE score IS NULL'
+        )
+    )
+    await connection.execute(text(f'ANALYZE {SCHEMA}.result'))
+
+
+async def measure(
+    connection: AsyncConnection, rows: int, updates: int
+) -> list[float]:
+    """Замеряет время UPDATE по случайным кадастровым номерам.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД.
+        rows (int): Количество записей в таблице.
+        updates (int): Количество замеров.
+
+    Returns:
+        list[float]: Время каждого UPDATE в миллисекундах.
+    """
+    statement = text(
+        f'UPDATE {SCHEMA}.result SET score = :score '
+        'WHERE cadastral_number = :cadastral_number'
+    )
+    timings = []
+    for _ in range(updates):
+        params = {
+            'score': random.uniform(-100, 100),
+            'cadastral_number': cadastral_number(random.randint(1, rows)),
+        }
+        started = time.perf_counter()
+        await connection.execute(statement, params)
+        await connection.commit()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def explain(connection: AsyncConnection) -> str:
+    """План запроса записи счета.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД.
+
+    Returns:
+        str: Текст плана.
+    """
+    result = await connection.execute(
+        text(
+            f'EXPLAIN UPDATE {SCHEMA}.result SET score = 1 '
+            "WHERE cadastral_number = '00\\:00\\:000001\\:00'"
+        )
+    )
+    return '\n'.join(row[0] for row in result)
+
+
+def report(title: str, timings: list[float], plan: str) -> None:
+    """Печатает статистику замера.
+
+    Args:
+        title (str): Заголовок замера.
+        timings (list[float]): Время запросов в миллисекундах.
+        plan (str): План запроса.
+    """
+    quantiles = statistics.quantiles(timings, n=100)
+    print(
+        f'{title}: mean={statistics.mean(timings):.3f}ms '
+        f'p50={quantiles[49]:.3f}ms p95={quantiles[94]:.3f}ms '
+        f'p99={quantiles[98]:.3f}ms'
+    )
+    print(plan)
+
+
+async def main(rows: int, updates: int, keep: bool) -> None:
+    """Выполняет бенчмарк.
+
+    Args:
+        rows (int): Количество записей в таблицах.
+        updates (int): Количество замеров на каждый этап.
+        keep (bool): Не удалять схему после замера.
+    """
+    engine = settings.get_engine(use_null_pool=True)
+    async with engine.connect() as connection:
+        started = time.perf_counter()
+        await prepare(connection, rows)
+        await connection.commit()
+        print(f'seeded {rows} rows in {time.perf_counter() - started:.1f}s')
+
+        report(
+            'without index',
+            await measure(connection, rows, updates),
+            await explain(connection),
+        )
+        await create_indexes(connection)
+        await connection.commit()
+        report(
+            'with index',
+            await measure(connection, rows, updates),
+            await explain(connection),
+        )
+        if not keep:
+            await connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+            await connection.commit()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(main(rows=args.rows, updates=args.updates, keep=args.keep))
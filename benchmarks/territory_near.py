@@ -0,0 +1,314 @@
+"""Бенчмарк поиска территорий рядом с точкой до и после geohash индекса.
+
+Создает во временной схеме таблицы territory с колонкой geohash и result,
+заполняет их generate_series точками в прямоугольнике вокруг Москвы,
+замеряет поиск в радиусе полным сканированием, затем строит индексы из
+ревизии e7b2d94f1c68 и замеряет Territory.near с search_path на схему
+бенчмарка.
+
+Запуск:
+    python -m benchmarks.territory_near --rows 3000000 --queries 200 \
+        --scan-queries 10
+"""
+
+# STDLIB
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+# THIRDPARTY
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+# FIRSTPARTY
+from app.dal.territory import Territory
+from app.database.db_prod_config import settings
+from app.database.models import GEOHASH_ENCODE_FUNCTION
+from app.services.geohash import EARTH_RADIUS
+
+SCHEMA = 'bench_territory_near'
+
+LAT_MIN, LAT_MAX = 54.0, 57.0
+LON_MIN, LON_MAX = 35.0, 40.0
+
+CADASTRAL_NUMBER = (
+    "lpad((i / 100000000 % 100)::text, 2, '0') || ':' || "
+    "lpad((i / 1000000 % 100)::text, 2, '0') || ':' || "
+    "lpad((i % 1000000)::text, 6, '0') || '\\:00'"
+)
+
+FULL_SCAN = text(
+    'SELECT t.cadastral_number, t.distance, '
+    f'(SELECT score FROM {SCHEMA}.result r '
+    'WHERE r.cadastral_number = t.cadastral_number AND score IS NOT NULL '
+    'ORDER BY r.id DESC LIMIT 1) AS score '
+    'FROM (SELECT cadastral_number, '
+    f'{2 * EARTH_RADIUS} * asin(least(1, sqrt('
+    'power(sin(radians(latitude - :lat) / 2), 2) + '
+    'cos(radians(:lat)) * cos(radians(latitude)) * '
+    'power(sin(radians(longtitude - :lon) / 2), 2)))) AS distance '
+    f'FROM {SCHEMA}.territory) AS t '
+    'WHERE t.distance <= :radius ORDER BY t.distance LIMIT :limit'
+)
+
+
+async def prepare(connection: AsyncConnection, rows: int) -> None:
+    """Создает и заполняет таблицы без дополнительных индексов.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД.
+        rows (int): Количество записей в territory и result.
+    """
+    await connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+    await connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+    await connection.exec_driver_sql(
+        GEOHASH_ENCODE_FUNCTION.format(name=f'{SCHEMA}.geohash_encode')
+    )
+    await connection.execute(
+        text(
+            f'CREATE TABLE {SCHEMA}.territory ('
+            'cadastral_number varchar PRIMARY KEY, '
+            'latitude float NOT NULL, longtitude float NOT NULL, '
+            'geohash varchar(12) COLLATE "C" GENERATED ALWAYS AS '
+            f'({SCHEMA}.geohash_encode(latitude, longtitude, 12)) STORED)'
+        )
+    )
+    await connection.execute(
+        text(
+            f'CREATE TABLE {SCHEMA}.result ('
+            'id serial PRIMARY KEY, '
+            f'cadastral_number varchar NOT NULL REFERENCES {SCHEMA}.territory '
+            'ON DELETE CASCADE, score float)'
+        )
+    )
+    await connection.execute(
+        text(
+            f'INSERT INTO {SCHEMA}.territory '
+            f'SELECT {CADASTRAL_NUMBER}, '
+            f'{LAT_MIN} + random() * {LAT_MAX - LAT_MIN}, '
+            f'{LON_MIN} + random() * {LON_MAX - LON_MIN} '
+            'FROM generate_series(1, :rows) AS i'
+        ),
+        {'rows': rows},
+    )
+    await connection.execute(
+        text(
+            f'INSERT INTO {SCHEMA}.result (cadastral_number, score) '
+            f'SELECT {CADASTRAL_NUMBER}, '
+            'CASE WHEN random() < 0.9 THEN random() * 200 - 100 END '
+            'FROM generate_series(1, :rows) AS i'
+        ),
+        {'rows': rows},
+    )
+    await connection.execute(
+        text(
+            'CREATE INDEX ix_result_cadastral_number '
+            f'ON {SCHEMA}.result (cadastral_number)'
+        )
+    )
+
+
+async def create_indexes(connection: AsyncConnection) -> None:
+    """Строит индексы, как в миграции e7b2d94f1c68.
+
+    VACUUM обновляет карту видимости, без нее index-only план читает
+    таблицу.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД в режиме AUTOCOMMIT.
+    """
+    await connection.execute(
+        text(
+            f'CREATE INDEX ix_territory_geohash ON {SCHEMA}.territory '
+            '(geohash) INCLUDE (cadastral_number, latitude, longtitude)'
+        )
+    )
+    await connection.execute(
+        text(
+            f'CREATE INDEX ix_result_latest_score ON {SCHEMA}.result '
+            '(cadastral_number, id) INCLUDE (score) '
+            'WHERE score IS NOT NULL'
+        )
+    )
+    await connection.execute(text(f'VACUUM ANALYZE {SCHEMA}.territory'))
+    await connection.execute(text(f'VACUUM ANALYZE {SCHEMA}.result'))
+
+
+def random_point() -> dict[str, float]:
+    """Случайная точка внутри заполненного прямоугольника."""
+    return {
+        'lat': random.uniform(LAT_MIN + 0.5, LAT_MAX - 0.5),
+        'lon': random.uniform(LON_MIN + 0.5, LON_MAX - 0.5),
+    }
+
+
+async def measure_full_scan(
+    connection: AsyncConnection, queries: int, radius: float, limit: int
+) -> list[float]:
+    """Замеряет поиск в радиусе полным сканированием territory.
+
+    Args:
+        connection (AsyncConnection): Соединение с БД.
+        queries (int): Количество замеров.
+        radius (float): Радиус поиска, м.
+        limit (int): Максимальное количество территорий.
+
+    Returns:
+        list[float]: Время каждого запроса в миллисекундах.
+    """
+    timings = []
+    for _ in range(queries):
+        params = {**random_point(), 'radius': radius, 'limit': limit}
+        started = time.perf_counter()
+        await connection.execute(FULL_SCAN, params)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def measure_near(
+    session: AsyncSession, queries: int, radius: float, limit: int
+) -> list[float]:
+    """Замеряет Territory.near по geohash индексу.
+
+    Args:
+        session (AsyncSession): Сессия со схемой бенчмарка.
+        queries (int): Количество замеров.
+        radius (float): Радиус поиска, м.
+        limit (int): Максимальное количество территорий.
+
+    Returns:
+        list[float]: Время каждого запроса в миллисекундах.
+    """
+    dal = Territory(session=session)
+    timings = []
+    for _ in range(queries):
+        point = random_point()
+        started = time.perf_counter()
+        await dal.near(
+            latitude=point['lat'],
+            longtitude=point['lon'],
+            radius=radius,
+            limit=limit,
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def explain_near(
+    session: AsyncSession, radius: float, limit: int
+) -> str:
+    """План запроса Territory.near.
+
+    Args:
+        session (AsyncSession): Сессия со схемой бенчмарка.
+        radius (float): Радиус поиска, м.
+        limit (int): Максимальное количество территорий.
+
+    Returns:
+        str: Текст плана.
+    """
+    point = random_point()
+    statement = Territory.near_statement(
+        latitude=point['lat'],
+        longtitude=point['lon'],
+        radius=radius,
+        limit=limit,
+    ).compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+    )
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(
+        f'EXPLAIN (ANALYZE, BUFFERS) {statement}'
+    )
+    return '\n'.join(row[0] for row in result)
+
+
+def report(title: str, timings: list[float], plan: str = '') -> None:
+    """Печатает статистику замера.
+
+    Args:
+        title (str): Заголовок замера.
+        timings (list[float]): Время запросов в миллисекундах.
+        plan (str): План запроса.
+    """
+    quantiles = statistics.quantiles(timings, n=100)
+    print(
+        f'{title}: mean={statistics.mean(timings):.3f}ms '
+        f'p50={quantiles[49]:.3f}ms p95={quantiles[94]:.3f}ms '
+        f'p99={quantiles[98]:.3f}ms'
+    )
+    if plan:
+        print(plan)
+
+
+async def main(
+    rows: int,
+    queries: int,
+    scan_queries: int,
+    radius: float,
+    limit: int,
+    keep: bool,
+) -> None:
+    """Выполняет бенчмарк.
+
+    Args:
+        rows (int): Количество записей в таблицах.
+        queries (int): Количество замеров поиска по индексу.
+        scan_queries (int): Количество замеров полного сканирования, каждый
+            читает всю таблицу.
+        radius (float): Радиус поиска, м.
+        limit (int): Максимальное количество территорий.
+        keep (bool): Не удалять схему после замера.
+    """
+    engine = settings.get_engine(use_null_pool=True)
+    async with engine.connect() as connection:
+        started = time.perf_counter()
+        await prepare(connection, rows)
+        await connection.commit()
+        print(f'seeded {rows} rows in {time.perf_counter() - started:.1f}s')
+
+        report(
+            'full scan',
+            await measure_full_scan(connection, scan_queries, radius, limit),
+        )
+        await connection.commit()
+        autocommit = await connection.execution_options(
+            isolation_level='AUTOCOMMIT'
+        )
+        await create_indexes(autocommit)
+    async with engine.connect() as connection:
+        await connection.execute(text(f'SET search_path TO {SCHEMA}'))
+        async with AsyncSession(bind=connection) as session:
+            report(
+                'geohash index',
+                await measure_near(session, queries, radius, limit),
+                await explain_near(session, radius, limit),
+            )
+        if not keep:
+            await connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+            await connection.commit()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--scan-queries', type=int, default=10)
+    parser.add_argument('--radius', type=float, default=1000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            rows=args.rows,
+            queries=args.queries,
+            scan_queries=args.scan_queries,
+            radius=args.radius,
+            limit=args.limit,
+            keep=args.keep,
+        )
+    )
@@ -0,0 +1,59 @@
+"""result indexes
+
+Revision ID: 3f1c2a7d9b41
+Revises: 9c00658729f8
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b41'
+down_revision: Union[str, None] = '9c00658729f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Индексы строятся CONCURRENTLY, чтобы не блокировать запись в result
+    # на больших таблицах, поэтому вне транзакции миграции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_result_cadastral_number'),
+            'result',
+            ['cadastral_number'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_result_pending',
+            'result',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text('score IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_result_pending',
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            op.f('ix_result_cadastral_number'),
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,46 @@
+"""result idempotency key
+
+Revision ID: a8d4e2c61f07
+Revises: 3f1c2a7d9b41
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4e2c61f07'
+down_revision: Union[str, None] = '3f1c2a7d9b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'result', sa.Column('idempotency_key', sa.String(), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_result_idempotency_key'),
+            'result',
+            ['idempotency_key'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_result_idempotency_key'),
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('result', 'idempotency_key')
@@ -0,0 +1,34 @@
+"""result available after
+
+Revision ID: b6e1d8f42a93
+Revises: f3a9c0d27b45
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d8f42a93'
+down_revision: Union[str, None] = 'f3a9c0d27b45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Колонка без значения по умолчанию добавляется без перезаписи таблицы.
+    op.add_column(
+        'result',
+        sa.Column(
+            'available_after', sa.DateTime(timezone=True), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('result', 'available_after')
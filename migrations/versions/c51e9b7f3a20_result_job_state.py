@@ -0,0 +1,83 @@
+"""result job state
+
+Revision ID: c51e9b7f3a20
+Revises: a8d4e2c61f07
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51e9b7f3a20'
+down_revision: Union[str, None] = 'a8d4e2c61f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Колонки с постоянным значением по умолчанию добавляются без
+    # перезаписи таблицы, уже посчитанные записи отмечаются done.
+    op.add_column(
+        'result',
+        sa.Column(
+            'status',
+            sa.String(length=16),
+            server_default='queued',
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        'result',
+        sa.Column(
+            'attempts', sa.Integer(), server_default='0', nullable=False
+        ),
+    )
+    op.add_column(
+        'result',
+        sa.Column('leased_until', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute("UPDATE result SET status = 'done' WHERE score IS NOT NULL")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_result_queued',
+            'result',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text("status = 'queued'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_result_leased',
+            'result',
+            ['leased_until'],
+            unique=False,
+            postgresql_where=sa.text("status = 'running'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_result_leased',
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_result_queued',
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('result', 'leased_until')
+    op.drop_column('result', 'attempts')
+    op.drop_column('result', 'status')
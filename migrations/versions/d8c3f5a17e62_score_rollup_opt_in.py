@@ -0,0 +1,181 @@
+"""score rollup opt in
+
+Revision ID: d8c3f5a17e62
+Revises: b6e1d8f42a93
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8c3f5a17e62'
+down_revision: Union[str, None] = 'b6e1d8f42a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCORE_ROLLUP_APPLY = """
+CREATE OR REPLACE FUNCTION score_rollup_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / 0.05)::integer,
+            floor(t.longtitude / 0.05)::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM (SELECT cadastral_number, score, 1 AS sign FROM new_rows) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / 0.05)::integer,
+            floor(t.longtitude / 0.05)::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM (SELECT cadastral_number, score, -1 AS sign FROM old_rows) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;
+    ELSE
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / 0.05)::integer,
+            floor(t.longtitude / 0.05)::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM (
+            SELECT x.*
+            FROM old_rows AS o
+            JOIN new_rows AS n USING (id)
+            CROSS JOIN LATERAL (VALUES
+                (o.cadastral_number, o.score, -1),
+                (n.cadastral_number, n.score, 1)
+            ) AS x(cadastral_number, score, sign)
+            WHERE o.score IS DISTINCT FROM n.score
+                OR o.cadastral_number <> n.cadastral_number
+        ) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+SCORE_ROLLUP_FORGET = """
+CREATE OR REPLACE FUNCTION score_rollup_forget() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO score_rollup AS rollup
+        (cell_lat, cell_lon, bucket, count, total)
+    SELECT
+        floor(OLD.latitude / 0.05)::integer,
+        floor(OLD.longtitude / 0.05)::integer,
+        score_bucket(r.score),
+        -count(*),
+        -sum(r.score)
+    FROM result AS r
+    WHERE r.cadastral_number = OLD.cadastral_number AND r.score IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+        count = rollup.count + excluded.count,
+        total = rollup.total + excluded.total;
+    RETURN OLD;
+END
+$$
+"""
+
+SCORE_ROLLUP_TRIGGERS = (
+    'CREATE TRIGGER result_score_rollup_insert AFTER INSERT ON result '
+    'REFERENCING NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    'CREATE TRIGGER result_score_rollup_update AFTER UPDATE ON result '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    'CREATE TRIGGER result_score_rollup_delete AFTER DELETE ON result '
+    'REFERENCING OLD TABLE AS old_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    'CREATE TRIGGER territory_score_rollup_move AFTER UPDATE ON territory '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_move()',
+)
+
+SCORE_ROLLUP_FILL = """
+INSERT INTO score_rollup (cell_lat, cell_lon, bucket, count, total)
+SELECT
+    floor(t.latitude / 0.05)::integer,
+    floor(t.longtitude / 0.05)::integer,
+    score_bucket(r.score),
+    count(*),
+    sum(r.score)
+FROM result AS r
+JOIN territory AS t USING (cadastral_number)
+WHERE r.score IS NOT NULL
+GROUP BY 1, 2, 3
+"""
+
+
+def drop_triggers() -> None:
+    op.execute(
+        'DROP TRIGGER IF EXISTS territory_score_rollup_forget ON territory'
+    )
+    op.execute(
+        'DROP TRIGGER IF EXISTS territory_score_rollup_move ON territory'
+    )
+    for operation in ('insert', 'update', 'delete'):
+        op.execute(
+            f'DROP TRIGGER IF EXISTS result_score_rollup_{operation} '
+            'ON result'
+        )
+
+
+def upgrade() -> None:
+    # Сводка становится опцией: триггеры ставит и заново заполняет
+    # сводку команда python -m app.rollup enable.
+    op.execute(SCORE_ROLLUP_APPLY)
+    op.execute(SCORE_ROLLUP_FORGET)
+    drop_triggers()
+    op.execute('DELETE FROM score_rollup')
+
+
+def downgrade() -> None:
+    # score_rollup_apply остается новой версией: она считает то же самое,
+    # только пропускает обновления без изменения счета.
+    op.execute('LOCK TABLE result, territory IN SHARE ROW EXCLUSIVE MODE')
+    drop_triggers()
+    op.execute('DROP FUNCTION IF EXISTS score_rollup_forget')
+    for trigger in SCORE_ROLLUP_TRIGGERS:
+        op.execute(trigger)
+    op.execute('DELETE FROM score_rollup')
+    op.execute(SCORE_ROLLUP_FILL)
@@ -0,0 +1,128 @@
+"""territory geohash
+
+Revision ID: e7b2d94f1c68
+Revises: c51e9b7f3a20
+Create Date: 2026-10-18 17:40:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2d94f1c68'
+down_revision: Union[str, None] = 'c51e9b7f3a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GEOHASH_ENCODE = """
+CREATE OR REPLACE FUNCTION geohash_encode(
+    latitude double precision,
+    longtitude double precision,
+    chars integer
+) RETURNS text
+LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE AS $$
+DECLARE
+    alphabet constant text := '0123456789bcdefghjkmnpqrstuvwxyz';
+    lat_min double precision := -90;
+    lat_max double precision := 90;
+    lon_min double precision := -180;
+    lon_max double precision := 180;
+    middle double precision;
+    code integer := 0;
+    bits integer := 0;
+    even boolean := true;
+    geohash text := '';
+BEGIN
+    WHILE length(geohash) < chars LOOP
+        IF even THEN
+            middle := (lon_min + lon_max) / 2;
+            IF longtitude >= middle THEN
+                code := code * 2 + 1;
+                lon_min := middle;
+            ELSE
+                code := code * 2;
+                lon_max := middle;
+            END IF;
+        ELSE
+            middle := (lat_min + lat_max) / 2;
+            IF latitude >= middle THEN
+                code := code * 2 + 1;
+                lat_min := middle;
+            ELSE
+                code := code * 2;
+                lat_max := middle;
+            END IF;
+        END IF;
+        even := NOT even;
+        bits := bits + 1;
+        IF bits = 5 THEN
+            geohash := geohash || substr(alphabet, code + 1, 1);
+            code := 0;
+            bits := 0;
+        END IF;
+    END LOOP;
+    RETURN geohash;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    # Вычисляемая колонка заполняется при добавлении, это перезаписывает
+    # territory под ACCESS EXCLUSIVE блокировкой. Индексы строятся
+    # CONCURRENTLY вне транзакции миграции.
+    op.execute(GEOHASH_ENCODE)
+    op.add_column(
+        'territory',
+        sa.Column(
+            'geohash',
+            sa.String(length=12, collation='C'),
+            sa.Computed(
+                'geohash_encode(latitude, longtitude, 12)', persisted=True
+            ),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_territory_geohash',
+            'territory',
+            ['geohash'],
+            unique=False,
+            postgresql_include=['cadastral_number', 'latitude', 'longtitude'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_result_latest_score',
+            'result',
+            ['cadastral_number', 'id'],
+            unique=False,
+            postgresql_include=['score'],
+            postgresql_where=sa.text('score IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_result_latest_score',
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_territory_geohash',
+            table_name='territory',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('territory', 'geohash')
+    op.execute('DROP FUNCTION IF EXISTS geohash_encode')
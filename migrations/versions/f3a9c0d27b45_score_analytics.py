@@ -0,0 +1,224 @@
+"""score analytics
+
+Revision ID: f3a9c0d27b45
+Revises: e7b2d94f1c68
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+
+# STDLIB
+from typing import Sequence, Union
+
+# THIRDPARTY
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c0d27b45'
+down_revision: Union[str, None] = 'e7b2d94f1c68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCORE_BUCKET = """
+CREATE OR REPLACE FUNCTION score_bucket(score double precision)
+RETURNS integer
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT greatest(0, least(19, floor(
+        (score - (-100)) / 10
+    )))::integer
+$$
+"""
+
+SCORE_ROLLUP_APPLY = """
+CREATE OR REPLACE FUNCTION score_rollup_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / 0.05)::integer,
+            floor(t.longtitude / 0.05)::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM (SELECT cadastral_number, score, 1 AS sign FROM new_rows) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / 0.05)::integer,
+            floor(t.longtitude / 0.05)::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM (SELECT cadastral_number, score, -1 AS sign FROM old_rows) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;
+    ELSE
+        INSERT INTO score_rollup AS rollup
+            (cell_lat, cell_lon, bucket, count, total)
+        SELECT
+            floor(t.latitude / 0.05)::integer,
+            floor(t.longtitude / 0.05)::integer,
+            score_bucket(c.score),
+            sum(c.sign),
+            sum(c.sign * c.score)
+        FROM (
+            SELECT cadastral_number, score, -1 AS sign FROM old_rows
+            UNION ALL
+            SELECT cadastral_number, score, 1 AS sign FROM new_rows
+        ) AS c
+        JOIN territory AS t USING (cadastral_number)
+        WHERE c.score IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(c.sign) <> 0 OR sum(c.sign * c.score) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            total = rollup.total + excluded.total;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+SCORE_ROLLUP_MOVE = """
+CREATE OR REPLACE FUNCTION score_rollup_move() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    WITH moved AS (
+        SELECT
+            n.cadastral_number,
+            floor(o.latitude / 0.05)::integer AS old_lat,
+            floor(o.longtitude / 0.05)::integer AS old_lon,
+            floor(n.latitude / 0.05)::integer AS new_lat,
+            floor(n.longtitude / 0.05)::integer AS new_lon
+        FROM old_rows AS o
+        JOIN new_rows AS n USING (cadastral_number)
+    ), changes AS (
+        SELECT cadastral_number, old_lat AS cell_lat, old_lon AS cell_lon,
+            -1 AS sign
+        FROM moved WHERE (old_lat, old_lon) <> (new_lat, new_lon)
+        UNION ALL
+        SELECT cadastral_number, new_lat, new_lon, 1
+        FROM moved WHERE (old_lat, old_lon) <> (new_lat, new_lon)
+    )
+    INSERT INTO score_rollup AS rollup
+        (cell_lat, cell_lon, bucket, count, total)
+    SELECT
+        c.cell_lat,
+        c.cell_lon,
+        score_bucket(r.score),
+        sum(c.sign),
+        sum(c.sign * r.score)
+    FROM changes AS c
+    JOIN result AS r USING (cadastral_number)
+    WHERE r.score IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (cell_lat, cell_lon, bucket) DO UPDATE SET
+        count = rollup.count + excluded.count,
+        total = rollup.total + excluded.total;
+    RETURN NULL;
+END
+$$
+"""
+
+SCORE_ROLLUP_TRIGGERS = (
+    'CREATE TRIGGER result_score_rollup_insert AFTER INSERT ON result '
+    'REFERENCING NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    'CREATE TRIGGER result_score_rollup_update AFTER UPDATE ON result '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    'CREATE TRIGGER result_score_rollup_delete AFTER DELETE ON result '
+    'REFERENCING OLD TABLE AS old_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_apply()',
+    'CREATE TRIGGER territory_score_rollup_move AFTER UPDATE ON territory '
+    'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION score_rollup_move()',
+)
+
+SCORE_ROLLUP_FILL = """
+INSERT INTO score_rollup (cell_lat, cell_lon, bucket, count, total)
+SELECT
+    floor(t.latitude / 0.05)::integer,
+    floor(t.longtitude / 0.05)::integer,
+    score_bucket(r.score),
+    count(*),
+    sum(r.score)
+FROM result AS r
+JOIN territory AS t USING (cadastral_number)
+WHERE r.score IS NOT NULL
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    # Сводка заполняется в одной транзакции с созданием триггеров, чтобы
+    # счета, записанные во время миграции, не потерялись и не
+    # посчитались дважды. Индекс строится CONCURRENTLY вне транзакции.
+    op.execute(SCORE_BUCKET)
+    op.create_table(
+        'score_rollup',
+        sa.Column('cell_lat', sa.Integer(), nullable=False),
+        sa.Column('cell_lon', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('cell_lat', 'cell_lon', 'bucket'),
+    )
+    op.execute(SCORE_ROLLUP_APPLY)
+    op.execute(SCORE_ROLLUP_MOVE)
+    op.execute('LOCK TABLE result, territory IN SHARE ROW EXCLUSIVE MODE')
+    for trigger in SCORE_ROLLUP_TRIGGERS:
+        op.execute(trigger)
+    op.execute(SCORE_ROLLUP_FILL)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_result_score',
+            'result',
+            ['score'],
+            unique=False,
+            postgresql_where=sa.text('score IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_result_score',
+            table_name='result',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.execute(
+        'DROP TRIGGER IF EXISTS territory_score_rollup_move ON territory'
+    )
+    for operation in ('insert', 'update', 'delete'):
+        op.execute(
+            f'DROP TRIGGER IF EXISTS result_score_rollup_{operation} '
+            'ON result'
+        )
+    op.drop_table('score_rollup')
+    op.execute(
+        'DROP FUNCTION IF EXISTS score_rollup_apply, score_rollup_move, '
+        'score_bucket'
+    )
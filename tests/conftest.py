@@ -4,18 +4,24 @@
 """
 
 # STDLIB
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Iterator
 
 # THIRDPARTY
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
 import pytest
 from sqlalchemy.exc import InterfaceError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # FIRSTPARTY
+from app.config import app_settings
+from app.dal.score_analytics import ScoreAnalytics
 from app.database.models import Base
 from app.main import app
-from app.routers.dependencies import get_prod_session
+from app.routers.dependencies import get_prod_session, get_prod_sessionmaker
+from app.services.tracing import tracing
 from tests.config import settings
 
 
@@ -57,14 +63,19 @@ async def get_session() -> AsyncSession:
 async def override_get_session() -> AsyncSession:
     """Override Depends для получения асинхронной сессии из test settings.
 
+    Сессия закрывается после ответа, чтобы ее транзакция не держала
+    блокировки таблиц до удаления их в конце тестов.
+
     Returns:
         AsyncSession
 
     """
-    yield settings.get_session()
+    async with settings.get_sessionmaker()() as session:
+        yield session
 
 
 app.dependency_overrides[get_prod_session] = override_get_session
+app.dependency_overrides[get_prod_sessionmaker] = settings.get_sessionmaker
 
 
 @pytest.fixture(scope='session')
@@ -76,6 +87,46 @@ async def get_client() -> AsyncGenerator[AsyncClient, None]:
 
     """
     async with AsyncClient(
-        app=app, base_url='http://0.0.0.0:7777'
+        transport=ASGITransport(app=app), base_url='http://0.0.0.0:7777'
     ) as async_client:
         yield async_client
+
+
+@pytest.fixture
+def span_exporter() -> Iterator[InMemorySpanExporter]:
+    """Фикстура с трассировкой процесса в память.
+
+    Yields:
+        InMemorySpanExporter: Экспортер с завершенными спанами теста.
+    """
+    exporter = InMemorySpanExporter()
+    tracing.setup(service_name='tests', exporter=exporter, sample_ratio=1)
+    yield exporter
+    tracing.shutdown()
+
+
+@pytest.fixture
+async def score_rollup(
+    get_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[ScoreAnalytics, None]:
+    """Фикстура со сводкой score_rollup, включенной на время теста.
+
+    Yields:
+        ScoreAnalytics: DAL статистики на сессии теста.
+    """
+    dal = ScoreAnalytics(session=get_session)
+    monkeypatch.setattr(app_settings, 'score_rollup_enabled', True)
+    await dal.enable_rollup()
+    yield dal
+    await dal.disable_rollup()
+
+
+@pytest.fixture
+def admin_headers(monkeypatch: pytest.MonkeyPatch) -> dict[str, str]:
+    """Фикстура с заголовками доступа к служебным ендпоинтам /admin/.
+
+    Returns:
+        dict: Заголовок Authorization с токеном, заданным на время теста.
+    """
+    monkeypatch.setattr(app_settings, 'admin_token', 'test-admin-token')
+    return {'Authorization': 'Bearer test-admin-token'}
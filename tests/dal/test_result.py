@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 # FIRSTPARTY
 from app.dal.result import Result
 from app.dal.territory import Territory
-from app.database.models import ResultModel
+from app.database.models import JobStatus, ResultModel
 from app.schemas.territory import CalcRequestSchema
 from tests.config import settings
 
@@ -41,26 +41,64 @@ class TestResult:
         Args:
             get_session: get_session: фикстура с AsyncSession.
         """
-        await self.dal_territory.create(
+        id_ = await self.dal_territory.create(
             data=CalcRequestSchema(
                 cadastral_number=ResultData.cadastral_number,
                 latitude=ResultData.latitude,
                 longtitude=ResultData.longtitude,
             )
         )
-        await self.dal_result.update(
-            cadastral_number=ResultData.cadastral_number,
-            score=ResultData.score,
-        )
+        updated = await self.dal_result.update(id_=id_, score=ResultData.score)
         async with get_session as connection:
-            result = select(ResultModel.score).filter(ResultModel.id_ == 1)
+            result = select(ResultModel.score).filter(ResultModel.id_ == id_)
             result = (await connection.execute(result)).first()
 
+        assert_that(actual_or_assertion=updated, matcher=equal_to(True))
         assert_that(
             actual_or_assertion=result.score,
             matcher=equal_to(ResultData.score),
         )
 
+    async def test_update_many(self, get_session: AsyncSession) -> None:
+        """Тест на функцию update_many класса Result.
+
+        Args:
+            get_session: get_session: фикстура с AsyncSession.
+        """
+        ids = await self.dal_territory.create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number=f'66:66:666668:{number:02}',
+                    latitude=ResultData.latitude,
+                    longtitude=ResultData.longtitude,
+                )
+                for number in range(3)
+            ]
+        )
+        updated = await self.dal_result.update_many(
+            [(id_, float(id_) / 2) for id_ in ids] + [(10**9, 1.0)]
+        )
+        async with get_session as connection:
+            rows = await connection.execute(
+                select(ResultModel.id_, ResultModel.score, ResultModel.status)
+                .where(ResultModel.id_.in_(ids))
+                .order_by(ResultModel.id_)
+            )
+            rows = [tuple(row) for row in rows]
+
+        assert_that(actual_or_assertion=updated, matcher=equal_to(3))
+        assert_that(
+            actual_or_assertion=rows,
+            matcher=equal_to(
+                [(id_, float(id_) / 2, JobStatus.done) for id_ in ids]
+            ),
+        )
+
+    async def test_update_missing(self) -> None:
+        """Тест на функцию update класса Result для несуществующего ID."""
+        updated = await self.dal_result.update(id_=10**9, score=1.0)
+        assert_that(actual_or_assertion=updated, matcher=equal_to(False))
+
     async def test_get(self, get_session: AsyncSession) -> None:
         """Тест на функцию get класса Result.
 
@@ -0,0 +1,175 @@
+"""Тесты DAL операций с состоянием расчетов."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_items, is_not
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.result_job import ResultJobs
+from app.dal.territory import Territory
+from app.database.models import JobStatus, ResultModel
+from app.schemas.territory import CalcRequestSchema
+from tests.config import settings
+
+ALL = 10**6
+
+
+async def create_results(session: AsyncSession, count: int) -> list[int]:
+    """Создает записи без счета.
+
+    Returns:
+        list[int]: ID записей.
+    """
+    return await Territory(session=session).create_many(
+        data=[
+            CalcRequestSchema(
+                cadastral_number=f'12:12:121212:{number:02}',
+                latitude=12.1212,
+                longtitude=21.2121,
+            )
+            for number in range(count)
+        ]
+    )
+
+
+async def job_state(session: AsyncSession, id_: int) -> tuple[str, int, bool]:
+    """Состояние расчета записи.
+
+    Returns:
+        tuple[str, int, bool]: status, attempts и наличие аренды.
+    """
+    row = (
+        await session.execute(
+            select(
+                ResultModel.status,
+                ResultModel.attempts,
+                ResultModel.leased_until,
+            ).where(ResultModel.id_ == id_)
+        )
+    ).one()
+    await session.commit()
+    return row.status, row.attempts, row.leased_until is not None
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestResultJobs:
+    """Класс методов с тестами состояния расчетов."""
+
+    async def test_claim_skips_locked(self, get_session: AsyncSession) -> None:
+        """Заблокированная запись пропускается и не задерживает claim.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        locked_id, *free_ids = await create_results(get_session, 3)
+        async with settings.get_sessionmaker()() as locker:
+            await locker.execute(
+                select(ResultModel.id_)
+                .where(ResultModel.id_ == locked_id)
+                .with_for_update()
+            )
+            async with settings.get_sessionmaker()() as session:
+                jobs = await ResultJobs(session).claim(limit=ALL, lease=60)
+            await locker.rollback()
+        async with settings.get_sessionmaker()() as session:
+            retry = await ResultJobs(session).claim(limit=ALL, lease=60)
+
+        claimed = [job.result_id for job in jobs]
+        assert_that(actual_or_assertion=claimed, matcher=has_items(*free_ids))
+        assert_that(
+            actual_or_assertion=claimed, matcher=is_not(has_items(locked_id))
+        )
+        assert_that(
+            actual_or_assertion=[job.result_id for job in retry],
+            matcher=equal_to([locked_id]),
+        )
+        assert_that(
+            actual_or_assertion=retry[0].data.cadastral_number,
+            matcher=equal_to('12:12:121212:00'),
+        )
+        assert_that(
+            actual_or_assertion=await job_state(get_session, locked_id),
+            matcher=equal_to((JobStatus.running, 1, True)),
+        )
+
+    async def test_fail_until_max_attempts(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Расчет с ошибкой повторяется, пока не исчерпаны попытки.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        (id_,) = await create_results(get_session, 1)
+        jobs = ResultJobs(get_session)
+        await jobs.claim(limit=ALL, lease=60)
+        await jobs.fail(id_, max_attempts=2)
+        first = await job_state(get_session, id_)
+        await jobs.claim(limit=ALL, lease=60)
+        await jobs.fail(id_, max_attempts=2)
+
+        assert_that(
+            actual_or_assertion=first,
+            matcher=equal_to((JobStatus.queued, 1, False)),
+        )
+        assert_that(
+            actual_or_assertion=await job_state(get_session, id_),
+            matcher=equal_to((JobStatus.failed, 2, False)),
+        )
+
+    async def test_fail_backoff(self, get_session: AsyncSession) -> None:
+        """Расчет с ошибкой не забирается снова до конца паузы.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        (id_,) = await create_results(get_session, 1)
+        jobs = ResultJobs(get_session)
+        await jobs.claim(limit=ALL, lease=60)
+        await jobs.fail(id_, max_attempts=3, backoff=60, max_backoff=600)
+        retry = await jobs.claim(limit=ALL, lease=60)
+
+        assert_that(
+            actual_or_assertion=[job.result_id for job in retry],
+            matcher=is_not(has_items(id_)),
+        )
+        assert_that(
+            actual_or_assertion=await job_state(get_session, id_),
+            matcher=equal_to((JobStatus.queued, 1, False)),
+        )
+
+    async def test_requeue_expired(self, get_session: AsyncSession) -> None:
+        """Расчет с истекшей арендой возвращается в очередь.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        (id_,) = await create_results(get_session, 1)
+        jobs = ResultJobs(get_session)
+        await jobs.claim(limit=ALL, lease=-1)
+        requeued = await jobs.requeue_expired(max_attempts=3)
+
+        assert_that(actual_or_assertion=requeued >= 1, matcher=equal_to(True))
+        assert_that(
+            actual_or_assertion=await job_state(get_session, id_),
+            matcher=equal_to((JobStatus.queued, 1, False)),
+        )
+
+    async def test_release(self, get_session: AsyncSession) -> None:
+        """Прерванный остановкой расчет не тратит попытку.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        (id_,) = await create_results(get_session, 1)
+        jobs = ResultJobs(get_session)
+        await jobs.claim(limit=ALL, lease=60)
+        await jobs.release([id_])
+
+        assert_that(
+            actual_or_assertion=await job_state(get_session, id_),
+            matcher=equal_to((JobStatus.queued, 0, False)),
+        )
@@ -0,0 +1,182 @@
+"""Тест для статистики счетов DAL класса ScoreAnalytics."""
+
+# THIRDPARTY
+from hamcrest import assert_that, close_to, equal_to
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.dal.score_analytics import (
+    ScoreAnalytics,
+    histogram_percentile,
+    score_bucket,
+)
+from app.dal.territory import Territory
+from app.database.models import TerritoryModel
+from app.rollup import switch_rollup
+from app.schemas.analytics import BoundingBox
+from app.schemas.territory import CalcRequestSchema
+from tests.config import settings
+
+BBOX = BoundingBox(min_lon=22.0, min_lat=11.0, max_lon=22.049, max_lat=11.049)
+
+
+@pytest.mark.unittest
+class TestHistogram:
+    """Класс с тестами корзин и перцентилей гистограммы."""
+
+    def test_score_bucket(self) -> None:
+        """Корзины счетов с ограничением крайними корзинами."""
+        assert_that(
+            actual_or_assertion=[
+                score_bucket(score) for score in (-1000, -100, 5, 99.9, 1000)
+            ],
+            matcher=equal_to([0, 0, 10, 19, 19]),
+        )
+
+    def test_histogram_percentile(self) -> None:
+        """Перцентиль интерполируется внутри корзины."""
+        histogram = [0] * 20
+        histogram[10] = 2
+        histogram[11] = 2
+
+        assert_that(
+            actual_or_assertion=histogram_percentile(histogram, 0.5),
+            matcher=equal_to(10),
+        )
+        assert_that(
+            actual_or_assertion=histogram_percentile(histogram, 0.75),
+            matcher=equal_to(15),
+        )
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestScoreAnalytics:
+    """Класс с тестами статистики по result и по сводке score_rollup."""
+
+    async def test_live_and_rollup(
+        self, get_session: AsyncSession, score_rollup: ScoreAnalytics
+    ) -> None:
+        """Статистика по прямоугольнику, диапазону и после переноса.
+
+        Args:
+            get_session: фикстура с AsyncSession.
+            score_rollup: фикстура с включенной сводкой.
+        """
+        territory = Territory(session=get_session)
+        data = [
+            CalcRequestSchema(
+                cadastral_number=f'22:22:222222:{number:02}',
+                latitude=11.01 + number * 0.01,
+                longtitude=22.01,
+            )
+            for number in range(4)
+        ]
+        ids = await territory.create_many(data=data)
+        await Result(session=get_session).update_many(
+            list(zip(ids, (5, 15, 25, 95)))
+        )
+        dal = score_rollup
+
+        live = await dal.live(BBOX)
+        rollup = await dal.rollup(BBOX)
+        filtered = await dal.live(BBOX, min_score=10, max_score=30)
+        filtered_rollup = await dal.rollup(BBOX, min_score=10, max_score=30)
+
+        for stats in (live, rollup):
+            assert_that(actual_or_assertion=stats.count, matcher=equal_to(4))
+            assert_that(actual_or_assertion=stats.mean, matcher=equal_to(35))
+            assert_that(
+                actual_or_assertion=[
+                    bucket
+                    for bucket, count in enumerate(stats.histogram)
+                    for _ in range(count)
+                ],
+                matcher=equal_to([10, 11, 12, 19]),
+            )
+        assert_that(
+            actual_or_assertion=live.percentiles['p50'], matcher=equal_to(20)
+        )
+        assert_that(
+            actual_or_assertion=rollup.percentiles['p50'],
+            matcher=close_to(20, 10),
+        )
+        assert_that(actual_or_assertion=filtered.count, matcher=equal_to(2))
+        assert_that(
+            actual_or_assertion=filtered_rollup.count, matcher=equal_to(2)
+        )
+
+        await territory.create(
+            data=CalcRequestSchema(
+                cadastral_number='22:22:222222:03',
+                latitude=11.2,
+                longtitude=22.01,
+            )
+        )
+        moved = await dal.rollup(BBOX)
+
+        assert_that(actual_or_assertion=moved.count, matcher=equal_to(3))
+        assert_that(actual_or_assertion=moved.mean, matcher=equal_to(15))
+
+    async def test_rollup_switch_and_cascade(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Сводка заполняется при включении, каскад вычитает счета.
+
+        Args:
+            get_session: фикстура с AsyncSession.
+        """
+        territory = Territory(session=get_session)
+        data = [
+            CalcRequestSchema(
+                cadastral_number=f'22:22:222223:{number:02}',
+                latitude=12.01 + number * 0.01,
+                longtitude=22.01,
+            )
+            for number in range(3)
+        ]
+        ids = await territory.create_many(data=data)
+        await Result(session=get_session).update_many(
+            list(zip(ids, (10, 20, 30)))
+        )
+        dal = ScoreAnalytics(session=get_session)
+        box = BoundingBox(
+            min_lon=22.0, min_lat=12.0, max_lon=22.049, max_lat=12.049
+        )
+
+        switches = [await dal.enable_rollup(), await dal.enable_rollup()]
+        try:
+            filled = await dal.rollup(box)
+            await get_session.execute(
+                delete(TerritoryModel).where(
+                    TerritoryModel.cadastral_number == data[0].cadastral_number
+                )
+            )
+            await get_session.commit()
+            deleted = await dal.rollup(box)
+        finally:
+            switches.append(await dal.disable_rollup())
+        disabled = await dal.rollup(box)
+
+        assert_that(
+            actual_or_assertion=switches, matcher=equal_to([True, False, True])
+        )
+        assert_that(actual_or_assertion=filled.count, matcher=equal_to(3))
+        assert_that(actual_or_assertion=deleted.count, matcher=equal_to(2))
+        assert_that(actual_or_assertion=deleted.mean, matcher=equal_to(25))
+        assert_that(actual_or_assertion=disabled.count, matcher=equal_to(0))
+
+    async def test_switch_rollup(self) -> None:
+        """Команда app.rollup ставит и снимает триггеры сводки."""
+        sessionmaker = settings.get_sessionmaker()
+        states = []
+        for action in ('status', 'enable', 'status', 'disable', 'status'):
+            states.append(await switch_rollup(sessionmaker, action))
+
+        assert_that(
+            actual_or_assertion=states,
+            matcher=equal_to([False, True, True, True, False]),
+        )
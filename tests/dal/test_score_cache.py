@@ -0,0 +1,167 @@
+"""Тесты кэша счетов."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_entries, instance_of
+import pytest
+
+# FIRSTPARTY
+from app.config import app_settings
+from app.dal.score_cache import (
+    LRUScoreCache,
+    RedisScoreCache,
+    create_score_cache,
+)
+
+
+class FakeClock:
+    """Управляемый источник времени."""
+
+    def __init__(self) -> None:
+        """Время начинается с нуля."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Текущее время."""
+        return self.now
+
+
+class FakeRedis:
+    """Локальная замена Redis с поддержкой времени жизни ключей."""
+
+    def __init__(self, clock: FakeClock) -> None:
+        """Инициализация хранилища.
+
+        Args:
+            clock (FakeClock): Источник времени.
+        """
+        self.clock = clock
+        self.data: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, name: str) -> bytes | None:
+        """Значение по ключу, если оно не истекло."""
+        expires_at, value = self.data.get(name, (0, None))
+        return value if expires_at > self.clock() else None
+
+    async def set(self, name: str, value: str, px: int) -> bool:
+        """Запись значения с временем жизни в миллисекундах."""
+        self.data[name] = (self.clock() + px / 1000, value.encode())
+        return True
+
+    async def delete(self, *names: str) -> int:
+        """Удаление ключей."""
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+
+@pytest.mark.unittest
+class TestLRUScoreCache:
+    """Класс методов с тестами LRU кэша."""
+
+    async def test_ttl_for_done_and_pending(self) -> None:
+        """Отметка ожидания живет pending_ttl, готовый счет - ttl."""
+        clock = FakeClock()
+        cache = LRUScoreCache(maxsize=10, ttl=60, pending_ttl=1, clock=clock)
+        await cache.set(1, 10.5)
+        await cache.set(2, None)
+
+        clock.now = 2
+        assert_that(
+            actual_or_assertion=await cache.get(1),
+            matcher=equal_to((True, 10.5)),
+        )
+        assert_that(
+            actual_or_assertion=await cache.get(2),
+            matcher=equal_to((False, None)),
+        )
+        assert_that(
+            actual_or_assertion=cache.stats.as_dict(),
+            matcher=has_entries({'hits': 1, 'misses': 1, 'evictions': 1}),
+        )
+
+    async def test_lru_eviction(self) -> None:
+        """Сверх maxsize вытесняется давно не использованная запись."""
+        cache = LRUScoreCache(maxsize=2, ttl=60, pending_ttl=1)
+        await cache.set(1, 1.0)
+        await cache.set(2, 2.0)
+        await cache.get(1)
+        await cache.set(3, 3.0)
+
+        assert_that(
+            actual_or_assertion=await cache.get(2),
+            matcher=equal_to((False, None)),
+        )
+        assert_that(
+            actual_or_assertion=await cache.get(1),
+            matcher=equal_to((True, 1.0)),
+        )
+        assert_that(
+            actual_or_assertion=cache.stats.evictions, matcher=equal_to(1)
+        )
+
+    async def test_write_through_replaces_pending(self) -> None:
+        """Запись счета заменяет отметку ожидания."""
+        cache = LRUScoreCache(maxsize=10, ttl=60, pending_ttl=1)
+        await cache.set(1, None)
+        await cache.set(1, -3.25)
+
+        assert_that(
+            actual_or_assertion=await cache.get(1),
+            matcher=equal_to((True, -3.25)),
+        )
+
+
+@pytest.mark.unittest
+class TestRedisScoreCache:
+    """Класс методов с тестами Redis кэша на локальной замене."""
+
+    async def test_get_set(self) -> None:
+        """Счет и отметка ожидания читаются обратно до истечения TTL."""
+        clock = FakeClock()
+        cache = RedisScoreCache(
+            client=FakeRedis(clock=clock), ttl=60, pending_ttl=1
+        )
+        await cache.set(1, 42.123456)
+        await cache.set(2, None)
+
+        assert_that(
+            actual_or_assertion=await cache.get(1),
+            matcher=equal_to((True, 42.123456)),
+        )
+        assert_that(
+            actual_or_assertion=await cache.get(2),
+            matcher=equal_to((True, None)),
+        )
+        clock.now = 2
+        assert_that(
+            actual_or_assertion=await cache.get(2),
+            matcher=equal_to((False, None)),
+        )
+        await cache.delete(1)
+        assert_that(
+            actual_or_assertion=await cache.get(1),
+            matcher=equal_to((False, None)),
+        )
+
+    async def test_create_and_close(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Кэш создается с клиентом redis и закрывает его пул.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): фикстура для смены настроек.
+        """
+        monkeypatch.setattr(app_settings, 'score_cache_backend', 'redis')
+        cache = create_score_cache()
+        disconnected = []
+
+        async def disconnect(*args: bool, **kwargs: bool) -> None:
+            disconnected.append(True)
+
+        monkeypatch.setattr(
+            cache.client.connection_pool, 'disconnect', disconnect
+        )
+        await cache.aclose()
+
+        assert_that(
+            actual_or_assertion=cache, matcher=instance_of(RedisScoreCache)
+        )
+        assert_that(actual_or_assertion=disconnected, matcher=equal_to([True]))
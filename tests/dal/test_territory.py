@@ -4,13 +4,17 @@
 from dataclasses import dataclass
 
 # THIRDPARTY
-from hamcrest import assert_that, is_not
+from hamcrest import assert_that, close_to, equal_to, has_length, is_not
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # FIRSTPARTY
+from app.dal.result import Result
 from app.dal.territory import Territory
+from app.database.models import TerritoryModel
 from app.schemas.territory import CalcRequestSchema
+from app.services.geohash import encode
 from tests.config import settings
 
 
@@ -44,3 +48,99 @@ class TestTerritory:
             )
         )
         assert_that(actual_or_assertion=response, matcher=is_not(None))
+
+    async def test_create_many(self, get_session: AsyncSession) -> None:
+        """Тест на функцию create_many класса Territory.
+
+        Args:
+            get_session: get_session: фикстура с AsyncSession.
+        """
+        data = [
+            CalcRequestSchema(
+                cadastral_number=f'66:66:666667:{number:02}',
+                latitude=TerritoryData.latitude,
+                longtitude=TerritoryData.longtitude,
+            )
+            for number in (1, 2, 1)
+        ]
+        response = await Territory(session=get_session).create_many(data=data)
+
+        assert_that(actual_or_assertion=response, matcher=has_length(3))
+        assert_that(
+            actual_or_assertion=response, matcher=equal_to(sorted(response))
+        )
+
+    async def test_upsert_idempotency_key(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Тест на функцию upsert класса Territory с ключом идемпотентности.
+
+        Args:
+            get_session: get_session: фикстура с AsyncSession.
+        """
+        dal = Territory(session=get_session)
+        data = CalcRequestSchema(
+            cadastral_number=TerritoryData.cadastral_number,
+            latitude=TerritoryData.latitude,
+            longtitude=TerritoryData.longtitude,
+        )
+        first = await dal.upsert(data=data, idempotency_key='territory-1')
+        second = await dal.upsert(data=data, idempotency_key='territory-1')
+        without_key = await dal.upsert(data=data)
+
+        assert_that(
+            actual_or_assertion=(first.created, second.created),
+            matcher=equal_to((True, False)),
+        )
+        assert_that(
+            actual_or_assertion=second.id_, matcher=equal_to(first.id_)
+        )
+        assert_that(
+            actual_or_assertion=without_key.id_, matcher=is_not(first.id_)
+        )
+
+    async def test_near(self, get_session: AsyncSession) -> None:
+        """Тест на функцию near класса Territory.
+
+        Args:
+            get_session: get_session: фикстура с AsyncSession.
+        """
+        dal = Territory(session=get_session)
+        data = [
+            CalcRequestSchema(
+                cadastral_number=f'19:19:191919:{number:02}',
+                latitude=-45 + offset,
+                longtitude=-120,
+            )
+            for number, offset in enumerate((0.005, 0.001, 0.05))
+        ]
+        ids = await dal.create_many(data=data)
+        await Result(session=get_session).update_many([(ids[1], 42.5)])
+
+        response = await dal.near(
+            latitude=-45, longtitude=-120, radius=1000, limit=10
+        )
+        geohashes = await get_session.scalars(
+            select(TerritoryModel.geohash)
+            .where(TerritoryModel.cadastral_number.startswith('19:19:'))
+            .order_by(TerritoryModel.cadastral_number)
+        )
+
+        assert_that(
+            actual_or_assertion=[item.cadastral_number for item in response],
+            matcher=equal_to(['19:19:191919:01', '19:19:191919:00']),
+        )
+        assert_that(
+            actual_or_assertion=[item.score for item in response],
+            matcher=equal_to([42.5, None]),
+        )
+        assert_that(
+            actual_or_assertion=response[0].distance,
+            matcher=close_to(111.2, 0.5),
+        )
+        assert_that(
+            actual_or_assertion=list(geohashes),
+            matcher=equal_to(
+                [encode(item.latitude, item.longtitude, 12) for item in data]
+            ),
+        )
@@ -0,0 +1,114 @@
+"""Тесты реестра движков и фабрик сессий."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, is_not, same_instance
+import pytest
+from sqlalchemy.pool import NullPool
+
+# FIRSTPARTY
+from app.database.db_base_config import EngineRegistry, Settings
+
+
+def make_settings(**kwargs) -> Settings:
+    """Настройки с фиктивным подключением, БД для тестов не нужна.
+
+    Returns:
+        Settings: Экземпляр настроек.
+    """
+    params = {
+        'postgres_host': 'localhost',
+        'postgres_port': 5432,
+        'postgres_db_name': 'registry_db',
+        'postgres_user': 'user',
+        'postgres_password': 'password',
+    }
+    params.update(kwargs)
+    return Settings(**params)
+
+
+@pytest.mark.unittest
+class TestEngineRegistry:
+    """Класс методов с тестами реестра движков."""
+
+    def test_engine_cached_by_dsn(self) -> None:
+        """Один DSN - один движок, другой DSN - другой движок."""
+        registry = EngineRegistry()
+        url = make_settings().get_db_url()
+        other_url = make_settings(postgres_db_name='other_db').get_db_url()
+
+        assert_that(
+            actual_or_assertion=registry.get_engine(url),
+            matcher=same_instance(registry.get_engine(url)),
+        )
+        assert_that(
+            actual_or_assertion=registry.get_engine(url),
+            matcher=is_not(same_instance(registry.get_engine(other_url))),
+        )
+
+    def test_null_pool_engine_separate(self) -> None:
+        """Движок с NullPool хранится отдельно от движка с пулом."""
+        registry = EngineRegistry()
+        url = make_settings().get_db_url()
+        engine = registry.get_engine(url, use_null_pool=True)
+
+        assert_that(
+            actual_or_assertion=isinstance(engine.pool, NullPool),
+            matcher=equal_to(True),
+        )
+        assert_that(
+            actual_or_assertion=engine,
+            matcher=is_not(same_instance(registry.get_engine(url))),
+        )
+
+    def test_settings_pool_options(self) -> None:
+        """Параметры пула из настроек передаются в движок."""
+        settings = make_settings(db_pool_size=3, db_max_overflow=7)
+        engine = settings.get_engine()
+
+        assert_that(
+            actual_or_assertion=engine.pool.size(), matcher=equal_to(3)
+        )
+        assert_that(
+            actual_or_assertion=engine.pool._max_overflow,
+            matcher=equal_to(7),
+        )
+        assert_that(
+            actual_or_assertion=settings.get_sessionmaker(),
+            matcher=same_instance(settings.get_sessionmaker()),
+        )
+
+    def test_engine_cached_by_pool_options(self) -> None:
+        """Другие параметры пула с тем же DSN - другой движок."""
+        registry = EngineRegistry()
+        url = make_settings().get_db_url()
+        engine = registry.get_engine(url, pool_size=3)
+
+        assert_that(
+            actual_or_assertion=registry.get_engine(url, pool_size=3),
+            matcher=same_instance(engine),
+        )
+        for pool_options in ({'pool_size': 4}, {'pool_recycle': 60}, {}):
+            assert_that(
+                actual_or_assertion=registry.get_engine(url, **pool_options),
+                matcher=is_not(same_instance(engine)),
+            )
+        assert_that(
+            actual_or_assertion=registry.get_engine(
+                url, use_null_pool=True, pool_size=3
+            ),
+            matcher=same_instance(
+                registry.get_engine(url, use_null_pool=True)
+            ),
+        )
+
+    async def test_dispose_keeps_engines(self) -> None:
+        """После dispose реестр отдает те же объекты движков."""
+        registry = EngineRegistry()
+        url = make_settings().get_db_url()
+        engine = registry.get_engine(url)
+        await registry.dispose()
+
+        assert_that(
+            actual_or_assertion=registry.get_engine(url),
+            matcher=same_instance(engine),
+        )
@@ -0,0 +1,74 @@
+"""Тест для ендпоинта /analytics/scores."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to
+from httpx import AsyncClient
+import pytest
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestAnalyticsRouter:
+    """Класс с тестами ендпоинта статистики счетов."""
+
+    @pytest.mark.usefixtures('score_rollup')
+    async def test_get_scores_empty(self, get_client: AsyncClient) -> None:
+        """Статистика по прямоугольнику без территорий.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        for source in ('live', 'rollup'):
+            response = await get_client.get(
+                '/analytics/scores',
+                params={'bbox': '-1,-1,-0.9,-0.9', 'source': source},
+            )
+
+            assert_that(
+                actual_or_assertion=response.json()['count'],
+                matcher=equal_to(0),
+            )
+            assert_that(
+                actual_or_assertion=response.json()['source'],
+                matcher=equal_to(source),
+            )
+
+    async def test_get_scores_rollup_disabled(
+        self, get_client: AsyncClient
+    ) -> None:
+        """Сводка не отдается, пока score_rollup_enabled выключена.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        response = await get_client.get(
+            '/analytics/scores', params={'source': 'rollup'}
+        )
+
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(409)
+        )
+
+    @pytest.mark.parametrize(
+        'params',
+        [
+            {'bbox': '1,2,3'},
+            {'bbox': '3,2,1,0'},
+            {'bbox': 'a,b,c,d'},
+            {'min_score': 10, 'max_score': 0},
+        ],
+    )
+    async def test_get_scores_bad_request(
+        self, get_client: AsyncClient, params: dict
+    ) -> None:
+        """Неверный bbox или диапазон счетов.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            params (dict): параметры запроса.
+        """
+        response = await get_client.get('/analytics/scores', params=params)
+
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(400)
+        )
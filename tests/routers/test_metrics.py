@@ -0,0 +1,53 @@
+"""Тест для ендпоинта /metrics."""
+
+# THIRDPARTY
+from hamcrest import assert_that, contains_string, equal_to
+from httpx import AsyncClient
+import pytest
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestMetricsRouter:
+    """Класс с тестами ендпоинта метрик."""
+
+    async def test_get_metrics(self, get_client: AsyncClient) -> None:
+        """Метрики запроса по шаблону пути, SQL запросов и пула.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        await get_client.get('/result/', params={'result_id': 10**9})
+        await get_client.get('/no/such/path')
+
+        response = await get_client.get('/metrics')
+
+        assert_that(
+            actual_or_assertion=response.headers['content-type'],
+            matcher=contains_string('text/plain'),
+        )
+        for line in (
+            'http_request_duration_seconds_count'
+            '{method="GET",route="/result/",status="4xx"}',
+            'http_request_duration_seconds_count'
+            '{method="GET",route="<unmatched>",status="4xx"}',
+            'db_statement_duration_seconds_count'
+            '{operation="SELECT",table="result"}',
+            'http_requests_in_flight 1',
+            'calc_queue_depth 0',
+            '# TYPE db_pool_checked_out gauge',
+            '# TYPE calc_coalesced_total counter',
+            'score_cache_requests_total{result="miss"}',
+            'score_cache_evictions_total',
+            'calc_batch_fill_ratio_count',
+            'calc_executor_busy_seconds_total',
+            'calc_executor_utilisation',
+            'calc_executor_chunk_seconds_bucket{le="+Inf"}',
+        ):
+            assert_that(
+                actual_or_assertion=response.text,
+                matcher=contains_string(line),
+            )
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(200)
+        )
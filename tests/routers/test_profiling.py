@@ -0,0 +1,142 @@
+"""Тесты служебных ендпоинтов профилирования."""
+
+# THIRDPARTY
+from hamcrest import assert_that, contains_string, equal_to, has_item
+from httpx import AsyncClient
+import pytest
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestProfilingRouter:
+    """Класс с тестами ендпоинтов профилирования."""
+
+    async def test_profile(
+        self, get_client: AsyncClient, admin_headers: dict
+    ) -> None:
+        """Профиль запросов скачивается отчетом pstats.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            admin_headers (dict): фикстура с токеном служебных ендпоинтов.
+        """
+        started = await get_client.post(
+            '/admin/profile/start/',
+            params={'seconds': 60},
+            headers=admin_headers,
+        )
+        busy = await get_client.post(
+            '/admin/profile/start/', headers=admin_headers
+        )
+        await get_client.get('/result/', params={'result_id': 10**9})
+        await get_client.post('/admin/profile/stop/', headers=admin_headers)
+
+        response = await get_client.get(
+            '/admin/profile/download/',
+            params={'format': 'text'},
+            headers=admin_headers,
+        )
+
+        assert_that(
+            actual_or_assertion=started.json()['running'],
+            matcher=equal_to(True),
+        )
+        assert_that(
+            actual_or_assertion=busy.status_code, matcher=equal_to(409)
+        )
+        assert_that(
+            actual_or_assertion=response.text,
+            matcher=contains_string('get_result'),
+        )
+
+    async def test_slow_queries(
+        self, get_client: AsyncClient, admin_headers: dict
+    ) -> None:
+        """Порог журнала медленных запросов меняется без перезапуска.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            admin_headers (dict): фикстура с токеном служебных ендпоинтов.
+        """
+        await get_client.put(
+            '/admin/slow-queries/',
+            params={'threshold_ms': 0.001},
+            headers=admin_headers,
+        )
+        try:
+            await get_client.get('/result/', params={'result_id': 10**9})
+        finally:
+            response = await get_client.put(
+                '/admin/slow-queries/',
+                params={'threshold_ms': 0},
+                headers=admin_headers,
+            )
+
+        assert_that(
+            actual_or_assertion=[
+                query['statement'] for query in response.json()['queries']
+            ],
+            matcher=has_item(contains_string('FROM result')),
+        )
+
+    async def test_admin_disabled(self, get_client: AsyncClient) -> None:
+        """Без заданного admin_token служебных ендпоинтов нет.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        response = await get_client.post('/admin/profile/start/')
+
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(404)
+        )
+
+    async def test_admin_stats_open(self, get_client: AsyncClient) -> None:
+        """Статистика кэша и расчетов доступна без токена.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        for path in (
+            '/admin/cache/stats/',
+            '/admin/calc/stats/',
+            '/admin/calc/batches/',
+            '/admin/calc/executor/',
+        ):
+            response = await get_client.get(path)
+
+            assert_that(
+                actual_or_assertion=response.status_code,
+                matcher=equal_to(200),
+            )
+
+    @pytest.mark.parametrize(
+        'headers',
+        [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'Basic x'}],
+    )
+    async def test_admin_unauthorized(
+        self, get_client: AsyncClient, admin_headers: dict, headers: dict
+    ) -> None:
+        """Без верного токена служебные ендпоинты отвечают 401.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            admin_headers (dict): фикстура с токеном служебных ендпоинтов.
+            headers (dict): заголовки запроса.
+        """
+        response = await get_client.put(
+            '/admin/slow-queries/',
+            params={'threshold_ms': 0.001},
+            headers=headers,
+        )
+        stats = await get_client.get(
+            '/admin/slow-queries/', headers=admin_headers
+        )
+
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(401)
+        )
+        assert_that(
+            actual_or_assertion=stats.json()['threshold_ms'],
+            matcher=equal_to(0),
+        )
@@ -0,0 +1,373 @@
+"""Тесты ендпоинтов получения счета."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, contains_string, equal_to, has_entries
+from httpx import AsyncClient
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.result import FAILED_MESSAGE, PENDING_MESSAGE, Result
+from app.dal.result_job import ResultJobs
+from app.dal.territory import Territory
+from app.database.models import JobStatus, ResultModel
+from app.routers import territory
+from app.schemas.territory import CalcRequestSchema
+from app.services.calc_queue import CalcJob
+from app.services.http_backend import CalculationBackendError
+from tests.config import settings
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestResultsRouter:
+    """Класс методов с тестами ендпоинта /results/."""
+
+    async def test_get_results(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """GET /results/ разделяет готовые, ожидающие и отсутствующие ID.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        done_id, pending_id = await Territory(session=get_session).create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number=f'33:33:333333:{number}',
+                    latitude=33.3333,
+                    longtitude=33.3333,
+                )
+                for number in ('01', '02')
+            ]
+        )
+        await Result(session=get_session).update(id_=done_id, score=12.5)
+        missing_id = pending_id + 1000
+
+        response = await get_client.get(
+            '/results/',
+            params={
+                'ids': f'{done_id},{pending_id}',
+                'cadastral_numbers': ['33:33:333333:99'],
+            },
+        )
+        response_by_list = await get_client.get(
+            '/results/', params={'ids': [missing_id]}
+        )
+
+        assert_that(
+            actual_or_assertion=response.json(),
+            matcher=equal_to(
+                {
+                    'results': {
+                        str(done_id): {
+                            'cadastral_number': '33:33:333333:01',
+                            'score': 12.5,
+                            'status': 'done',
+                        },
+                        str(pending_id): {
+                            'cadastral_number': '33:33:333333:02',
+                            'score': None,
+                            'status': 'queued',
+                        },
+                    },
+                    'missing': {
+                        'ids': [],
+                        'cadastral_numbers': ['33:33:333333:99'],
+                    },
+                }
+            ),
+        )
+        assert_that(
+            actual_or_assertion=response_by_list.json(),
+            matcher=has_entries(
+                {
+                    'results': {},
+                    'missing': {'ids': [missing_id], 'cadastral_numbers': []},
+                }
+            ),
+        )
+
+    async def test_get_results_by_cadastral_number(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """По кадастровому номеру записи возвращаются вместе с номером.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        first_id, second_id, other_id = await Territory(
+            session=get_session
+        ).create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number=f'33:33:333333:{number}',
+                    latitude=33.3333,
+                    longtitude=33.3333,
+                )
+                for number in ('11', '11', '12')
+            ]
+        )
+        await Result(session=get_session).update(id_=first_id, score=1.5)
+
+        response = await get_client.get(
+            '/results/',
+            params={'cadastral_numbers': '33:33:333333:11,33:33:333333:12'},
+        )
+
+        assert_that(
+            actual_or_assertion=response.json(),
+            matcher=equal_to(
+                {
+                    'results': {
+                        str(first_id): {
+                            'cadastral_number': '33:33:333333:11',
+                            'score': 1.5,
+                            'status': 'done',
+                        },
+                        str(second_id): {
+                            'cadastral_number': '33:33:333333:11',
+                            'score': None,
+                            'status': 'queued',
+                        },
+                        str(other_id): {
+                            'cadastral_number': '33:33:333333:12',
+                            'score': None,
+                            'status': 'queued',
+                        },
+                    },
+                    'missing': {'ids': [], 'cadastral_numbers': []},
+                }
+            ),
+        )
+
+    async def test_get_results_invalid_id(
+        self, get_client: AsyncClient
+    ) -> None:
+        """Нечисловой ID отклоняется с кодом 400.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        response = await get_client.get('/results/', params={'ids': 'abc'})
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(400)
+        )
+
+
+async def create_pending_result(session: AsyncSession, number: str) -> int:
+    """Создает запись без счета.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия.
+        number (str): Последние цифры кадастрового номера.
+
+    Returns:
+        int: ID записи с счетом.
+    """
+    return await Territory(session=session).create(
+        data=CalcRequestSchema(
+            cadastral_number=f'22:22:222222:{number}',
+            latitude=22.2222,
+            longtitude=22.2222,
+        )
+    )
+
+
+async def update_later(session: AsyncSession, id_: int, score: float) -> None:
+    """Записывает счет после того, как запрос начал ждать.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия.
+        id_ (int): ID записи с счетом.
+        score (float): Счет.
+    """
+    await asyncio.sleep(0.2)
+    await Result(session=session).update(id_=id_, score=score)
+
+
+async def fail_later(session: AsyncSession, id_: int) -> None:
+    """Отмечает расчет исчерпавшим попытки после того, как запрос начал ждать.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия.
+        id_ (int): ID записи с счетом.
+    """
+    await asyncio.sleep(0.2)
+    await session.execute(
+        update(ResultModel)
+        .where(ResultModel.id_ == id_)
+        .values(status=JobStatus.running, attempts=1)
+    )
+    await session.commit()
+    await ResultJobs(session).fail(id_, max_attempts=1)
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestResultWaitRouter:
+    """Класс методов с тестами long-poll и SSE ендпоинтов."""
+
+    async def test_wait_result(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """Long-poll возвращает счет, как только он записан.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await create_pending_result(get_session, '01')
+        response, _ = await asyncio.gather(
+            get_client.get(f'/result/{id_}/wait', params={'timeout': 5}),
+            update_later(get_session, id_, -7.25),
+        )
+        assert_that(
+            actual_or_assertion=response.json(),
+            matcher=equal_to({'score': -7.25}),
+        )
+
+    async def test_wait_result_timeout(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """Long-poll без записи счета возвращает отметку ожидания.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await create_pending_result(get_session, '02')
+        response = await get_client.get(
+            f'/result/{id_}/wait', params={'timeout': 0.1}
+        )
+        missing = await get_client.get(
+            f'/result/{id_ + 1000}/wait', params={'timeout': 0.1}
+        )
+        assert_that(
+            actual_or_assertion=response.json(),
+            matcher=equal_to({'score': PENDING_MESSAGE}),
+        )
+        assert_that(
+            actual_or_assertion=missing.status_code, matcher=equal_to(404)
+        )
+
+    async def test_wait_result_failed(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """Long-poll и SSE завершаются, когда попытки расчета исчерпаны.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await create_pending_result(get_session, '04')
+        waited, events, _ = await asyncio.gather(
+            get_client.get(f'/result/{id_}/wait', params={'timeout': 5}),
+            get_client.get(f'/result/{id_}/events'),
+            fail_later(get_session, id_),
+        )
+        result = await get_client.get('/result/', params={'result_id': id_})
+        results = await get_client.get('/results/', params={'ids': id_})
+
+        assert_that(
+            actual_or_assertion=waited.json(),
+            matcher=equal_to({'score': FAILED_MESSAGE}),
+        )
+        assert_that(
+            actual_or_assertion=events.text,
+            matcher=contains_string(
+                f'event: failed\ndata: {{"score": "{FAILED_MESSAGE}"}}'
+            ),
+        )
+        assert_that(
+            actual_or_assertion=result.json(),
+            matcher=equal_to({'score': FAILED_MESSAGE}),
+        )
+        assert_that(
+            actual_or_assertion=results.json()['results'][str(id_)],
+            matcher=has_entries({'score': None, 'status': 'failed'}),
+        )
+
+    async def test_wait_result_queue_failed(
+        self,
+        get_client: AsyncClient,
+        get_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Ошибка расчета в очереди процесса завершает ожидание счета.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+            monkeypatch (pytest.MonkeyPatch): фикстура для подмены расчета.
+        """
+
+        async def broken_calculation(**kwargs) -> None:
+            raise CalculationBackendError('сервис недоступен')
+
+        async def calculate_later(job: CalcJob) -> None:
+            await asyncio.sleep(0.2)
+            async with settings.get_sessionmaker()() as session:
+                with pytest.raises(CalculationBackendError):
+                    await territory.calculate_job(job, session)
+
+        monkeypatch.setattr(
+            territory, 'remote_calculation', broken_calculation
+        )
+        id_ = await create_pending_result(get_session, '06')
+        job = CalcJob(
+            data=CalcRequestSchema(
+                cadastral_number='22:22:222222:06',
+                latitude=22.2222,
+                longtitude=22.2222,
+            ),
+            result_id=id_,
+        )
+        waited, _ = await asyncio.gather(
+            get_client.get(f'/result/{id_}/wait', params={'timeout': 5}),
+            calculate_later(job),
+        )
+        results = await get_client.get('/results/', params={'ids': id_})
+
+        assert_that(
+            actual_or_assertion=waited.json(),
+            matcher=equal_to({'score': FAILED_MESSAGE}),
+        )
+        assert_that(
+            actual_or_assertion=results.json()['results'][str(id_)],
+            matcher=has_entries({'score': None, 'status': 'failed'}),
+        )
+
+    async def test_result_events(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """SSE отдает pending, затем score и закрывает поток.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await create_pending_result(get_session, '03')
+        response, _ = await asyncio.gather(
+            get_client.get(f'/result/{id_}/events'),
+            update_later(get_session, id_, 3.5),
+        )
+        assert_that(
+            actual_or_assertion=response.headers['content-type'],
+            matcher=contains_string('text/event-stream'),
+        )
+        assert_that(
+            actual_or_assertion=response.text,
+            matcher=equal_to(
+                'event: pending\n'
+                f'data: {{"score": "{PENDING_MESSAGE}"}}\n\n'
+                'event: score\n'
+                'data: {"score": 3.5}\n\n'
+            ),
+        )
@@ -0,0 +1,403 @@
+"""Тесты ендпоинтов расчета."""
+
+# STDLIB
+import asyncio
+from dataclasses import dataclass
+import json
+
+# THIRDPARTY
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    equal_to,
+    has_entries,
+    has_length,
+    instance_of,
+    none,
+)
+from httpx import AsyncClient
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.database.models import ResultModel
+from app.main import app
+from app.routers.territory import get_calc_queue, get_in_flight
+from app.services.calc_queue import CalcJob, CalcQueueFull
+from app.services.single_flight import InFlightCalculations
+
+
+@dataclass
+class CalcData:
+    """Dataclass для тестов ендпоинта /calc/."""
+
+    cadastral_number: str = '55:55:555555:55'
+    latitude: float = 12.3456
+    longtitude: float = 65.4321
+
+
+class RecordingQueue:
+    """Очередь, которая только запоминает поставленные задачи."""
+
+    def __init__(self) -> None:
+        """Инициализация списка задач."""
+        self.jobs: list[CalcJob] = []
+
+    def submit(self, job: CalcJob) -> None:
+        """Запоминает задачу.
+
+        Args:
+            job (CalcJob): Задача на расчет.
+        """
+        self.jobs.append(job)
+
+    def has_room(self, count: int) -> bool:
+        """Место в очереди есть всегда.
+
+        Args:
+            count (int): Количество задач.
+
+        Returns:
+            bool: True.
+        """
+        return True
+
+    def submit_many(self, jobs: list[CalcJob]) -> None:
+        """Запоминает пакет задач.
+
+        Args:
+            jobs (list[CalcJob]): Задачи на расчет.
+        """
+        self.jobs.extend(jobs)
+
+
+class FullQueue(RecordingQueue):
+    """Очередь, которая отказывает первым rejects постановкам."""
+
+    def __init__(self, rejects: int) -> None:
+        """Инициализация счетчика отказов.
+
+        Args:
+            rejects (int): Сколько постановок отклонить.
+        """
+        super().__init__()
+        self.rejects = rejects
+
+    def submit(self, job: CalcJob) -> None:
+        """Отклоняет задачу, пока не исчерпан счетчик отказов.
+
+        Args:
+            job (CalcJob): Задача на расчет.
+
+        Raises:
+            CalcQueueFull: Пока счетчик отказов не исчерпан.
+        """
+        self.submit_many([job])
+
+    def submit_many(self, jobs: list[CalcJob]) -> None:
+        """Отклоняет пакет, пока не исчерпан счетчик отказов.
+
+        Args:
+            jobs (list[CalcJob]): Задачи на расчет.
+
+        Raises:
+            CalcQueueFull: Пока счетчик отказов не исчерпан.
+        """
+        if self.rejects > 0:
+            self.rejects -= 1
+            raise CalcQueueFull
+        super().submit_many(jobs)
+
+
+BATCH = [
+    {
+        'cadastral_number': '55:55:555555:01',
+        'latitude': 10.0,
+        'longtitude': 20.0,
+    },
+    {
+        'cadastral_number': 'invalid',
+        'latitude': 10.0,
+        'longtitude': 20.0,
+    },
+    {
+        'cadastral_number': '55:55:555555:02',
+        'latitude': 11.0,
+        'longtitude': 21.0,
+    },
+    {
+        'cadastral_number': '55:55:555555:01',
+        'latitude': 12.0,
+        'longtitude': 22.0,
+    },
+]
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestCalcRouter:
+    """Класс методов с тестами ендпоинта /calc/."""
+
+    async def test_post_returns_before_calculation(
+        self, get_client: AsyncClient
+    ) -> None:
+        """POST /calc/ отвечает 202 и ставит расчет в очередь.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        queue = RecordingQueue()
+        app.dependency_overrides[get_calc_queue] = lambda: queue
+        app.dependency_overrides[get_in_flight] = InFlightCalculations
+        try:
+            response = await get_client.post(
+                '/calc/',
+                json={
+                    'cadastral_number': CalcData.cadastral_number,
+                    'latitude': CalcData.latitude,
+                    'longtitude': CalcData.longtitude,
+                },
+            )
+        finally:
+            app.dependency_overrides.pop(get_calc_queue)
+            app.dependency_overrides.pop(get_in_flight)
+
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(202)
+        )
+        assert_that(
+            actual_or_assertion=response.json(), matcher=instance_of(int)
+        )
+        assert_that(
+            actual_or_assertion=queue.jobs[0].result_id,
+            matcher=equal_to(response.json()),
+        )
+
+    async def test_post_idempotency_key(self, get_client: AsyncClient) -> None:
+        """Повтор с тем же Idempotency-Key не запускает новый расчет.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        queue = RecordingQueue()
+        app.dependency_overrides[get_calc_queue] = lambda: queue
+        app.dependency_overrides[get_in_flight] = InFlightCalculations
+        request = {
+            'json': {
+                'cadastral_number': CalcData.cadastral_number,
+                'latitude': CalcData.latitude,
+                'longtitude': CalcData.longtitude,
+            },
+            'headers': {'Idempotency-Key': 'calc-55-1'},
+        }
+        try:
+            first = await get_client.post('/calc/', **request)
+            second = await get_client.post('/calc/', **request)
+        finally:
+            app.dependency_overrides.pop(get_calc_queue)
+            app.dependency_overrides.pop(get_in_flight)
+
+        assert_that(
+            actual_or_assertion=(first.status_code, second.status_code),
+            matcher=equal_to((202, 200)),
+        )
+        assert_that(
+            actual_or_assertion=second.json(), matcher=equal_to(first.json())
+        )
+        assert_that(actual_or_assertion=queue.jobs, matcher=has_length(1))
+
+    async def test_post_idempotency_key_after_queue_full(
+        self, get_client: AsyncClient
+    ) -> None:
+        """Повтор после 503 с тем же Idempotency-Key ставит расчет.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        queue = FullQueue(rejects=1)
+        app.dependency_overrides[get_calc_queue] = lambda: queue
+        app.dependency_overrides[get_in_flight] = InFlightCalculations
+        request = {
+            'json': {
+                'cadastral_number': CalcData.cadastral_number,
+                'latitude': CalcData.latitude,
+                'longtitude': CalcData.longtitude,
+            },
+            'headers': {'Idempotency-Key': 'calc-55-full'},
+        }
+        try:
+            first = await get_client.post('/calc/', **request)
+            second = await get_client.post('/calc/', **request)
+            third = await get_client.post('/calc/', **request)
+        finally:
+            app.dependency_overrides.pop(get_calc_queue)
+            app.dependency_overrides.pop(get_in_flight)
+
+        assert_that(
+            actual_or_assertion=(
+                first.status_code,
+                second.status_code,
+                third.status_code,
+            ),
+            matcher=equal_to((503, 202, 200)),
+        )
+        assert_that(
+            actual_or_assertion=[job.result_id for job in queue.jobs],
+            matcher=equal_to([second.json()]),
+        )
+        assert_that(
+            actual_or_assertion=third.json(), matcher=equal_to(second.json())
+        )
+
+    async def test_post_coalesced(self, get_client: AsyncClient) -> None:
+        """Одинаковые запросы во время расчета получают один ID.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        queue = RecordingQueue()
+        calculations = InFlightCalculations()
+        app.dependency_overrides[get_calc_queue] = lambda: queue
+        app.dependency_overrides[get_in_flight] = lambda: calculations
+        body = {
+            'cadastral_number': '55:55:555555:77',
+            'latitude': 1.5,
+            'longtitude': 2.5,
+        }
+        try:
+            responses = await asyncio.gather(
+                *[get_client.post('/calc/', json=body) for _ in range(3)]
+            )
+            batch = await get_client.post('/calc/batch', json=[body, body])
+        finally:
+            app.dependency_overrides.pop(get_calc_queue)
+            app.dependency_overrides.pop(get_in_flight)
+
+        ids = {response.json() for response in responses}
+        assert_that(actual_or_assertion=ids, matcher=has_length(1))
+        assert_that(
+            actual_or_assertion=batch.json()['ids'],
+            matcher=equal_to(list(ids) * 2),
+        )
+        assert_that(actual_or_assertion=queue.jobs, matcher=has_length(1))
+        assert_that(
+            actual_or_assertion=calculations.coalesced, matcher=equal_to(4)
+        )
+
+    @pytest.mark.parametrize('ndjson', [False, True])
+    async def test_post_batch(
+        self, get_client: AsyncClient, ndjson: bool
+    ) -> None:
+        """POST /calc/batch записывает валидные элементы по порядку.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            ndjson (bool): отправлять тело в формате NDJSON.
+        """
+        queue = RecordingQueue()
+        app.dependency_overrides[get_calc_queue] = lambda: queue
+        app.dependency_overrides[get_in_flight] = InFlightCalculations
+        if ndjson:
+            request = {
+                'content': '\n'.join(json.dumps(item) for item in BATCH),
+                'headers': {'content-type': 'application/x-ndjson'},
+            }
+        else:
+            request = {'json': BATCH}
+        try:
+            response = await get_client.post('/calc/batch', **request)
+        finally:
+            app.dependency_overrides.pop(get_calc_queue)
+            app.dependency_overrides.pop(get_in_flight)
+
+        body = response.json()
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(202)
+        )
+        assert_that(actual_or_assertion=body['ids'][1], matcher=none())
+        assert_that(
+            actual_or_assertion=[job.result_id for job in queue.jobs],
+            matcher=equal_to([body['ids'][0], body['ids'][2], body['ids'][3]]),
+        )
+        assert_that(
+            actual_or_assertion=body['ids'][0] < body['ids'][2],
+            matcher=equal_to(True),
+        )
+        assert_that(
+            actual_or_assertion=body['errors'],
+            matcher=contains_exactly(has_entries({'index': 1})),
+        )
+
+    async def test_post_batch_queue_full(
+        self, get_client: AsyncClient, get_session: AsyncSession
+    ) -> None:
+        """Пакет, не поставленный в очередь, не оставляет записей.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        queue = FullQueue(rejects=1)
+        calculations = InFlightCalculations()
+        app.dependency_overrides[get_calc_queue] = lambda: queue
+        app.dependency_overrides[get_in_flight] = lambda: calculations
+        body = {
+            'cadastral_number': '55:55:555555:88',
+            'latitude': 8.5,
+            'longtitude': 8.5,
+        }
+        try:
+            rejected = await get_client.post('/calc/batch', json=[body])
+            joined = await get_client.post('/calc/', json=body)
+        finally:
+            app.dependency_overrides.pop(get_calc_queue)
+            app.dependency_overrides.pop(get_in_flight)
+        rows = await get_session.execute(
+            select(ResultModel.id_).where(
+                ResultModel.cadastral_number == body['cadastral_number']
+            )
+        )
+
+        assert_that(
+            actual_or_assertion=(rejected.status_code, joined.status_code),
+            matcher=equal_to((503, 202)),
+        )
+        assert_that(
+            actual_or_assertion=rows.scalars().all(),
+            matcher=equal_to([joined.json()]),
+        )
+        assert_that(
+            actual_or_assertion=[job.result_id for job in queue.jobs],
+            matcher=equal_to([joined.json()]),
+        )
+
+    async def test_post_batch_not_array(self, get_client: AsyncClient) -> None:
+        """Тело, не являющееся массивом, отклоняется с кодом 400.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        response = await get_client.post('/calc/batch', json={'a': 1})
+        assert_that(
+            actual_or_assertion=response.status_code, matcher=equal_to(400)
+        )
+
+    async def test_get_territories_near(self, get_client: AsyncClient) -> None:
+        """Поиск рядом с точкой без территорий и с радиусом больше лимита.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+        """
+        response = await get_client.get(
+            '/territory/near',
+            params={'lat': 0.5, 'lon': -0.5, 'radius': 100, 'limit': 5},
+        )
+        too_far = await get_client.get(
+            '/territory/near', params={'lat': 0, 'lon': 0, 'radius': 10**9}
+        )
+
+        assert_that(actual_or_assertion=response.json(), matcher=equal_to([]))
+        assert_that(
+            actual_or_assertion=too_far.status_code, matcher=equal_to(422)
+        )
@@ -0,0 +1,64 @@
+"""Тест трассировки HTTP запроса до SQL запросов."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_items
+from httpx import AsyncClient
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+import pytest
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestTracingRouter:
+    """Класс с тестами спанов запроса."""
+
+    async def test_request_spans(
+        self, get_client: AsyncClient, span_exporter: InMemorySpanExporter
+    ) -> None:
+        """Спаны запроса, DAL и SQL вложены и продолжают входящую трассу.
+
+        Args:
+            get_client (AsyncClient): фикстура с HTTP клиентом.
+            span_exporter (InMemorySpanExporter): фикстура с экспортером
+                спанов в память.
+        """
+        await get_client.get(
+            '/result/',
+            params={'result_id': 10**9},
+            headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-01'},
+        )
+
+        spans = span_exporter.get_finished_spans()
+        by_name = {span.name: span for span in spans}
+        assert_that(
+            actual_or_assertion=list(by_name),
+            matcher=has_items('GET /result/', 'Result.get', 'SELECT result'),
+        )
+        request = by_name['GET /result/']
+        assert_that(
+            actual_or_assertion=request.parent.span_id,
+            matcher=equal_to(int(PARENT_ID, 16)),
+        )
+        assert_that(
+            actual_or_assertion={span.context.trace_id for span in spans},
+            matcher=equal_to({int(TRACE_ID, 16)}),
+        )
+        assert_that(
+            actual_or_assertion=request.attributes[
+                'http.response.status_code'
+            ],
+            matcher=equal_to(404),
+        )
+        assert_that(
+            actual_or_assertion=by_name['Result.get'].parent.span_id,
+            matcher=equal_to(request.context.span_id),
+        )
+        assert_that(
+            actual_or_assertion=by_name['SELECT result'].parent.span_id,
+            matcher=equal_to(by_name['Result.get'].context.span_id),
+        )
@@ -0,0 +1,70 @@
+"""Тесты WebSocket ендпоинта /ws/results."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_entries
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.testclient import TestClient
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.dal.territory import Territory
+from app.main import app
+from app.schemas.territory import CalcRequestSchema
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestResultsWebSocket:
+    """Класс методов с тестами ендпоинта /ws/results."""
+
+    async def test_subscribe(self, get_session: AsyncSession) -> None:
+        """Готовый счет приходит сразу, отсутствующий ID - в missing.
+
+        TestClient запускает приложение в своем цикле событий, тестовая
+        фабрика сессий работает без пула и не переносит соединения между
+        циклами.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await Territory(session=get_session).create(
+            data=CalcRequestSchema(
+                cadastral_number='99:99:999999:01',
+                latitude=89.9999,
+                longtitude=99.9999,
+            )
+        )
+        await Result(session=get_session).update(id_=id_, score=5.5)
+        with TestClient(app).websocket_connect('/ws/results') as ws:
+            ws.send_text('not json')
+            error = ws.receive_json()
+            ws.send_json(
+                {
+                    'action': 'subscribe',
+                    'ids': [id_ + 1000],
+                    'cadastral_numbers': ['99:99:999999:01'],
+                }
+            )
+            messages = [ws.receive_json(), ws.receive_json()]
+
+        messages.sort(key=lambda message: message['type'])
+        assert_that(
+            actual_or_assertion=error, matcher=has_entries(type='error')
+        )
+        assert_that(
+            actual_or_assertion=messages,
+            matcher=equal_to(
+                [
+                    {'type': 'scores', 'scores': [{'id': id_, 'score': 5.5}]},
+                    {
+                        'type': 'subscribed',
+                        'pending': [],
+                        'missing': {
+                            'ids': [id_ + 1000],
+                            'cadastral_numbers': [],
+                        },
+                    },
+                ]
+            ),
+        )
@@ -0,0 +1,108 @@
+"""Локальный сервис вычислений для тестов HTTP бэкенда.
+
+Сервис запускается uvicorn на свободном порту 127.0.0.1 в цикле событий
+теста и отвечает по сценарию: заданное количество ошибок, затем счет,
+с задержкой перед ответом.
+"""
+
+# STDLIB
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# THIRDPARTY
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse
+import uvicorn
+
+
+class FakeScoringService:
+    """Сценарий ответов и счетчики запросов."""
+
+    def __init__(
+        self,
+        score: float = 42.5,
+        failures: int = 0,
+        failure_status: int = 503,
+        delay: float = 0,
+    ) -> None:
+        """Инициализация сценария.
+
+        Args:
+            score (float): Счет в успешном ответе.
+            failures (int): Сколько первых запросов завершить ошибкой.
+            failure_status (int): Код ответа с ошибкой.
+            delay (float): Задержка перед ответом, сек.
+        """
+        self.score = score
+        self.failures = failures
+        self.failure_status = failure_status
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.payloads: list[dict] = []
+        self.app = FastAPI()
+        self.app.post('/score')(self.handle)
+        self.app.post('/score/batch')(self.handle_batch)
+
+    async def handle(self, request: Request) -> JSONResponse:
+        """Ответ на запрос счета.
+
+        Args:
+            request (Request): Запрос.
+
+        Returns:
+            JSONResponse: {'score': ...} или ошибка по сценарию.
+        """
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            self.payloads.append(await request.json())
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.failures:
+                return JSONResponse({}, status_code=self.failure_status)
+            return JSONResponse({'score': self.score})
+        finally:
+            self.active -= 1
+
+    async def handle_batch(self, request: Request) -> JSONResponse:
+        """Ответ на запрос счетов пачки, счет - номер элемента.
+
+        Args:
+            request (Request): Запрос.
+
+        Returns:
+            JSONResponse: {'scores': [...]}.
+        """
+        self.calls += 1
+        items = (await request.json())['items']
+        self.payloads.extend(items)
+        return JSONResponse({'scores': list(range(len(items)))})
+
+
+@asynccontextmanager
+async def serve(service: FakeScoringService) -> AsyncIterator[str]:
+    """Запускает сервис на свободном порту.
+
+    Args:
+        service (FakeScoringService): Сценарий ответов.
+
+    Yields:
+        str: Адрес сервиса.
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(
+            service.app, host='127.0.0.1', port=0, log_level='warning'
+        )
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.should_exit = True
+        await task
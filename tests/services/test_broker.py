@@ -0,0 +1,85 @@
+"""Тесты публикации и обработки задач на расчет через Kafka."""
+
+# STDLIB
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# THIRDPARTY
+from faststream.kafka import TestKafkaBroker
+from hamcrest import assert_that, equal_to, has_length
+import pytest
+
+# FIRSTPARTY
+from app import consumer
+from app.schemas.territory import CalcJobMessage, CalcRequestSchema
+from app.services.broker import broker, calc_publisher, publish_calc_job
+
+MESSAGE = CalcJobMessage(
+    cadastral_number='44:44:444444:44',
+    latitude=44.4444,
+    longtitude=44.4444,
+    result_id=7,
+)
+
+
+@asynccontextmanager
+async def fake_sessionmaker() -> AsyncIterator[object]:
+    """Фабрика сессий без БД."""
+    yield object()
+
+
+@pytest.mark.unittest
+class TestCalcBroker:
+    """Класс методов с тестами Kafka пайплайна расчетов."""
+
+    async def test_publish_calc_job(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Задача публикуется в топик и обрабатывается консьюмером.
+
+        Args:
+            monkeypatch: фикстура для подмены расчета и сессии.
+        """
+        calculated: list[CalcRequestSchema] = []
+
+        async def calculation(
+            data: CalcRequestSchema, result_id: int, session: object
+        ) -> None:
+            calculated.append(data)
+
+        monkeypatch.setattr(consumer, 'remote_calculation', calculation)
+        monkeypatch.setattr(consumer, 'prod_sessionmaker', fake_sessionmaker)
+
+        async with TestKafkaBroker(broker):
+            await publish_calc_job(MESSAGE)
+
+            calc_publisher.mock.assert_called_once_with(MESSAGE.model_dump())
+            consumer.handle_calc_job.mock.assert_called_once_with(
+                MESSAGE.model_dump()
+            )
+
+        assert_that(actual_or_assertion=calculated, matcher=has_length(1))
+        assert_that(
+            actual_or_assertion=calculated[0], matcher=equal_to(MESSAGE)
+        )
+
+    async def test_message_key_is_cadastral_number(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ключ сообщения - кадастровый номер, для выбора партиции.
+
+        Args:
+            monkeypatch: фикстура для подмены публикации.
+        """
+        published = []
+
+        async def publish(message: CalcJobMessage, **kwargs) -> None:
+            published.append(kwargs)
+
+        monkeypatch.setattr(calc_publisher, 'publish', publish)
+        await publish_calc_job(MESSAGE)
+
+        assert_that(
+            actual_or_assertion=published[0]['key'],
+            matcher=equal_to(MESSAGE.cadastral_number.encode()),
+        )
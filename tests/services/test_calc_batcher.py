@@ -0,0 +1,153 @@
+"""Тесты микропакетирования запросов к бэкенду вычислений."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_entries
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.territory import Territory
+from app.database.models import ResultModel
+from app.schemas.territory import CalcRequestSchema
+from app.services.calc_batcher import CalcBatcher
+from app.services.histogram import Histogram
+from tests.config import settings
+
+
+class FakeBackend:
+    """Бэкенд без сети, счет - долгота, запоминает размеры пачек."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        """Инициализация.
+
+        Args:
+            error (Exception | None): Ошибка, которую вернет каждый вызов.
+        """
+        self.error = error
+        self.batches: list[int] = []
+
+    async def calculate(self, data: CalcRequestSchema) -> float:
+        """Счет одной территории."""
+        return (await self.calculate_many([data]))[0]
+
+    async def calculate_many(
+        self, data: list[CalcRequestSchema]
+    ) -> list[float]:
+        """Счета пачки."""
+        self.batches.append(len(data))
+        if self.error is not None:
+            raise self.error
+        return [item.longtitude for item in data]
+
+    async def aclose(self) -> None:
+        """Нечего закрывать."""
+
+
+def make_data(number: int) -> CalcRequestSchema:
+    """Данные территории с долготой number.
+
+    Returns:
+        CalcRequestSchema: Данные для расчета.
+    """
+    return CalcRequestSchema(
+        cadastral_number=f'15:15:151515:{number:02}',
+        latitude=15.1515,
+        longtitude=float(number),
+    )
+
+
+@pytest.mark.unittest
+class TestHistogram:
+    """Класс методов с тестами гистограммы."""
+
+    def test_cumulative_buckets(self) -> None:
+        """Корзины накопительные, значение на границе попадает в корзину."""
+        histogram = Histogram((1, 5))
+        for value in (1, 3, 5, 7):
+            histogram.observe(value)
+
+        assert_that(
+            actual_or_assertion=histogram.as_dict(),
+            matcher=equal_to(
+                {
+                    'buckets': {'1': 1, '5': 3, '+Inf': 4},
+                    'count': 4,
+                    'sum': 16.0,
+                }
+            ),
+        )
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestCalcBatcher:
+    """Класс методов с тестами пачек расчетов."""
+
+    async def test_batches_by_size_and_linger(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Полная пачка уходит сразу, остаток - по таймеру.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        data = [make_data(number) for number in range(5)]
+        ids = await Territory(session=get_session).create_many(data=data)
+        backend = FakeBackend()
+        batcher = CalcBatcher(
+            backend=backend,
+            sessionmaker=settings.get_sessionmaker(),
+            max_size=3,
+            linger=0.05,
+        )
+
+        scores = await asyncio.gather(
+            *(batcher.calculate(item, id_) for item, id_ in zip(data, ids))
+        )
+        rows = await get_session.execute(
+            select(ResultModel.id_, ResultModel.score)
+            .where(ResultModel.id_.in_(ids))
+            .order_by(ResultModel.id_)
+        )
+
+        expected = [float(number) for number in range(5)]
+        assert_that(actual_or_assertion=scores, matcher=equal_to(expected))
+        assert_that(
+            actual_or_assertion=[row.score for row in rows],
+            matcher=equal_to(expected),
+        )
+        assert_that(
+            actual_or_assertion=backend.batches, matcher=equal_to([3, 2])
+        )
+        assert_that(
+            actual_or_assertion=batcher.stats(),
+            matcher=has_entries(
+                flushed_full=1,
+                flushed_linger=1,
+                sizes=has_entries(count=2, sum=5.0),
+            ),
+        )
+
+    async def test_error_fails_whole_batch(self) -> None:
+        """Ошибка бэкенда передается всем расчетам пачки."""
+        batcher = CalcBatcher(
+            backend=FakeBackend(error=RuntimeError('down')),
+            sessionmaker=settings.get_sessionmaker(),
+            max_size=2,
+            linger=1,
+        )
+
+        results = await asyncio.gather(
+            batcher.calculate(make_data(1), 1),
+            batcher.calculate(make_data(2), 2),
+            return_exceptions=True,
+        )
+
+        assert_that(
+            actual_or_assertion=[type(result) for result in results],
+            matcher=equal_to([RuntimeError, RuntimeError]),
+        )
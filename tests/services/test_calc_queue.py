@@ -0,0 +1,120 @@
+"""Тесты очереди фоновых расчетов."""
+
+# STDLIB
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# THIRDPARTY
+from hamcrest import assert_that, contains_inanyorder, equal_to
+import pytest
+
+# FIRSTPARTY
+from app.schemas.territory import CalcRequestSchema
+from app.services.calc_queue import CalcJob, CalcQueue, CalcQueueFull
+
+
+class FakeSessionmaker:
+    """Фабрика сессий без БД, считает открытые сессии."""
+
+    def __init__(self) -> None:
+        """Инициализация счетчиков."""
+        self.opened = 0
+        self.closed = 0
+
+    @asynccontextmanager
+    async def __call__(self) -> AsyncIterator[object]:
+        """Выдает новую фиктивную сессию на каждый вызов."""
+        self.opened += 1
+        try:
+            yield object()
+        finally:
+            self.closed += 1
+
+
+def make_job(result_id: int) -> CalcJob:
+    """Задача на расчет для тестов.
+
+    Returns:
+        CalcJob: Задача с валидными данными.
+    """
+    return CalcJob(
+        data=CalcRequestSchema(
+            cadastral_number='77:77:777777:77',
+            latitude=55.7558,
+            longtitude=37.6173,
+        ),
+        result_id=result_id,
+    )
+
+
+@pytest.mark.unittest
+class TestCalcQueue:
+    """Класс методов с тестами очереди расчетов."""
+
+    async def test_jobs_processed_in_own_sessions(self) -> None:
+        """Каждая задача выполняется в отдельной сессии воркера."""
+        done = []
+        sessions = set()
+
+        async def handler(job: CalcJob, session: object) -> None:
+            sessions.add(id(session))
+            done.append(job.result_id)
+
+        sessionmaker = FakeSessionmaker()
+        queue = CalcQueue(
+            handler=handler, sessionmaker=sessionmaker, workers=2, maxsize=10
+        )
+        for result_id in range(5):
+            queue.submit(make_job(result_id))
+        await queue.stop(drain_timeout=1)
+
+        assert_that(
+            actual_or_assertion=done,
+            matcher=contains_inanyorder(0, 1, 2, 3, 4),
+        )
+        assert_that(
+            actual_or_assertion=sessionmaker.closed, matcher=equal_to(5)
+        )
+
+    async def test_submit_full_queue(self) -> None:
+        """Переполненная очередь отклоняет задачу сразу."""
+        release = asyncio.Event()
+
+        async def handler(job: CalcJob, session: object) -> None:
+            await release.wait()
+
+        queue = CalcQueue(
+            handler=handler,
+            sessionmaker=FakeSessionmaker(),
+            workers=1,
+            maxsize=1,
+        )
+        queue.submit(make_job(1))
+        await asyncio.sleep(0)
+        queue.submit(make_job(2))
+        with pytest.raises(CalcQueueFull):
+            queue.submit(make_job(3))
+        release.set()
+        await queue.stop(drain_timeout=1)
+
+    async def test_handler_error_does_not_stop_worker(self) -> None:
+        """Ошибка в расчете не останавливает воркер."""
+        done = []
+
+        async def handler(job: CalcJob, session: object) -> None:
+            if job.result_id == 1:
+                raise RuntimeError('calculation failed')
+            done.append(job.result_id)
+
+        queue = CalcQueue(
+            handler=handler,
+            sessionmaker=FakeSessionmaker(),
+            workers=1,
+            maxsize=10,
+        )
+        queue.submit(make_job(1))
+        queue.submit(make_job(2))
+        await queue.stop(drain_timeout=1)
+
+        assert_that(actual_or_assertion=done, matcher=equal_to([2]))
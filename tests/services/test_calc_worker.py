@@ -0,0 +1,171 @@
+"""Тесты воркера расчетов из БД."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.dal.territory import Territory
+from app.database.models import JobStatus, ResultModel
+from app.schemas.territory import CalcRequestSchema
+from app.services.calc_queue import CalcHandler, CalcJob
+from app.services.calc_worker import CalcWorker
+from tests.config import settings
+
+
+def make_worker(handler: CalcHandler) -> CalcWorker:
+    """Воркер тестовой БД с частым опросом.
+
+    Returns:
+        CalcWorker: Воркер, не запущенный.
+    """
+    return CalcWorker(
+        handler=handler,
+        sessionmaker=settings.get_sessionmaker(),
+        workers=4,
+        batch_size=2,
+        lease=60,
+        poll_interval=0.05,
+        sweep_interval=60,
+        max_attempts=1,
+    )
+
+
+async def statuses(ids: list[int]) -> list[tuple[str, float | None]]:
+    """Состояние и счет записей в порядке ids.
+
+    Returns:
+        list[tuple[str, float | None]]: Пары (status, score).
+    """
+    async with settings.get_sessionmaker()() as session:
+        rows = await session.execute(
+            select(
+                ResultModel.id_, ResultModel.status, ResultModel.score
+            ).where(ResultModel.id_.in_(ids))
+        )
+        by_id = {row.id_: (row.status, row.score) for row in rows}
+    return [by_id[id_] for id_ in ids]
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestCalcWorker:
+    """Класс методов с тестами воркера расчетов из БД."""
+
+    async def test_worker_drains_table(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Воркер выполняет расчеты и отмечает ошибки failed.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        ids = await Territory(session=get_session).create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number=f'13:13:131313:{number:02}',
+                    latitude=13.1313,
+                    longtitude=31.3131,
+                )
+                for number in range(5)
+            ]
+        )
+        broken_id = ids[-1]
+
+        async def handler(job: CalcJob, session: AsyncSession) -> None:
+            if job.result_id == broken_id:
+                raise RuntimeError
+            await Result(session=session).update(
+                id_=job.result_id, score=float(job.result_id)
+            )
+
+        worker = make_worker(handler)
+        await worker.start()
+        try:
+            for _ in range(100):
+                states = await statuses(ids)
+                if all(status != JobStatus.queued for status, _ in states):
+                    if not len(worker):
+                        break
+                await asyncio.sleep(0.05)
+        finally:
+            await worker.stop()
+
+        expected = [(JobStatus.done, float(id_)) for id_ in ids[:-1]]
+        expected.append((JobStatus.failed, None))
+        assert_that(
+            actual_or_assertion=await statuses(ids),
+            matcher=equal_to(expected),
+        )
+
+    async def test_stop_releases_unfinished(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Расчет, прерванный остановкой, возвращается в очередь.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        (id_,) = await Territory(session=get_session).create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number='13:13:131313:99',
+                    latitude=13.1313,
+                    longtitude=31.3131,
+                )
+            ]
+        )
+        started = asyncio.Event()
+
+        async def handler(job: CalcJob, session: AsyncSession) -> None:
+            if job.result_id == id_:
+                started.set()
+            await asyncio.Event().wait()
+
+        worker = make_worker(handler)
+        await worker.start()
+        try:
+            await asyncio.wait_for(started.wait(), timeout=5)
+        finally:
+            await worker.stop(drain_timeout=0.01)
+
+        assert_that(
+            actual_or_assertion=await statuses([id_]),
+            matcher=equal_to([(JobStatus.queued, None)]),
+        )
+
+    async def test_drain(self, get_session: AsyncSession) -> None:
+        """Разовый запуск выполняет все queued расчеты и завершается.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        ids = await Territory(session=get_session).create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number=f'13:13:131314:{number:02}',
+                    latitude=13.1313,
+                    longtitude=31.3131,
+                )
+                for number in range(5)
+            ]
+        )
+
+        async def handler(job: CalcJob, session: AsyncSession) -> None:
+            await Result(session=session).update(
+                id_=job.result_id, score=float(job.result_id)
+            )
+
+        count = await make_worker(handler).drain()
+
+        assert_that(actual_or_assertion=count >= 5, matcher=equal_to(True))
+        assert_that(
+            actual_or_assertion=await statuses(ids),
+            matcher=equal_to([(JobStatus.done, float(id_)) for id_ in ids]),
+        )
@@ -0,0 +1,68 @@
+"""Тесты пула процессов для вычислений."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, greater_than, has_entries
+import pytest
+
+# FIRSTPARTY
+from app.services.cpu_executor import CpuExecutor
+
+
+def double_chunk(chunk: list[int]) -> list[int]:
+    """Удваивает элементы пачки.
+
+    Args:
+        chunk (list[int]): Пачка чисел.
+
+    Returns:
+        list[int]: Удвоенные числа.
+    """
+    return [item * 2 for item in chunk]
+
+
+@pytest.mark.unittest
+class TestCpuExecutor:
+    """Класс методов с тестами пула процессов."""
+
+    async def test_map_in_processes(self) -> None:
+        """Пачки считаются в пуле, результаты идут в порядке элементов."""
+        executor = CpuExecutor(
+            kind='process', workers=2, chunk_size=3, queue_size=1
+        )
+        try:
+            result = await executor.map(double_chunk, list(range(10)))
+            stats = executor.stats()
+        finally:
+            await executor.shutdown()
+
+        assert_that(
+            actual_or_assertion=result,
+            matcher=equal_to([item * 2 for item in range(10)]),
+        )
+        assert_that(
+            actual_or_assertion=stats,
+            matcher=has_entries(
+                chunks=4,
+                items=10,
+                in_flight=0,
+                waiting=0,
+                chunk_seconds=has_entries(count=4),
+            ),
+        )
+        assert_that(actual_or_assertion=stats['busy'], matcher=greater_than(0))
+
+    async def test_map_inline(self) -> None:
+        """Без пула пачки считаются в цикле событий, пул не создается."""
+        executor = CpuExecutor(
+            kind='none', workers=2, chunk_size=3, queue_size=1
+        )
+
+        result = await executor.map(double_chunk, list(range(5)))
+
+        assert_that(
+            actual_or_assertion=result, matcher=equal_to([0, 2, 4, 6, 8])
+        )
+        assert_that(
+            actual_or_assertion=executor.stats(),
+            matcher=has_entries(chunks=0, utilisation=0),
+        )
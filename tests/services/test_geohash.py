@@ -0,0 +1,54 @@
+"""Тесты geohash ячеек."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_item, has_length, less_than
+import pytest
+
+# FIRSTPARTY
+from app.services.geohash import MAX_CELLS, covering_cells, encode
+
+
+@pytest.mark.unittest
+class TestGeohash:
+    """Класс методов с тестами geohash."""
+
+    def test_encode(self) -> None:
+        """Кодирование совпадает с эталонным значением geohash."""
+        assert_that(
+            actual_or_assertion=encode(57.64911, 10.40744, 11),
+            matcher=equal_to('u4pruydqqvj'),
+        )
+
+    def test_covering_cells(self) -> None:
+        """Ячейки покрывают круг, включая точки на его границе."""
+        cells = covering_cells(55.75, 37.62, 1000)
+        edge = encode(55.75 + 0.0089, 37.62, 12)
+
+        assert_that(
+            actual_or_assertion=len(cells),
+            matcher=less_than(MAX_CELLS + 1),
+        )
+        assert_that(
+            actual_or_assertion=cells,
+            matcher=has_item(edge[: len(cells[0])]),
+        )
+
+    def test_covering_cells_antimeridian(self) -> None:
+        """Круг у 180 меридиана покрывается ячейками с обеих сторон."""
+        cells = covering_cells(0, 179.99, 5000)
+
+        assert_that(
+            actual_or_assertion=cells,
+            matcher=has_item(encode(0, -179.99, len(cells[0]))),
+        )
+        assert_that(
+            actual_or_assertion=cells,
+            matcher=has_item(encode(0, 179.99, len(cells[0]))),
+        )
+
+    def test_covering_cells_whole_earth(self) -> None:
+        """Радиус больше Земли покрывается ячейками первого уровня."""
+        assert_that(
+            actual_or_assertion=covering_cells(0, 0, 2 * 10**7),
+            matcher=has_length(32),
+        )
@@ -0,0 +1,223 @@
+"""Тесты HTTP бэкенда вычислений на локальном сервисе."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_length, less_than_or_equal_to
+import httpx
+import pytest
+
+# FIRSTPARTY
+from app.schemas.territory import CalcRequestSchema
+from app.services.http_backend import (
+    CalculationBackendError,
+    CircuitBreaker,
+    CircuitOpen,
+    HttpCalculationBackend,
+)
+from tests.services.fake_scoring import FakeScoringService, serve
+
+DATA = CalcRequestSchema(
+    cadastral_number='14:14:141414:14', latitude=14.1414, longtitude=41.4141
+)
+
+
+def make_backend(url: str, **kwargs: float) -> HttpCalculationBackend:
+    """Бэкенд с короткими паузами и таймаутами.
+
+    Returns:
+        HttpCalculationBackend: Бэкенд локального сервиса.
+    """
+    options = {
+        'concurrency': 4,
+        'timeout': 1,
+        'connect_timeout': 1,
+        'retries': 2,
+        'backoff': 0.01,
+        'breaker_threshold': 5,
+        'breaker_reset': 60,
+    }
+    options.update(kwargs)
+    return HttpCalculationBackend(url=url, **options)
+
+
+@pytest.mark.unittest
+class TestCircuitBreaker:
+    """Класс методов с тестами размыкателя."""
+
+    def test_open_and_half_open(self) -> None:
+        """Размыкание после порога и одна пробная попытка после reset."""
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=2, reset=10, clock=lambda: now[0])
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+
+        assert_that(
+            actual_or_assertion=breaker.state, matcher=equal_to('open')
+        )
+        with pytest.raises(CircuitOpen):
+            breaker.allow()
+        now[0] = 10
+        breaker.allow()
+        with pytest.raises(CircuitOpen):
+            breaker.allow()
+        breaker.record_success()
+        assert_that(
+            actual_or_assertion=breaker.state, matcher=equal_to('closed')
+        )
+
+
+@pytest.mark.unittest
+class TestHttpCalculationBackend:
+    """Класс методов с тестами HTTP бэкенда."""
+
+    async def test_calculate(self) -> None:
+        """Счет запрашивается с данными территории."""
+        service = FakeScoringService(score=-12.25)
+        async with serve(service) as url:
+            backend = make_backend(url)
+            try:
+                score = await backend.calculate(DATA)
+            finally:
+                await backend.aclose()
+
+        assert_that(actual_or_assertion=score, matcher=equal_to(-12.25))
+        assert_that(
+            actual_or_assertion=service.payloads,
+            matcher=equal_to([DATA.model_dump()]),
+        )
+
+    async def test_calculate_many(self) -> None:
+        """Пачка считается одним запросом."""
+        service = FakeScoringService()
+        async with serve(service) as url:
+            backend = make_backend(url)
+            try:
+                scores = await backend.calculate_many([DATA] * 3)
+            finally:
+                await backend.aclose()
+
+        assert_that(
+            actual_or_assertion=scores, matcher=equal_to([0.0, 1.0, 2.0])
+        )
+        assert_that(actual_or_assertion=service.calls, matcher=equal_to(1))
+
+    async def test_retries(self) -> None:
+        """Ошибки 5xx повторяются до успешного ответа."""
+        service = FakeScoringService(failures=2)
+        async with serve(service) as url:
+            backend = make_backend(url, retries=2)
+            try:
+                score = await backend.calculate(DATA)
+            finally:
+                await backend.aclose()
+
+        assert_that(actual_or_assertion=score, matcher=equal_to(42.5))
+        assert_that(actual_or_assertion=service.calls, matcher=equal_to(3))
+
+    async def test_client_error_is_not_retried(self) -> None:
+        """Ошибка 4xx не повторяется и не размыкает размыкатель."""
+        service = FakeScoringService(failures=1, failure_status=422)
+        async with serve(service) as url:
+            backend = make_backend(url)
+            try:
+                with pytest.raises(CalculationBackendError):
+                    await backend.calculate(DATA)
+            finally:
+                await backend.aclose()
+
+        assert_that(actual_or_assertion=service.calls, matcher=equal_to(1))
+        assert_that(
+            actual_or_assertion=backend.breaker.state,
+            matcher=equal_to('closed'),
+        )
+
+    async def test_timeout(self) -> None:
+        """Попытка дольше timeout считается ошибкой."""
+        service = FakeScoringService(delay=1)
+        async with serve(service) as url:
+            backend = make_backend(url, timeout=0.2, retries=1)
+            try:
+                with pytest.raises(CalculationBackendError):
+                    await backend.calculate(DATA)
+            finally:
+                await backend.aclose()
+
+        assert_that(actual_or_assertion=service.calls, matcher=equal_to(2))
+
+    async def test_circuit_breaker(self) -> None:
+        """После серии ошибок запросы к сервису прекращаются."""
+        service = FakeScoringService(failures=100)
+        async with serve(service) as url:
+            backend = make_backend(url, retries=0, breaker_threshold=2)
+            try:
+                for _ in range(2):
+                    with pytest.raises(CalculationBackendError):
+                        await backend.calculate(DATA)
+                with pytest.raises(CircuitOpen):
+                    await backend.calculate(DATA)
+            finally:
+                await backend.aclose()
+
+        assert_that(actual_or_assertion=service.calls, matcher=equal_to(2))
+
+    @pytest.mark.parametrize('interrupt', ['cancel', 'decoding_error'])
+    async def test_half_open_trial_interrupted(self, interrupt: str) -> None:
+        """Прерванная пробная попытка не оставляет размыкатель занятым.
+
+        Args:
+            interrupt (str): cancel - попытка отменена, decoding_error -
+                ошибка вне TransportError.
+        """
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503)
+            if len(calls) == 2:
+                if interrupt == 'cancel':
+                    await asyncio.sleep(10)
+                raise httpx.DecodingError('broken body', request=request)
+            return httpx.Response(200, json={'score': 1.5})
+
+        backend = make_backend(
+            'http://scoring',
+            retries=0,
+            breaker_threshold=1,
+            breaker_reset=0,
+            transport=httpx.MockTransport(handler),
+        )
+        try:
+            with pytest.raises(CalculationBackendError):
+                await backend.calculate(DATA)
+            trial = asyncio.create_task(backend.calculate(DATA))
+            await asyncio.sleep(0.05)
+            trial.cancel()
+            await asyncio.gather(trial, return_exceptions=True)
+            score = await backend.calculate(DATA)
+        finally:
+            await backend.aclose()
+
+        assert_that(actual_or_assertion=score, matcher=equal_to(1.5))
+        assert_that(actual_or_assertion=calls, matcher=has_length(3))
+
+    async def test_concurrency_limit(self) -> None:
+        """Одновременных запросов не больше concurrency."""
+        service = FakeScoringService(delay=0.05)
+        async with serve(service) as url:
+            backend = make_backend(url, concurrency=2)
+            try:
+                await asyncio.gather(
+                    *(backend.calculate(DATA) for _ in range(8))
+                )
+            finally:
+                await backend.aclose()
+
+        assert_that(actual_or_assertion=service.calls, matcher=equal_to(8))
+        assert_that(
+            actual_or_assertion=service.max_active,
+            matcher=less_than_or_equal_to(2),
+        )
@@ -0,0 +1,157 @@
+"""Тесты локального векторного расчета и пересчета записей без счета."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_length
+import numpy as np
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.backfill import backfill
+from app.dal.territory import Territory
+from app.database.models import JobStatus, ResultModel
+from app.schemas.territory import CalcRequestSchema
+from app.services.cpu_executor import CpuExecutor
+from app.services.local_scoring import NumpyScoringEngine, score_arrays
+from tests.config import settings
+
+
+async def scores(session: AsyncSession, ids: list[int]) -> list[float | None]:
+    """Счета записей в порядке ids.
+
+    Returns:
+        list[float | None]: Счета, None - без счета.
+    """
+    rows = await session.execute(
+        select(ResultModel.id_, ResultModel.score).where(
+            ResultModel.id_.in_(ids)
+        )
+    )
+    by_id = dict(rows.tuples().all())
+    await session.commit()
+    return [by_id[id_] for id_ in ids]
+
+
+@pytest.mark.unittest
+class TestNumpyScoringEngine:
+    """Класс методов с тестами векторного расчета."""
+
+    async def test_matches_arrays(self) -> None:
+        """Расчет пачки совпадает с расчетом по колонкам."""
+        data = [
+            CalcRequestSchema(
+                cadastral_number='16:16:161616:16',
+                latitude=latitude,
+                longtitude=longtitude,
+            )
+            for latitude, longtitude in ((0, 0), (30, 45), (-60, 170))
+        ]
+        scores = await NumpyScoringEngine().calculate_many(data)
+        expected = score_arrays(
+            np.array([0, 30, -60]), np.array([0, 45, 170])
+        ).tolist()
+
+        assert_that(actual_or_assertion=scores, matcher=equal_to(expected))
+        assert_that(
+            actual_or_assertion=await NumpyScoringEngine().calculate(data[1]),
+            matcher=equal_to(expected[1]),
+        )
+        assert_that(
+            actual_or_assertion=bool(np.all(np.abs(scores) <= 100)),
+            matcher=equal_to(True),
+        )
+
+    async def test_executor(self) -> None:
+        """Расчет в пуле процессов совпадает с расчетом в цикле событий."""
+        data = [
+            CalcRequestSchema(
+                cadastral_number='16:16:161616:16',
+                latitude=number,
+                longtitude=-2 * number,
+            )
+            for number in range(7)
+        ]
+        executor = CpuExecutor(
+            kind='process', workers=2, chunk_size=3, queue_size=2
+        )
+        try:
+            scores = await NumpyScoringEngine(executor).calculate_many(data)
+        finally:
+            await executor.shutdown()
+
+        assert_that(
+            actual_or_assertion=scores,
+            matcher=equal_to(await NumpyScoringEngine().calculate_many(data)),
+        )
+        assert_that(actual_or_assertion=executor.chunks, matcher=equal_to(3))
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestBackfill:
+    """Класс методов с тестами пересчета записей без счета."""
+
+    async def test_backfill(self, get_session: AsyncSession) -> None:
+        """Записи queued без счета получают счет по координатам.
+
+        Выполняющийся расчет не трогается, failed - только с
+        include_failed.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        data = [
+            CalcRequestSchema(
+                cadastral_number=f'16:16:161616:{number:02}',
+                latitude=float(number),
+                longtitude=float(-number),
+            )
+            for number in range(5)
+        ]
+        ids = await Territory(session=get_session).create_many(data=data)
+        for id_, status in zip(ids[3:], (JobStatus.running, JobStatus.failed)):
+            await get_session.execute(
+                update(ResultModel)
+                .where(ResultModel.id_ == id_)
+                .values(status=status)
+            )
+        await get_session.commit()
+        expected = score_arrays(
+            np.arange(5, dtype=float), -np.arange(5, dtype=float)
+        ).tolist()
+        reports = []
+
+        stats = await backfill(
+            settings.get_sessionmaker(), chunk_size=2, report=reports.append
+        )
+        first = await scores(get_session, ids)
+        pending = await get_session.execute(
+            select(ResultModel.id_).where(
+                ResultModel.score.is_(None),
+                ResultModel.status == JobStatus.queued,
+            )
+        )
+        await get_session.commit()
+        await backfill(
+            settings.get_sessionmaker(),
+            chunk_size=2,
+            report=reports.append,
+            include_failed=True,
+        )
+
+        assert_that(
+            actual_or_assertion=first,
+            matcher=equal_to(expected[:3] + [None, None]),
+        )
+        assert_that(
+            actual_or_assertion=await scores(get_session, ids),
+            matcher=equal_to(expected[:3] + [None, expected[4]]),
+        )
+        assert_that(actual_or_assertion=pending.all(), matcher=has_length(0))
+        assert_that(
+            actual_or_assertion=stats.rows >= 3, matcher=equal_to(True)
+        )
+        assert_that(
+            actual_or_assertion=len(reports) >= 3, matcher=equal_to(True)
+        )
@@ -0,0 +1,110 @@
+"""Тесты метрик в формате Prometheus."""
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to, has_length
+import pytest
+
+# FIRSTPARTY
+from app.services.histogram import Histogram
+from app.services.metrics import Counter, LabeledHistogram, statement_labels
+
+
+@pytest.mark.unittest
+class TestMetrics:
+    """Класс методов с тестами метрик."""
+
+    def test_histogram_render(self) -> None:
+        """Накопительные корзины, сумма и количество с метками."""
+        histogram = LabeledHistogram(
+            'test_seconds', 'Тест.', ('route',), buckets=(0.1, 1)
+        )
+        histogram.labels('/a"b').observe(0.05)
+        histogram.labels('/a"b').observe(0.5)
+
+        assert_that(
+            actual_or_assertion=histogram.render(),
+            matcher=equal_to(
+                [
+                    '# HELP test_seconds Тест.',
+                    '# TYPE test_seconds histogram',
+                    'test_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+                    'test_seconds_bucket{route="/a\\"b",le="1"} 2',
+                    'test_seconds_bucket{route="/a\\"b",le="+Inf"} 2',
+                    'test_seconds_sum{route="/a\\"b"} 0.55',
+                    'test_seconds_count{route="/a\\"b"} 2',
+                ]
+            ),
+        )
+
+    def test_collect(self) -> None:
+        """Счетчик и гистограмма сервиса считываются при выводе."""
+        sizes = Histogram((1, 10))
+        sizes.observe(5)
+        histogram = LabeledHistogram(
+            'test_size', 'Тест.', collect=lambda: {(): sizes}
+        )
+        counter = Counter(
+            'test_total', 'Тест.', ('result',), collect=lambda: {('hit',): 3}
+        )
+
+        assert_that(
+            actual_or_assertion=histogram.render() + counter.render(),
+            matcher=equal_to(
+                [
+                    '# HELP test_size Тест.',
+                    '# TYPE test_size histogram',
+                    'test_size_bucket{le="1"} 0',
+                    'test_size_bucket{le="10"} 1',
+                    'test_size_bucket{le="+Inf"} 1',
+                    'test_size_sum 5.0',
+                    'test_size_count 1',
+                    '# HELP test_total Тест.',
+                    '# TYPE test_total counter',
+                    'test_total{result="hit"} 3',
+                ]
+            ),
+        )
+
+    def test_max_series(self) -> None:
+        """Наборы меток сверх max_series попадают в other."""
+        histogram = LabeledHistogram(
+            'test_seconds', 'Тест.', ('table',), max_series=2
+        )
+        for table in ('a', 'b', 'c', 'd'):
+            histogram.labels(table).observe(1)
+
+        assert_that(
+            actual_or_assertion=histogram.series, matcher=has_length(3)
+        )
+        assert_that(
+            actual_or_assertion=histogram.series[('other',)].count,
+            matcher=equal_to(2),
+        )
+
+    @pytest.mark.parametrize(
+        'statement, labels',
+        [
+            (
+                'SELECT result.score FROM result WHERE id = $1',
+                ('SELECT', 'result'),
+            ),
+            (
+                'WITH t AS (INSERT INTO territory VALUES ($1)) SELECT 1',
+                ('WITH', 'territory'),
+            ),
+            ('UPDATE result SET score = $1', ('UPDATE', 'result')),
+            ('SELECT * FROM (SELECT 1) AS s', ('SELECT', '')),
+            ('LISTEN result_done', ('other', '')),
+        ],
+    )
+    def test_statement_labels(self, statement: str, labels: tuple) -> None:
+        """Операция и первая таблица запроса.
+
+        Args:
+            statement (str): Текст запроса.
+            labels (tuple): Ожидаемые метки.
+        """
+        assert_that(
+            actual_or_assertion=statement_labels(statement),
+            matcher=equal_to(labels),
+        )
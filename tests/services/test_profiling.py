@@ -0,0 +1,110 @@
+"""Тесты профилирования процесса."""
+
+# STDLIB
+import asyncio
+import time
+
+# THIRDPARTY
+from hamcrest import (
+    assert_that,
+    contains_string,
+    equal_to,
+    greater_than,
+    has_length,
+)
+import pytest
+
+# FIRSTPARTY
+from app.services.profiling import (
+    LoopMonitor,
+    Profiler,
+    ProfilerBusy,
+    SlowQueryLog,
+)
+
+
+def busy_function() -> int:
+    """Функция, которая должна попасть в профиль."""
+    return sum(range(10000))
+
+
+def block_loop() -> None:
+    """Синхронный код, блокирующий цикл событий."""
+    time.sleep(0.3)
+
+
+@pytest.mark.unittest
+class TestProfiling:
+    """Класс методов с тестами профилирования."""
+
+    async def test_profiler(self) -> None:
+        """Профиль содержит вызванные функции, второй запуск запрещен."""
+        profiler = Profiler(max_seconds=60)
+        profiler.start(seconds=600)
+        try:
+            with pytest.raises(ProfilerBusy):
+                profiler.start(seconds=1)
+            busy_function()
+        finally:
+            profiler.stop()
+
+        assert_that(
+            actual_or_assertion=profiler.status()['seconds'],
+            matcher=equal_to(60),
+        )
+        assert_that(
+            actual_or_assertion=profiler.text('cumulative', 100),
+            matcher=contains_string('busy_function'),
+        )
+
+    async def test_profiler_stops_itself(self) -> None:
+        """Профилирование выключается по истечении времени."""
+        profiler = Profiler(max_seconds=60)
+        profiler.start(seconds=0.01)
+        await asyncio.sleep(0.05)
+
+        assert_that(
+            actual_or_assertion=profiler.running, matcher=equal_to(False)
+        )
+        assert_that(
+            actual_or_assertion=profiler.dump(),
+            matcher=has_length(greater_than(0)),
+        )
+
+    def test_slow_query_log(self) -> None:
+        """В журнал попадают только запросы дольше порога."""
+        log = SlowQueryLog(threshold_ms=0, size=2)
+        log.record('SELECT 1', (), 1)
+        log.threshold_ms = 100
+        log.record('SELECT 2', (), 0.05)
+        for number in (3, 4, 5):
+            log.record(f'SELECT {number}', (number,), 0.2)
+
+        stats = log.stats()
+        assert_that(actual_or_assertion=stats['count'], matcher=equal_to(3))
+        assert_that(
+            actual_or_assertion=[
+                (query['statement'], query['parameters'])
+                for query in stats['queries']
+            ],
+            matcher=equal_to([('SELECT 4', '(4,)'), ('SELECT 5', '(5,)')]),
+        )
+
+    async def test_loop_monitor(self) -> None:
+        """Блокировка цикла видна в задержке и в снятом стеке."""
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_loop()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        stats = monitor.stats()
+        assert_that(
+            actual_or_assertion=stats['max_lag'], matcher=greater_than(0.2)
+        )
+        assert_that(actual_or_assertion=stats['blocks'], matcher=has_length(1))
+        assert_that(
+            actual_or_assertion=stats['blocks'][0]['stack'],
+            matcher=contains_string('block_loop'),
+        )
@@ -0,0 +1,189 @@
+"""Тесты получения уведомлений о записи счета через LISTEN/NOTIFY."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.result import FAILED_MESSAGE, Result
+from app.dal.score_cache import LRUScoreCache
+from app.dal.territory import Territory
+from app.schemas.territory import CalcRequestSchema
+from app.services import score_listener
+from app.services.score_listener import ScoreListener, parse_payload
+from app.services.score_notifier import ScoreNotifier
+from tests.config import settings
+
+
+def make_listener(notifier: ScoreNotifier, **kwargs: float) -> ScoreListener:
+    """Слушатель тестовой БД с собственными уведомлениями и кэшем.
+
+    Args:
+        notifier (ScoreNotifier): Подписчики слушателя.
+        **kwargs (float): Паузы переподключения и проверки соединения.
+
+    Returns:
+        ScoreListener: Слушатель, не запущенный.
+    """
+    return ScoreListener(
+        url=settings.get_db_url(),
+        channel='result_done',
+        notifier=notifier,
+        cache=LRUScoreCache(maxsize=10, ttl=60, pending_ttl=1),
+        **kwargs,
+    )
+
+
+async def create_result(session: AsyncSession, number: str) -> int:
+    """Создает запись без счета.
+
+    Returns:
+        int: ID записи с счетом.
+    """
+    return await Territory(session=session).create(
+        data=CalcRequestSchema(
+            cadastral_number=f'88:88:888888:{number}',
+            latitude=8.8888,
+            longtitude=8.8888,
+        )
+    )
+
+
+@pytest.mark.unittest
+def test_parse_payload() -> None:
+    """Уведомление разбирается в ID и счет или отметку failed."""
+    assert_that(
+        actual_or_assertion=parse_payload('15:-12.345678'),
+        matcher=equal_to((15, -12.345678)),
+    )
+    assert_that(
+        actual_or_assertion=parse_payload('16:failed'),
+        matcher=equal_to((16, FAILED_MESSAGE)),
+    )
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestScoreListener:
+    """Класс методов с тестами слушателя уведомлений."""
+
+    async def test_notification_from_other_process(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Счет, записанный другим процессом, будит подписчика.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await create_result(get_session, '01')
+        notifier = ScoreNotifier()
+        listener = make_listener(notifier)
+        listener.start()
+        try:
+            await asyncio.wait_for(listener.connected.wait(), timeout=5)
+            future = notifier.subscribe(id_)
+            # Отдельные уведомления имитируют другой процесс.
+            await Result(session=get_session, notifier=ScoreNotifier()).update(
+                id_=id_, score=9.75
+            )
+            score = await asyncio.wait_for(future, timeout=5)
+        finally:
+            await listener.stop()
+
+        assert_that(actual_or_assertion=score, matcher=equal_to(9.75))
+        assert_that(
+            actual_or_assertion=await listener.cache.get(id_),
+            matcher=equal_to((True, 9.75)),
+        )
+
+    async def test_catch_up_after_reconnect(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Счет, записанный без соединения LISTEN, приходит при подключении.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        id_ = await create_result(get_session, '02')
+        notifier = ScoreNotifier()
+        future = notifier.subscribe(id_)
+        await Result(session=get_session, notifier=ScoreNotifier()).update(
+            id_=id_, score=-1.5
+        )
+        listener = make_listener(notifier)
+        listener.start()
+        try:
+            score = await asyncio.wait_for(future, timeout=5)
+        finally:
+            await listener.stop()
+
+        assert_that(actual_or_assertion=score, matcher=equal_to(-1.5))
+        assert_that(
+            actual_or_assertion=listener.caught_up, matcher=equal_to(1)
+        )
+
+    async def test_update_without_notify(
+        self, get_session: AsyncSession
+    ) -> None:
+        """Счет, записанный с notify=False, не рассылается подписчикам.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        silent_id = await create_result(get_session, '03')
+        id_ = await create_result(get_session, '04')
+        notifier = ScoreNotifier()
+        listener = make_listener(notifier)
+        listener.start()
+        try:
+            await asyncio.wait_for(listener.connected.wait(), timeout=5)
+            silent = notifier.subscribe(silent_id)
+            future = notifier.subscribe(id_)
+            result = Result(session=get_session, notifier=ScoreNotifier())
+            await result.update_many([(silent_id, 1.0)], notify=False)
+            await result.update(id_=id_, score=2.0)
+            await asyncio.wait_for(future, timeout=5)
+        finally:
+            await listener.stop()
+
+        assert_that(actual_or_assertion=silent.done(), matcher=equal_to(False))
+
+    async def test_health_check_reconnect(
+        self, get_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Соединение без ответа на проверку переподключается и догоняет.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+            monkeypatch (pytest.MonkeyPatch): фикстура подмены атрибутов.
+        """
+        id_ = await create_result(get_session, '05')
+        notifier = ScoreNotifier()
+        listener = make_listener(
+            notifier,
+            reconnect_delay=0.01,
+            health_interval=0.05,
+            health_timeout=0.05,
+        )
+        listener.start()
+        try:
+            await asyncio.wait_for(listener.connected.wait(), timeout=5)
+            future = notifier.subscribe(id_)
+            await Result(session=get_session).update(
+                id_=id_, score=3.5, notify=False
+            )
+            monkeypatch.setattr(
+                score_listener, 'HEALTH_QUERY', 'SELECT pg_sleep(1)'
+            )
+            score = await asyncio.wait_for(future, timeout=5)
+        finally:
+            await listener.stop()
+
+        assert_that(actual_or_assertion=score, matcher=equal_to(3.5))
+        assert_that(
+            actual_or_assertion=listener.caught_up, matcher=equal_to(1)
+        )
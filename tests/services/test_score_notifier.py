@@ -0,0 +1,38 @@
+"""Тесты уведомлений о записи счета."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to
+import pytest
+
+# FIRSTPARTY
+from app.services.score_notifier import ScoreNotifier
+
+
+@pytest.mark.unittest
+class TestScoreNotifier:
+    """Класс методов с тестами уведомлений о записи счета."""
+
+    async def test_publish_wakes_all_waiters(self) -> None:
+        """Все подписчики записи получают счет."""
+        notifier = ScoreNotifier()
+        futures = [notifier.subscribe(1) for _ in range(3)]
+        other = notifier.subscribe(2)
+        notifier.publish(1, 12.5)
+
+        results = await asyncio.gather(*futures)
+        assert_that(actual_or_assertion=results, matcher=equal_to([12.5] * 3))
+        assert_that(actual_or_assertion=other.done(), matcher=equal_to(False))
+        assert_that(actual_or_assertion=len(notifier), matcher=equal_to(1))
+
+    async def test_unsubscribe(self) -> None:
+        """Снятая подписка не хранится в уведомлениях."""
+        notifier = ScoreNotifier()
+        future = notifier.subscribe(1)
+        notifier.unsubscribe(1, future)
+        notifier.publish(1, 12.5)
+
+        assert_that(actual_or_assertion=future.done(), matcher=equal_to(False))
+        assert_that(actual_or_assertion=len(notifier), matcher=equal_to(0))
@@ -0,0 +1,164 @@
+"""Тесты подписки WebSocket клиента на запись счетов."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, calling, equal_to, raises
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# FIRSTPARTY
+from app.dal.result import Result
+from app.dal.territory import Territory
+from app.schemas.territory import CalcRequestSchema
+from app.services.score_notifier import ScoreNotifier
+from app.services.score_subscription import (
+    ScoreSubscription,
+    ScoreSubscriptionLimit,
+    subscribe_scores,
+)
+from tests.config import settings
+
+
+def make_subscription(
+    notifier: ScoreNotifier, maxsize: int = 10, max_subscriptions: int = 10
+) -> ScoreSubscription:
+    """Подписка с небольшими лимитами.
+
+    Returns:
+        ScoreSubscription: Подписка соединения.
+    """
+    return ScoreSubscription(
+        notifier=notifier,
+        maxsize=maxsize,
+        max_subscriptions=max_subscriptions,
+    )
+
+
+@pytest.mark.unittest
+class TestScoreSubscription:
+    """Класс методов с тестами подписки соединения."""
+
+    async def test_published_scores_are_batched(self) -> None:
+        """Записанные счета приходят одной пачкой и снимают подписку."""
+        notifier = ScoreNotifier()
+        subscription = make_subscription(notifier)
+        subscription.subscribe([1, 2, 3])
+        notifier.publish(1, 1.5)
+        notifier.publish(2, -2.5)
+        notifier.publish(1, 9.9)
+        batches = subscription.batches(batch_size=10, window=0.05)
+
+        batch = await asyncio.wait_for(anext(batches), timeout=1)
+        assert_that(
+            actual_or_assertion=batch, matcher=equal_to([(1, 1.5), (2, -2.5)])
+        )
+        assert_that(actual_or_assertion=len(subscription), matcher=equal_to(1))
+
+    async def test_batch_size(self) -> None:
+        """Пачка не больше batch_size."""
+        subscription = make_subscription(ScoreNotifier())
+        for id_ in range(5):
+            subscription.put(id_, float(id_))
+        batches = subscription.batches(batch_size=2, window=1)
+
+        batch = await asyncio.wait_for(anext(batches), timeout=1)
+        assert_that(actual_or_assertion=len(batch), matcher=equal_to(2))
+        assert_that(
+            actual_or_assertion=subscription.queue.qsize(), matcher=equal_to(3)
+        )
+
+    async def test_overflow(self) -> None:
+        """Переполнение очереди отмечается, а не растит память."""
+        subscription = make_subscription(ScoreNotifier(), maxsize=2)
+        for id_ in range(3):
+            subscription.put(id_, float(id_))
+
+        assert_that(
+            actual_or_assertion=subscription.overflowed.is_set(),
+            matcher=equal_to(True),
+        )
+        assert_that(
+            actual_or_assertion=subscription.queue.qsize(), matcher=equal_to(2)
+        )
+
+    async def test_subscription_limit(self) -> None:
+        """Подписок не больше max_subscriptions."""
+        subscription = make_subscription(ScoreNotifier(), max_subscriptions=2)
+        subscription.subscribe([1, 2])
+
+        assert_that(
+            actual_or_assertion=calling(subscription.subscribe).with_args([3]),
+            matcher=raises(ScoreSubscriptionLimit),
+        )
+        subscription.subscribe([1])
+
+    async def test_close_unsubscribes(self) -> None:
+        """Закрытие соединения снимает подписки в уведомлениях."""
+        notifier = ScoreNotifier()
+        subscription = make_subscription(notifier)
+        subscription.subscribe([1, 2])
+        subscription.close()
+        notifier.publish(1, 1.5)
+        await asyncio.sleep(0)
+
+        assert_that(actual_or_assertion=len(notifier), matcher=equal_to(0))
+        assert_that(
+            actual_or_assertion=subscription.queue.empty(),
+            matcher=equal_to(True),
+        )
+
+
+@pytest.mark.usefixtures('setup_database')
+@pytest.mark.integtest
+class TestSubscribeScores:
+    """Класс методов с тестами подписки на ID и кадастровые номера."""
+
+    async def test_subscribe_scores(self, get_session: AsyncSession) -> None:
+        """Готовые счета ставятся в очередь, на остальные есть подписка.
+
+        Args:
+            get_session (AsyncSession): фикстура с AsyncSession.
+        """
+        done_id, pending_id = await Territory(session=get_session).create_many(
+            data=[
+                CalcRequestSchema(
+                    cadastral_number=f'44:44:444444:{number}',
+                    latitude=44.4444,
+                    longtitude=44.4444,
+                )
+                for number in ('01', '02')
+            ]
+        )
+        await Result(session=get_session).update(id_=done_id, score=4.5)
+        notifier = ScoreNotifier()
+        subscription = make_subscription(notifier)
+
+        status = await subscribe_scores(
+            sessionmaker=settings.get_sessionmaker(),
+            subscription=subscription,
+            ids=[done_id, pending_id + 1000],
+            cadastral_numbers=['44:44:444444:02', '44:44:444444:99'],
+        )
+        notifier.publish(pending_id, -1.0)
+        batch = await asyncio.wait_for(
+            anext(subscription.batches(batch_size=10, window=0.05)), timeout=1
+        )
+
+        assert_that(
+            actual_or_assertion=status,
+            matcher=equal_to(
+                {
+                    'pending': [pending_id],
+                    'missing': {
+                        'ids': [pending_id + 1000],
+                        'cadastral_numbers': ['44:44:444444:99'],
+                    },
+                }
+            ),
+        )
+        assert_that(
+            actual_or_assertion=batch,
+            matcher=equal_to([(done_id, 4.5), (pending_id, -1.0)]),
+        )
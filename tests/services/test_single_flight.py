@@ -0,0 +1,77 @@
+"""Тесты объединения одинаковых расчетов."""
+
+# STDLIB
+import asyncio
+
+# THIRDPARTY
+from hamcrest import assert_that, equal_to
+import pytest
+
+# FIRSTPARTY
+from app.services.single_flight import InFlightCalculations
+
+
+@pytest.mark.unittest
+class TestInFlightCalculations:
+    """Класс методов с тестами реестра выполняющихся расчетов."""
+
+    async def test_concurrent_requests_share_result(self) -> None:
+        """Одновременные запросы получают ID записи лидера."""
+        calculations = InFlightCalculations()
+        created = []
+        release = asyncio.Event()
+
+        async def create() -> int:
+            await release.wait()
+            created.append(1)
+            return 42
+
+        tasks = [
+            asyncio.create_task(calculations.run('key', create))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert_that(actual_or_assertion=created, matcher=equal_to([1]))
+        assert_that(
+            actual_or_assertion=sorted(results),
+            matcher=equal_to([(42, False)] * 4 + [(42, True)]),
+        )
+        assert_that(
+            actual_or_assertion=calculations.coalesced, matcher=equal_to(4)
+        )
+
+    async def test_release_after_calculation(self) -> None:
+        """После завершения расчета ключ снимается."""
+        calculations = InFlightCalculations()
+
+        async def create() -> int:
+            return 7
+
+        await calculations.run('key', create)
+        calculations.release('key', 8)
+        assert_that(actual_or_assertion=len(calculations), matcher=equal_to(1))
+        calculations.release('key', 7)
+        assert_that(actual_or_assertion=len(calculations), matcher=equal_to(0))
+
+    async def test_leader_error_propagates(self) -> None:
+        """Ошибка лидера снимает ключ и передается ожидающим."""
+        calculations = InFlightCalculations()
+        release = asyncio.Event()
+
+        async def create() -> int:
+            await release.wait()
+            raise RuntimeError('db is down')
+
+        leader = asyncio.create_task(calculations.run('key', create))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(calculations.run('key', create))
+        await asyncio.sleep(0)
+        release.set()
+
+        for task in (leader, follower):
+            with pytest.raises(RuntimeError):
+                await task
+        assert_that(actual_or_assertion=len(calculations), matcher=equal_to(0))
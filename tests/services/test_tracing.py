@@ -0,0 +1,184 @@
+"""Тесты трассировки OpenTelemetry."""
+
+# STDLIB
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# THIRDPARTY
+from faststream.kafka import TestKafkaBroker
+from hamcrest import assert_that, equal_to, has_length, none
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+import pytest
+
+# FIRSTPARTY
+from app import consumer
+from app.schemas.territory import CalcJobMessage, CalcRequestSchema
+from app.services.broker import broker, publish_calc_job
+from app.services.calc_queue import CalcJob, CalcQueue
+from app.services.tracing import traced, tracing
+
+DATA = CalcRequestSchema(
+    cadastral_number='55:55:555555:55', latitude=55.5555, longtitude=55.5555
+)
+
+
+@asynccontextmanager
+async def fake_sessionmaker() -> AsyncIterator[object]:
+    """Фабрика сессий без БД."""
+    yield object()
+
+
+class Dal:
+    """DAL с трассируемыми методами."""
+
+    @traced
+    async def get(self) -> int:
+        """Трассируемая корутина."""
+        return 1
+
+    @traced
+    async def get_many(self) -> AsyncIterator[int]:
+        """Трассируемый асинхронный генератор."""
+        for item in (1, 2):
+            yield item
+
+
+@pytest.mark.unittest
+class TestTracing:
+    """Класс методов с тестами трассировки."""
+
+    async def test_disabled(self) -> None:
+        """Без настройки спаны не создаются, контекст не передается."""
+        with tracing.span('test') as span:
+            assert_that(actual_or_assertion=span, matcher=none())
+            assert_that(
+                actual_or_assertion=await Dal().get(), matcher=equal_to(1)
+            )
+            assert_that(
+                actual_or_assertion=tracing.inject(), matcher=equal_to({})
+            )
+
+    async def test_traced(self, span_exporter: InMemorySpanExporter) -> None:
+        """Спаны DAL методов - дочерние спаны вызывающего.
+
+        Args:
+            span_exporter (InMemorySpanExporter): фикстура с экспортером
+                спанов в память.
+        """
+        dal = Dal()
+        with tracing.span('request'):
+            await dal.get()
+            items = [item async for item in dal.get_many()]
+
+        spans = {
+            span.name: span for span in span_exporter.get_finished_spans()
+        }
+        assert_that(actual_or_assertion=items, matcher=equal_to([1, 2]))
+        for name in ('Dal.get', 'Dal.get_many'):
+            assert_that(
+                actual_or_assertion=spans[name].parent.span_id,
+                matcher=equal_to(spans['request'].context.span_id),
+            )
+
+    async def test_sample_ratio(
+        self, span_exporter: InMemorySpanExporter
+    ) -> None:
+        """Несэмплированные трассы не записываются и не передаются дальше.
+
+        Args:
+            span_exporter (InMemorySpanExporter): фикстура с экспортером
+                спанов в память.
+        """
+        tracing.shutdown()
+        tracing.setup(
+            service_name='tests', exporter=span_exporter, sample_ratio=0
+        )
+        with tracing.span('request'):
+            await Dal().get()
+            carrier = tracing.inject()
+        with tracing.span('job', carrier=carrier):
+            pass
+
+        assert_that(
+            actual_or_assertion=span_exporter.get_finished_spans(),
+            matcher=has_length(0),
+        )
+
+    async def test_calc_queue_context(
+        self, span_exporter: InMemorySpanExporter
+    ) -> None:
+        """Спан задачи очереди продолжает трассу, в которой она поставлена.
+
+        Args:
+            span_exporter (InMemorySpanExporter): фикстура с экспортером
+                спанов в память.
+        """
+
+        async def handler(job: CalcJob, session: object) -> None:
+            pass
+
+        queue = CalcQueue(
+            handler=handler,
+            sessionmaker=fake_sessionmaker,
+            workers=1,
+            maxsize=10,
+        )
+        with tracing.span('request') as request:
+            queue.submit(
+                CalcJob(data=DATA, result_id=1, trace_context=tracing.inject())
+            )
+        await queue.join()
+        await queue.stop()
+
+        job = next(
+            span
+            for span in span_exporter.get_finished_spans()
+            if span.name == 'CalcQueue.job'
+        )
+        assert_that(
+            actual_or_assertion=job.parent.span_id,
+            matcher=equal_to(request.get_span_context().span_id),
+        )
+        assert_that(
+            actual_or_assertion=job.context.trace_id,
+            matcher=equal_to(request.get_span_context().trace_id),
+        )
+
+    async def test_broker_context(
+        self,
+        span_exporter: InMemorySpanExporter,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Консьюмер продолжает трассу публикации из заголовков сообщения.
+
+        Args:
+            span_exporter (InMemorySpanExporter): фикстура с экспортером
+                спанов в память.
+            monkeypatch: фикстура для подмены расчета и сессии.
+        """
+
+        async def calculation(
+            data: CalcRequestSchema, result_id: int, session: object
+        ) -> None:
+            pass
+
+        monkeypatch.setattr(consumer, 'remote_calculation', calculation)
+        monkeypatch.setattr(consumer, 'prod_sessionmaker', fake_sessionmaker)
+
+        async with TestKafkaBroker(broker):
+            with tracing.span('request') as request:
+                await publish_calc_job(
+                    CalcJobMessage(**DATA.model_dump(), result_id=1)
+                )
+
+        handled = next(
+            span
+            for span in span_exporter.get_finished_spans()
+            if span.name == 'handle_calc_job'
+        )
+        assert_that(
+            actual_or_assertion=handled.parent.span_id,
+            matcher=equal_to(request.get_span_context().span_id),
+        )